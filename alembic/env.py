@@ -11,7 +11,7 @@ sys.path.insert(0, str(project_root))
 
 from app.core.config import settings
 from app.core.database import Base
-from app.models import User, UserPackage, PackageRecord, Device  # 导入所有模型
+from app.models import User, UserPackage, PackageRecord, PackageSeriesChunk, PackageSeriesRollup, Device  # 导入所有模型
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
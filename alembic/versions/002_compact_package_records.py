@@ -0,0 +1,33 @@
+"""compact_package_records
+
+紧凑存储编码（温湿度 SMALLINT 百分位定点数、时间戳 INT UNSIGNED）的转换不放在迁移中：
+迁移只会执行一次，而编码由 COMPACT_RECORD_STORAGE 决定，若按配置条件执行，之后再开启配置时
+迁移已被记录为完成，模型会把 DOUBLE 值按百分位整数读取。
+
+转换改为显式执行（与配置无关）：
+    python scripts/convert_record_storage.py --to compact
+应用启动时检查列类型与配置一致（app/core/record_storage.py），不一致时拒绝启动。
+
+本迁移升级为空操作；降级时转回 DOUBLE/BIGINT，使 001 的表结构保持不变。
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+from app.core.record_storage import convert_record_storage
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    convert_record_storage(op.get_bind(), to_compact=False)
@@ -0,0 +1,45 @@
+"""add_package_series_chunks
+
+新增 package_series_chunks 表，存储已封存包裹的差分编码压缩序列
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'package_series_chunks',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True, comment='块ID'),
+        sa.Column('package_id', sa.Integer(), nullable=False, comment='包裹ID'),
+        sa.Column('seq', sa.Integer(), nullable=False, comment='块序号（按时间升序）'),
+        sa.Column('record_count', sa.Integer(), nullable=False, comment='块内记录数'),
+        sa.Column('start_timestamp', sa.BigInteger(), nullable=False, comment='块内最早时间戳'),
+        sa.Column('end_timestamp', sa.BigInteger(), nullable=False, comment='块内最晚时间戳'),
+        sa.Column('encoding', sa.SmallInteger(), nullable=False, comment='编码版本'),
+        sa.Column(
+            'data',
+            sa.LargeBinary().with_variant(mysql.MEDIUMBLOB(), 'mysql'),
+            nullable=False,
+            comment='差分编码 + zlib 压缩的序列数据'
+        ),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False, comment='封存时间'),
+        comment='已封存包裹时间序列块表'
+    )
+    op.create_index('uk_package_seq', 'package_series_chunks', ['package_id', 'seq'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uk_package_seq', table_name='package_series_chunks')
+    op.drop_table('package_series_chunks')
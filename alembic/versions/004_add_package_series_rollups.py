@@ -0,0 +1,44 @@
+"""add_package_series_rollups
+
+新增 package_series_rollups 表，存储包裹时间序列的多分辨率预聚合（1分钟/15分钟/1小时/1天）
+
+升级后执行 python scripts/rebuild_rollups.py --all 为已有数据生成预聚合
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'package_series_rollups',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True, comment='聚合ID'),
+        sa.Column('package_id', sa.Integer(), nullable=False, comment='包裹ID'),
+        sa.Column('level', sa.Integer(), nullable=False, comment='层级（桶时长，秒）'),
+        sa.Column('bucket_start', sa.BigInteger(), nullable=False, comment='桶起始时间戳'),
+        sa.Column('record_count', sa.Integer(), nullable=False, comment='桶内记录数'),
+        sa.Column('min_temperature', sa.Float(), nullable=False, comment='桶内最高温度的最小值(°C)'),
+        sa.Column('max_temperature', sa.Float(), nullable=False, comment='桶内最高温度的最大值(°C)'),
+        sa.Column('sum_temperature', sa.Float(), nullable=False, comment='桶内最高温度之和（用于计算平均值）'),
+        sa.Column('sum_humidity', sa.Float(), nullable=False, comment='桶内平均湿度之和（用于计算平均值）'),
+        comment='包裹时间序列预聚合表'
+    )
+    op.create_index(
+        'uk_package_level_bucket', 'package_series_rollups',
+        ['package_id', 'level', 'bucket_start'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uk_package_level_bucket', table_name='package_series_rollups')
+    op.drop_table('package_series_rollups')
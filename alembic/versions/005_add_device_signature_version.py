@@ -0,0 +1,32 @@
+"""add_device_signature_version
+
+devices 表新增 signature_version 字段（1: 字段拼接字符串签名; 2: 请求体原始字节签名）
+已有设备保持 v1
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'devices',
+        sa.Column(
+            'signature_version', sa.SmallInteger(), server_default='1', nullable=False,
+            comment='签名版本（1: 字段拼接字符串; 2: 请求体原始字节）'
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('devices', 'signature_version')
@@ -0,0 +1,32 @@
+"""add_record_source_device
+
+package_records 新增 source_device_id 字段（上传设备 devices.id），作为幂等键的一部分
+已有记录为 0（未知/历史数据）
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'package_records',
+        sa.Column(
+            'source_device_id', sa.Integer(), server_default='0', nullable=False,
+            comment='上传设备（devices.id，0 表示未知/历史数据）'
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('package_records', 'source_device_id')
@@ -0,0 +1,44 @@
+"""add_record_idempotency_index
+
+package_records 新增唯一索引 uk_package_timestamp_device (package_id, timestamp, source_device_id)，
+设备重发的相同读数不再产生重复记录
+
+已有重复读数时无法创建唯一索引，升级前先执行：
+    python scripts/dedupe_records.py
+（删除重复记录并重建受影响包裹的预聚合），然后重新执行 alembic upgrade head
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 17:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT COUNT(*) FROM ("
+        "SELECT package_id FROM package_records "
+        "GROUP BY package_id, timestamp, source_device_id HAVING COUNT(*) > 1"
+        ") AS duplicate_keys"
+    )).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"package_records has {duplicates} duplicated (package_id, timestamp, source_device_id) keys, "
+            f"run 'python scripts/dedupe_records.py' before upgrading"
+        )
+    op.create_index(
+        'uk_package_timestamp_device', 'package_records',
+        ['package_id', 'timestamp', 'source_device_id'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uk_package_timestamp_device', table_name='package_records')
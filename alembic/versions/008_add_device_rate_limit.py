@@ -0,0 +1,36 @@
+"""add_device_rate_limit
+
+devices 表新增 rate_limit_per_minute / rate_limit_burst 字段（设备上传限流覆盖，为空使用全局配置）
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'devices',
+        sa.Column(
+            'rate_limit_per_minute', sa.Integer(), nullable=True,
+            comment='上传限流：每分钟请求数（为空使用全局配置，0 表示不限流）'
+        )
+    )
+    op.add_column(
+        'devices',
+        sa.Column('rate_limit_burst', sa.Integer(), nullable=True, comment='上传限流：突发请求数（为空使用全局配置）')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('devices', 'rate_limit_burst')
+    op.drop_column('devices', 'rate_limit_per_minute')
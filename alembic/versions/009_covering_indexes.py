@@ -0,0 +1,87 @@
+"""covering_indexes
+
+按实际查询形状调整索引：删除冗余索引（每次写入都要维护），新增覆盖索引
+
+package_records:
+    删除 idx_package_timestamp、ix_package_records_package_id（均为 uk_package_timestamp_device 的前缀）
+    和 ix_package_records_id（与主键重复）
+    新增 idx_package_history (package_id, timestamp DESC, id DESC, 查询列...)，历史分页/热数据窗口只扫描索引
+    （MySQL 不支持 INCLUDE，查询列直接追加在键尾）
+user_packages:
+    删除 idx_user_id / ix_user_packages_user_id（uk_user_package 的前缀）、
+    idx_package_id / ix_user_packages_package_id（没有只按包裹查询的语句）和 ix_user_packages_id
+    新增 idx_user_active_package (user_id, is_active, package_id)，所有权校验和用户包裹列表只扫描索引
+users:
+    删除 idx_username（与用户名唯一索引重复）和 ix_users_id
+
+表结构来源不同（init_db / scripts/create_user_tables.py）时索引名不同，删除前先检查是否存在
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+# 升级时删除的索引及其定义（表 -> 索引名 -> 列），降级时按此重建
+REDUNDANT_INDEXES = {
+    'package_records': {
+        'idx_package_timestamp': ['package_id', 'timestamp'],
+        'ix_package_records_package_id': ['package_id'],
+        'ix_package_records_id': ['id'],
+    },
+    'user_packages': {
+        'idx_user_id': ['user_id'],
+        'ix_user_packages_user_id': ['user_id'],
+        'idx_package_id': ['package_id'],
+        'ix_user_packages_package_id': ['package_id'],
+        'ix_user_packages_id': ['id'],
+    },
+    'users': {
+        'idx_username': ['username'],
+        'ix_users_id': ['id'],
+    },
+}
+
+
+def _existing_indexes(table: str) -> set:
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    # 先建新索引再删旧索引，升级过程中查询始终有可用索引
+    op.create_index(
+        'idx_package_history', 'package_records',
+        [
+            'package_id', sa.text('timestamp DESC'), sa.text('id DESC'),
+            'max_temperature', 'avg_humidity', 'over_threshold_time', 'source_device_id', 'created_at'
+        ]
+    )
+    op.create_index('idx_user_active_package', 'user_packages', ['user_id', 'is_active', 'package_id'])
+
+    for table, indexes in REDUNDANT_INDEXES.items():
+        existing = _existing_indexes(table)
+        for name in indexes:
+            if name in existing:
+                op.drop_index(name, table_name=table)
+
+
+def downgrade() -> None:
+    # 重建升级时删除的全部索引（init_db 建表时两套索引名都存在；
+    # scripts/create_user_tables.py 建的表原本只有 idx_*，降级后多出的 ix_* 与之重复但无害）
+    for table, indexes in REDUNDANT_INDEXES.items():
+        existing = _existing_indexes(table)
+        for name, columns in indexes.items():
+            if name not in existing:
+                op.create_index(name, table, columns)
+
+    op.drop_index('idx_user_active_package', table_name='user_packages')
+    op.drop_index('idx_package_history', table_name='package_records')
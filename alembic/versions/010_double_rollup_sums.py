@@ -0,0 +1,41 @@
+"""double_rollup_sums
+
+package_series_rollups 的 sum_temperature / sum_humidity 改为 DOUBLE：
+MySQL 的 FLOAT 为单精度（约 7 位有效数字），日级桶累加上万条读数后平均值会出现明显误差
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+SUM_COLUMNS = {
+    'sum_temperature': '桶内最高温度之和（用于计算平均值）',
+    'sum_humidity': '桶内平均湿度之和（用于计算平均值）',
+}
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('package_series_rollups') as batch:
+        for name, comment in SUM_COLUMNS.items():
+            batch.alter_column(
+                name, existing_type=sa.Float(), type_=sa.Double(),
+                existing_nullable=False, existing_comment=comment
+            )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('package_series_rollups') as batch:
+        for name, comment in SUM_COLUMNS.items():
+            batch.alter_column(
+                name, existing_type=sa.Double(), type_=sa.Float(),
+                existing_nullable=False, existing_comment=comment
+            )
@@ -1,16 +1,31 @@
+import math
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from datetime import datetime
 from loguru import logger
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import DATABASE_UNAVAILABLE_ERRORS, get_db
+from app.core.device_cache import device_cache
+from app.core.rate_limit import device_rate_limiter
+from app.core.read_replica import track_writes_for
+from app.core.replay_cache import replay_cache
 from app.repositories.package_repository import PackageRepository
 from app.repositories.device_repository import DeviceRepository
 from app.services.package_service import PackageService
 from app.services.user import UserService, PackageService as UserPackageService
 from app.utils.auth import verify_token
-from app.utils.security import build_signature_data, verify_hmac_signature
+from app.utils.binary_frame import FRAME_MEDIA_TYPE
+from app.utils.security import (
+    SIGNATURE_V2,
+    build_signature_data,
+    verify_body_signature,
+    verify_hmac_signature
+)
 from app.schemas.user import TokenData
 from app.schemas.package import PackageUploadRequest
 from app.models.device import Device
@@ -50,19 +65,24 @@ security = HTTPBearer()
 
 
 def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
 ) -> TokenData:
     """
     获取当前用户信息
     
+    同时为本次请求的数据库会话标记用户：用户刚提交过写入（如绑定包裹）时本次请求读主库（读己之写）
+    
     Args:
         credentials: JWT凭证
+        db: 数据库会话（与本次请求的其他依赖共用）
         
     Returns:
         TokenData: 用户令牌数据
     """
-    token_data = verify_token(credentials.credentials)
-    return TokenData(**token_data)
+    token_data = TokenData(**verify_token(credentials.credentials))
+    track_writes_for(db, f"user:{token_data.user_id}")
+    return token_data
 
 
 def get_user_service(db: Session = Depends(get_db)) -> UserService:
@@ -104,39 +124,26 @@ def get_device_repository(db: Session = Depends(get_db)) -> DeviceRepository:
     return DeviceRepository(db)
 
 
-async def verify_device_authentication(
-    request: Request,
-    payload: PackageUploadRequest,
-    x_device_id: Optional[str] = Header(None, alias="X-Device-ID"),
-    x_signature: Optional[str] = Header(None, alias="X-Signature"),
-    x_timestamp: Optional[int] = Header(None, alias="X-Timestamp"),
-    device_repo: DeviceRepository = Depends(get_device_repository)
+def _check_device(
+    device: Optional[Device],
+    x_device_id: Optional[str],
+    x_signature: Optional[str],
+    x_timestamp: Optional[int]
 ) -> Device:
     """
-    验证设备身份和签名
-    
-    验证流程：
-    1. 检查请求头是否包含必要字段
-    2. 通过 device_id 查找设备
-    3. 检查设备是否激活
-    4. 构建签名字符串
-    5. 验证 HMAC 签名
-    6. 验证时间戳（防重放）
-    7. 更新设备最后活跃时间
+    检查认证请求头和设备状态
     
     Args:
-        request: FastAPI 请求对象
-        payload: 请求体数据
+        device: 按 X-Device-ID 查到的设备（可为 None）
         x_device_id: 设备ID（请求头）
         x_signature: HMAC签名（请求头）
         x_timestamp: 时间戳（请求头）
-        device_repo: 设备仓库
         
     Returns:
-        验证通过的设备对象
+        设备对象
         
     Raises:
-        HTTPException: 验证失败时抛出
+        HTTPException: 请求头缺失、设备不存在或未激活时抛出
     """
     # 1. 检查请求头
     if not x_device_id:
@@ -157,8 +164,7 @@ async def verify_device_authentication(
             detail="Missing X-Timestamp header"
         )
     
-    # 2. 查找设备
-    device = device_repo.get_by_device_id(x_device_id)
+    # 2. 检查设备是否存在
     if not device:
         logger.warning(f"Unknown device attempted access: {x_device_id}")
         raise HTTPException(
@@ -174,29 +180,170 @@ async def verify_device_authentication(
             detail="Device is not active"
         )
     
-    # 4. 构建签名字符串
-    sign_data = build_signature_data(
-        package_id=payload.package_id,
-        max_temperature=payload.max_temperature,
-        avg_humidity=payload.avg_humidity,
-        over_threshold_time=payload.over_threshold_time,
-        timestamp=payload.timestamp
-    )
+    return device
+
+
+def _lookup_device(device_repo: DeviceRepository, x_device_id: Optional[str]) -> Optional[Device]:
+    """
+    查找设备，数据库不可用时回退到最近一次查询到的设备快照
+    
+    Args:
+        device_repo: 设备仓库
+        x_device_id: 设备ID（请求头）
+        
+    Returns:
+        设备对象（或设备快照），不存在时返回 None
+    """
+    if not x_device_id:
+        return None
+    try:
+        return device_repo.get_by_device_id(x_device_id)
+    except DATABASE_UNAVAILABLE_ERRORS:
+        snapshot = device_cache.get(x_device_id)
+        if snapshot is None:
+            raise
+        _rollback_quietly(device_repo.db)
+        device_cache.record_fallback()
+        logger.warning(f"Database unavailable, authenticating {x_device_id} from device cache")
+        return snapshot
+
+
+def _touch_device(device_repo: DeviceRepository, x_device_id: str) -> None:
+    """
+    更新设备最后活跃时间（数据库不可用时跳过，不影响上传）
+    
+    Args:
+        device_repo: 设备仓库
+        x_device_id: 设备ID
+    """
+    try:
+        device_repo.update_last_seen(x_device_id)
+    except DATABASE_UNAVAILABLE_ERRORS as e:
+        _rollback_quietly(device_repo.db)
+        logger.warning(f"Failed to update last_seen of {x_device_id}: {str(e)}")
+
+
+def _rollback_quietly(db: Session) -> None:
+    """回滚会话（连接已断开时忽略回滚本身的异常）"""
+    try:
+        db.rollback()
+    except Exception:
+        pass
+
+
+def _get_active_device(
+    device_repo: DeviceRepository,
+    x_device_id: Optional[str],
+    x_signature: Optional[str],
+    x_timestamp: Optional[int]
+) -> Device:
+    """
+    检查认证请求头并获取已激活的设备
+    
+    Args:
+        device_repo: 设备仓库
+        x_device_id: 设备ID（请求头）
+        x_signature: HMAC签名（请求头）
+        x_timestamp: 时间戳（请求头）
+        
+    Returns:
+        设备对象
+    """
+    device = _lookup_device(device_repo, x_device_id)
+    return _check_device(device, x_device_id, x_signature, x_timestamp)
+
+
+def _parse_upload_payload(body: bytes) -> PackageUploadRequest:
+    """
+    解析并校验上传请求体（每个请求只解析一次）
     
-    # 5. 验证签名
-    if not verify_hmac_signature(sign_data, x_signature, device.secret_key):
-        logger.warning(f"Invalid signature from device: {x_device_id}")
+    Args:
+        body: 请求体原始字节
+        
+    Returns:
+        上传数据
+        
+    Raises:
+        RequestValidationError: 校验失败时抛出（返回 422，与声明式请求体一致）
+    """
+    try:
+        return PackageUploadRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False), body=body)
+
+
+def _reject_replay(x_device_id: Optional[str], x_signature: Optional[str]) -> None:
+    """
+    拒绝时间窗口内已接受过的请求（只查进程内缓存或 Redis，不访问数据库）
+    
+    Args:
+        x_device_id: 设备ID（请求头）
+        x_signature: HMAC签名（请求头）
+        
+    Raises:
+        HTTPException: 重放请求时抛出 409
+    """
+    if x_device_id and x_signature and replay_cache.seen(x_device_id, x_signature):
+        logger.warning(f"Replayed request rejected from device: {x_device_id}")
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid signature"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Replayed request"
         )
+
+
+def remember_request(request: Request) -> None:
+    """
+    写入成功（或已落盘 spool）后记录请求签名，之后时间窗口内的重放返回 409
+    
+    认证阶段只检查不记录：写入失败时设备用同一签名重试仍能通过。
+    并发到达的相同请求可能都通过认证，由幂等写入保证只入库一次（后到的返回 duplicate）
     
-    # 6. 验证时间戳（防重放攻击）
+    Args:
+        request: FastAPI 请求对象（认证时保存了设备ID和签名）
+    """
+    key = getattr(request.state, "replay_key", None)
+    if key is not None:
+        replay_cache.add(*key)
+
+
+def _enforce_rate_limit(device: Device) -> None:
+    """
+    设备上传限流（令牌桶，设备上的配置优先于全局配置）
+    
+    Args:
+        device: 设备对象
+        
+    Raises:
+        HTTPException: 超出限额时抛出 429
+    """
+    if not settings.DEVICE_RATE_LIMIT_ENABLED:
+        return
+    retry_after = device_rate_limiter.acquire(
+        device.id, device.device_id, device.rate_limit_per_minute, device.rate_limit_burst
+    )
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Device rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+
+def _verify_request_timestamp(x_device_id: str, x_timestamp: int) -> None:
+    """
+    验证请求时间戳（防重放攻击，默认允许 5 分钟的时间误差）
+    
+    Args:
+        x_device_id: 设备ID
+        x_timestamp: 时间戳（请求头）
+        
+    Raises:
+        HTTPException: 时间戳超出范围时抛出
+    """
     current_timestamp = int(datetime.now().timestamp())
     time_diff = abs(current_timestamp - x_timestamp)
     
-    # 允许 5 分钟的时间误差
-    if time_diff > 300:  # 5分钟 = 300秒
+    if time_diff > settings.DEVICE_TIMESTAMP_TOLERANCE_SECONDS:
         logger.warning(
             f"Timestamp out of range from device {x_device_id}: "
             f"diff={time_diff}s"
@@ -205,9 +352,163 @@ async def verify_device_authentication(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Timestamp out of range (diff: {time_diff}s)"
         )
+
+
+async def verify_device_authentication(
+    request: Request,
+    x_device_id: Optional[str] = Header(None, alias="X-Device-ID"),
+    x_signature: Optional[str] = Header(None, alias="X-Signature"),
+    x_timestamp: Optional[int] = Header(None, alias="X-Timestamp"),
+    device_repo: DeviceRepository = Depends(get_device_repository)
+) -> Device:
+    """
+    验证设备身份和签名
+    
+    验证流程：
+    1. 检查请求头是否包含必要字段
+    2. 通过 device_id 查找设备
+    3. 检查设备是否激活
+    4. 验证 HMAC 签名，通过后按设备令牌桶限流（429）
+       - v2 设备：在解析 JSON 之前对请求体原始字节验证，伪造请求不消耗 Pydantic 校验
+       - v1 设备：解析请求体后按 build_signature_data 拼接字段字符串验证
+    5. 验证时间戳，并拒绝时间窗口内已成功写入过的签名（防重放，写入成功后由端点调用 remember_request 记录）
+    6. 更新设备最后活跃时间
+    
+    重放请求在读取请求体和访问数据库之前即被拒绝（409）；请求体只解析一次，解析结果保存在 request.state 中，由 get_upload_payload 提供给端点
+    
+    Args:
+        request: FastAPI 请求对象
+        x_device_id: 设备ID（请求头）
+        x_signature: HMAC签名（请求头）
+        x_timestamp: 时间戳（请求头）
+        device_repo: 设备仓库
+        
+    Returns:
+        验证通过的设备对象
+        
+    Raises:
+        HTTPException: 验证失败时抛出
+    """
+    _reject_replay(x_device_id, x_signature)
+    
+    body = await request.body()
+    # 数据库访问放入线程池，数据库变慢时不阻塞事件循环（健康检查和准入控制仍可响应）
+    device = await run_in_threadpool(_lookup_device, device_repo, x_device_id)
+    
+    if device is not None and device.signature_version == SIGNATURE_V2:
+        # 1-3. 检查请求头和设备状态
+        device = _check_device(device, x_device_id, x_signature, x_timestamp)
+        
+        # 4. 对原始字节验证签名，通过后再解析
+        if not verify_body_signature(body, x_signature, device.secret_key):
+            logger.warning(f"Invalid signature from device: {x_device_id}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid signature"
+            )
+        payload = _parse_upload_payload(body)
+    else:
+        # v1：与原有行为一致，请求体校验失败优先返回 422
+        payload = _parse_upload_payload(body)
+        
+        # 1-3. 检查请求头和设备状态
+        device = _check_device(device, x_device_id, x_signature, x_timestamp)
+        
+        # 4. 构建签名字符串并验证签名
+        sign_data = build_signature_data(
+            package_id=payload.package_id,
+            max_temperature=payload.max_temperature,
+            avg_humidity=payload.avg_humidity,
+            over_threshold_time=payload.over_threshold_time,
+            timestamp=payload.timestamp
+        )
+        if not verify_hmac_signature(sign_data, x_signature, device.secret_key):
+            logger.warning(f"Invalid signature from device: {x_device_id}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid signature"
+            )
+    
+    # 签名通过后才消耗令牌：未签名或伪造的请求不能耗尽设备的限额
+    _enforce_rate_limit(device)
+    
+    # 5. 验证时间戳（签名在写入成功后由端点记录，见 remember_request）
+    _verify_request_timestamp(x_device_id, x_timestamp)
+    request.state.replay_key = (x_device_id, x_signature)
     
-    # 7. 更新最后活跃时间
-    device_repo.update_last_seen(x_device_id)
+    # 6. 更新最后活跃时间
+    await run_in_threadpool(_touch_device, device_repo, x_device_id)
     
+    request.state.upload_payload = payload
     logger.info(f"Device authenticated: {x_device_id}")
     return device
+
+
+async def get_upload_payload(
+    request: Request,
+    device: Device = Depends(verify_device_authentication)
+) -> PackageUploadRequest:
+    """
+    获取设备认证时解析的上传数据（避免端点再次解析请求体）
+    
+    Args:
+        request: FastAPI 请求对象
+        device: 验证通过的设备
+        
+    Returns:
+        上传数据
+    """
+    return request.state.upload_payload
+
+
+async def verify_device_frame_authentication(
+    request: Request,
+    x_device_id: Optional[str] = Header(None, alias="X-Device-ID"),
+    x_signature: Optional[str] = Header(None, alias="X-Signature"),
+    x_timestamp: Optional[int] = Header(None, alias="X-Timestamp"),
+    device_repo: DeviceRepository = Depends(get_device_repository)
+) -> Device:
+    """
+    验证二进制帧上传的设备身份和签名
+    
+    签名为对请求体原始字节计算的 HMAC-SHA256，在解码帧之前完成验证
+    
+    Args:
+        request: FastAPI 请求对象
+        x_device_id: 设备ID（请求头）
+        x_signature: HMAC签名（请求头）
+        x_timestamp: 时间戳（请求头）
+        device_repo: 设备仓库
+        
+    Returns:
+        验证通过的设备对象
+        
+    Raises:
+        HTTPException: 验证失败时抛出
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type != FRAME_MEDIA_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type must be {FRAME_MEDIA_TYPE}"
+        )
+    
+    _reject_replay(x_device_id, x_signature)
+    device = await run_in_threadpool(_get_active_device, device_repo, x_device_id, x_signature, x_timestamp)
+    
+    # 对原始字节验证签名（请求体会被 Starlette 缓存，端点中再次读取不会重复接收）
+    body = await request.body()
+    if not verify_body_signature(body, x_signature, device.secret_key):
+        logger.warning(f"Invalid frame signature from device: {x_device_id}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid signature"
+        )
+    
+    _enforce_rate_limit(device)
+    _verify_request_timestamp(x_device_id, x_timestamp)
+    request.state.replay_key = (x_device_id, x_signature)
+    await run_in_threadpool(_touch_device, device_repo, x_device_id)
+    
+    logger.info(f"Device authenticated (frame): {x_device_id}")
+    return device
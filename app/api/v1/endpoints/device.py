@@ -3,10 +3,11 @@
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from loguru import logger
 
 from app.core.database import get_db
+from app.core.rate_limit import device_rate_limiter
 from app.api.deps import get_current_user, get_device_repository
 from app.repositories.device_repository import DeviceRepository
 from app.utils.security import generate_secret_key
@@ -47,7 +48,8 @@ async def create_device(
         device_id=device_data.device_id,
         device_name=device_data.device_name,
         secret_key=secret_key,
-        description=device_data.description
+        description=device_data.description,
+        signature_version=device_data.signature_version
     )
     
     logger.info(f"Device created by user {current_user.username}: {device.device_id}")
@@ -57,6 +59,9 @@ async def create_device(
         device_id=device.device_id,
         device_name=device.device_name,
         is_active=device.is_active,
+        signature_version=device.signature_version,
+        rate_limit_per_minute=device.rate_limit_per_minute,
+        rate_limit_burst=device.rate_limit_burst,
         created_at=device.created_at,
         last_seen=device.last_seen,
         secret_key=secret_key  # 只在创建时返回一次
@@ -84,6 +89,9 @@ async def list_devices(
                 device_id=d.device_id,
                 device_name=d.device_name,
                 is_active=d.is_active,
+                signature_version=d.signature_version,
+                rate_limit_per_minute=d.rate_limit_per_minute,
+                rate_limit_burst=d.rate_limit_burst,
                 created_at=d.created_at,
                 last_seen=d.last_seen,
                 secret_key=None  # 列表不返回密钥
@@ -93,6 +101,19 @@ async def list_devices(
     )
 
 
+@router.get("/devices/rate-limits", tags=["Device"])
+async def get_device_rate_limits(
+    top: int = Query(default=20, ge=1, le=1000, description="返回拒绝次数最多的设备数量"),
+    current_user: TokenData = Depends(get_current_user)  # 需要登录
+):
+    """
+    获取设备上传限流统计（需要登录）
+    
+    返回当前跟踪的设备数和被限流次数最多的设备
+    """
+    return device_rate_limiter.stats(top)
+
+
 @router.get("/devices/{device_id}", response_model=DeviceResponse, tags=["Device"])
 async def get_device(
     device_id: str,
@@ -114,6 +135,9 @@ async def get_device(
         device_id=device.device_id,
         device_name=device.device_name,
         is_active=device.is_active,
+        signature_version=device.signature_version,
+        rate_limit_per_minute=device.rate_limit_per_minute,
+        rate_limit_burst=device.rate_limit_burst,
         created_at=device.created_at,
         last_seen=device.last_seen,
         secret_key=None  # 详情不返回密钥
@@ -155,3 +179,50 @@ async def deactivate_device(
         detail="Device not found"
     )
 
+
+@router.post("/devices/{device_id}/signature-version", tags=["Device"])
+async def set_device_signature_version(
+    device_id: str,
+    version: int = Query(..., ge=1, le=2, description="签名版本（1: 字段拼接字符串; 2: 请求体原始字节）"),
+    current_user: TokenData = Depends(get_current_user),  # 需要登录
+    device_repo: DeviceRepository = Depends(get_device_repository)
+):
+    """
+    切换设备签名版本（需要登录）
+    
+    设备固件升级到 v2 签名后切换，切换后该设备的 v1 签名请求将被拒绝
+    """
+    if device_repo.set_signature_version(device_id, version):
+        logger.info(
+            f"Device {device_id} signature version set to v{version} by user {current_user.username}"
+        )
+        return {"status": "success", "message": f"Device {device_id} uses signature v{version}"}
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Device not found"
+    )
+
+
+@router.post("/devices/{device_id}/rate-limit", tags=["Device"])
+async def set_device_rate_limit(
+    device_id: str,
+    per_minute: Optional[int] = Query(None, ge=0, description="每分钟请求数（0 表示不限流，不传使用全局配置）"),
+    burst: Optional[int] = Query(None, ge=1, description="突发请求数（不传使用全局配置）"),
+    current_user: TokenData = Depends(get_current_user),  # 需要登录
+    device_repo: DeviceRepository = Depends(get_device_repository)
+):
+    """
+    设置设备上传限流（需要登录）
+    
+    用于为批量上传的网关设备放宽限额，或临时压制异常设备
+    """
+    if device_repo.set_rate_limit(device_id, per_minute, burst):
+        logger.info(
+            f"Device {device_id} rate limit set to {per_minute}/min burst {burst} "
+            f"by user {current_user.username}"
+        )
+        return {"status": "success", "message": f"Device {device_id} rate limit updated"}
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Device not found"
+    )
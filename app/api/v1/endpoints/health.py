@@ -1,6 +1,11 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.admission import admission_gates
+from app.core.database import engine, get_db, pool_metrics, replica_engine, replica_router
+from app.core.device_cache import device_cache
+from app.core.spool import ingest_spool
+from app.core.sqlite import sqlite_status
+from app.services.ingest_listener import ingest_listener
 from app.core.config import settings
 from app.schemas.common import HealthResponse
 
@@ -31,3 +36,71 @@ async def health_check(db: Session = Depends(get_db)):
         app_name=settings.APP_NAME,
         version=settings.API_VERSION
     )
+
+
+@router.get("/health/admission", tags=["Health"])
+async def admission_metrics():
+    """
+    准入控制指标
+    
+    返回设备上传与用户接口两个闸门的当前占用、排队和拒绝次数
+    """
+    return {name: gate.stats() for name, gate in admission_gates.items()}
+
+
+@router.get("/health/spool", tags=["Health"])
+async def spool_metrics():
+    """
+    本地 spool 指标
+    
+    返回待回放的读数深度、累计写入/回放/损坏记录数，以及数据库不可用时设备缓存认证的次数
+    """
+    return {
+        "enabled": settings.SPOOL_ENABLED,
+        "spool": ingest_spool.stats(),
+        "device_cache": device_cache.stats(),
+    }
+
+
+@router.get("/health/ingest-listener", tags=["Health"])
+async def ingest_listener_metrics():
+    """
+    UDP/TCP 上传监听指标
+    
+    返回监听状态、按确认状态统计的报文数和写入的读数数量
+    """
+    return {"enabled": settings.INGEST_LISTENER_ENABLED, **ingest_listener.stats()}
+
+
+@router.get("/health/replica", tags=["Health"])
+async def replica_metrics():
+    """
+    只读副本状态
+    
+    返回是否配置副本、最近一次检查的可用性和复制延迟，以及走副本/回退主库的查询次数
+    """
+    return {"configured": replica_engine is not None, **replica_router.stats()}
+
+
+@router.get("/health/pool", tags=["Health"])
+async def pool_metrics_view():
+    """
+    数据库连接池指标
+    
+    返回主库（及只读副本）连接池的常驻/使用中/空闲/溢出连接数、取连接等待时间分布、超时次数和新建连接数；
+    等待时间持续偏高或出现超时说明请求受连接池容量限制
+    """
+    engines = {"primary": engine, "replica": replica_engine}
+    return {name: metrics.stats(engines[name].pool) for name, metrics in pool_metrics.items()}
+
+
+@router.get("/health/sqlite", tags=["Health"])
+def sqlite_metrics():
+    """
+    SQLite 嵌入式模式状态
+    
+    DATABASE_URL 为 sqlite 时返回当前生效的 pragma 和单写者队列的排队/超时统计
+    """
+    if engine.dialect.name != "sqlite":
+        return {"enabled": False}
+    return {"enabled": True, **sqlite_status(engine)}
@@ -1,19 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from loguru import logger
 
 from app.core.database import get_db
 from app.schemas.package import (
     PackageUploadRequest,
-    PackageHistoryResponse
+    PackageHistoryResponse,
+    PackageSeriesResponse
 )
 from app.schemas.user import TokenData
 from app.services.package_service import PackageService
+from app.services.rollup_service import RollupService
+from app.services.series_service import SeriesService
+from app.services.stream_ingest_service import StreamIngestService
 from app.repositories.package_repository import PackageRepository
+from app.repositories.rollup_repository import SeriesRollupRepository
+from app.repositories.series_chunk_repository import SeriesChunkRepository
 from app.repositories.user import UserPackageRepository
-from app.api.deps import verify_device_authentication, get_current_user
+from app.repositories.device_repository import DeviceRepository
+from app.api.deps import (
+    get_upload_payload, verify_device_authentication, verify_device_frame_authentication,
+    get_current_user, get_device_repository, remember_request
+)
+from app.core.config import settings
 from app.models.device import Device
+from app.utils.binary_frame import FrameDecodeError, decode_frame
+from app.utils.columnar import PACKED_MEDIA_TYPE, encode_columnar_json, encode_packed
+from app.utils.ndjson import NDJSONDecodeError, NDJSON_MEDIA_TYPE, inflate_gzip, iter_lines
 
 router = APIRouter()
 
@@ -29,9 +44,37 @@ def get_user_package_repository(db: Session = Depends(get_db)) -> UserPackageRep
     return UserPackageRepository(db)
 
 
-@router.post("/upload", response_model=Dict[str, Any], tags=["Package"])
+def get_series_service(db: Session = Depends(get_db)) -> SeriesService:
+    """依赖注入：获取封存序列服务"""
+    return SeriesService(PackageRepository(db), SeriesChunkRepository(db))
+
+
+def get_rollup_service(db: Session = Depends(get_db)) -> RollupService:
+    """依赖注入：获取预聚合服务"""
+    return RollupService(PackageService(PackageRepository(db)), SeriesRollupRepository(db))
+
+
+def _mark_stored(response: Response, result: Dict[str, Any]) -> None:
+    """读数写入本地 spool（尚未入库）时返回 202 Accepted"""
+    if result.get("status") == "stored":
+        response.status_code = status.HTTP_202_ACCEPTED
+
+
+@router.post(
+    "/upload",
+    response_model=Dict[str, Any],
+    tags=["Package"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": PackageUploadRequest.model_json_schema()}}
+        }
+    }
+)
 async def upload_package_data(
-    payload: PackageUploadRequest,
+    request: Request,
+    response: Response,
+    payload: PackageUploadRequest = Depends(get_upload_payload),  # 认证时已解析，不重复解析
     device: Device = Depends(verify_device_authentication),  # 添加设备认证
     service: PackageService = Depends(get_package_service)
 ):
@@ -40,7 +83,7 @@ async def upload_package_data(
     
     请求头要求：
     - **X-Device-ID**: 设备唯一标识（如：ESP32-001）
-    - **X-Signature**: HMAC-SHA256 签名
+    - **X-Signature**: HMAC-SHA256 签名（v1 设备对字段拼接字符串签名，v2 设备对请求体原始字节签名）
     - **X-Timestamp**: Unix时间戳（秒）
     
     请求体：
@@ -49,9 +92,15 @@ async def upload_package_data(
     - **avg_humidity**: 平均湿度值（0 ~ 100%）
     - **over_threshold_time**: 超阈值时间（秒）
     - **timestamp**: Unix时间戳（秒）
+    
+    同一设备重发的相同读数（package_id + timestamp）不会重复写入，返回原记录ID且 duplicate 为 true
+    
+    数据库不可用时读数写入本地 spool，返回 202 且 status 为 "stored"（已落盘，数据库恢复后自动写入）
     """
     try:
-        result = service.save_package_data(payload)
+        result = await run_in_threadpool(service.save_package_data, payload, device.id)
+        _mark_stored(response, result)
+        remember_request(request)
         logger.info(f"Data uploaded by device: {device.device_id}")
         return result
     except Exception as e:
@@ -59,11 +108,124 @@ async def upload_package_data(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/upload/frame", response_model=Dict[str, Any], tags=["Package"])
+async def upload_package_frame(
+    request: Request,
+    response: Response,
+    device: Device = Depends(verify_device_frame_authentication),
+    service: PackageService = Depends(get_package_service)
+):
+    """
+    接收 ESP32 上传的二进制帧（需要设备认证，适用于蜂窝网络等受限链路）
+    
+    请求头要求：
+    - **Content-Type**: application/x-rfid-frame
+    - **X-Device-ID**: 设备唯一标识
+    - **X-Signature**: 对请求体原始字节计算的 HMAC-SHA256 签名
+    - **X-Timestamp**: Unix时间戳（秒）
+    
+    请求体（小端序）：
+    - 头部 6 字节：魔数 "RF" | 版本 1 | 保留 0 | 读数条数 (uint16)
+    - 每条读数 16 字节：package_id (uint32) | 最高温度×100 (int16) | 平均湿度×100 (uint16) |
+      超阈值时间 (uint32) | 时间戳 (uint32)
+    
+    同一帧内的全部读数在一个事务中写入；已写入过的读数不会重复写入（计入 duplicates）
+    
+    数据库不可用时读数写入本地 spool，返回 202 且 status 为 "stored"
+    """
+    body = await request.body()
+    try:
+        readings = decode_frame(body, settings.UPLOAD_FRAME_MAX_READINGS)
+    except FrameDecodeError as e:
+        logger.warning(f"Invalid frame from device {device.device_id}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    try:
+        result = await run_in_threadpool(service.save_package_batch, readings, device.id)
+        _mark_stored(response, result)
+        remember_request(request)
+        logger.info(f"Frame uploaded by device: {device.device_id}, readings: {len(readings)}")
+        return result
+    except Exception as e:
+        logger.error(f"Frame upload failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post(
+    "/upload/stream",
+    response_model=Dict[str, Any],
+    tags=["Package"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}}
+        }
+    }
+)
+async def upload_package_stream(
+    request: Request,
+    response: Response,
+    service: PackageService = Depends(get_package_service),
+    device_repo: DeviceRepository = Depends(get_device_repository)
+):
+    """
+    接收网关转发的 NDJSON 读数流（适用于汇聚多个 ESP32 采集器、转发大量积压数据的网关）
+    
+    请求头：
+    - **Content-Type**: application/x-ndjson
+    - **Content-Encoding**: gzip（可选）
+    
+    每行一个 JSON 对象：PackageUploadRequest 的全部字段，加上
+    - **device_id**: 采集设备唯一标识
+    - **signature**: 采集设备对 build_signature_data 拼接字符串计算的 HMAC-SHA256 签名
+    
+    请求体边接收边解析，每 UPLOAD_STREAM_BATCH_SIZE 行校验并写入一次，内存占用与请求体大小无关；
+    签名错误、设备不存在或格式非法的行被跳过并计入 rejected（返回前 20 条错误样例）。
+    写入幂等，中断后可整体重发。读数时间戳不做时间窗口检查（积压数据可能很旧）
+    """
+    ingest = StreamIngestService(service, device_repo)
+    chunks = request.stream()
+    if request.headers.get("content-encoding", "").lower() == "gzip":
+        chunks = inflate_gzip(chunks)
+    
+    batch = []
+    try:
+        async for line_number, line in iter_lines(chunks, settings.UPLOAD_STREAM_MAX_LINE_BYTES):
+            batch.append((line_number, line))
+            if len(batch) >= settings.UPLOAD_STREAM_BATCH_SIZE:
+                await run_in_threadpool(ingest.process, batch)
+                batch = []
+        if batch:
+            await run_in_threadpool(ingest.process, batch)
+    except NDJSONDecodeError as e:
+        logger.warning(f"Invalid stream upload after {ingest.lines} lines: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{str(e)} (after {ingest.lines} lines, {ingest.accepted} readings accepted)"
+        )
+    except Exception as e:
+        logger.error(f"Stream upload failed after {ingest.lines} lines: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    result = ingest.summary()
+    _mark_stored(response, result)
+    logger.info(
+        f"Stream uploaded - lines: {result['lines']}, accepted: {result['accepted']}, "
+        f"duplicates: {result['duplicates']}, rejected: {result['rejected']}"
+    )
+    return result
+
+
 @router.get("/packages/{package_id}/records", response_model=PackageHistoryResponse, tags=["Package"])
 async def get_package_history(
     package_id: int,
     limit: int = Query(default=1000, ge=1, le=10000, description="返回记录数量（默认1000，最大10000）"),
     offset: int = Query(default=0, ge=0, description="偏移量（用于分页）"),
+    points: Optional[int] = Query(default=None, ge=3, le=10000, description="降采样目标点数（用于图表，指定后忽略 limit/offset）"),
+    method: str = Query(default="lttb", pattern="^(lttb|minmax)$", description="降采样算法"),
+    start_timestamp: Optional[int] = Query(default=None, description="降采样开始时间戳（可选）"),
+    end_timestamp: Optional[int] = Query(default=None, description="降采样结束时间戳（可选）"),
+    format: str = Query(default="json", pattern="^(json|columnar|packed)$", description="响应格式"),
     current_user: TokenData = Depends(get_current_user),  # 需要用户登录
     service: PackageService = Depends(get_package_service),
     user_package_repo: UserPackageRepository = Depends(get_user_package_repository)
@@ -77,6 +239,13 @@ async def get_package_history(
     - **package_id**: 包裹ID
     - **limit**: 返回记录数量（1-10000，默认1000）
     - **offset**: 偏移量（用于分页，默认0）
+    - **points**: 降采样目标点数（可选，图表按像素宽度传入，超出温度阈值的峰值必定保留）
+    - **method**: 降采样算法（lttb: 保留曲线形状; minmax: 每个桶保留最小/最大值）
+    - **start_timestamp / end_timestamp**: 降采样时间范围（可选）
+    - **format**: 响应格式
+        - json: 逐条记录（默认）
+        - columnar: JSON 平行数组 `{"package_id", "total", "count", "columns": {"timestamp": [...], ...}}`
+        - packed: 小端序二进制列数组（`application/x-package-history`，格式见 app/utils/columnar.py）
     
     权限要求：
     - 需要JWT Token认证
@@ -96,7 +265,31 @@ async def get_package_history(
         )
     
     try:
-        history = service.get_package_history(package_id, limit, offset)
+        if format == "json":
+            if points is not None:
+                history = service.get_downsampled_history(
+                    package_id, points, method, start_timestamp, end_timestamp
+                )
+            else:
+                history = service.get_package_history(package_id, limit, offset)
+        else:
+            # 列式响应：直接由列数组编码，不构建逐条记录对象
+            if points is not None:
+                total, columns = service.get_downsampled_columns(
+                    package_id, points, method, start_timestamp, end_timestamp
+                )
+            else:
+                total, columns = service.get_package_history_columns(package_id, limit, offset)
+            if format == "packed":
+                history = Response(
+                    content=encode_packed(package_id, total, columns),
+                    media_type=PACKED_MEDIA_TYPE
+                )
+            else:
+                history = Response(
+                    content=encode_columnar_json(package_id, total, columns),
+                    media_type="application/json"
+                )
         logger.info(
             f"User {current_user.user_id} (username: {current_user.username}) "
             f"queried package {package_id} history"
@@ -107,3 +300,73 @@ async def get_package_history(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/packages/{package_id}/series", response_model=PackageSeriesResponse, tags=["Package"])
+async def get_package_series(
+    package_id: int,
+    points: int = Query(default=600, ge=1, le=10000, description="点数预算（用于自动选择层级）"),
+    start_timestamp: Optional[int] = Query(default=None, description="开始时间戳（默认最早数据）"),
+    end_timestamp: Optional[int] = Query(default=None, description="结束时间戳（默认最新数据）"),
+    level: Optional[int] = Query(default=None, description="指定层级（60/900/3600/86400 秒，默认自动选择）"),
+    current_user: TokenData = Depends(get_current_user),
+    rollup_service: RollupService = Depends(get_rollup_service),
+    user_package_repo: UserPackageRepository = Depends(get_user_package_repository)
+):
+    """
+    获取包裹预聚合时间序列（需要登录，只能查看自己的包裹）
+    
+    每个桶包含最高温度的 最小/最大/平均值、平均湿度和记录数。
+    未指定层级时，选择桶数不超过点数预算的最细层级（1分钟/15分钟/1小时/1天），
+    图表缩放时无需扫描原始记录。
+    """
+    if not user_package_repo.check_package_ownership(current_user.user_id, package_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Access denied: You don't have permission to view package {package_id}"
+        )
+    
+    return rollup_service.get_series(package_id, points, start_timestamp, end_timestamp, level)
+
+
+@router.post("/packages/{package_id}/seal", response_model=Dict[str, Any], tags=["Package"])
+async def seal_package(
+    package_id: int,
+    current_user: TokenData = Depends(get_current_user),
+    series_service: SeriesService = Depends(get_series_service),
+    user_package_repo: UserPackageRepository = Depends(get_user_package_repository)
+):
+    """
+    封存包裹数据（需要登录，只能操作自己的包裹）
+    
+    包裹送达后数据只读，封存后以差分编码压缩块存储，历史查询和导出自动读取封存块。
+    温湿度按 0.01 精度保存（与签名精度一致）。
+    """
+    if not user_package_repo.check_package_ownership(current_user.user_id, package_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Access denied: You don't have permission to modify package {package_id}"
+        )
+    
+    result = series_service.seal(package_id)
+    logger.info(f"User {current_user.user_id} sealed package {package_id}")
+    return {"status": "success", "data": result}
+
+
+@router.post("/packages/{package_id}/unseal", response_model=Dict[str, Any], tags=["Package"])
+async def unseal_package(
+    package_id: int,
+    current_user: TokenData = Depends(get_current_user),
+    series_service: SeriesService = Depends(get_series_service),
+    user_package_repo: UserPackageRepository = Depends(get_user_package_repository)
+):
+    """
+    解封包裹数据，将封存块写回记录表（需要登录，只能操作自己的包裹）
+    """
+    if not user_package_repo.check_package_ownership(current_user.user_id, package_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Access denied: You don't have permission to modify package {package_id}"
+        )
+    
+    result = series_service.unseal(package_id)
+    logger.info(f"User {current_user.user_id} unsealed package {package_id}")
+    return {"status": "success", "data": result}
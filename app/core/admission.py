@@ -0,0 +1,199 @@
+"""
+请求准入控制（背压）
+在路由之前按请求类别限制并发：设备上传与用户查询使用独立的并发额度和等待队列，
+数据库变慢时一类请求堆积不会占满连接池而饿死另一类
+
+- 并发未满：直接放行
+- 并发已满：进入有界等待队列，最多等待 ADMISSION_QUEUE_TIMEOUT_SECONDS
+- 队列已满：立即返回 429；等待超时：返回 503（均带 Retry-After）
+- 健康检查和文档不受限制
+
+所有状态只在事件循环线程中修改，不需要加锁
+"""
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+
+class AdmissionRejected(Exception):
+    """请求未获准入"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AdmissionGate:
+    """有界并发闸门（FIFO 等待队列）"""
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.peak_active = 0
+
+    async def acquire(self) -> None:
+        """
+        获取一个并发额度
+
+        Raises:
+            AdmissionRejected: 队列已满（429）或等待超时（503）
+        """
+        if self.active < self.limit and not self._waiters:
+            self._admit()
+            return
+
+        if len(self._waiters) >= self.queue_size:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected(429, f"Too many concurrent {self.name} requests")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(future)
+            self.rejected_timeout += 1
+            raise AdmissionRejected(503, f"Server busy, {self.name} request timed out in queue")
+        except BaseException:
+            # 请求被取消：若额度已经转交给本请求，需要归还
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self._discard(future)
+            raise
+
+    def release(self) -> None:
+        """归还并发额度（有等待者时直接转交给队首请求）"""
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                self.admitted += 1
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, int]:
+        """闸门占用和拒绝统计"""
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "queue_size": self.queue_size,
+            "peak_active": self.peak_active,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+    def reset_stats(self) -> None:
+        """清空统计（不影响正在处理的请求）"""
+        self.admitted = self.queued = 0
+        self.rejected_queue_full = self.rejected_timeout = 0
+        self.peak_active = self.active
+
+    def _admit(self) -> None:
+        self.active += 1
+        self.admitted += 1
+        self.peak_active = max(self.peak_active, self.active)
+
+    def _discard(self, future: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+
+def classify_request(path: str) -> Optional[str]:
+    """
+    按路径划分请求类别
+
+    Args:
+        path: 请求路径
+
+    Returns:
+        "device"、"user"，或 None（不受准入控制）
+    """
+    api_prefix = f"/api/{settings.API_VERSION}"
+    if not path.startswith(api_prefix + "/"):
+        return None
+    route = path[len(api_prefix):]
+    if route.startswith("/health") or route in ("/docs", "/redoc", "/openapi.json"):
+        return None
+    if route.startswith("/upload"):
+        return "device"
+    return "user"
+
+
+class AdmissionControlMiddleware:
+    """准入控制 ASGI 中间件"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        gates: Dict[str, AdmissionGate],
+        classify: Callable[[str], Optional[str]] = classify_request,
+        retry_after: int = 1
+    ):
+        self.app = app
+        self.gates = gates
+        self.classify = classify
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        gate = self.gates.get(self.classify(scope["path"]))
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await gate.acquire()
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                {"detail": e.detail},
+                status_code=e.status_code,
+                headers={"Retry-After": str(self.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+
+# 全局准入闸门（设备上传 / 用户查询）
+admission_gates: Dict[str, AdmissionGate] = {
+    "device": AdmissionGate(
+        "device",
+        settings.ADMISSION_DEVICE_CONCURRENCY,
+        settings.ADMISSION_DEVICE_QUEUE_SIZE,
+        settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+    ),
+    "user": AdmissionGate(
+        "user",
+        settings.ADMISSION_USER_CONCURRENCY,
+        settings.ADMISSION_USER_QUEUE_SIZE,
+        settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+    ),
+}
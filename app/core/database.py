@@ -1,19 +1,65 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Dict, Generator
 from .config import settings
+from .pool_metrics import InstrumentedQueuePool, instrument_engine, warm_up_pool
+from .read_replica import ReplicaRouter, RoutingSession
+from .sqlite import create_sqlite_engine
+
+
+def _create_pooled_engine(url: str):
+    """按连接池配置创建引擎（连接池记录取连接等待时间）"""
+    pool_options = dict(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,  # 连接回收时间（秒）
+        pool_use_lifo=settings.DB_POOL_USE_LIFO,
+        echo=settings.DEBUG  # 是否打印 SQL 语句
+    )
+    if make_url(url).get_backend_name() == "sqlite":
+        # 嵌入式模式：WAL + pragma + 单写者队列，本地文件不需要连接预检查
+        return create_sqlite_engine(url, **pool_options)
+    return create_engine(
+        url,
+        pool_pre_ping=True,  # 连接池预检查
+        **pool_options
+    )
+
 
 # 创建数据库引擎
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,  # 连接池预检查
-    pool_recycle=3600,   # 连接回收时间（秒）
-    echo=settings.DEBUG  # 是否打印 SQL 语句
+engine = _create_pooled_engine(settings.database_url)
+pool_metrics = {"primary": instrument_engine(engine, "primary")}
+
+# 表示数据库暂时不可用（连接失败、主从切换、连接池耗尽）的异常，上传数据可写入本地 spool
+DATABASE_UNAVAILABLE_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError)
+
+# 只读副本引擎（可选），看板类重查询通过 @replica_read 路由到副本
+replica_engine = _create_pooled_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+if replica_engine is not None:
+    pool_metrics["replica"] = instrument_engine(replica_engine, "replica")
+
+replica_router = ReplicaRouter(
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_CHECK_INTERVAL_SECONDS,
+    sticky_seconds=settings.REPLICA_STICKY_SECONDS
 )
+if replica_engine is not None:
+    event.listen(replica_engine, "handle_error", replica_router.handle_error)
 
 # 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    replica_bind=replica_engine,
+    router=replica_router
+)
 
 # 创建基类
 Base = declarative_base()
@@ -37,3 +83,19 @@ def init_db() -> None:
     创建所有表
     """
     Base.metadata.create_all(bind=engine)
+
+
+def warm_up_pools() -> Dict[str, int]:
+    """
+    预热主库和只读副本连接池（DB_POOL_WARMUP 个连接，不超过常驻连接数）
+    
+    Returns:
+        各连接池建立的连接数
+    """
+    connections = min(settings.DB_POOL_WARMUP, settings.DB_POOL_SIZE)
+    engines = {"primary": engine, "replica": replica_engine}
+    return {
+        name: warm_up_pool(target, connections)
+        for name, target in engines.items()
+        if target is not None and connections > 0
+    }
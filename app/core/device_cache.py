@@ -0,0 +1,97 @@
+"""
+设备认证信息缓存
+记录每个设备最近一次从数据库查到的认证字段（DeviceSnapshot），
+数据库不可用（主从切换、连接池耗尽）时设备认证回退到缓存，上传数据写入本地 spool 而不是直接失败
+
+- 按设备 LRU 淘汰，最多 DEVICE_CACHE_MAX_DEVICES 个设备
+- 缓存超过 DEVICE_CACHE_MAX_AGE_SECONDS 的条目不再使用（停用或换钥的设备不会长期沿用旧信息）
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.models.device import DeviceSnapshot
+
+
+class DeviceCache:
+    """设备认证信息缓存（LRU）"""
+
+    def __init__(self, max_devices: int, max_age_seconds: float):
+        self.max_devices = max_devices
+        self.max_age_seconds = max_age_seconds
+        self._entries: "OrderedDict[str, Tuple[DeviceSnapshot, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.fallbacks = 0
+
+    def put(self, snapshot: DeviceSnapshot) -> None:
+        """
+        缓存设备快照
+
+        Args:
+            snapshot: 设备快照
+        """
+        with self._lock:
+            self._entries[snapshot.device_id] = (snapshot, time.monotonic())
+            self._entries.move_to_end(snapshot.device_id)
+            while len(self._entries) > self.max_devices:
+                self._entries.popitem(last=False)
+
+    def get(self, device_id: str, max_age_seconds: Optional[float] = None) -> Optional[DeviceSnapshot]:
+        """
+        获取设备快照
+
+        Args:
+            device_id: 设备唯一标识
+            max_age_seconds: 最大缓存时长（默认使用 DEVICE_CACHE_MAX_AGE_SECONDS）
+
+        Returns:
+            设备快照，不存在或已过期时返回 None
+        """
+        max_age = self.max_age_seconds if max_age_seconds is None else max_age_seconds
+        with self._lock:
+            entry = self._entries.get(device_id)
+            if entry is None:
+                return None
+            snapshot, cached_at = entry
+            if time.monotonic() - cached_at > max_age:
+                return None
+            self._entries.move_to_end(device_id)
+            return snapshot
+
+    def record_fallback(self) -> None:
+        """记录一次数据库不可用时的缓存认证"""
+        with self._lock:
+            self.fallbacks += 1
+
+    def invalidate(self, device_id: Optional[str] = None) -> None:
+        """
+        使设备缓存失效（不指定设备时清空全部）
+
+        Args:
+            device_id: 设备唯一标识
+        """
+        with self._lock:
+            if device_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(device_id, None)
+
+    def clear(self) -> None:
+        """清空缓存和统计"""
+        with self._lock:
+            self._entries.clear()
+            self.fallbacks = 0
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        with self._lock:
+            return {"devices": len(self._entries), "fallbacks": self.fallbacks}
+
+
+# 全局设备缓存实例
+device_cache = DeviceCache(
+    max_devices=settings.DEVICE_CACHE_MAX_DEVICES,
+    max_age_seconds=settings.DEVICE_CACHE_MAX_AGE_SECONDS
+)
@@ -0,0 +1,176 @@
+"""
+包裹热数据窗口
+进程内为每个活跃包裹缓存最近 K 条记录（按时间倒序），用于最新数据和小页历史查询
+
+- 写入路径：数据库提交成功后追加；写入失败时使该包裹的缓存失效，下次读取重新加载
+- 读取路径：未命中时从数据库懒加载最近 K 条记录（不足 K 条时窗口即为全部记录，否则总数未知，不执行 COUNT）
+- 内存控制：按包裹 LRU 淘汰，最多缓存 HOT_WINDOW_MAX_PACKAGES 个包裹
+- 多进程部署：各进程缓存独立，条目超过 HOT_WINDOW_TTL_SECONDS 后重新加载（0 表示不过期）；
+  分页总数不从窗口读取，由数据库统计
+"""
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.package import RecordSnapshot
+
+
+def _sort_key(record: RecordSnapshot) -> Tuple[int, int]:
+    # 取负值使列表按 (timestamp, id) 倒序排列，便于 bisect
+    return (-record.timestamp, -record.id)
+
+
+class WindowEntry:
+    """单个包裹的热数据窗口"""
+
+    __slots__ = ("records", "keys", "total", "loaded_at")
+
+    def __init__(self, records: List[RecordSnapshot], total: Optional[int]):
+        self.records = sorted(records, key=_sort_key)
+        self.keys = [_sort_key(r) for r in self.records]
+        self.total = total
+        self.loaded_at = time.monotonic()
+
+    @property
+    def complete(self) -> bool:
+        """窗口是否包含该包裹在热表中的全部记录（总数未知时视为不完整）"""
+        return self.total is not None and len(self.records) >= self.total
+
+    def covers(self, offset: int, limit: int) -> bool:
+        """窗口能否直接满足该分页请求"""
+        return self.complete or offset + limit <= len(self.records)
+
+
+class HotWindow:
+    """包裹热数据窗口（LRU）"""
+
+    def __init__(self, window_size: int, max_packages: int, ttl_seconds: float = 0):
+        self.window_size = window_size
+        self.max_packages = max_packages
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, WindowEntry]" = OrderedDict()
+        # 正在加载的包裹 -> 加载期间是否有写入/失效（有则本次加载结果不缓存）
+        self._loading: Dict[int, bool] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(
+        self,
+        package_id: int,
+        loader: Callable[[int], Tuple[List[RecordSnapshot], Optional[int]]]
+    ) -> WindowEntry:
+        """
+        获取包裹窗口，未命中或过期时调用 loader 从数据库加载
+
+        Args:
+            package_id: 包裹ID
+            loader: 加载函数，参数为窗口大小，返回 (最近记录列表, 记录总数，未知时为 None)
+
+        Returns:
+            包裹窗口
+        """
+        with self._lock:
+            entry = self._entries.get(package_id)
+            if entry is not None and not self._expired(entry):
+                self._entries.move_to_end(package_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            self._loading[package_id] = False
+
+        # 在锁外访问数据库，避免阻塞其他包裹
+        try:
+            records, total = loader(self.window_size)
+        except Exception:
+            with self._lock:
+                self._loading.pop(package_id, None)
+            raise
+
+        entry = WindowEntry(records[:self.window_size], total)
+        with self._lock:
+            dirty = self._loading.pop(package_id, True)
+            if not dirty:
+                self._entries[package_id] = entry
+                self._entries.move_to_end(package_id)
+                self._evict()
+        return entry
+
+    def append(self, record: RecordSnapshot) -> None:
+        """
+        追加一条已提交的记录（仅更新已缓存的包裹，未缓存的包裹等待懒加载）
+
+        Args:
+            record: 记录快照
+        """
+        with self._lock:
+            if record.package_id in self._loading:
+                self._loading[record.package_id] = True
+            entry = self._entries.get(record.package_id)
+            if entry is None:
+                return
+            if entry.total is not None:
+                entry.total += 1
+            key = _sort_key(record)
+            position = bisect.bisect_left(entry.keys, key)
+            # 窗口已满且记录比窗口内所有记录都旧时，只更新总数
+            if position >= self.window_size:
+                return
+            entry.records.insert(position, record)
+            entry.keys.insert(position, key)
+            if len(entry.records) > self.window_size:
+                entry.records.pop()
+                entry.keys.pop()
+
+    def invalidate(self, package_id: Optional[int] = None) -> None:
+        """
+        使包裹窗口失效（不指定包裹时清空全部）
+
+        Args:
+            package_id: 包裹ID
+        """
+        with self._lock:
+            if package_id is None:
+                self._entries.clear()
+                for loading_id in self._loading:
+                    self._loading[loading_id] = True
+            else:
+                self._entries.pop(package_id, None)
+                if package_id in self._loading:
+                    self._loading[package_id] = True
+
+    def clear(self) -> None:
+        """清空全部窗口和统计"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        with self._lock:
+            return {
+                "packages": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _expired(self, entry: WindowEntry) -> bool:
+        return self.ttl_seconds > 0 and time.monotonic() - entry.loaded_at > self.ttl_seconds
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_packages:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# 全局热数据窗口实例
+hot_window = HotWindow(
+    window_size=settings.HOT_WINDOW_SIZE,
+    max_packages=settings.HOT_WINDOW_MAX_PACKAGES,
+    ttl_seconds=settings.HOT_WINDOW_TTL_SECONDS
+)
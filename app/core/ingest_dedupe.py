@@ -0,0 +1,80 @@
+"""
+上传幂等键缓存
+进程内记录最近写入（或确认已存在）的幂等键 (上传设备, package_id, 读数时间戳) -> 记录ID，
+设备超时重发的读数在进入数据库之前即可识别，直接返回原记录ID
+
+- 唯一索引 uk_package_timestamp_device 是最终保证，本缓存只用于减少重复写入的数据库往返
+- 只在事务提交后写入缓存，命中即一定是已提交的记录（不使用 Bloom 过滤器，避免误判丢数据）
+- 按 LRU 淘汰，最多 INGEST_DEDUPE_CACHE_SIZE 个键
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+IngestKey = Tuple[int, int, int]
+
+
+class RecentIngestKeys:
+    """最近写入的幂等键（LRU）"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._keys: "OrderedDict[IngestKey, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def get(self, key: IngestKey) -> Optional[int]:
+        """
+        查询幂等键对应的记录ID
+
+        Args:
+            key: (上传设备, package_id, 读数时间戳)
+
+        Returns:
+            记录ID，未命中时返回 None
+        """
+        with self._lock:
+            record_id = self._keys.get(key)
+            if record_id is not None:
+                self._keys.move_to_end(key)
+                self.hits += 1
+            return record_id
+
+    def put(self, key: IngestKey, record_id: int) -> None:
+        """
+        记录已提交的幂等键
+
+        Args:
+            key: (上传设备, package_id, 读数时间戳)
+            record_id: 记录ID
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._keys[key] = record_id
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+
+    def discard(self, key: IngestKey) -> None:
+        """移除幂等键（对应记录已不在热表中时调用）"""
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存和统计"""
+        with self._lock:
+            self._keys.clear()
+            self.hits = 0
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        with self._lock:
+            return {"keys": len(self._keys), "hits": self.hits}
+
+
+# 全局幂等键缓存实例
+recent_ingest_keys = RecentIngestKeys(settings.INGEST_DEDUPE_CACHE_SIZE)
@@ -0,0 +1,152 @@
+"""
+数据库连接池监控
+记录连接获取的等待时间分布、超时次数和新建连接数，配合连接池当前的使用中/空闲连接数，
+用于判断请求是否受连接池容量限制
+
+- InstrumentedQueuePool 在 QueuePool 取连接（_do_get）前后计时，引擎 dispose 重建连接池时保留统计
+- 等待时间按固定边界（毫秒）计入直方图
+"""
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# 等待时间直方图边界（毫秒），最后一个桶为 +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """单个连接池的统计"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def observe_wait(self, seconds: float) -> None:
+        """记录一次取连接的等待时间"""
+        milliseconds = seconds * 1000
+        with self._lock:
+            self._buckets[bisect.bisect_left(WAIT_BUCKETS_MS, milliseconds)] += 1
+            self.checkouts += 1
+            self.wait_total_ms += milliseconds
+            self.wait_max_ms = max(self.wait_max_ms, milliseconds)
+
+    def observe_timeout(self, seconds: float) -> None:
+        """记录一次取连接超时"""
+        with self._lock:
+            self.timeouts += 1
+            self.wait_max_ms = max(self.wait_max_ms, seconds * 1000)
+
+    def observe_connect(self) -> None:
+        """记录一次新建数据库连接"""
+        with self._lock:
+            self.connects += 1
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self._buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.checkouts = 0
+            self.timeouts = 0
+            self.connects = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+
+    def stats(self, pool=None) -> Dict:
+        """
+        统计信息
+
+        Args:
+            pool: 连接池（提供当前使用中/空闲/溢出连接数）
+
+        Returns:
+            统计信息
+        """
+        with self._lock:
+            histogram = {
+                f"le_{bound}ms": count for bound, count in zip(WAIT_BUCKETS_MS, self._buckets)
+            }
+            histogram["le_inf"] = self._buckets[-1]
+            result = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "wait_histogram": histogram,
+            }
+        if isinstance(pool, QueuePool):
+            result.update({
+                "size": pool.size(),
+                "active": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return result
+
+
+class InstrumentedQueuePool(QueuePool):
+    """记录取连接等待时间的 QueuePool"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.observe_timeout(time.perf_counter() - started)
+            raise
+        if self.metrics is not None:
+            self.metrics.observe_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def instrument_engine(engine: Engine, name: str) -> PoolMetrics:
+    """
+    为引擎的连接池挂载统计（连接池需为 InstrumentedQueuePool 才记录等待时间）
+
+    Args:
+        engine: 数据库引擎
+        name: 名称（如 primary / replica）
+
+    Returns:
+        连接池统计
+    """
+    metrics = PoolMetrics(name)
+    engine.pool.metrics = metrics
+    event.listen(engine, "connect", lambda dbapi_connection, record: metrics.observe_connect())
+    return metrics
+
+
+def warm_up_pool(engine: Engine, connections: int) -> int:
+    """
+    预先建立连接（同时持有 N 个连接后归还），避免部署后第一波请求承担建连开销
+
+    Args:
+        engine: 数据库引擎
+        connections: 预热连接数
+
+    Returns:
+        成功建立的连接数
+    """
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
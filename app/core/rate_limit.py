@@ -0,0 +1,145 @@
+"""
+设备上传限流（每设备令牌桶）
+防止个别设备（如固件异常死循环上传）占满上传处理能力
+
+- 令牌数和上次更新时间存放在预分配的 array('d') 中，设备通过 dict 映射到槽位，
+  请求路径上只做惰性补充（按经过时间计算），不为每个请求创建对象
+- 空闲到令牌补满的桶与新桶等价，定期整体扫描回收槽位；槽位用尽时放行（不因限流器容量拒绝正常设备）
+- 被拒绝的请求按设备计数
+"""
+import threading
+import time
+from array import array
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+
+class DeviceRateLimiter:
+    """每设备令牌桶限流器"""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int,
+        max_devices: int,
+        sweep_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.max_devices = max_devices
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._slots: Dict[int, int] = {}
+        self._tokens = array("d", [0.0]) * max_devices
+        self._updated = array("d", [0.0]) * max_devices
+        # 每个槽位补满所需时间（用于判断空闲）
+        self._refill_seconds = array("d", [0.0]) * max_devices
+        self._free: List[int] = list(range(max_devices - 1, -1, -1))
+        self._next_sweep = clock() + sweep_interval
+        self._lock = threading.Lock()
+        self.rejections: Dict[str, int] = {}
+        self.rejected_total = 0
+        self.overflowed = 0
+
+    def acquire(
+        self,
+        device_key: int,
+        device_id: str,
+        rate_per_minute: Optional[float] = None,
+        burst: Optional[int] = None
+    ) -> float:
+        """
+        为设备取一个令牌
+
+        Args:
+            device_key: 设备主键（devices.id）
+            device_id: 设备唯一标识（用于拒绝计数）
+            rate_per_minute: 设备覆盖的每分钟令牌数（None 使用默认值，0 表示不限流）
+            burst: 设备覆盖的桶容量（None 使用默认值）
+
+        Returns:
+            0 表示放行，否则为建议的重试等待秒数
+        """
+        rate = (self.rate_per_minute if rate_per_minute is None else rate_per_minute) / 60.0
+        if rate <= 0:
+            return 0.0
+        capacity = float(self.burst if burst is None else burst)
+
+        with self._lock:
+            now = self._clock()
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+            slot = self._slots.get(device_key)
+            if slot is None:
+                if not self._free:
+                    self._sweep(now)
+                    if not self._free:
+                        self.overflowed += 1
+                        return 0.0
+                slot = self._free.pop()
+                self._slots[device_key] = slot
+                tokens = capacity
+            else:
+                # 惰性补充
+                tokens = min(capacity, self._tokens[slot] + (now - self._updated[slot]) * rate)
+
+            self._updated[slot] = now
+            self._refill_seconds[slot] = capacity / rate
+            if tokens >= 1.0:
+                self._tokens[slot] = tokens - 1.0
+                return 0.0
+
+            self._tokens[slot] = tokens
+            self.rejected_total += 1
+            self.rejections[device_id] = self.rejections.get(device_id, 0) + 1
+            return (1.0 - tokens) / rate
+
+    def clear(self) -> None:
+        """清空全部令牌桶和统计"""
+        with self._lock:
+            self._slots.clear()
+            self._free = list(range(self.max_devices - 1, -1, -1))
+            self.rejections.clear()
+            self.rejected_total = 0
+            self.overflowed = 0
+
+    def stats(self, top: int = 20) -> Dict:
+        """
+        限流统计
+
+        Args:
+            top: 返回拒绝次数最多的设备数量
+
+        Returns:
+            统计信息
+        """
+        with self._lock:
+            ranked = sorted(self.rejections.items(), key=lambda item: item[1], reverse=True)[:top]
+            return {
+                "tracked_devices": len(self._slots),
+                "capacity": self.max_devices,
+                "rejected_total": self.rejected_total,
+                "overflowed": self.overflowed,
+                "top_rejected": [{"device_id": d, "rejected": n} for d, n in ranked],
+            }
+
+    def _sweep(self, now: float) -> None:
+        """回收已补满（空闲）的令牌桶"""
+        idle = [
+            key for key, slot in self._slots.items()
+            if now - self._updated[slot] >= self._refill_seconds[slot]
+        ]
+        for key in idle:
+            self._free.append(self._slots.pop(key))
+        self._next_sweep = now + self.sweep_interval
+
+
+# 全局设备限流器
+device_rate_limiter = DeviceRateLimiter(
+    rate_per_minute=settings.DEVICE_RATE_LIMIT_PER_MINUTE,
+    burst=settings.DEVICE_RATE_LIMIT_BURST,
+    max_devices=settings.DEVICE_RATE_LIMIT_MAX_DEVICES
+)
@@ -0,0 +1,279 @@
+"""
+读写分离：只读副本路由
+看板类的重查询（历史、统计、导出）路由到只读副本，写入和其余读取走主库
+
+- 只有标注 @replica_read 的仓库方法中的查询走副本；写入（flush / INSERT / UPDATE / DELETE）始终走主库
+- 读己之写：会话写入过数据后，后续查询全部走主库；同一用户提交写入后 REPLICA_STICKY_SECONDS 内的请求也走主库
+  （进程内记录，多进程部署时各进程独立）；也可调用 use_primary(db) 强制当前请求走主库
+- 副本延迟超过 REPLICA_MAX_LAG_SECONDS、延迟未知（复制停止）或连接失败时回退主库，
+  每 REPLICA_CHECK_INTERVAL_SECONDS 重新检查一次（由一个线程在锁外检查，其他线程沿用上次结果，不等待）
+- 副本查询中途失败（连接断开等）时，在主库重试一次，本次会话后续查询走主库
+"""
+import functools
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from loguru import logger
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+
+# Session.info 中的路由标记
+REPLICA_READ = "replica_read"
+REPLICA_USED = "replica_used"
+USE_PRIMARY = "use_primary"
+HAS_WRITTEN = "has_written"
+STICKY_KEY = "sticky_key"
+
+
+def probe_replica_lag(engine: Engine) -> Optional[float]:
+    """
+    查询副本复制延迟（秒）
+
+    Args:
+        engine: 副本引擎
+
+    Returns:
+        延迟秒数，复制停止时返回 None（非 MySQL 数据库视为无延迟）
+    """
+    if engine.dialect.name != "mysql":
+        return 0.0
+    with engine.connect() as conn:
+        try:
+            row = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+            column = "Seconds_Behind_Source"
+        except OperationalError:
+            # MySQL 8.0.22 之前的语法
+            row = conn.execute(text("SHOW SLAVE STATUS")).mappings().first()
+            column = "Seconds_Behind_Master"
+    if row is None:
+        # 未配置复制（例如直接指向主库）
+        return 0.0
+    lag = row[column]
+    return None if lag is None else float(lag)
+
+
+class ReplicaRouter:
+    """副本可用性检查与读己之写记录"""
+
+    def __init__(
+        self,
+        max_lag_seconds: float,
+        check_interval: float,
+        sticky_seconds: float,
+        lag_probe: Callable[[Engine], Optional[float]] = probe_replica_lag,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        self.lag_probe = lag_probe
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._available = False
+        self._next_check = 0.0
+        self._writes: Dict[str, float] = {}
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
+    def replica_available(self, engine: Engine) -> bool:
+        """
+        副本当前是否可用（按检查间隔缓存结果）
+
+        Args:
+            engine: 副本引擎
+
+        Returns:
+            是否可用
+        """
+        now = self._clock()
+        if now >= self._next_check:
+            with self._lock:
+                # 由第一个到达的线程检查：先推迟下次检查时间，检查期间其他线程沿用上次结果
+                claimed = now >= self._next_check
+                if claimed:
+                    self._next_check = now + self.check_interval
+            if claimed:
+                self._check(engine)
+        return self._available
+
+    def mark_down(self, reason: str) -> None:
+        """
+        标记副本不可用（到下次检查前查询走主库）
+
+        Args:
+            reason: 原因
+        """
+        with self._lock:
+            if self._available:
+                logger.warning(f"Read replica marked down: {reason}")
+            self._available = False
+            self.last_error = reason
+            self._next_check = self._clock() + self.check_interval
+
+    def handle_error(self, context) -> None:
+        """副本引擎 handle_error 事件：连接类错误时标记副本不可用"""
+        if isinstance(context.sqlalchemy_exception, (OperationalError, InterfaceError)):
+            self.mark_down(str(context.original_exception))
+
+    def note_write(self, key: str) -> None:
+        """
+        记录某个调用方（如用户）提交了写入
+
+        Args:
+            key: 调用方标识
+        """
+        with self._lock:
+            now = self._clock()
+            self._writes[key] = now + self.sticky_seconds
+            if len(self._writes) > 10000:
+                self._writes = {k: until for k, until in self._writes.items() if until > now}
+
+    def recently_wrote(self, key: str) -> bool:
+        """
+        调用方是否在粘滞时间内提交过写入
+
+        Args:
+            key: 调用方标识
+
+        Returns:
+            是否应读主库
+        """
+        until = self._writes.get(key)
+        return until is not None and until > self._clock()
+
+    def reset(self) -> None:
+        """清空检查结果和写入记录"""
+        with self._lock:
+            self._available = False
+            self._next_check = 0.0
+            self._writes.clear()
+            self.lag = None
+            self.last_error = None
+            self.replica_reads = 0
+            self.primary_fallbacks = 0
+
+    def stats(self) -> Dict:
+        """副本状态"""
+        return {
+            "available": self._available,
+            "lag_seconds": self.lag,
+            "last_error": self.last_error,
+            "replica_reads": self.replica_reads,
+            "primary_fallbacks": self.primary_fallbacks,
+        }
+
+    def _check(self, engine: Engine) -> None:
+        # 探测在锁外执行（副本无响应时可能等待到连接超时）
+        try:
+            lag = self.lag_probe(engine)
+            available = lag is not None and lag <= self.max_lag_seconds
+            error = None if available else f"replication lag {lag}"
+        except Exception as e:
+            lag, available, error = None, False, str(e)
+        with self._lock:
+            self.lag = lag
+            self._available = available
+            self.last_error = error
+        if not available:
+            logger.warning(f"Read replica unavailable, reading from primary: {error}")
+
+
+class RoutingSession(Session):
+    """按 @replica_read 标记和写入状态选择主库或副本的会话"""
+
+    def __init__(self, replica_bind: Optional[Engine] = None, router: Optional[ReplicaRouter] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.replica_bind = replica_bind
+        self.router = router
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.info[HAS_WRITTEN] = True
+        elif (
+            self.replica_bind is not None
+            and clause is not None
+            and self.info.get(REPLICA_READ)
+            and not self.info.get(USE_PRIMARY)
+            and not self.info.get(HAS_WRITTEN)
+        ):
+            if self.router.replica_available(self.replica_bind):
+                self.router.replica_reads += 1
+                self.info[REPLICA_USED] = True
+                return self.replica_bind
+            self.router.primary_fallbacks += 1
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_commit(session: RoutingSession) -> None:
+    """提交写入后记录调用方，后续请求在粘滞时间内读主库"""
+    key = session.info.get(STICKY_KEY)
+    if key and session.router is not None and session.info.get(HAS_WRITTEN):
+        session.router.note_write(key)
+
+
+def replica_read(method):
+    """仓库方法装饰器：方法内的查询可以走只读副本，副本查询失败时在主库重试一次"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        db = self.db
+        previous = db.info.get(REPLICA_READ)
+        db.info[REPLICA_READ] = True
+        db.info.pop(REPLICA_USED, None)
+        try:
+            return method(self, *args, **kwargs)
+        except (OperationalError, InterfaceError) as e:
+            # 只重试副本上的失败；会话有未提交的对象时回滚会丢失它们，不重试
+            if not db.info.pop(REPLICA_USED, False) or db.new or db.dirty or db.deleted:
+                raise
+            logger.warning(f"Replica query failed, retrying on primary: {getattr(e, 'orig', e)}")
+            # 副本连接可能已失效：回滚会话事务（走副本说明会话内没有写入），后续查询走主库
+            db.rollback()
+            use_primary(db)
+            return method(self, *args, **kwargs)
+        finally:
+            db.info[REPLICA_READ] = previous
+    return wrapper
+
+
+def primary_read(method):
+    """仓库方法装饰器：方法内的查询始终走主库（例如加载进程内共享缓存）"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        info = self.db.info
+        previous = info.get(REPLICA_READ)
+        info[REPLICA_READ] = False
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            info[REPLICA_READ] = previous
+    return wrapper
+
+
+def use_primary(db: Session) -> None:
+    """
+    当前会话（请求）的查询全部走主库（读己之写）
+
+    Args:
+        db: 数据库会话
+    """
+    db.info[USE_PRIMARY] = True
+
+
+def track_writes_for(db: Session, key: str) -> None:
+    """
+    为会话设置调用方标识：该调用方近期提交过写入时本次请求走主库，本次提交写入后同样记录
+
+    Args:
+        db: 数据库会话
+        key: 调用方标识（如 "user:1"）
+    """
+    db.info[STICKY_KEY] = key
+    router = getattr(db, "router", None)
+    if router is not None and router.recently_wrote(key):
+        use_primary(db)
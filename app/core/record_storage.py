@@ -0,0 +1,181 @@
+"""
+package_records 存储编码检查与转换
+
+模型的列类型在导入时由 COMPACT_RECORD_STORAGE 决定；数据库中的列类型只能通过显式转换修改
+（python scripts/convert_record_storage.py），与配置无关。配置与实际列类型不一致时
+CentiUnits 会把 DOUBLE 值按百分位整数解读（或反之），读数被静默放大/缩小 100 倍，
+因此启动时检查两者一致，不一致时拒绝启动。
+
+- wide：温湿度 DOUBLE，时间戳 BIGINT
+- compact：温湿度 SMALLINT 百分位定点数，时间戳/超阈值时间 INT UNSIGNED（MySQL）
+"""
+from typing import Optional
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.core.schema_version import SchemaVersionError
+
+
+TABLE = "package_records"
+MEASUREMENT_COLUMNS = {
+    "max_temperature": "最高温度(°C)",
+    "avg_humidity": "平均湿度(%)",
+}
+
+COMPACT = "compact"
+WIDE = "wide"
+
+
+def get_record_storage(connection: Connection) -> Optional[str]:
+    """
+    查询 package_records 当前的存储编码
+
+    Args:
+        connection: 数据库连接
+
+    Returns:
+        compact / wide，表不存在时返回 None
+    """
+    inspector = sa.inspect(connection)
+    if not inspector.has_table(TABLE):
+        return None
+    column_type = next(c["type"] for c in inspector.get_columns(TABLE) if c["name"] == "max_temperature")
+    return COMPACT if isinstance(column_type, sa.SmallInteger) else WIDE
+
+
+def check_record_storage(engine: Engine, compact: Optional[bool] = None) -> Optional[str]:
+    """
+    检查数据库存储编码与 COMPACT_RECORD_STORAGE 是否一致
+
+    Args:
+        engine: 数据库引擎
+        compact: 期望是否为紧凑编码（默认读取配置）
+
+    Returns:
+        数据库当前存储编码（表不存在时为 None）
+
+    Raises:
+        SchemaVersionError: 存储编码与配置不一致
+    """
+    expected = COMPACT if (settings.COMPACT_RECORD_STORAGE if compact is None else compact) else WIDE
+    with engine.connect() as conn:
+        storage = get_record_storage(conn)
+    if storage is not None and storage != expected:
+        raise SchemaVersionError(
+            f"{TABLE} uses {storage} storage but COMPACT_RECORD_STORAGE expects {expected}, "
+            f"run 'python scripts/convert_record_storage.py --to {expected}' "
+            f"(or set COMPACT_RECORD_STORAGE={'true' if storage == COMPACT else 'false'})"
+        )
+    return storage
+
+
+def _convert_measurements(op, to_compact: bool) -> None:
+    """通过 新增列 -> 换算 -> 删除旧列 -> 重命名 的方式转换温湿度列"""
+    new_type = sa.SmallInteger() if to_compact else sa.Float()
+    with op.batch_alter_table(TABLE) as batch:
+        for name in MEASUREMENT_COLUMNS:
+            batch.add_column(sa.Column(f"{name}_new", new_type, nullable=True))
+
+    # 注意：MySQL 对 DOUBLE 的 ROUND 与 Python 的 .2f 在恰好 .xx5 的边界值上可能相差 1 个百分位
+    expression = "ROUND({name} * 100)" if to_compact else "{name} / 100.0"
+    assignments = ", ".join(
+        f"{name}_new = " + expression.format(name=name) for name in MEASUREMENT_COLUMNS
+    )
+    op.execute(f"UPDATE {TABLE} SET {assignments}")
+
+    # 覆盖索引包含温湿度列：先删除，重命名后按模型定义重建（MySQL 删除列时会静默缩短索引）
+    indexes = _covering_indexes(op.get_bind())
+    for index in indexes:
+        op.drop_index(index.name, table_name=TABLE)
+
+    # 删除与重命名分两次执行（SQLite 的批量重建不支持同一批次中先删除再重命名为同名列）
+    with op.batch_alter_table(TABLE) as batch:
+        for name in MEASUREMENT_COLUMNS:
+            batch.drop_column(name)
+    with op.batch_alter_table(TABLE) as batch:
+        for name, comment in MEASUREMENT_COLUMNS.items():
+            batch.alter_column(
+                f"{name}_new",
+                new_column_name=name,
+                existing_type=new_type,
+                nullable=False,
+                comment=comment
+            )
+
+    for index in indexes:
+        index.create(op.get_bind())
+
+
+def _covering_indexes(connection: Connection) -> list:
+    """数据库中已存在、且包含温湿度列的模型索引"""
+    from app.models.package import PackageRecord
+
+    existing = {index["name"] for index in sa.inspect(connection).get_indexes(TABLE)}
+    return [
+        index for index in PackageRecord.__table__.indexes
+        if index.name in existing and any(column.name in MEASUREMENT_COLUMNS for column in index.columns)
+    ]
+
+
+def convert_record_storage(connection: Connection, to_compact: bool, nullable_created_at: bool = False) -> bool:
+    """
+    转换 package_records 的存储编码（已是目标编码时不做修改）
+
+    Args:
+        connection: 数据库连接
+        to_compact: True 转为紧凑编码，False 转回 DOUBLE/BIGINT
+        nullable_created_at: 转为紧凑编码时 created_at 改为可空且无默认值（RECORD_CREATED_AT_ENABLED=false）
+
+    Returns:
+        是否执行了转换
+    """
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    storage = get_record_storage(connection)
+    if storage is None or storage == (COMPACT if to_compact else WIDE):
+        return False
+
+    op = Operations(MigrationContext.configure(connection))
+    _convert_measurements(op, to_compact)
+
+    wide_timestamp, compact_timestamp = sa.BigInteger(), sa.BigInteger().with_variant(mysql.INTEGER(unsigned=True), "mysql")
+    wide_seconds, compact_seconds = sa.Integer(), sa.Integer().with_variant(mysql.INTEGER(unsigned=True), "mysql")
+    if not to_compact:
+        op.execute(f"UPDATE {TABLE} SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+
+    with op.batch_alter_table(TABLE) as batch:
+        batch.alter_column(
+            "timestamp",
+            existing_type=wide_timestamp if to_compact else compact_timestamp,
+            type_=compact_timestamp if to_compact else wide_timestamp,
+            existing_nullable=False,
+            existing_comment="Unix时间戳"
+        )
+        batch.alter_column(
+            "over_threshold_time",
+            existing_type=wide_seconds if to_compact else compact_seconds,
+            type_=compact_seconds if to_compact else wide_seconds,
+            existing_nullable=False,
+            existing_comment="超阈值时间(秒)"
+        )
+        if to_compact and nullable_created_at:
+            batch.alter_column(
+                "created_at",
+                existing_type=sa.DateTime(),
+                nullable=True,
+                server_default=None,
+                existing_comment="记录创建时间"
+            )
+        elif not to_compact:
+            batch.alter_column(
+                "created_at",
+                existing_type=sa.DateTime(),
+                nullable=False,
+                server_default=sa.func.now(),
+                existing_comment="记录创建时间"
+            )
+    return True
@@ -0,0 +1,179 @@
+"""
+设备请求防重放缓存
+记录时间窗口内已接受的 (device_id, 签名)，拒绝窗口内重复提交的已签名请求
+
+- 内存后端：按到达时间划分为固定时长的桶，每个桶一个集合；
+  查询只检查窗口内固定数量的桶（O(1)），过期时整桶丢弃，内存只与窗口内的请求量相关
+- Redis 后端（可选，多进程/多实例部署）：SET NX EX，过期由 Redis 负责
+- 签名不覆盖 X-Timestamp（v1 签名覆盖读数时间戳，v2/二进制帧覆盖请求体），
+  因此以签名本身为键，而不是按 X-Timestamp 分桶
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Set, Tuple
+
+from app.core.config import settings
+
+
+class MemoryReplayCache:
+    """进程内防重放缓存（轮转时间桶）"""
+
+    def __init__(
+        self,
+        window_seconds: int,
+        bucket_seconds: int,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        # 窗口内的桶数 + 当前未满的桶
+        self.bucket_count = -(-window_seconds // bucket_seconds) + 1
+        self._clock = clock
+        self._buckets: Deque[Tuple[int, Set[Tuple[str, str]]]] = deque()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def seen(self, device_id: str, signature: str) -> bool:
+        """
+        请求是否已在窗口内出现过（只读，可在任何数据库操作之前调用）
+
+        Args:
+            device_id: 设备ID
+            signature: 请求签名
+
+        Returns:
+            是否为重放请求
+        """
+        key = (device_id, signature)
+        with self._lock:
+            self._rotate()
+            if self._contains(key):
+                self.rejected += 1
+                return True
+            return False
+
+    def add(self, device_id: str, signature: str) -> bool:
+        """
+        记录已通过验证的请求（原子操作，并发的相同请求只有一个能成功）
+
+        Args:
+            device_id: 设备ID
+            signature: 请求签名
+
+        Returns:
+            是否为首次出现（False 表示重放）
+        """
+        key = (device_id, signature)
+        with self._lock:
+            self._rotate()
+            if self._contains(key):
+                self.rejected += 1
+                return False
+            self._buckets[-1][1].add(key)
+            return True
+
+    def clear(self) -> None:
+        """清空缓存和统计"""
+        with self._lock:
+            self._buckets.clear()
+            self.rejected = 0
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        with self._lock:
+            return {
+                "buckets": len(self._buckets),
+                "entries": sum(len(keys) for _, keys in self._buckets),
+                "rejected": self.rejected,
+            }
+
+    def _contains(self, key: Tuple[str, str]) -> bool:
+        return any(key in keys for _, keys in self._buckets)
+
+    def _rotate(self) -> None:
+        index = int(self._clock() // self.bucket_seconds)
+        # 整桶过期，不逐条清理
+        while self._buckets and self._buckets[0][0] <= index - self.bucket_count:
+            self._buckets.popleft()
+        if not self._buckets or self._buckets[-1][0] != index:
+            self._buckets.append((index, set()))
+
+
+class RedisReplayCache:
+    """基于 Redis 的共享防重放缓存（需要安装 redis 包）"""
+
+    def __init__(self, url: str, window_seconds: int, prefix: str = "replay:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "REPLAY_CACHE_BACKEND=redis requires the 'redis' package (pip install redis)"
+            ) from e
+        self._client = redis.Redis.from_url(url)
+        self.window_seconds = window_seconds
+        self.prefix = prefix
+        self.rejected = 0
+
+    def seen(self, device_id: str, signature: str) -> bool:
+        """请求是否已在窗口内出现过"""
+        if self._client.exists(self._key(device_id, signature)):
+            self.rejected += 1
+            return True
+        return False
+
+    def add(self, device_id: str, signature: str) -> bool:
+        """记录已通过验证的请求，返回是否为首次出现"""
+        added = self._client.set(
+            self._key(device_id, signature), 1, nx=True, ex=self.window_seconds
+        )
+        if not added:
+            self.rejected += 1
+        return bool(added)
+
+    def clear(self) -> None:
+        """清空本实例的统计（共享数据由 Redis 过期）"""
+        self.rejected = 0
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        return {"rejected": self.rejected}
+
+    def _key(self, device_id: str, signature: str) -> str:
+        return f"{self.prefix}{device_id}:{signature}"
+
+
+class DisabledReplayCache:
+    """关闭防重放时使用的空实现"""
+
+    def seen(self, device_id: str, signature: str) -> bool:
+        return False
+
+    def add(self, device_id: str, signature: str) -> bool:
+        return True
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+def create_replay_cache():
+    """
+    按配置创建防重放缓存
+
+    Returns:
+        防重放缓存实例
+    """
+    if not settings.REPLAY_CACHE_ENABLED:
+        return DisabledReplayCache()
+    # 时间戳允许 ±容差，同一请求最长在 2 倍容差内都可能通过时间戳校验
+    window_seconds = settings.DEVICE_TIMESTAMP_TOLERANCE_SECONDS * 2
+    if settings.REPLAY_CACHE_BACKEND == "redis":
+        return RedisReplayCache(settings.REPLAY_CACHE_REDIS_URL, window_seconds)
+    return MemoryReplayCache(window_seconds, settings.REPLAY_CACHE_BUCKET_SECONDS)
+
+
+# 全局防重放缓存实例
+replay_cache = create_replay_cache()
@@ -0,0 +1,70 @@
+"""
+数据库结构版本检查
+启动时只查询一次 alembic_version，与代码期望的迁移版本比对，不一致时拒绝启动，
+不再在每次启动时执行 create_all（逐表检查元数据，多 worker 滚动发布时拖慢启动）
+
+建表/升级需显式执行：
+    python scripts/init_db.py      # 新库：建表并标记为最新版本
+    alembic upgrade head           # 已有库：执行迁移
+"""
+from typing import Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+# 代码期望的数据库结构版本（alembic head），新增迁移时同步修改
+SCHEMA_REVISION = "010"
+
+
+class SchemaVersionError(RuntimeError):
+    """数据库结构版本与代码不一致"""
+
+
+def get_schema_revision(engine: Engine) -> Optional[str]:
+    """
+    查询数据库当前的迁移版本
+
+    Args:
+        engine: 数据库引擎
+
+    Returns:
+        版本号，未执行过迁移（没有 alembic_version 表）时返回 None
+
+    Raises:
+        DBAPIError: 数据库无法连接或查询失败（权限不足等）
+    """
+    # 只有表不存在才视为"未执行迁移"；连接失败、权限不足等错误直接抛出
+    with engine.connect() as conn:
+        if not inspect(conn).has_table("alembic_version"):
+            return None
+        versions = conn.execute(text("SELECT version_num FROM alembic_version")).scalars().all()
+    return ",".join(sorted(versions)) or None
+
+
+def check_schema_version(engine: Engine, expected: str = SCHEMA_REVISION) -> str:
+    """
+    检查数据库迁移版本是否与代码一致
+
+    Args:
+        engine: 数据库引擎
+        expected: 期望的版本号
+
+    Returns:
+        数据库当前版本号
+
+    Raises:
+        SchemaVersionError: 未执行迁移或版本不一致
+        OperationalError: 数据库无法连接
+    """
+    revision = get_schema_revision(engine)
+    if revision is None:
+        raise SchemaVersionError(
+            f"database has no alembic_version (expected revision {expected}), "
+            f"run 'python scripts/init_db.py' for a new database or 'alembic upgrade head'"
+        )
+    if revision != expected:
+        raise SchemaVersionError(
+            f"database schema revision {revision} does not match application revision {expected}, "
+            f"run 'alembic upgrade head' (or deploy the matching application version)"
+        )
+    return revision
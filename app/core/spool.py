@@ -0,0 +1,315 @@
+"""
+上传数据本地 spool（预写日志）
+数据库不可用时，已通过认证的读数追加写入本地分段日志并向设备确认"已存储"，
+数据库恢复后由后台任务按写入顺序批量回放
+
+文件格式：
+    目录下按序号命名的分段文件 {seq:012d}.spool，只追加写入
+    每条记录 40 字节（小端序）：
+        I 上传设备(devices.id) | I package_id | d 最高温度 | d 平均湿度 | I 超阈值时间 | q 时间戳 | I CRC32
+    CRC32 覆盖前 36 字节；校验失败或末尾不完整（写入中断）的记录在回放时跳过并计数
+
+- 写入：追加后 flush + fsync，返回即已落盘；当前分段超过 SPOOL_SEGMENT_BYTES 后切换新分段
+- 回放：先切换当前分段，再按序号依次回放已关闭的分段，整段写入成功后删除；
+  中途因数据库不可用失败的分段下次从头回放，依赖幂等写入（唯一索引）保证不产生重复记录；
+  因其他错误（数据本身无法写入）失败的批次逐条重试，仍失败的读数移入死信文件 dead-letter.bin
+  （格式与分段相同，不自动回放），不阻塞后续回放
+- 多进程（多个 uvicorn worker 共用目录）：写入中的分段由写入进程持有 flock 排它锁，
+  回放只处理能获得锁的（已关闭的）分段，并在回放期间持有锁；分段的创建和选取在目录锁 .lock 内进行，
+  序号不会冲突。Windows 没有 flock，只支持单进程部署
+"""
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from itertools import groupby
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from app.core.config import settings
+from app.core.database import DATABASE_UNAVAILABLE_ERRORS
+from app.utils.binary_frame import FrameReading
+
+
+_RECORD = struct.Struct("<IIddIq")
+_CRC = struct.Struct("<I")
+
+RECORD_SIZE = _RECORD.size + _CRC.size
+SEGMENT_SUFFIX = ".spool"
+LOCK_FILE = ".lock"
+DEAD_LETTER_FILE = "dead-letter.bin"
+
+
+def _lock(f: BinaryIO, blocking: bool = True) -> bool:
+    """对打开的文件加排它锁（进程退出时自动释放），非阻塞模式下已被锁定时返回 False"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+def _encode(readings: List, source_device_id: int) -> bytearray:
+    """将读数编码为带 CRC 的记录"""
+    buffer = bytearray()
+    for r in readings:
+        payload = _RECORD.pack(
+            source_device_id, r.package_id, r.max_temperature, r.avg_humidity,
+            r.over_threshold_time, r.timestamp
+        )
+        buffer += payload
+        buffer += _CRC.pack(zlib.crc32(payload))
+    return buffer
+
+
+class IngestSpool:
+    """分段只追加的上传数据 spool"""
+
+    def __init__(self, directory: str, segment_bytes: int, fsync: bool = True):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._active = None
+        self._active_size = 0
+        self.appended = 0
+        self.replayed = 0
+        self.corrupt = 0
+        self.dead_lettered = 0
+        self.replay_failures = 0
+        self.last_error: Optional[str] = None
+
+    def append(self, readings: List, source_device_id: int) -> int:
+        """
+        追加读数（返回时已落盘）
+
+        Args:
+            readings: 具有 PackageUploadRequest 字段属性的读数
+            source_device_id: 上传设备（devices.id）
+
+        Returns:
+            追加的记录数
+        """
+        buffer = _encode(readings, source_device_id)
+        with self._lock:
+            if self._active is None or self._active_size >= self.segment_bytes:
+                self._open_segment()
+            self._active.write(buffer)
+            self._active.flush()
+            if self.fsync:
+                os.fsync(self._active.fileno())
+            self._active_size += len(buffer)
+            self.appended += len(readings)
+        return len(readings)
+
+    def replay(
+        self,
+        writer: Callable[[List[FrameReading], int], None],
+        batch_size: int = 500,
+        retryable: Tuple[Type[BaseException], ...] = DATABASE_UNAVAILABLE_ERRORS
+    ) -> int:
+        """
+        按写入顺序回放已关闭的分段（其他进程正在写入或回放的分段跳过）
+
+        Args:
+            writer: 写入函数，参数为 (读数列表, 上传设备)，失败时抛出异常
+            batch_size: 每批最大读数数量
+            retryable: 可重试的异常（数据库不可用），抛出时中止回放、保留分段；其他异常的读数移入死信文件
+
+        Returns:
+            本次回放的读数数量（未完成的分段不计入，含移入死信文件的读数）
+        """
+        with self._replay_lock:
+            with self._lock:
+                self._close_segment()
+            claimed = self._claim_segments()
+
+            total = 0
+            try:
+                for path, handle in claimed:
+                    try:
+                        count = 0
+                        for source_device_id, batch in self._read_batches(path, batch_size):
+                            self._write_batch(writer, batch, source_device_id, retryable)
+                            count += len(batch)
+                    except Exception as e:
+                        self.replay_failures += 1
+                        self.last_error = str(e)
+                        raise
+                    # 先删除再释放分段锁，其他进程不会再选中该分段
+                    path.unlink()
+                    handle.close()
+                    self.replayed += count
+                    total += count
+            finally:
+                for _, handle in claimed:
+                    handle.close()
+            self.last_error = None
+            return total
+
+    def _write_batch(
+        self,
+        writer: Callable[[List[FrameReading], int], None],
+        batch: List[FrameReading],
+        source_device_id: int,
+        retryable: Tuple[Type[BaseException], ...]
+    ) -> None:
+        """写入一批读数；非数据库不可用的失败逐条重试，仍失败的读数移入死信文件"""
+        try:
+            writer(batch, source_device_id)
+            return
+        except retryable:
+            raise
+        except Exception as e:
+            self.last_error = str(e)
+        for reading in batch:
+            try:
+                writer([reading], source_device_id)
+            except retryable:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                self._dead_letter(reading, source_device_id)
+
+    def _dead_letter(self, reading: FrameReading, source_device_id: int) -> None:
+        """追加到死信文件（与分段格式相同，不自动回放）"""
+        with open(self.directory / DEAD_LETTER_FILE, "ab") as f:
+            f.write(_encode([reading], source_device_id))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self.dead_lettered += 1
+
+    def depth(self) -> int:
+        """spool 中待回放的记录数（按文件大小估算，包含损坏记录）"""
+        return sum(size for _, size in self._segment_sizes()) // RECORD_SIZE
+
+    def stats(self) -> Dict:
+        """spool 深度和累计统计"""
+        sizes = self._segment_sizes()
+        total_bytes = sum(size for _, size in sizes)
+        return {
+            "segments": len(sizes),
+            "bytes": total_bytes,
+            "depth": total_bytes // RECORD_SIZE,
+            "appended": self.appended,
+            "replayed": self.replayed,
+            "corrupt": self.corrupt,
+            "dead_lettered": self.dead_lettered,
+            "replay_failures": self.replay_failures,
+            "last_error": self.last_error,
+        }
+
+    def close(self) -> None:
+        """关闭当前分段"""
+        with self._lock:
+            self._close_segment()
+
+    def _read_batches(self, path: Path, batch_size: int) -> Iterator[Tuple[int, List[FrameReading]]]:
+        """流式读取分段，按连续的上传设备分组并切分批次（保持写入顺序）"""
+        for source_device_id, group in groupby(self._read_records(path), key=lambda item: item[0]):
+            batch = []
+            for _, reading in group:
+                batch.append(reading)
+                if len(batch) >= batch_size:
+                    yield source_device_id, batch
+                    batch = []
+            if batch:
+                yield source_device_id, batch
+
+    def _read_records(self, path: Path) -> Iterator[Tuple[int, FrameReading]]:
+        chunk_size = RECORD_SIZE * 1024
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if len(chunk) < chunk_size:
+                    # 末尾不完整的记录（写入中断）
+                    if len(chunk) % RECORD_SIZE:
+                        self.corrupt += 1
+                    chunk = chunk[:len(chunk) - len(chunk) % RECORD_SIZE]
+                view = memoryview(chunk)
+                for offset in range(0, len(view), RECORD_SIZE):
+                    payload = view[offset:offset + _RECORD.size]
+                    (crc,) = _CRC.unpack_from(view, offset + _RECORD.size)
+                    if zlib.crc32(payload) != crc:
+                        self.corrupt += 1
+                        continue
+                    device_id, package_id, temperature, humidity, over_time, timestamp = _RECORD.unpack(payload)
+                    yield device_id, FrameReading(package_id, temperature, humidity, over_time, timestamp)
+                if len(chunk) < chunk_size:
+                    return
+
+    @contextmanager
+    def _directory_lock(self) -> Iterator[None]:
+        """目录锁：多个进程创建分段、选取回放分段时互斥"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / LOCK_FILE, "ab") as f:
+            _lock(f)
+            yield
+
+    def _open_segment(self) -> None:
+        self._close_segment()
+        with self._directory_lock():
+            # 序号在目录锁内按现有分段计算（其他进程的分段同样计入）；
+            # 进程重启后不续写旧分段（末尾可能不完整），总是创建新分段
+            existing = [int(path.stem) for path in self._segments()]
+            path = self.directory / f"{max(existing, default=0) + 1:012d}{SEGMENT_SUFFIX}"
+            self._active = open(path, "xb")
+            # 写入期间持有分段锁，其他进程的回放跳过该分段
+            _lock(self._active)
+        self._active_size = 0
+
+    def _claim_segments(self) -> List[Tuple[Path, BinaryIO]]:
+        """选取可回放的分段并持有其锁（写入中或其他进程回放中的分段无法获得锁，跳过）"""
+        if not self.directory.exists():
+            return []
+        claimed = []
+        with self._directory_lock():
+            for path in self._segments():
+                try:
+                    handle = open(path, "rb")
+                except FileNotFoundError:
+                    continue
+                if _lock(handle, blocking=False):
+                    claimed.append((path, handle))
+                else:
+                    handle.close()
+        return claimed
+
+    def _close_segment(self) -> None:
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+            self._active_size = 0
+
+    def _segments(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+
+    def _segment_sizes(self) -> List[Tuple[Path, int]]:
+        sizes = []
+        for path in self._segments():
+            try:
+                sizes.append((path, path.stat().st_size))
+            except FileNotFoundError:
+                # 回放中刚被删除
+                continue
+        return sizes
+
+
+# 全局 spool 实例（首次写入时才创建目录）
+ingest_spool = IngestSpool(
+    settings.SPOOL_DIR,
+    settings.SPOOL_SEGMENT_BYTES,
+    fsync=settings.SPOOL_FSYNC
+)
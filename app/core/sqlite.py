@@ -0,0 +1,228 @@
+"""
+SQLite 嵌入式数据库模式（边缘部署，无需 MySQL）
+DATABASE_URL 为 sqlite 时使用
+
+- 每个连接建立时设置 WAL 和读写相关 pragma（synchronous、mmap_size、cache_size）
+- 单写者队列：SQLite 同一时间只允许一个写事务，其他写入方在 busy handler 中轮询等待，并发上传时
+  容易超时报 database is locked；进程内改为写事务在第一条写语句前按到达顺序排队，提交/回滚完成后放行下一个，
+  读查询（WAL 下不阻塞）不排队。跨进程的写冲突仍由 busy_timeout 处理
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+
+
+# 需要写锁的语句
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+
+
+class SQLiteWriteQueue:
+    """进程内 SQLite 单写者队列（按到达顺序放行）"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._condition = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned = set()
+        self.waiting = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def acquire(self) -> None:
+        """
+        排队获取写权限
+
+        Raises:
+            sqlalchemy.exc.TimeoutError: 排队超时（按数据库不可用处理）
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._condition:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self.waiting += 1
+            try:
+                while self._serving != ticket:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        # 放弃的号在轮到时直接跳过
+                        self._abandoned.add(ticket)
+                        self.timeouts += 1
+                        raise PoolTimeoutError(
+                            f"SQLite write queue timeout after {self.timeout}s ({self.waiting - 1} writers ahead)"
+                        )
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            waited = time.monotonic() - start
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def release(self) -> None:
+        """释放写权限，放行下一个排队者"""
+        with self._condition:
+            self._serving += 1
+            while self._serving in self._abandoned:
+                self._abandoned.remove(self._serving)
+                self._serving += 1
+            self._condition.notify_all()
+
+    def install(self, engine: Engine) -> None:
+        """
+        为引擎注册写事务排队：第一条写语句执行前排队
+
+        释放由 connection_factory() 创建的连接在 commit/rollback/close 完成后执行
+        （SQLAlchemy 的 commit 事件在实际提交之前触发，此时放行下一个写入方仍会遇到写锁）
+
+        Args:
+            engine: SQLite 引擎（连接需由 connection_factory() 创建）
+        """
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+
+    def connection_factory(self) -> type:
+        """
+        创建 sqlite3 连接类（传给 sqlite3.connect 的 factory 参数），事务结束后释放写权限
+
+        Returns:
+            sqlite3.Connection 子类
+        """
+        queue = self
+
+        class QueuedConnection(sqlite3.Connection):
+            holds_write_queue = False
+
+            def commit(self):
+                try:
+                    super().commit()
+                finally:
+                    self._release_write_queue()
+
+            def rollback(self):
+                try:
+                    super().rollback()
+                finally:
+                    self._release_write_queue()
+
+            def close(self):
+                try:
+                    super().close()
+                finally:
+                    self._release_write_queue()
+
+            def _release_write_queue(self):
+                if self.holds_write_queue:
+                    self.holds_write_queue = False
+                    queue.release()
+
+        return QueuedConnection
+
+    def stats(self) -> Dict:
+        """排队统计"""
+        with self._condition:
+            return {
+                "timeout_seconds": self.timeout,
+                "waiting": self.waiting,
+                "acquired": self.acquired,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.acquired * 1000, 3) if self.acquired else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+    def reset_stats(self) -> None:
+        """清空统计"""
+        with self._condition:
+            self.acquired = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        connection = cursor.connection
+        if connection.holds_write_queue:
+            return
+        if statement.lstrip()[:7].upper().startswith(_WRITE_PREFIXES):
+            self.acquire()
+            connection.holds_write_queue = True
+
+
+# 全局写队列（进程内所有 SQLite 引擎共用）
+sqlite_write_queue = SQLiteWriteQueue(settings.SQLITE_WRITE_QUEUE_TIMEOUT_SECONDS)
+
+
+def _apply_pragmas(dbapi_connection, connection_record) -> None:
+    """连接建立时设置 pragma"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def create_sqlite_engine(url: str, **options) -> Engine:
+    """
+    创建 SQLite 引擎
+
+    Args:
+        url: sqlite 连接 URL
+        **options: 传给 create_engine 的连接池等参数（内存数据库忽略连接池参数，使用单连接）
+
+    Returns:
+        引擎
+    """
+    database = make_url(url).database
+    if database in (None, "", ":memory:"):
+        # 内存数据库只存在于单个连接中
+        options = {"poolclass": StaticPool, "echo": options.get("echo", False)}
+    else:
+        Path(database).parent.mkdir(parents=True, exist_ok=True)
+
+    connect_args = {
+        "check_same_thread": False,  # 连接池中的连接会被不同线程使用
+        "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+    }
+    if settings.SQLITE_WRITE_QUEUE_ENABLED:
+        connect_args["factory"] = sqlite_write_queue.connection_factory()
+
+    engine = create_engine(url, connect_args=connect_args, **options)
+    event.listen(engine, "connect", _apply_pragmas)
+    if settings.SQLITE_WRITE_QUEUE_ENABLED:
+        sqlite_write_queue.install(engine)
+    return engine
+
+
+def sqlite_status(engine: Engine) -> Dict:
+    """
+    当前生效的 pragma 和写队列统计
+
+    Args:
+        engine: SQLite 引擎
+
+    Returns:
+        状态信息
+    """
+    with engine.connect() as conn:
+        pragmas = {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ("journal_mode", "synchronous", "mmap_size", "cache_size", "busy_timeout")
+        }
+    return {
+        "pragmas": pragmas,
+        "write_queue": sqlite_write_queue.stats() if settings.SQLITE_WRITE_QUEUE_ENABLED else None,
+    }
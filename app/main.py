@@ -1,11 +1,19 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from loguru import logger
 
+from app.core.admission import AdmissionControlMiddleware, admission_gates
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import DATABASE_UNAVAILABLE_ERRORS, engine, warm_up_pools
+from app.core.record_storage import check_record_storage
+from app.core.schema_version import SchemaVersionError, check_schema_version
+from app.core.spool import ingest_spool
 from app.api.v1.router import api_router
+from app.services.ingest_listener import ingest_listener
+from app.services.spool_service import run_spool_replayer
 from app.utils.logger import setup_logger
 
 
@@ -20,16 +28,54 @@ async def lifespan(app: FastAPI):
     logger.info(f"🔧 Debug Mode: {settings.DEBUG}")
     logger.info("=" * 60)
     
-    # 初始化数据库
+    # 检查数据库结构版本（建表/迁移由 scripts/init_db.py、alembic upgrade head 显式执行）
+    if settings.SCHEMA_CHECK_ENABLED:
+        try:
+            revision = await asyncio.to_thread(check_schema_version, engine)
+            # 列类型与 COMPACT_RECORD_STORAGE 不一致时读数会被按错误的编码解读
+            storage = await asyncio.to_thread(check_record_storage, engine)
+            logger.info(f"✅ Database schema revision: {revision}, record storage: {storage}")
+        except SchemaVersionError as e:
+            logger.error(f"❌ {str(e)}")
+            raise
+        except DATABASE_UNAVAILABLE_ERRORS as e:
+            # 数据库暂不可用时仍然启动（上传数据写入本地 spool）
+            logger.warning(f"Database unavailable, schema check skipped: {str(e)}")
+    
+    # 预热连接池，部署后第一波请求不承担建连开销
     try:
-        init_db()
-        logger.info("✅ Database initialized successfully")
+        warmed = await asyncio.to_thread(warm_up_pools)
+        if warmed:
+            logger.info(f"🔥 Database pool warmed up: {warmed}")
     except Exception as e:
-        logger.error(f"❌ Database initialization failed: {str(e)}")
+        logger.warning(f"Database pool warmup failed: {str(e)}")
+    
+    # 数据库恢复后回放本地 spool 中的读数
+    replayer = None
+    if settings.SPOOL_ENABLED:
+        replayer = asyncio.create_task(run_spool_replayer(settings.SPOOL_REPLAY_INTERVAL_SECONDS))
+        logger.info(f"📦 Ingest spool enabled, pending readings: {ingest_spool.depth()}")
+    
+    # UDP/TCP 轻量上传监听
+    if settings.INGEST_LISTENER_ENABLED:
+        await ingest_listener.start(
+            settings.INGEST_LISTENER_HOST,
+            settings.INGEST_LISTENER_UDP_PORT or None,
+            settings.INGEST_LISTENER_TCP_PORT or None
+        )
     
     yield
     
     # 关闭时执行
+    if settings.INGEST_LISTENER_ENABLED:
+        await ingest_listener.stop()
+    if replayer is not None:
+        replayer.cancel()
+        try:
+            await replayer
+        except asyncio.CancelledError:
+            pass
+        ingest_spool.close()
     logger.info("🛑 Shutting down application")
 
 
@@ -44,6 +90,14 @@ app = FastAPI(
     openapi_url=f"/api/{settings.API_VERSION}/openapi.json"
 )
 
+# 准入控制（先注册，位于 CORS 内层，拒绝响应同样带跨域头）
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        gates=admission_gates,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS
+    )
+
 # 配置 CORS（跨域资源共享）
 app.add_middleware(
     CORSMiddleware,
@@ -1,5 +1,5 @@
-from .package import PackageRecord
+from .package import PackageRecord, PackageSeriesChunk, PackageSeriesRollup, RecordSnapshot
 from .user import User, UserPackage
 from .device import Device
 
-__all__ = ["PackageRecord", "User", "UserPackage", "Device"]
+__all__ = ["PackageRecord", "PackageSeriesChunk", "PackageSeriesRollup", "RecordSnapshot", "User", "UserPackage", "Device"]
@@ -2,7 +2,8 @@
 设备模型
 用于管理 ESP32 设备
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from typing import NamedTuple, Optional
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, SmallInteger, Text
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -16,6 +17,14 @@ class Device(Base):
     device_name = Column(String(100), nullable=True, comment="设备名称")
     secret_key = Column(String(64), nullable=False, comment="HMAC密钥（用于签名）")
     is_active = Column(Boolean, default=True, nullable=False, comment="是否激活")
+    signature_version = Column(
+        SmallInteger, default=1, server_default="1", nullable=False,
+        comment="签名版本（1: 字段拼接字符串; 2: 请求体原始字节）"
+    )
+    rate_limit_per_minute = Column(
+        Integer, nullable=True, comment="上传限流：每分钟请求数（为空使用全局配置，0 表示不限流）"
+    )
+    rate_limit_burst = Column(Integer, nullable=True, comment="上传限流：突发请求数（为空使用全局配置）")
     description = Column(Text, nullable=True, comment="设备描述")
     created_at = Column(DateTime, server_default=func.now(), nullable=False, comment="创建时间")
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False, comment="更新时间")
@@ -24,3 +33,30 @@ class Device(Base):
     def __repr__(self):
         return f"<Device(device_id='{self.device_id}', name='{self.device_name}')>"
 
+
+class DeviceSnapshot(NamedTuple):
+    """
+    设备快照（与会话无关的只读副本）
+    
+    字段与认证相关的 Device 字段一致，用于数据库不可用时以最近一次查询结果完成设备认证
+    """
+    id: int
+    device_id: str
+    secret_key: str
+    is_active: bool
+    signature_version: int
+    rate_limit_per_minute: Optional[int]
+    rate_limit_burst: Optional[int]
+    
+    @classmethod
+    def from_device(cls, device) -> "DeviceSnapshot":
+        """从 ORM 对象创建快照"""
+        return cls(
+            id=device.id,
+            device_id=device.device_id,
+            secret_key=device.secret_key,
+            is_active=device.is_active,
+            signature_version=device.signature_version,
+            rate_limit_per_minute=device.rate_limit_per_minute,
+            rate_limit_burst=device.rate_limit_burst
+        )
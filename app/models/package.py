@@ -1,6 +1,28 @@
-from sqlalchemy import Column, Integer, Float, BigInteger, DateTime, Index
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import Column, Integer, Float, BigInteger, DateTime, Double, Index, LargeBinary, SmallInteger
+from sqlalchemy.dialects import mysql
 from sqlalchemy.sql import func
+from app.core.config import settings
 from app.core.database import Base
+from app.models.types import CentiUnits, CompactTimestamp, CompactSeconds
+
+
+# 紧凑存储模式：温湿度以 SMALLINT 百分位定点数存储，Python 侧仍然是 float
+if settings.COMPACT_RECORD_STORAGE:
+    _MeasurementType = CentiUnits
+    _TimestampType = CompactTimestamp
+    _SecondsType = CompactSeconds
+    _created_at_options = (
+        dict(server_default=func.now(), nullable=False)
+        if settings.RECORD_CREATED_AT_ENABLED
+        else dict(nullable=True)
+    )
+else:
+    _MeasurementType = Float
+    _TimestampType = BigInteger
+    _SecondsType = Integer
+    _created_at_options = dict(server_default=func.now(), nullable=False)
 
 
 class PackageRecord(Base):
@@ -9,26 +31,37 @@ class PackageRecord(Base):
     __tablename__ = "package_records"
     
     # 主键
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True, comment="记录ID")
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="记录ID")
     
     # 业务字段
-    package_id = Column(Integer, nullable=False, index=True, comment="包裹ID")
-    max_temperature = Column(Float, nullable=False, comment="最高温度(°C)")
-    avg_humidity = Column(Float, nullable=False, comment="平均湿度(%)")
-    over_threshold_time = Column(Integer, nullable=False, comment="超阈值时间(秒)")
-    timestamp = Column(BigInteger, nullable=False, comment="Unix时间戳")
+    package_id = Column(Integer, nullable=False, comment="包裹ID")
+    max_temperature = Column(_MeasurementType, nullable=False, comment="最高温度(°C)")
+    avg_humidity = Column(_MeasurementType, nullable=False, comment="平均湿度(%)")
+    over_threshold_time = Column(_SecondsType, nullable=False, comment="超阈值时间(秒)")
+    timestamp = Column(_TimestampType, nullable=False, comment="Unix时间戳")
+    source_device_id = Column(
+        Integer, nullable=False, default=0, server_default="0",
+        comment="上传设备（devices.id，0 表示未知/历史数据）"
+    )
     
     # 系统字段
     created_at = Column(
         DateTime, 
-        server_default=func.now(), 
-        nullable=False,
-        comment="记录创建时间"
+        comment="记录创建时间",
+        **_created_at_options
     )
     
     # 创建复合索引（用于查询优化）
     __table_args__ = (
-        Index('idx_package_timestamp', 'package_id', 'timestamp'),
+        # 历史查询覆盖索引：按包裹倒序分页/热数据窗口只扫描索引，不回表
+        # （MySQL 不支持 INCLUDE，查询列直接追加在键尾）
+        Index(
+            'idx_package_history',
+            package_id, timestamp.desc(), id.desc(),
+            max_temperature, avg_humidity, over_threshold_time, source_device_id, created_at
+        ),
+        # 幂等键：同一设备对同一包裹同一时刻的读数只保存一次（设备重试不产生重复记录）
+        Index('uk_package_timestamp_device', 'package_id', 'timestamp', 'source_device_id', unique=True),
         {'comment': '包裹环境监测记录表'}
     )
     
@@ -38,3 +71,106 @@ class PackageRecord(Base):
             f"max_temperature={self.max_temperature}, avg_humidity={self.avg_humidity}, "
             f"over_threshold_time={self.over_threshold_time}, timestamp={self.timestamp})>"
         )
+
+
+class RecordSnapshot(NamedTuple):
+    """
+    包裹记录快照（与会话无关的只读副本）
+    
+    字段与 PackageRecord 一致，可直接用于响应模型；
+    用于冷归档、封存序列块和热数据窗口缓存返回的记录
+    """
+    id: int
+    package_id: int
+    max_temperature: float
+    avg_humidity: float
+    over_threshold_time: int
+    timestamp: int
+    created_at: Optional[datetime]
+    source_device_id: int = 0
+    
+    @classmethod
+    def from_record(cls, record) -> "RecordSnapshot":
+        """从 ORM 对象或查询结果行创建快照"""
+        return cls(
+            id=record.id,
+            package_id=record.package_id,
+            max_temperature=record.max_temperature,
+            avg_humidity=record.avg_humidity,
+            over_threshold_time=record.over_threshold_time,
+            timestamp=record.timestamp,
+            created_at=record.created_at,
+            source_device_id=record.source_device_id
+        )
+
+
+class PackageSeriesChunk(Base):
+    """已封存包裹的时间序列压缩块模型"""
+    
+    __tablename__ = "package_series_chunks"
+    
+    # 主键
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="块ID")
+    
+    # 业务字段
+    package_id = Column(Integer, nullable=False, comment="包裹ID")
+    seq = Column(Integer, nullable=False, comment="块序号（按时间升序）")
+    record_count = Column(Integer, nullable=False, comment="块内记录数")
+    start_timestamp = Column(BigInteger, nullable=False, comment="块内最早时间戳")
+    end_timestamp = Column(BigInteger, nullable=False, comment="块内最晚时间戳")
+    encoding = Column(SmallInteger, nullable=False, comment="编码版本")
+    data = Column(
+        LargeBinary().with_variant(mysql.MEDIUMBLOB(), "mysql"),
+        nullable=False,
+        comment="差分编码 + zlib 压缩的序列数据"
+    )
+    
+    # 系统字段
+    created_at = Column(
+        DateTime, 
+        server_default=func.now(), 
+        nullable=False,
+        comment="封存时间"
+    )
+    
+    __table_args__ = (
+        Index('uk_package_seq', 'package_id', 'seq', unique=True),
+        {'comment': '已封存包裹时间序列块表'}
+    )
+    
+    def __repr__(self):
+        return (
+            f"<PackageSeriesChunk(package_id={self.package_id}, seq={self.seq}, "
+            f"record_count={self.record_count}, bytes={len(self.data or b'')})>"
+        )
+
+
+class PackageSeriesRollup(Base):
+    """包裹时间序列预聚合模型（多分辨率金字塔，每个层级按固定时长分桶）"""
+    
+    __tablename__ = "package_series_rollups"
+    
+    # 主键
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="聚合ID")
+    
+    # 业务字段
+    package_id = Column(Integer, nullable=False, comment="包裹ID")
+    level = Column(Integer, nullable=False, comment="层级（桶时长，秒）")
+    bucket_start = Column(BigInteger, nullable=False, comment="桶起始时间戳")
+    record_count = Column(Integer, nullable=False, comment="桶内记录数")
+    min_temperature = Column(Float, nullable=False, comment="桶内最高温度的最小值(°C)")
+    max_temperature = Column(Float, nullable=False, comment="桶内最高温度的最大值(°C)")
+    # 求和列使用双精度（MySQL FLOAT 为单精度，大桶累加后平均值失真）
+    sum_temperature = Column(Double, nullable=False, comment="桶内最高温度之和（用于计算平均值）")
+    sum_humidity = Column(Double, nullable=False, comment="桶内平均湿度之和（用于计算平均值）")
+    
+    __table_args__ = (
+        Index('uk_package_level_bucket', 'package_id', 'level', 'bucket_start', unique=True),
+        {'comment': '包裹时间序列预聚合表'}
+    )
+    
+    def __repr__(self):
+        return (
+            f"<PackageSeriesRollup(package_id={self.package_id}, level={self.level}, "
+            f"bucket_start={self.bucket_start}, record_count={self.record_count})>"
+        )
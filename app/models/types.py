@@ -0,0 +1,74 @@
+"""
+自定义列类型
+用于 package_records 的紧凑存储编码
+"""
+from typing import Optional
+from sqlalchemy import BigInteger, Integer, SmallInteger
+from sqlalchemy.dialects import mysql
+from sqlalchemy.types import TypeDecorator
+
+
+# 定点数缩放系数（百分位，与签名中的 .2f 格式一致）
+CENTI_SCALE = 100
+
+
+def to_centi(value: Optional[float]) -> Optional[int]:
+    """
+    浮点数转换为百分位定点整数
+
+    先按 .2f 格式化再缩放，保证与 build_signature_data 的取整结果一致
+
+    Args:
+        value: 浮点数值
+
+    Returns:
+        定点整数
+    """
+    if value is None:
+        return None
+    return round(float(f"{value:.2f}") * CENTI_SCALE)
+
+
+def from_centi(value: Optional[int]) -> Optional[float]:
+    """
+    百分位定点整数转换为浮点数
+
+    Args:
+        value: 定点整数（也可以是数据库返回的 Decimal 聚合值）
+
+    Returns:
+        浮点数值
+    """
+    if value is None:
+        return None
+    return float(value) / CENTI_SCALE
+
+
+class CentiUnits(TypeDecorator):
+    """
+    百分位定点数列类型
+
+    数据库中以 SMALLINT 存储（范围 ±327.67），Python 侧透明地读写 float
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return to_centi(value)
+
+    def process_result_value(self, value, dialect):
+        return from_centi(value)
+
+    def process_literal_param(self, value, dialect):
+        return str(to_centi(value))
+
+    @property
+    def python_type(self):
+        return float
+
+
+# 紧凑存储的时间戳列类型：MySQL 使用 INT UNSIGNED（4字节，可表示到 2106 年）
+CompactTimestamp = BigInteger().with_variant(mysql.INTEGER(unsigned=True), "mysql")
+
+# 紧凑存储的超阈值时间列类型
+CompactSeconds = Integer().with_variant(mysql.INTEGER(unsigned=True), "mysql")
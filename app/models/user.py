@@ -9,7 +9,7 @@ class User(Base):
     __tablename__ = "users"
     
     # 主键
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True, comment="用户ID")
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="用户ID")
     
     # 基础信息
     username = Column(String(50), unique=True, nullable=False, index=True, comment="用户名")
@@ -36,7 +36,6 @@ class User(Base):
     
     # 创建索引
     __table_args__ = (
-        Index('idx_username', 'username'),
         Index('idx_email', 'email'),
         {'comment': '用户表'}
     )
@@ -51,11 +50,11 @@ class UserPackage(Base):
     __tablename__ = "user_packages"
     
     # 主键
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True, comment="关联ID")
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="关联ID")
     
     # 关联字段
-    user_id = Column(Integer, nullable=False, index=True, comment="用户ID")
-    package_id = Column(Integer, nullable=False, index=True, comment="包裹ID")
+    user_id = Column(Integer, nullable=False, comment="用户ID")
+    package_id = Column(Integer, nullable=False, comment="包裹ID")
     
     # 包裹信息
     package_name = Column(String(100), nullable=True, comment="包裹名称")
@@ -81,9 +80,9 @@ class UserPackage(Base):
     
     # 创建索引和约束
     __table_args__ = (
-        Index('idx_user_id', 'user_id'),
-        Index('idx_package_id', 'package_id'),
         Index('uk_user_package', 'user_id', 'package_id', unique=True),
+        # 所有权校验/用户包裹列表覆盖索引
+        Index('idx_user_active_package', 'user_id', 'is_active', 'package_id'),
         {'comment': '用户包裹关联表'}
     )
     
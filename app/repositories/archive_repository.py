@@ -0,0 +1,349 @@
+"""
+冷归档数据访问层
+将热表中的历史记录按 包裹/月份 写入 gzip 压缩的 CSV 文件
+
+目录结构：
+    {base_dir}/{package_id}/{YYYY-MM}.{NNNN}.csv.gz   归档段（每次追加写入一个新段，写入后不再修改，段内按时间升序）
+    {base_dir}/{package_id}/manifest.json             各月份的段列表（文件名、记录数、时间范围、记录ID范围）
+
+早期版本每个月份只有一个 {YYYY-MM}.csv.gz 文件，读取时按一个段处理；
+早期版本的行没有 source_device_id 列，读取为 0
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+from app.models.package import RecordSnapshot
+
+
+ARCHIVE_COLUMNS = [
+    "id", "package_id", "max_temperature", "avg_humidity",
+    "over_threshold_time", "timestamp", "created_at", "source_device_id"
+]
+
+MANIFEST_FILE = "manifest.json"
+
+
+def month_key(timestamp: int) -> str:
+    """根据 Unix 时间戳计算归档月份（UTC）"""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m")
+
+
+class ArchiveRepository:
+    """冷归档数据访问层"""
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+
+    def has_archive(self, package_id: int) -> bool:
+        """
+        检查包裹是否存在归档数据
+
+        Args:
+            package_id: 包裹ID
+
+        Returns:
+            是否存在归档
+        """
+        return os.path.isfile(self._manifest_path(package_id))
+
+    def get_package_ids(self) -> List[int]:
+        """
+        获取全部存在归档数据的包裹ID
+
+        Returns:
+            包裹ID列表
+        """
+        if not os.path.isdir(self.base_dir):
+            return []
+        return [
+            int(name) for name in os.listdir(self.base_dir)
+            if name.isdigit() and self.has_archive(int(name))
+        ]
+
+    def append(self, package_id: int, records: Iterable) -> int:
+        """
+        追加归档记录（按月份分组，每组写入一个新的段文件，已归档的记录ID会被跳过，保证重复执行幂等）
+
+        段文件先写临时文件再原子重命名，全部写完后再更新 manifest；中途中断时未登记的段文件会在
+        重新执行时被同名覆盖，不会重复计数
+
+        Args:
+            package_id: 包裹ID
+            records: 具有 PackageRecord 字段属性的记录
+
+        Returns:
+            实际写入的记录数
+        """
+        by_month: Dict[str, list] = {}
+        for record in records:
+            by_month.setdefault(month_key(record.timestamp), []).append(record)
+        if not by_month:
+            return 0
+
+        os.makedirs(self._package_dir(package_id), exist_ok=True)
+        manifest = self._load_manifest(package_id)
+        written = 0
+
+        for month, month_records in by_month.items():
+            segments = self._month_segments(month, manifest.get(month))
+            existing_ids = self._archived_ids(package_id, segments, month_records)
+            new_records = sorted(
+                (r for r in month_records if r.id not in existing_ids),
+                key=lambda r: (r.timestamp, r.id)
+            )
+            if not new_records:
+                continue
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for r in new_records:
+                writer.writerow([
+                    r.id, r.package_id, r.max_temperature, r.avg_humidity,
+                    r.over_threshold_time, r.timestamp,
+                    r.created_at.isoformat() if r.created_at else "",
+                    r.source_device_id
+                ])
+
+            # 段文件名由 manifest 中已登记的段数决定，未登记的残留文件会被覆盖
+            filename = f"{month}.{len(segments):04d}.csv.gz"
+            path = os.path.join(self._package_dir(package_id), filename)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                    gz.write(buffer.getvalue().encode("utf-8"))
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_path, path)
+
+            segments.append({
+                "file": filename,
+                "count": len(new_records),
+                "min_timestamp": new_records[0].timestamp,
+                "max_timestamp": new_records[-1].timestamp,
+                "min_id": min(r.id for r in new_records),
+                "max_id": max(r.id for r in new_records),
+            })
+            manifest[month] = {
+                "count": sum(segment["count"] for segment in segments),
+                "min_timestamp": min(segment["min_timestamp"] for segment in segments),
+                "max_timestamp": max(segment["max_timestamp"] for segment in segments),
+                "segments": segments,
+            }
+            written += len(new_records)
+
+        self._save_manifest(package_id, manifest)
+        return written
+
+    def count(
+        self,
+        package_id: int,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> int:
+        """
+        统计归档记录数（完全落在范围内的段直接使用 manifest 计数）
+
+        Args:
+            package_id: 包裹ID
+            start_timestamp: 开始时间戳（可选）
+            end_timestamp: 结束时间戳（可选）
+
+        Returns:
+            记录数量
+        """
+        total = 0
+        for segment in self._segments(package_id, start_timestamp, end_timestamp):
+            if self._covered(segment, start_timestamp, end_timestamp):
+                total += segment["count"]
+            else:
+                total += sum(
+                    1 for r in self._read_segment(package_id, segment)
+                    if self._in_range(r.timestamp, start_timestamp, end_timestamp)
+                )
+        return total
+
+    def read_range(
+        self,
+        package_id: int,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> List[RecordSnapshot]:
+        """
+        读取时间范围内的归档记录（按时间倒序）
+
+        Args:
+            package_id: 包裹ID
+            start_timestamp: 开始时间戳（可选）
+            end_timestamp: 结束时间戳（可选）
+
+        Returns:
+            归档记录列表
+        """
+        records = []
+        for segment in self._segments(package_id, start_timestamp, end_timestamp):
+            records.extend(
+                r for r in self._read_segment(package_id, segment)
+                if self._in_range(r.timestamp, start_timestamp, end_timestamp)
+            )
+        records.sort(key=lambda r: (r.timestamp, r.id), reverse=True)
+        return records
+
+    def page(
+        self,
+        package_id: int,
+        skip: int,
+        limit: int,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> List[RecordSnapshot]:
+        """
+        分页读取归档记录（按时间倒序）
+
+        时间范围互不重叠的段组按 manifest 中的记录数跳过，只解压与当前页相交的段
+
+        Args:
+            package_id: 包裹ID
+            skip: 偏移量
+            limit: 返回数量限制
+            start_timestamp: 开始时间戳（可选）
+            end_timestamp: 结束时间戳（可选）
+
+        Returns:
+            归档记录列表
+        """
+        if limit <= 0:
+            return []
+        page: List[RecordSnapshot] = []
+        for group in self._segment_groups(self._segments(package_id, start_timestamp, end_timestamp)):
+            covered = all(self._covered(segment, start_timestamp, end_timestamp) for segment in group)
+            if covered and skip >= sum(segment["count"] for segment in group):
+                skip -= sum(segment["count"] for segment in group)
+                continue
+            records = [
+                r for segment in group for r in self._read_segment(package_id, segment)
+                if self._in_range(r.timestamp, start_timestamp, end_timestamp)
+            ]
+            if skip >= len(records):
+                skip -= len(records)
+                continue
+            records.sort(key=lambda r: (r.timestamp, r.id), reverse=True)
+            page.extend(records[skip:skip + limit - len(page)])
+            skip = 0
+            if len(page) >= limit:
+                break
+        return page
+
+    def _package_dir(self, package_id: int) -> str:
+        return os.path.join(self.base_dir, str(package_id))
+
+    def _manifest_path(self, package_id: int) -> str:
+        return os.path.join(self._package_dir(package_id), MANIFEST_FILE)
+
+    def _load_manifest(self, package_id: int) -> Dict[str, dict]:
+        path = self._manifest_path(package_id)
+        if not os.path.isfile(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_manifest(self, package_id: int, manifest: Dict[str, dict]) -> None:
+        # 先写临时文件再原子替换，避免中断时 manifest 损坏
+        path = self._manifest_path(package_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _month_segments(month: str, entry: Optional[dict]) -> List[dict]:
+        """月份的段列表（旧版 manifest 中每个月份只有一个 {month}.csv.gz 文件，记录ID范围未知）"""
+        if entry is None:
+            return []
+        if "segments" in entry:
+            return list(entry["segments"])
+        return [{
+            "file": f"{month}.csv.gz",
+            "count": entry["count"],
+            "min_timestamp": entry["min_timestamp"],
+            "max_timestamp": entry["max_timestamp"],
+            "min_id": None,
+            "max_id": None,
+        }]
+
+    def _segments(
+        self,
+        package_id: int,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> List[dict]:
+        """与时间范围相交的全部段"""
+        return [
+            segment
+            for month, entry in self._load_manifest(package_id).items()
+            for segment in self._month_segments(month, entry)
+            if self._overlaps(segment, start_timestamp, end_timestamp)
+        ]
+
+    @staticmethod
+    def _segment_groups(segments: List[dict]) -> List[List[dict]]:
+        """将时间范围重叠的段合并为一组，按时间倒序返回（组与组之间时间范围不重叠）"""
+        groups: List[List[dict]] = []
+        group_min = None
+        for segment in sorted(segments, key=lambda s: s["max_timestamp"], reverse=True):
+            if groups and segment["max_timestamp"] >= group_min:
+                groups[-1].append(segment)
+                group_min = min(group_min, segment["min_timestamp"])
+            else:
+                groups.append([segment])
+                group_min = segment["min_timestamp"]
+        return groups
+
+    def _archived_ids(self, package_id: int, segments: List[dict], records: list) -> Set[int]:
+        """只读取记录ID范围与待写入记录相交的段，返回其中已归档的记录ID"""
+        low = min(r.id for r in records)
+        high = max(r.id for r in records)
+        ids: Set[int] = set()
+        for segment in segments:
+            if segment["min_id"] is not None and (segment["max_id"] < low or segment["min_id"] > high):
+                continue
+            ids.update(r.id for r in self._read_segment(package_id, segment))
+        return ids
+
+    def _read_segment(self, package_id: int, segment: dict) -> List[RecordSnapshot]:
+        path = os.path.join(self._package_dir(package_id), segment["file"])
+        if not os.path.isfile(path):
+            return []
+        records = []
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                records.append(RecordSnapshot(
+                    id=int(row[0]),
+                    package_id=int(row[1]),
+                    max_temperature=float(row[2]),
+                    avg_humidity=float(row[3]),
+                    over_threshold_time=int(row[4]),
+                    timestamp=int(row[5]),
+                    created_at=datetime.fromisoformat(row[6]) if row[6] else None,
+                    source_device_id=int(row[7]) if len(row) > 7 else 0
+                ))
+        return records
+
+    @staticmethod
+    def _in_range(timestamp: int, start: Optional[int], end: Optional[int]) -> bool:
+        return (start is None or timestamp >= start) and (end is None or timestamp <= end)
+
+    @staticmethod
+    def _overlaps(entry: dict, start: Optional[int], end: Optional[int]) -> bool:
+        return (start is None or entry["max_timestamp"] >= start) and \
+            (end is None or entry["min_timestamp"] <= end)
+
+    @staticmethod
+    def _covered(entry: dict, start: Optional[int], end: Optional[int]) -> bool:
+        return (start is None or entry["min_timestamp"] >= start) and \
+            (end is None or entry["max_timestamp"] <= end)
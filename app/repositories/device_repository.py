@@ -1,10 +1,14 @@
 """
 设备数据访问层
 """
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime
-from app.models.device import Device
+from app.core.device_cache import device_cache
+from app.models.device import Device, DeviceSnapshot
+
+_SELECT_BY_DEVICE_ID = select(Device).where(Device.device_id == bindparam("device_id")).limit(1)
 
 
 class DeviceRepository:
@@ -23,16 +27,19 @@ class DeviceRepository:
         Returns:
             设备对象或 None
         """
-        return self.db.query(Device).filter(
-            Device.device_id == device_id
-        ).first()
+        device = self.db.execute(_SELECT_BY_DEVICE_ID, {"device_id": device_id}).scalar_one_or_none()
+        if device:
+            # 记录最近一次查询结果，数据库不可用时用于设备认证
+            device_cache.put(DeviceSnapshot.from_device(device))
+        return device
     
     def create(
         self, 
         device_id: str, 
         device_name: str = None, 
         secret_key: str = None, 
-        description: str = None
+        description: str = None,
+        signature_version: int = 1
     ) -> Device:
         """
         创建设备
@@ -42,6 +49,7 @@ class DeviceRepository:
             device_name: 设备名称（可选）
             secret_key: 密钥（如果为None，需要外部生成）
             description: 设备描述（可选）
+            signature_version: 签名版本（默认 1）
             
         Returns:
             创建的设备对象
@@ -50,7 +58,8 @@ class DeviceRepository:
             device_id=device_id,
             device_name=device_name,
             secret_key=secret_key,
-            description=description
+            description=description,
+            signature_version=signature_version
         )
         self.db.add(device)
         self.db.commit()
@@ -110,6 +119,7 @@ class DeviceRepository:
         if device:
             device.is_active = True
             self.db.commit()
+            device_cache.invalidate(device_id)
             return True
         return False
     
@@ -127,6 +137,52 @@ class DeviceRepository:
         if device:
             device.is_active = False
             self.db.commit()
+            device_cache.invalidate(device_id)
+            return True
+        return False
+    
+    def set_signature_version(self, device_id: str, version: int) -> bool:
+        """
+        设置设备签名版本
+        
+        Args:
+            device_id: 设备唯一标识
+            version: 签名版本
+            
+        Returns:
+            是否设置成功
+        """
+        device = self.get_by_device_id(device_id)
+        if device:
+            device.signature_version = version
+            self.db.commit()
+            device_cache.invalidate(device_id)
+            return True
+        return False
+    
+    def set_rate_limit(
+        self,
+        device_id: str,
+        per_minute: Optional[int],
+        burst: Optional[int]
+    ) -> bool:
+        """
+        设置设备上传限流（为空时使用全局配置）
+        
+        Args:
+            device_id: 设备唯一标识
+            per_minute: 每分钟请求数（0 表示不限流）
+            burst: 突发请求数
+            
+        Returns:
+            是否设置成功
+        """
+        device = self.get_by_device_id(device_id)
+        if device:
+            device.rate_limit_per_minute = per_minute
+            device.rate_limit_burst = burst
+            self.db.commit()
+            device_cache.invalidate(device_id)
             return True
         return False
     
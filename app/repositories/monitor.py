@@ -1,9 +1,14 @@
 from typing import List, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func, text
+from sqlalchemy import and_, desc, func, select
+from app.core.read_replica import replica_read
 from app.models.package import PackageRecord
-from app.models.user import UserPackage
+from app.repositories.package_repository import PackageRepository
+from app.repositories.user import UserPackageRepository
+
+SECONDS_PER_DAY = 86400
+EPOCH_DATE = date(1970, 1, 1)
 
 
 class MonitorRepository:
@@ -12,6 +17,7 @@ class MonitorRepository:
     def __init__(self, db: Session):
         self.db = db
     
+    @replica_read
     def get_package_records(
         self, 
         package_id: int, 
@@ -43,11 +49,10 @@ class MonitorRepository:
         return records, total
     
     def get_package_latest_record(self, package_id: int) -> Optional[PackageRecord]:
-        """获取包裹最新记录"""
-        return self.db.query(PackageRecord).filter(
-            PackageRecord.package_id == package_id
-        ).order_by(desc(PackageRecord.timestamp)).first()
+        """获取包裹最新记录（优先读取热数据窗口）"""
+        return PackageRepository(self.db).get_latest_by_package_id(package_id)
     
+    @replica_read
     def get_package_statistics(self, package_id: int, days: int = 7) -> dict:
         """获取包裹统计信息"""
         # 计算时间范围
@@ -59,10 +64,10 @@ class MonitorRepository:
         # 查询统计数据
         stats = self.db.query(
             func.count(PackageRecord.id).label('total_records'),
-            func.avg(PackageRecord.max_temperature).label('avg_temperature'),
+            func.avg(PackageRecord.max_temperature, type_=PackageRecord.max_temperature.type).label('avg_temperature'),
             func.min(PackageRecord.max_temperature).label('min_temperature'),
             func.max(PackageRecord.max_temperature).label('max_temperature'),
-            func.avg(PackageRecord.avg_humidity).label('avg_humidity'),
+            func.avg(PackageRecord.avg_humidity, type_=PackageRecord.avg_humidity.type).label('avg_humidity'),
             func.min(PackageRecord.avg_humidity).label('min_humidity'),
             func.max(PackageRecord.avg_humidity).label('max_humidity'),
             func.min(PackageRecord.timestamp).label('min_timestamp'),
@@ -87,6 +92,7 @@ class MonitorRepository:
             'end_timestamp': stats.max_timestamp
         }
     
+    @replica_read
     def get_daily_statistics(self, package_id: int, days: int = 7) -> List[dict]:
         """获取每日统计数据"""
         # 计算时间范围
@@ -95,31 +101,27 @@ class MonitorRepository:
         start_timestamp = int(start_time.timestamp())
         end_timestamp = int(end_time.timestamp())
         
-        # 使用原生SQL查询每日统计
-        sql = text("""
-            SELECT 
-                DATE(FROM_UNIXTIME(timestamp)) as date,
-                AVG(max_temperature) as avg_temp,
-                AVG(avg_humidity) as avg_humidity,
-                COUNT(*) as record_count
-            FROM package_records 
-            WHERE package_id = :package_id 
-                AND timestamp >= :start_timestamp 
-                AND timestamp <= :end_timestamp
-            GROUP BY DATE(FROM_UNIXTIME(timestamp))
-            ORDER BY date DESC
-        """)
-        
-        result = self.db.execute(sql, {
-            'package_id': package_id,
-            'start_timestamp': start_timestamp,
-            'end_timestamp': end_timestamp
-        })
+        # 按本地时区的自然日分组（整数天序号，MySQL/SQLite 通用；// 在 MySQL 上生成 FLOOR(a / b)）
+        utc_offset = int(end_time.astimezone().utcoffset().total_seconds())
+        day = ((PackageRecord.timestamp + utc_offset) // SECONDS_PER_DAY).label('day')
+        rows = self.db.execute(
+            select(
+                day,
+                # 使用模型列类型处理结果，紧凑存储模式下自动换算定点数
+                func.avg(PackageRecord.max_temperature, type_=PackageRecord.max_temperature.type).label('avg_temp'),
+                func.avg(PackageRecord.avg_humidity, type_=PackageRecord.avg_humidity.type).label('avg_humidity'),
+                func.count(PackageRecord.id).label('record_count')
+            ).where(
+                PackageRecord.package_id == package_id,
+                PackageRecord.timestamp >= start_timestamp,
+                PackageRecord.timestamp <= end_timestamp
+            ).group_by(day).order_by(day.desc())
+        )
         
         daily_stats = []
-        for row in result:
+        for row in rows:
             daily_stats.append({
-                'date': row.date.strftime('%Y-%m-%d'),
+                'date': (EPOCH_DATE + timedelta(days=int(row.day))).strftime('%Y-%m-%d'),
                 'avg_temp': float(row.avg_temp) if row.avg_temp else None,
                 'avg_humidity': float(row.avg_humidity) if row.avg_humidity else None,
                 'record_count': row.record_count
@@ -127,6 +129,7 @@ class MonitorRepository:
         
         return daily_stats
     
+    @replica_read
     def get_all_package_records(self, package_id: int) -> List[PackageRecord]:
         """获取包裹所有记录（用于导出）"""
         return self.db.query(PackageRecord).filter(
@@ -135,10 +138,4 @@ class MonitorRepository:
     
     def check_package_ownership(self, user_id: int, package_id: int) -> bool:
         """检查包裹所有权"""
-        return self.db.query(UserPackage).filter(
-            and_(
-                UserPackage.user_id == user_id,
-                UserPackage.package_id == package_id,
-                UserPackage.is_active == True
-            )
-        ).first() is not None
+        return UserPackageRepository(self.db).check_package_ownership(user_id, package_id)
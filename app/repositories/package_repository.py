@@ -1,37 +1,255 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List, Optional
-from app.models.package import PackageRecord
+from sqlalchemy import Row, bindparam, delete, desc, func, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.hot_window import hot_window, WindowEntry
+from app.core.ingest_dedupe import recent_ingest_keys
+from app.core.read_replica import primary_read, replica_read
+from app.models.package import PackageRecord, RecordSnapshot
+from app.repositories.rollup_repository import SeriesRollupRepository
+from app.utils.columnar import columns_from_records, columns_from_rows
 from app.schemas.package import PackageUploadRequest
 
 
+# 热点查询：模块级语句 + 绑定参数，只构建一次，每次调用不再重新构建 Query/select 语句
+# 同一时间戳可能有多台设备的读数：与热数据窗口相同按 (timestamp, id) 倒序，分页边界不重复、不遗漏
+_SELECT_PAGE = select(PackageRecord).where(
+    PackageRecord.package_id == bindparam("package_id")
+).order_by(
+    desc(PackageRecord.timestamp), desc(PackageRecord.id)
+).limit(bindparam("limit")).offset(bindparam("offset"))
+
+_SELECT_LATEST = select(PackageRecord).where(
+    PackageRecord.package_id == bindparam("package_id")
+).order_by(
+    desc(PackageRecord.timestamp), desc(PackageRecord.id)
+).limit(1)
+
+_COUNT_BY_PACKAGE = select(func.count(PackageRecord.id)).where(
+    PackageRecord.package_id == bindparam("package_id")
+)
+
+_SELECT_WINDOW = select(PackageRecord.__table__).where(
+    PackageRecord.package_id == bindparam("package_id")
+).order_by(
+    desc(PackageRecord.timestamp), desc(PackageRecord.id)
+).limit(bindparam("size"))
+
+
+def _record_row(data, source_device_id: int) -> dict:
+    """构建 package_records 插入行"""
+    return {
+        "package_id": data.package_id,
+        "max_temperature": data.max_temperature,
+        "avg_humidity": data.avg_humidity,
+        "over_threshold_time": data.over_threshold_time,
+        "timestamp": data.timestamp,
+        "source_device_id": source_device_id,
+    }
+
+
+def record_insert_ignore(db: Session):
+    """
+    构建按数据库方言的 package_records 插入语句（幂等键冲突时忽略该行）
+    
+    MySQL 使用 ON DUPLICATE KEY UPDATE id = id 而不是 INSERT IGNORE：IGNORE 会把超出范围、截断等
+    数据错误也降级为警告并写入截断后的值。注意 SQLAlchemy 的 MySQL 连接启用了 CLIENT_FOUND_ROWS，
+    未修改的重复行同样计入 rowcount，是否新写入需用 mysql_first_inserted_id 判断
+    
+    Args:
+        db: 数据库会话
+        
+    Returns:
+        插入语句
+    """
+    table = PackageRecord.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        return mysql.insert(table).on_duplicate_key_update(id=table.c.id)
+
+    if dialect in ("sqlite", "postgresql"):
+        module = sqlite if dialect == "sqlite" else postgresql
+        return module.insert(table).on_conflict_do_nothing(
+            index_elements=["package_id", "timestamp", "source_device_id"]
+        )
+
+    raise NotImplementedError(f"Idempotent insert is not supported on {dialect}")
+
+
+def mysql_first_inserted_id(result) -> int:
+    """
+    MySQL 插入语句新写入的第一个自增ID（ON DUPLICATE KEY UPDATE 没有新写入任何行时为 0）
+    
+    Args:
+        result: record_insert_ignore 的执行结果
+        
+    Returns:
+        自增ID，没有新写入时为 0
+    """
+    return result.lastrowid or 0
+
+
+def supports_insert_returning(db: Session) -> bool:
+    """
+    数据库是否支持 INSERT ... RETURNING（含 executemany），SQLite 3.35+、PostgreSQL、MariaDB 10.5+ 支持，MySQL 不支持
+    
+    Args:
+        db: 数据库会话
+        
+    Returns:
+        是否支持
+    """
+    dialect = db.get_bind().dialect
+    return dialect.insert_returning and dialect.insert_executemany_returning
+
+
 class PackageRepository:
     """包裹数据访问层"""
     
     def __init__(self, db: Session):
         self.db = db
     
-    def create(self, data: PackageUploadRequest) -> PackageRecord:
+    def create(
+        self,
+        data: PackageUploadRequest,
+        source_device_id: int = 0
+    ) -> Tuple[int, bool]:
         """
-        创建新的包裹记录
+        创建新的包裹记录（幂等：同一设备对同一包裹同一时间戳的读数只写入一次）
         
         Args:
             data: 包裹上传数据
+            source_device_id: 上传设备（devices.id，0 表示未知）
             
         Returns:
-            创建的记录对象
+            (记录ID, 是否新写入)，重复读数返回已存在记录的ID
         """
-        db_record = PackageRecord(
-            package_id=data.package_id,
-            max_temperature=data.max_temperature,
-            avg_humidity=data.avg_humidity,
-            over_threshold_time=data.over_threshold_time,
-            timestamp=data.timestamp
-        )
-        self.db.add(db_record)
-        self.db.commit()
-        self.db.refresh(db_record)
-        return db_record
+        key = (source_device_id, data.package_id, data.timestamp)
+        record_id = recent_ingest_keys.get(key)
+        if record_id is not None:
+            return record_id, False
+        
+        returning = supports_insert_returning(self.db)
+        row = None
+        try:
+            statement = record_insert_ignore(self.db).values(_record_row(data, source_device_id))
+            if returning:
+                # INSERT ... RETURNING 直接取回新记录（含服务端默认值），不再单独查询
+                row = self.db.execute(statement.returning(PackageRecord.__table__)).first()
+                created = row is not None
+                record_id = row.id if created else None
+            elif self.db.get_bind().dialect.name == "mysql":
+                record_id = mysql_first_inserted_id(self.db.execute(statement)) or None
+                created = record_id is not None
+            else:
+                result = self.db.execute(statement)
+                created = result.rowcount == 1
+                record_id = result.inserted_primary_key[0] if created else None
+            if created and settings.SERIES_ROLLUP_ENABLED:
+                # 预聚合与记录在同一事务中写入，重复读数不累加
+                SeriesRollupRepository(self.db).accumulate([data])
+            self.db.commit()
+        except Exception:
+            # 提交结果未知，使热数据窗口失效，下次读取时从数据库重新加载
+            hot_window.invalidate(data.package_id)
+            raise
+        
+        if created:
+            if settings.HOT_WINDOW_ENABLED:
+                if row is None:
+                    # 不支持 RETURNING（MySQL）：按 lastrowid 取回服务端默认值
+                    row = self.db.execute(
+                        select(PackageRecord.__table__).where(PackageRecord.id == record_id)
+                    ).one()
+                hot_window.append(RecordSnapshot.from_record(row))
+        else:
+            record_id = self._get_rows_by_keys(source_device_id, [key])[key].id
+        recent_ingest_keys.put(key, record_id)
+        return record_id, created
+    
+    def create_many(
+        self,
+        data: List[PackageUploadRequest],
+        source_device_id: int = 0
+    ) -> Tuple[List[int], int]:
+        """
+        批量创建包裹记录（单个事务，幂等）
+        
+        Args:
+            data: 包裹上传数据列表（PackageUploadRequest 或二进制帧读数）
+            source_device_id: 上传设备（devices.id，0 表示未知）
+            
+        Returns:
+            (记录ID列表（与输入顺序一致，重复读数为已存在记录的ID）, 新写入的记录数)
+        """
+        keys = [(source_device_id, item.package_id, item.timestamp) for item in data]
+        record_ids = {}
+        pending = {}
+        for key, item in zip(keys, data):
+            if key in record_ids or key in pending:
+                continue
+            record_id = recent_ingest_keys.get(key)
+            if record_id is not None:
+                record_ids[key] = record_id
+            else:
+                pending[key] = item
+        
+        new_items = {}
+        if pending:
+            # 一次查询找出已存在的读数，只写入新读数
+            existing = self._get_rows_by_keys(source_device_id, pending)
+            record_ids.update((key, row.id) for key, row in existing.items())
+            new_items = {key: item for key, item in pending.items() if key not in existing}
+        
+        if new_items:
+            package_ids = {item.package_id for item in new_items.values()}
+            rows = [_record_row(item, source_device_id) for item in new_items.values()]
+            returning = supports_insert_returning(self.db)
+            inserted = None
+            try:
+                if returning:
+                    # executemany + RETURNING（SQLAlchemy 按批生成多行 VALUES），写入同时取回新记录
+                    inserted = self.db.execute(
+                        record_insert_ignore(self.db).returning(PackageRecord.__table__), rows
+                    ).all()
+                    raced = len(inserted) != len(new_items)
+                elif self.db.get_bind().dialect.name == "mysql":
+                    # rowcount 包含重复行：按本语句分配的自增ID判断，查询到的行中ID小于首个新ID的是并发写入的
+                    first_id = mysql_first_inserted_id(self.db.execute(record_insert_ignore(self.db), rows))
+                    inserted = self._get_rows_by_keys(source_device_id, new_items).values()
+                    raced = not first_id or any(row.id < first_id for row in inserted)
+                else:
+                    result = self.db.execute(record_insert_ignore(self.db), rows)
+                    raced = result.rowcount != len(new_items)
+                if raced:
+                    # 查询与写入之间有并发请求写入了相同读数，回滚后逐条幂等写入
+                    self.db.rollback()
+                else:
+                    if settings.SERIES_ROLLUP_ENABLED:
+                        SeriesRollupRepository(self.db).accumulate(new_items.values())
+                    self.db.commit()
+            except Exception:
+                for package_id in package_ids:
+                    hot_window.invalidate(package_id)
+                raise
+            if raced:
+                results = [self.create(item, source_device_id) for item in data]
+                return [record_id for record_id, _ in results], sum(created for _, created in results)
+            
+            if inserted is None:
+                # 不支持 RETURNING：一次查询取回新记录的ID和服务端默认值（created_at）
+                inserted = self._get_rows_by_keys(source_device_id, new_items).values()
+            for row in inserted:
+                record_ids[(source_device_id, row.package_id, row.timestamp)] = row.id
+                if settings.HOT_WINDOW_ENABLED:
+                    hot_window.append(RecordSnapshot.from_record(row))
+        
+        for key, record_id in record_ids.items():
+            recent_ingest_keys.put(key, record_id)
+        return [record_ids[key] for key in keys], len(new_items)
     
     def get_by_id(self, record_id: int) -> Optional[PackageRecord]:
         """
@@ -47,6 +265,7 @@ class PackageRepository:
             PackageRecord.id == record_id
         ).first()
     
+    @replica_read
     def get_by_package_id(
         self, 
         package_id: int, 
@@ -64,25 +283,67 @@ class PackageRepository:
         Returns:
             记录列表
         """
-        return self.db.query(PackageRecord).filter(
-            PackageRecord.package_id == package_id
-        ).order_by(
-            desc(PackageRecord.timestamp)
-        ).limit(limit).offset(offset).all()
+        if settings.HOT_WINDOW_ENABLED and offset + limit <= hot_window.window_size:
+            entry = self._get_window(package_id)
+            if entry.covers(offset, limit):
+                return entry.records[offset:offset + limit]
+        
+        return self.db.execute(
+            _SELECT_PAGE, {"package_id": package_id, "limit": limit, "offset": offset}
+        ).scalars().all()
+    
+    @replica_read
+    def get_columns_by_package_id(
+        self,
+        package_id: int,
+        limit: int = 100,
+        offset: int = 0
+    ) -> Dict[str, np.ndarray]:
+        """
+        根据包裹ID获取历史记录列数组（列式查询，不构建 ORM 对象）
+        
+        Args:
+            package_id: 包裹ID
+            limit: 返回记录数量限制
+            offset: 偏移量
+            
+        Returns:
+            列数组（按时间倒序）
+        """
+        if settings.HOT_WINDOW_ENABLED and offset + limit <= hot_window.window_size:
+            entry = self._get_window(package_id)
+            if entry.covers(offset, limit):
+                return columns_from_records(entry.records[offset:offset + limit])
+        
+        rows = self.db.execute(
+            select(
+                PackageRecord.id,
+                PackageRecord.timestamp,
+                PackageRecord.max_temperature,
+                PackageRecord.avg_humidity,
+                PackageRecord.over_threshold_time,
+                PackageRecord.created_at
+            ).where(
+                PackageRecord.package_id == package_id
+            ).order_by(
+                desc(PackageRecord.timestamp), desc(PackageRecord.id)
+            ).limit(limit).offset(offset)
+        ).all()
+        return columns_from_rows(rows)
     
     def count_by_package_id(self, package_id: int) -> int:
         """
         统计指定包裹的记录数量
         
+        用作分页总数，始终由数据库统计（热数据窗口在多进程间最长滞后 HOT_WINDOW_TTL_SECONDS）
+        
         Args:
             package_id: 包裹ID
             
         Returns:
             记录数量
         """
-        return self.db.query(PackageRecord).filter(
-            PackageRecord.package_id == package_id
-        ).count()
+        return self._count_from_db(package_id)
     
     def get_latest_by_package_id(self, package_id: int) -> Optional[PackageRecord]:
         """
@@ -92,13 +353,13 @@ class PackageRepository:
             package_id: 包裹ID
             
         Returns:
-            最新记录或 None
+            最新记录或 None（启用热数据窗口时返回记录快照）
         """
-        return self.db.query(PackageRecord).filter(
-            PackageRecord.package_id == package_id
-        ).order_by(
-            desc(PackageRecord.timestamp)
-        ).first()
+        if settings.HOT_WINDOW_ENABLED:
+            records = self._get_window(package_id).records
+            return records[0] if records else None
+        
+        return self.db.execute(_SELECT_LATEST, {"package_id": package_id}).scalars().first()
     
     def get_all(self, limit: int = 100, offset: int = 0) -> List[PackageRecord]:
         """
@@ -129,5 +390,184 @@ class PackageRepository:
         if record:
             self.db.delete(record)
             self.db.commit()
+            hot_window.invalidate(record.package_id)
+            recent_ingest_keys.clear()
             return True
         return False
+
+    def get_package_ids(self) -> List[int]:
+        """
+        获取热表中的全部包裹ID
+        
+        Returns:
+            包裹ID列表
+        """
+        return list(self.db.execute(
+            select(PackageRecord.package_id).distinct()
+        ).scalars())
+
+    def get_series_rows(
+        self,
+        package_id: int,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> List[Row]:
+        """
+        获取包裹全部记录（按时间升序，用于序列封存和降采样）
+        
+        Args:
+            package_id: 包裹ID
+            start_timestamp: 开始时间戳（可选）
+            end_timestamp: 结束时间戳（可选）
+            
+        Returns:
+            记录行列表
+        """
+        stmt = select(PackageRecord.__table__).where(
+            PackageRecord.package_id == package_id
+        )
+        if start_timestamp is not None:
+            stmt = stmt.where(PackageRecord.timestamp >= start_timestamp)
+        if end_timestamp is not None:
+            stmt = stmt.where(PackageRecord.timestamp <= end_timestamp)
+        stmt = stmt.order_by(PackageRecord.timestamp, PackageRecord.id)
+        return self.db.execute(stmt).all()
+
+    def get_records_before(
+        self,
+        cutoff_timestamp: int,
+        after_id: int = 0,
+        limit: int = 1000
+    ) -> List[Row]:
+        """
+        按ID顺序获取时间戳早于截止时间的记录（用于归档，键集分页）
+
+        Args:
+            cutoff_timestamp: 截止时间戳（不含）
+            after_id: 上一批次最后一条记录ID
+            limit: 返回记录数量限制
+
+        Returns:
+            记录行列表
+        """
+        stmt = select(PackageRecord.__table__).where(
+            PackageRecord.timestamp < cutoff_timestamp,
+            PackageRecord.id > after_id
+        ).order_by(PackageRecord.id).limit(limit)
+        return self.db.execute(stmt).all()
+
+    def get_records_of_idle_packages(
+        self,
+        idle_cutoff_timestamp: int,
+        after_id: int = 0,
+        limit: int = 1000
+    ) -> List[Row]:
+        """
+        按ID顺序获取已关闭包裹（最新记录早于截止时间）的全部记录（用于归档，键集分页）
+
+        Args:
+            idle_cutoff_timestamp: 最新记录截止时间戳（不含）
+            after_id: 上一批次最后一条记录ID
+            limit: 返回记录数量限制
+
+        Returns:
+            记录行列表
+        """
+        idle_packages = select(PackageRecord.package_id).group_by(
+            PackageRecord.package_id
+        ).having(func.max(PackageRecord.timestamp) < idle_cutoff_timestamp)
+
+        stmt = select(PackageRecord.__table__).where(
+            PackageRecord.package_id.in_(idle_packages),
+            PackageRecord.id > after_id
+        ).order_by(PackageRecord.id).limit(limit)
+        return self.db.execute(stmt).all()
+
+    def delete_by_ids(self, record_ids: List[int]) -> int:
+        """
+        按ID批量删除记录（单个事务）
+
+        Args:
+            record_ids: 记录ID列表
+
+        Returns:
+            删除的记录数量
+        """
+        if not record_ids:
+            return 0
+        result = self.db.execute(
+            delete(PackageRecord).where(PackageRecord.id.in_(record_ids))
+        )
+        self.db.commit()
+        # 批量删除可能涉及多个包裹，直接清空热数据窗口和幂等键缓存
+        hot_window.invalidate()
+        recent_ingest_keys.clear()
+        return result.rowcount
+
+    def get_duplicate_package_ids(self) -> List[int]:
+        """
+        获取存在重复读数（相同幂等键）的包裹ID
+        
+        Returns:
+            包裹ID列表
+        """
+        duplicates = select(PackageRecord.package_id).group_by(
+            PackageRecord.package_id, PackageRecord.timestamp, PackageRecord.source_device_id
+        ).having(func.count() > 1).subquery()
+        return list(self.db.execute(select(duplicates.c.package_id).distinct()).scalars())
+
+    def get_duplicate_ids(self, package_id: int) -> List[int]:
+        """
+        获取包裹的重复记录ID（相同幂等键保留ID最小的一条）
+        
+        Args:
+            package_id: 包裹ID
+            
+        Returns:
+            需要删除的记录ID列表
+        """
+        rows = self.db.execute(
+            select(PackageRecord.id, PackageRecord.timestamp, PackageRecord.source_device_id).where(
+                PackageRecord.package_id == package_id
+            ).order_by(PackageRecord.id)
+        ).all()
+        seen = set()
+        duplicate_ids = []
+        for row in rows:
+            key = (row.timestamp, row.source_device_id)
+            if key in seen:
+                duplicate_ids.append(row.id)
+            else:
+                seen.add(key)
+        return duplicate_ids
+
+    def _get_rows_by_keys(self, source_device_id: int, keys) -> Dict[tuple, Row]:
+        """按幂等键批量查询记录（单个设备）"""
+        keys = set(keys)
+        rows = self.db.execute(
+            select(PackageRecord.__table__).where(
+                PackageRecord.source_device_id == source_device_id,
+                PackageRecord.package_id.in_({key[1] for key in keys}),
+                PackageRecord.timestamp.in_({key[2] for key in keys})
+            )
+        ).all()
+        found = {}
+        for row in rows:
+            key = (source_device_id, row.package_id, row.timestamp)
+            if key in keys:
+                found[key] = row
+        return found
+
+    def _get_window(self, package_id: int) -> WindowEntry:
+        """获取包裹热数据窗口，未命中时从数据库加载"""
+        return hot_window.get_or_load(package_id, lambda size: self._load_window(package_id, size))
+
+    @primary_read
+    def _load_window(self, package_id: int, size: int) -> Tuple[List[RecordSnapshot], Optional[int]]:
+        """从数据库加载最近记录（不足窗口大小时即为全部记录，总数已知；否则总数未知）"""
+        rows = self.db.execute(_SELECT_WINDOW, {"package_id": package_id, "size": size}).all()
+        return [RecordSnapshot.from_record(row) for row in rows], len(rows) if len(rows) < size else None
+
+    def _count_from_db(self, package_id: int) -> int:
+        """从数据库统计记录数量"""
+        return self.db.execute(_COUNT_BY_PACKAGE, {"package_id": package_id}).scalar_one()
@@ -0,0 +1,171 @@
+"""
+时间序列预聚合数据访问层
+每条记录写入时按 1分钟/15分钟/1小时/1天 四个层级累加到对应的桶（upsert）
+"""
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import Row, delete, func, insert, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.core.read_replica import replica_read
+from app.models.package import PackageSeriesRollup
+
+
+# 预聚合层级（桶时长，秒），从细到粗
+ROLLUP_LEVELS = (60, 900, 3600, 86400)
+
+
+def bucket_start(timestamp: int, level: int) -> int:
+    """计算时间戳所在桶的起始时间（按 UTC 对齐）"""
+    return timestamp - timestamp % level
+
+
+class SeriesRollupRepository:
+    """时间序列预聚合数据访问层"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def accumulate(self, records: Iterable) -> None:
+        """
+        将记录累加到各层级的桶（不提交事务，与记录写入处于同一事务）
+
+        Args:
+            records: 具有 package_id / max_temperature / avg_humidity / timestamp 属性的记录
+        """
+        buckets = {}
+        for record in records:
+            for level in ROLLUP_LEVELS:
+                key = (record.package_id, level, bucket_start(record.timestamp, level))
+                row = buckets.get(key)
+                if row is None:
+                    buckets[key] = {
+                        "package_id": key[0],
+                        "level": level,
+                        "bucket_start": key[2],
+                        "record_count": 1,
+                        "min_temperature": record.max_temperature,
+                        "max_temperature": record.max_temperature,
+                        "sum_temperature": record.max_temperature,
+                        "sum_humidity": record.avg_humidity,
+                    }
+                else:
+                    row["record_count"] += 1
+                    row["min_temperature"] = min(row["min_temperature"], record.max_temperature)
+                    row["max_temperature"] = max(row["max_temperature"], record.max_temperature)
+                    row["sum_temperature"] += record.max_temperature
+                    row["sum_humidity"] += record.avg_humidity
+        if buckets:
+            # 按桶键排序后写入：并发事务以相同顺序锁定桶行，只会短暂排队而不会互相死锁
+            self.db.execute(self._upsert([buckets[key] for key in sorted(buckets)]))
+
+    @replica_read
+    def get_range(
+        self,
+        package_id: int,
+        level: int,
+        start_timestamp: int,
+        end_timestamp: int
+    ) -> List[Row]:
+        """
+        获取时间范围内某层级的桶（按时间升序）
+
+        Args:
+            package_id: 包裹ID
+            level: 层级（桶时长，秒）
+            start_timestamp: 开始时间戳
+            end_timestamp: 结束时间戳
+
+        Returns:
+            聚合行列表
+        """
+        table = PackageSeriesRollup.__table__
+        stmt = select(table).where(
+            table.c.package_id == package_id,
+            table.c.level == level,
+            table.c.bucket_start >= bucket_start(start_timestamp, level),
+            table.c.bucket_start <= end_timestamp
+        ).order_by(table.c.bucket_start)
+        return self.db.execute(stmt).all()
+
+    def get_bounds(self, package_id: int) -> Optional[Tuple[int, int]]:
+        """
+        获取包裹预聚合覆盖的时间范围（基于最细层级）
+
+        Args:
+            package_id: 包裹ID
+
+        Returns:
+            (最早桶起始时间, 最晚桶结束时间)，无数据时返回 None
+        """
+        level = ROLLUP_LEVELS[0]
+        first, last = self.db.execute(
+            select(
+                func.min(PackageSeriesRollup.bucket_start),
+                func.max(PackageSeriesRollup.bucket_start)
+            ).where(
+                PackageSeriesRollup.package_id == package_id,
+                PackageSeriesRollup.level == level
+            )
+        ).one()
+        if first is None:
+            return None
+        return first, last + level - 1
+
+    def replace(self, package_id: int, rows: List[dict]) -> int:
+        """
+        替换包裹的全部预聚合（重建用，单个事务）
+
+        Args:
+            package_id: 包裹ID
+            rows: 聚合行
+
+        Returns:
+            写入的行数
+        """
+        try:
+            self.db.execute(
+                delete(PackageSeriesRollup).where(PackageSeriesRollup.package_id == package_id)
+            )
+            if rows:
+                self.db.execute(insert(PackageSeriesRollup), rows)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return len(rows)
+
+    def _upsert(self, rows: List[dict]):
+        """构建按数据库方言的 upsert 语句（桶已存在时累加）"""
+        table = PackageSeriesRollup.__table__
+        dialect = self.db.get_bind().dialect.name
+
+        if dialect == "mysql":
+            stmt = mysql.insert(table).values(rows)
+            new = stmt.inserted
+            return stmt.on_duplicate_key_update(
+                record_count=table.c.record_count + new.record_count,
+                min_temperature=func.least(table.c.min_temperature, new.min_temperature),
+                max_temperature=func.greatest(table.c.max_temperature, new.max_temperature),
+                sum_temperature=table.c.sum_temperature + new.sum_temperature,
+                sum_humidity=table.c.sum_humidity + new.sum_humidity,
+            )
+
+        if dialect in ("sqlite", "postgresql"):
+            module = sqlite if dialect == "sqlite" else postgresql
+            stmt = module.insert(table).values(rows)
+            new = stmt.excluded
+            # SQLite 的多参数 min/max 为标量函数，PostgreSQL 使用 least/greatest
+            least = func.min if dialect == "sqlite" else func.least
+            greatest = func.max if dialect == "sqlite" else func.greatest
+            return stmt.on_conflict_do_update(
+                index_elements=["package_id", "level", "bucket_start"],
+                set_={
+                    "record_count": table.c.record_count + new.record_count,
+                    "min_temperature": least(table.c.min_temperature, new.min_temperature),
+                    "max_temperature": greatest(table.c.max_temperature, new.max_temperature),
+                    "sum_temperature": table.c.sum_temperature + new.sum_temperature,
+                    "sum_humidity": table.c.sum_humidity + new.sum_humidity,
+                }
+            )
+
+        raise NotImplementedError(f"Series rollup upsert is not supported on {dialect}")
@@ -0,0 +1,174 @@
+"""
+封存序列块数据访问层
+"""
+from typing import Dict, List
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from app.core.hot_window import hot_window
+from app.models.package import PackageRecord, PackageSeriesChunk
+from app.repositories.package_repository import record_insert_ignore
+
+
+class SeriesChunkRepository:
+    """封存序列块数据访问层"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def has_chunks(self, package_id: int) -> bool:
+        """
+        检查包裹是否已封存
+
+        Args:
+            package_id: 包裹ID
+
+        Returns:
+            是否存在序列块
+        """
+        return self.db.execute(
+            select(PackageSeriesChunk.id).where(
+                PackageSeriesChunk.package_id == package_id
+            ).limit(1)
+        ).first() is not None
+
+    def get_package_ids(self) -> List[int]:
+        """
+        获取全部已封存的包裹ID
+
+        Returns:
+            包裹ID列表
+        """
+        return list(self.db.execute(
+            select(PackageSeriesChunk.package_id).distinct()
+        ).scalars())
+
+    def count_records(self, package_id: int) -> int:
+        """
+        统计封存的记录数量
+
+        Args:
+            package_id: 包裹ID
+
+        Returns:
+            记录数量
+        """
+        return self.db.execute(
+            select(func.coalesce(func.sum(PackageSeriesChunk.record_count), 0)).where(
+                PackageSeriesChunk.package_id == package_id
+            )
+        ).scalar()
+
+    def get_chunks(self, package_id: int) -> List[PackageSeriesChunk]:
+        """
+        获取包裹的全部序列块（按序号升序）
+
+        Args:
+            package_id: 包裹ID
+
+        Returns:
+            序列块列表
+        """
+        return self.db.query(PackageSeriesChunk).filter(
+            PackageSeriesChunk.package_id == package_id
+        ).order_by(PackageSeriesChunk.seq).all()
+
+    def get_chunk_index(self, package_id: int) -> List[Row]:
+        """
+        获取包裹的序列块元数据（不含数据，按序号升序）
+
+        Args:
+            package_id: 包裹ID
+
+        Returns:
+            (id, seq, record_count, start_timestamp, end_timestamp) 行列表
+        """
+        return self.db.execute(
+            select(
+                PackageSeriesChunk.id,
+                PackageSeriesChunk.seq,
+                PackageSeriesChunk.record_count,
+                PackageSeriesChunk.start_timestamp,
+                PackageSeriesChunk.end_timestamp
+            ).where(
+                PackageSeriesChunk.package_id == package_id
+            ).order_by(PackageSeriesChunk.seq)
+        ).all()
+
+    def get_chunk_data(self, chunk_ids: List[int]) -> Dict[int, bytes]:
+        """
+        按ID获取序列块数据
+
+        Args:
+            chunk_ids: 序列块ID列表
+
+        Returns:
+            序列块ID到二进制数据的映射
+        """
+        if not chunk_ids:
+            return {}
+        return dict(self.db.execute(
+            select(PackageSeriesChunk.id, PackageSeriesChunk.data).where(
+                PackageSeriesChunk.id.in_(chunk_ids)
+            )
+        ).all())
+
+    def seal(self, package_id: int, chunks: List[dict], record_ids: List[List[int]]) -> int:
+        """
+        封存包裹：写入序列块并删除已编码的热表记录（同一事务）
+
+        只按已编码的记录ID删除：编码期间并发提交的记录（ID 不一定更大）保留在热表
+
+        Args:
+            package_id: 包裹ID
+            chunks: 序列块字段字典列表
+            record_ids: 每个序列块已编码的记录ID列表
+
+        Returns:
+            删除的热表记录数
+        """
+        deleted = 0
+        try:
+            self.db.execute(insert(PackageSeriesChunk), chunks)
+            for ids in record_ids:
+                deleted += self.db.execute(
+                    delete(PackageRecord).where(
+                        PackageRecord.package_id == package_id,
+                        PackageRecord.id.in_(ids)
+                    )
+                ).rowcount
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            hot_window.invalidate(package_id)
+        return deleted
+
+    def unseal(self, package_id: int, records: List[dict]) -> int:
+        """
+        解封包裹：将记录写回热表并删除序列块（同一事务）
+
+        Args:
+            package_id: 包裹ID
+            records: 记录字段字典列表（不含记录ID，写回时分配新ID）
+
+        Returns:
+            写回的记录数
+        """
+        restored = 0
+        try:
+            if records:
+                # 封存前可能已存在重复读数（幂等键），写回时忽略重复行
+                # （MySQL 的 rowcount 包含被忽略的重复行，仅作统计）
+                restored = self.db.execute(record_insert_ignore(self.db), records).rowcount
+            self.db.execute(
+                delete(PackageSeriesChunk).where(PackageSeriesChunk.package_id == package_id)
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            hot_window.invalidate(package_id)
+        return restored
@@ -1,10 +1,18 @@
 from typing import Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, bindparam, select
+from app.core.read_replica import replica_read
 from app.models.user import User, UserPackage
 from app.models.package import PackageRecord
+from app.repositories.package_repository import PackageRepository
 from app.schemas.user import UserRegisterRequest, UserUpdateRequest, PackageBindRequest
 
+_SELECT_OWNERSHIP = select(UserPackage.id).where(
+    UserPackage.user_id == bindparam("user_id"),
+    UserPackage.package_id == bindparam("package_id"),
+    UserPackage.is_active == True
+).limit(1)
+
 
 class UserRepository:
     """用户数据访问层"""
@@ -106,6 +114,7 @@ class UserPackageRepository:
         self.db.commit()
         return True
     
+    @replica_read
     def get_user_packages(self, user_id: int, skip: int = 0, limit: int = 100) -> List[UserPackage]:
         """获取用户包裹列表"""
         return self.db.query(UserPackage).filter(
@@ -115,6 +124,7 @@ class UserPackageRepository:
             )
         ).offset(skip).limit(limit).all()
     
+    @replica_read
     def get_user_package_count(self, user_id: int) -> int:
         """获取用户包裹总数"""
         return self.db.query(UserPackage).filter(
@@ -136,22 +146,14 @@ class UserPackageRepository:
     
     def check_package_ownership(self, user_id: int, package_id: int) -> bool:
         """检查包裹所有权"""
-        return self.db.query(UserPackage).filter(
-            and_(
-                UserPackage.user_id == user_id,
-                UserPackage.package_id == package_id,
-                UserPackage.is_active == True
-            )
+        return self.db.execute(
+            _SELECT_OWNERSHIP, {"user_id": user_id, "package_id": package_id}
         ).first() is not None
     
     def get_package_latest_record(self, package_id: int) -> Optional[PackageRecord]:
-        """获取包裹最新记录"""
-        return self.db.query(PackageRecord).filter(
-            PackageRecord.package_id == package_id
-        ).order_by(desc(PackageRecord.timestamp)).first()
+        """获取包裹最新记录（优先读取热数据窗口）"""
+        return PackageRepository(self.db).get_latest_by_package_id(package_id)
     
     def get_package_record_count(self, package_id: int) -> int:
-        """获取包裹记录总数"""
-        return self.db.query(PackageRecord).filter(
-            PackageRecord.package_id == package_id
-        ).count()
+        """获取包裹记录总数（始终在数据库中统计）"""
+        return PackageRepository(self.db).count_by_package_id(package_id)
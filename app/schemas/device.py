@@ -26,6 +26,13 @@ class DeviceCreateRequest(BaseModel):
         description="设备描述（可选）",
         example="位于仓库入口的RFID读取设备"
     )
+    signature_version: int = Field(
+        1,
+        ge=1,
+        le=2,
+        description="签名版本（1: 字段拼接字符串; 2: 请求体原始字节，推荐）",
+        example=2
+    )
 
 
 class DeviceResponse(BaseModel):
@@ -34,6 +41,9 @@ class DeviceResponse(BaseModel):
     device_id: str = Field(..., description="设备唯一标识")
     device_name: Optional[str] = Field(None, description="设备名称")
     is_active: bool = Field(..., description="是否激活")
+    signature_version: int = Field(1, description="签名版本")
+    rate_limit_per_minute: Optional[int] = Field(None, description="上传限流：每分钟请求数（为空使用全局配置）")
+    rate_limit_burst: Optional[int] = Field(None, description="上传限流：突发请求数（为空使用全局配置）")
     created_at: datetime = Field(..., description="创建时间")
     last_seen: Optional[datetime] = Field(None, description="最后活跃时间")
     secret_key: Optional[str] = Field(None, description="密钥（只在创建时返回一次）")
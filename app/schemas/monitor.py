@@ -44,7 +44,7 @@ class PackageRecordResponse(BaseModel):
     avg_humidity: float
     over_threshold_time: int
     timestamp: int
-    created_at: datetime
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
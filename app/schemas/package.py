@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -60,6 +60,18 @@ class PackageUploadRequest(BaseModel):
         }
 
 
+class PackageStreamReading(PackageUploadRequest):
+    """网关流式上传（NDJSON）中的一行：读数及采集设备的签名"""
+    
+    device_id: str = Field(..., min_length=1, max_length=50, description="采集设备唯一标识")
+    signature: str = Field(
+        ...,
+        min_length=64,
+        max_length=64,
+        description="设备对 build_signature_data 拼接字符串计算的 HMAC-SHA256 签名"
+    )
+
+
 class PackageRecordResponse(BaseModel):
     """包裹记录响应模型"""
     
@@ -69,7 +81,7 @@ class PackageRecordResponse(BaseModel):
     avg_humidity: float = Field(..., description="平均湿度(%)")
     over_threshold_time: int = Field(..., description="超阈值时间(秒)")
     timestamp: int = Field(..., description="Unix时间戳")
-    created_at: datetime = Field(..., description="记录创建时间")
+    created_at: Optional[datetime] = Field(None, description="记录创建时间（紧凑存储且未启用 created_at 时为空）")
     
     class Config:
         from_attributes = True  # 允许从 ORM 模型创建
@@ -81,6 +93,7 @@ class PackageHistoryResponse(BaseModel):
     package_id: int = Field(..., description="包裹ID")
     total: int = Field(..., description="总记录数")
     records: List[PackageRecordResponse] = Field(..., description="记录列表（按时间倒序）")
+    downsample: Optional[str] = Field(None, description="降采样算法（未降采样时为空）")
     
     class Config:
         json_schema_extra = {
@@ -109,3 +122,24 @@ class PackageHistoryResponse(BaseModel):
                 ]
             }
         }
+
+
+class PackageSeriesBucket(BaseModel):
+    """预聚合时间桶"""
+    
+    bucket_start: int = Field(..., description="桶起始时间戳")
+    count: int = Field(..., description="桶内记录数")
+    min_temperature: float = Field(..., description="最高温度的最小值(°C)")
+    max_temperature: float = Field(..., description="最高温度的最大值(°C)")
+    avg_temperature: float = Field(..., description="最高温度的平均值(°C)")
+    avg_humidity: float = Field(..., description="平均湿度的平均值(%)")
+
+
+class PackageSeriesResponse(BaseModel):
+    """包裹预聚合时间序列响应模型"""
+    
+    package_id: int = Field(..., description="包裹ID")
+    level: int = Field(..., description="使用的聚合层级（桶时长，秒）")
+    start_timestamp: int = Field(..., description="查询开始时间戳")
+    end_timestamp: int = Field(..., description="查询结束时间戳")
+    buckets: List[PackageSeriesBucket] = Field(..., description="时间桶列表（按时间升序）")
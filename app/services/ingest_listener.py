@@ -0,0 +1,247 @@
+"""
+UDP/TCP 轻量上传监听
+接收签名的二进制帧报文（见 app.utils.ingest_packet），与 /upload/frame 共用设备缓存、HMAC 校验、
+防重放、设备限流、准入控制和写入路径（幂等写入，数据库不可用时写入本地 spool），并回复 8 字节确认
+
+- 设备信息优先取设备缓存（不超过 INGEST_LISTENER_DEVICE_CACHE_SECONDS），
+  缓存未命中时查库并更新最后活跃时间，因此 last_seen 的精度为缓存时长
+- 报文处理（查库、写入）在线程池中执行，不阻塞事件循环
+"""
+import asyncio
+import math
+import struct
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+
+from app.core.admission import AdmissionRejected, admission_gates
+from app.core.config import settings
+from app.core.database import DATABASE_UNAVAILABLE_ERRORS, SessionLocal
+from app.core.device_cache import device_cache
+from app.core.rate_limit import device_rate_limiter
+from app.core.replay_cache import replay_cache
+from app.models.device import DeviceSnapshot
+from app.repositories.device_repository import DeviceRepository
+from app.repositories.package_repository import PackageRepository
+from app.services.package_service import PackageService
+from app.utils.binary_frame import FrameDecodeError, HEADER_SIZE, READING_SIZE, decode_frame
+from app.utils.ingest_packet import (
+    MAX_DEVICE_ID_LENGTH, PREFIX_SIZE, SIGNATURE_SIZE, AckStatus, decode_packet, encode_ack
+)
+from app.utils.security import verify_body_signature
+
+_LENGTH = struct.Struct("<H")
+
+
+class PacketIngestHandler:
+    """单个报文的认证与写入（同步，在线程池中调用）"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.counts: Dict[str, int] = {status.name.lower(): 0 for status in AckStatus}
+        self.readings = 0
+
+    def handle(self, data: bytes) -> bytes:
+        """
+        处理一个报文
+
+        Args:
+            data: 报文字节串
+
+        Returns:
+            确认字节串
+        """
+        status, retry_after, signature = self._handle(data)
+        self.counts[status.name.lower()] += 1
+        return encode_ack(status, signature, retry_after)
+
+    def _handle(self, data: bytes) -> Tuple[AckStatus, int, bytes]:
+        try:
+            packet = decode_packet(data)
+        except FrameDecodeError:
+            return AckStatus.BAD_PACKET, 0, data[-SIGNATURE_SIZE:]
+
+        signature_hex = packet.signature.hex()
+        if replay_cache.seen(packet.device_id, signature_hex):
+            return AckStatus.REPLAYED, 0, packet.signature
+
+        db = self.session_factory()
+        try:
+            device = self._get_device(db, packet.device_id)
+            if device is None or not device.is_active:
+                logger.warning(f"Unknown or inactive device on ingest listener: {packet.device_id}")
+                return AckStatus.UNAUTHORIZED, 0, packet.signature
+
+            if not verify_body_signature(packet.signed, signature_hex, device.secret_key):
+                logger.warning(f"Invalid packet signature from device: {packet.device_id}")
+                return AckStatus.UNAUTHORIZED, 0, packet.signature
+
+            # 签名通过后才消耗令牌：伪造的报文不能耗尽设备的限额
+            if settings.DEVICE_RATE_LIMIT_ENABLED:
+                retry_after = device_rate_limiter.acquire(
+                    device.id, device.device_id, device.rate_limit_per_minute, device.rate_limit_burst
+                )
+                if retry_after:
+                    return AckStatus.RATE_LIMITED, math.ceil(retry_after), packet.signature
+            if abs(int(datetime.now().timestamp()) - packet.timestamp) > settings.DEVICE_TIMESTAMP_TOLERANCE_SECONDS:
+                return AckStatus.UNAUTHORIZED, 0, packet.signature
+
+            try:
+                readings = decode_frame(packet.frame, settings.UPLOAD_FRAME_MAX_READINGS)
+            except FrameDecodeError as e:
+                logger.warning(f"Invalid frame from device {packet.device_id}: {str(e)}")
+                return AckStatus.BAD_PACKET, 0, packet.signature
+
+            result = PackageService(PackageRepository(db)).save_package_batch(readings, device.id)
+            # 写入成功（或已落盘 spool）后才记录签名：写入失败时设备重发同一报文仍能通过，
+            # 并发到达的相同报文由幂等写入保证只入库一次
+            replay_cache.add(packet.device_id, signature_hex)
+            self.readings += len(readings)
+            status = AckStatus.STORED if result["status"] == "stored" else AckStatus.OK
+            return status, 0, packet.signature
+        except Exception as e:
+            logger.error(f"Ingest listener failed to handle packet: {str(e)}")
+            return AckStatus.ERROR, 1, packet.signature
+        finally:
+            db.close()
+
+    def _get_device(self, db, device_id: str) -> Optional[DeviceSnapshot]:
+        """设备缓存 → 数据库（数据库不可用时回退到较旧的缓存）"""
+        device = device_cache.get(device_id, settings.INGEST_LISTENER_DEVICE_CACHE_SECONDS)
+        if device is not None:
+            return device
+
+        repository = DeviceRepository(db)
+        try:
+            found = repository.get_by_device_id(device_id)
+            if found is not None:
+                repository.update_last_seen(device_id)
+                return DeviceSnapshot.from_device(found)
+            return None
+        except DATABASE_UNAVAILABLE_ERRORS:
+            db.rollback()
+            device = device_cache.get(device_id)
+            if device is None:
+                raise
+            device_cache.record_fallback()
+            return device
+
+
+class IngestListener:
+    """UDP/TCP 上传监听服务"""
+
+    def __init__(self, handler: Optional[PacketIngestHandler] = None):
+        self.handler = handler or PacketIngestHandler()
+        self.max_packet_bytes = (
+            PREFIX_SIZE + MAX_DEVICE_ID_LENGTH + HEADER_SIZE
+            + settings.UPLOAD_FRAME_MAX_READINGS * READING_SIZE + SIGNATURE_SIZE
+        )
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks = set()
+
+    async def start(self, host: str, udp_port: Optional[int], tcp_port: Optional[int]) -> None:
+        """
+        启动监听
+
+        Args:
+            host: 监听地址
+            udp_port: UDP 端口（None 表示不监听，0 表示随机端口）
+            tcp_port: TCP 端口（None 表示不监听，0 表示随机端口）
+        """
+        loop = asyncio.get_running_loop()
+        if udp_port is not None:
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DatagramProtocol(self), local_addr=(host, udp_port)
+            )
+            logger.info(f"📡 Ingest listener (UDP) on {host}:{self.udp_address[1]}")
+        if tcp_port is not None:
+            self._server = await asyncio.start_server(self._serve_stream, host, tcp_port)
+            logger.info(f"📡 Ingest listener (TCP) on {host}:{self.tcp_address[1]}")
+
+    async def stop(self) -> None:
+        """停止监听并等待处理中的报文完成"""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @property
+    def udp_address(self) -> Optional[Tuple[str, int]]:
+        return self._transport.get_extra_info("sockname")[:2] if self._transport else None
+
+    @property
+    def tcp_address(self) -> Optional[Tuple[str, int]]:
+        return self._server.sockets[0].getsockname()[:2] if self._server else None
+
+    def stats(self) -> Dict:
+        """按确认状态统计的报文数和写入的读数数量"""
+        return {
+            "udp": self.udp_address is not None,
+            "tcp": self.tcp_address is not None,
+            "packets": dict(self.handler.counts),
+            "readings": self.handler.readings,
+        }
+
+    async def process(self, data: bytes) -> bytes:
+        """经准入控制后在线程池中处理报文"""
+        gate = admission_gates["device"]
+        try:
+            await gate.acquire()
+        except AdmissionRejected:
+            self.handler.counts[AckStatus.BUSY.name.lower()] += 1
+            return encode_ack(AckStatus.BUSY, data[-SIGNATURE_SIZE:], settings.ADMISSION_RETRY_AFTER_SECONDS)
+        try:
+            return await run_in_threadpool(self.handler.handle, data)
+        finally:
+            gate.release()
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _reply_datagram(self, data: bytes, address) -> None:
+        ack = await self.process(data)
+        if self._transport is not None:
+            self._transport.sendto(ack, address)
+
+    async def _serve_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """TCP 连接：循环读取带长度前缀的报文，按顺序回复确认"""
+        try:
+            while True:
+                header = await asyncio.wait_for(
+                    reader.readexactly(_LENGTH.size), settings.INGEST_LISTENER_TCP_IDLE_SECONDS
+                )
+                (length,) = _LENGTH.unpack(header)
+                if length > self.max_packet_bytes:
+                    break
+                data = await reader.readexactly(length)
+                writer.write(await self.process(data))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    """UDP：每个数据报一个报文"""
+
+    def __init__(self, listener: IngestListener):
+        self.listener = listener
+
+    def datagram_received(self, data: bytes, address) -> None:
+        if len(data) <= self.listener.max_packet_bytes:
+            self.listener._spawn(self.listener._reply_datagram(data, address))
+
+
+# 全局监听实例（INGEST_LISTENER_ENABLED 时由 lifespan 启动）
+ingest_listener = IngestListener()
@@ -5,7 +5,13 @@ from datetime import datetime
 from fastapi import HTTPException, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.repositories.monitor import MonitorRepository
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+from app.repositories.series_chunk_repository import SeriesChunkRepository
+from app.services.series_service import SeriesService
+from app.utils.pagination import page_across_sources
 from app.schemas.monitor import (
     PackageDetailResponse, CurrentDataResponse, PackageStatisticsResponse,
     DateRangeResponse, PackageRecordsResponse, PackageRecordResponse,
@@ -19,6 +25,8 @@ class MonitorService:
     def __init__(self, db: Session):
         self.db = db
         self.monitor_repo = MonitorRepository(db)
+        self.archive_repo = ArchiveRepository(settings.ARCHIVE_DIR)
+        self.series_service = SeriesService(PackageRepository(db), SeriesChunkRepository(db))
     
     def get_package_detail(self, user_id: int, package_id: int) -> PackageDetailResponse:
         """获取包裹详情"""
@@ -41,7 +49,7 @@ class MonitorService:
             current_data = CurrentDataResponse(
                 temperature=latest_record.max_temperature,
                 humidity=latest_record.avg_humidity,
-                timestamp=latest_record.created_at
+                timestamp=latest_record.created_at or datetime.fromtimestamp(latest_record.timestamp)
             )
         
         # 构建统计响应
@@ -82,10 +90,31 @@ class MonitorService:
             )
         
         skip = (page - 1) * size
-        records, total = self.monitor_repo.get_package_records(
+        hot_records, hot_total = self.monitor_repo.get_package_records(
             package_id, skip, size, start_date, end_date
         )
         
+        # 查询范围超出热表时，从封存序列块和冷归档补齐
+        start_timestamp = int(start_date.timestamp()) if start_date else None
+        end_timestamp = int(end_date.timestamp()) if end_date else None
+        sources = [(hot_total, lambda _skip, _size: hot_records)]
+        if self.series_service.is_sealed(package_id):
+            sources.append((
+                self.series_service.count_range(package_id, start_timestamp, end_timestamp),
+                lambda offset, limit: self.series_service.page(
+                    package_id, offset, limit, start_timestamp, end_timestamp
+                )
+            ))
+        if self.archive_repo.has_archive(package_id):
+            sources.append((
+                self.archive_repo.count(package_id, start_timestamp, end_timestamp),
+                lambda offset, limit: self.archive_repo.page(
+                    package_id, offset, limit, start_timestamp, end_timestamp
+                )
+            ))
+        records = page_across_sources(sources, skip, size)
+        total = sum(count for count, _ in sources)
+        
         # 转换为响应格式
         record_responses = [
             PackageRecordResponse.model_validate(record) for record in records
@@ -165,8 +194,14 @@ class MonitorService:
                 detail="Only CSV format is supported"
             )
         
-        # 获取所有记录
+        # 获取所有记录（热表 + 封存序列块 + 冷归档）
         records = self.monitor_repo.get_all_package_records(package_id)
+        if self.series_service.is_sealed(package_id):
+            records = list(records) + self.series_service.page(
+                package_id, 0, self.series_service.count(package_id)
+            )
+        if self.archive_repo.has_archive(package_id):
+            records = list(records) + self.archive_repo.read_range(package_id)
         
         # 生成CSV内容
         output = io.StringIO()
@@ -187,7 +222,7 @@ class MonitorService:
                 record.avg_humidity,
                 record.over_threshold_time,
                 record.timestamp,
-                record.created_at.strftime('%Y-%m-%d %H:%M:%S')
+                record.created_at.strftime('%Y-%m-%d %H:%M:%S') if record.created_at else ''
             ])
         
         # 准备响应
@@ -1,26 +1,52 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 from loguru import logger
+from app.models.types import CENTI_SCALE
 from app.repositories.package_repository import PackageRepository
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.series_chunk_repository import SeriesChunkRepository
+from app.services.series_service import (
+    SeriesService, columns_to_records, rows_to_columns, to_history_columns
+)
+from app.utils.columnar import columns_from_records, page_column_sources
+from app.utils.downsample import downsample_indices
+from app.utils.pagination import page_across_sources
 from app.schemas.package import (
     PackageUploadRequest, 
     PackageRecordResponse,
     PackageHistoryResponse
 )
 from app.core.config import settings
+from app.core.database import DATABASE_UNAVAILABLE_ERRORS
+from app.core.spool import IngestSpool, ingest_spool
 
 
 class PackageService:
     """包裹业务逻辑层"""
     
-    def __init__(self, repository: PackageRepository):
+    def __init__(
+        self,
+        repository: PackageRepository,
+        archive: Optional[ArchiveRepository] = None,
+        series: Optional[SeriesService] = None,
+        spool: Optional[IngestSpool] = None
+    ):
         self.repository = repository
+        self.spool = spool or (ingest_spool if settings.SPOOL_ENABLED else None)
+        self.archive = archive or ArchiveRepository(settings.ARCHIVE_DIR)
+        self.series = series or SeriesService(repository, SeriesChunkRepository(repository.db))
     
-    def save_package_data(self, data: PackageUploadRequest) -> Dict[str, Any]:
+    def save_package_data(
+        self,
+        data: PackageUploadRequest,
+        source_device_id: int = 0
+    ) -> Dict[str, Any]:
         """
-        保存包裹数据
+        保存包裹数据（幂等：设备重发的相同读数不会重复写入）
         
         Args:
             data: 包裹上传数据
+            source_device_id: 上传设备（devices.id，0 表示未知）
             
         Returns:
             保存结果
@@ -30,22 +56,102 @@ class PackageService:
         
         # 保存数据
         try:
-            record = self.repository.create(data)
-            logger.info(
-                f"Package data saved - ID: {data.package_id}, "
-                f"MaxTemp: {data.max_temperature}°C, AvgHumidity: {data.avg_humidity}%, "
-                f"OverTime: {data.over_threshold_time}s, Timestamp: {data.timestamp}"
-            )
+            record_id, created = self.repository.create(data, source_device_id)
+            if created:
+                logger.info(
+                    f"Package data saved - ID: {data.package_id}, "
+                    f"MaxTemp: {data.max_temperature}°C, AvgHumidity: {data.avg_humidity}%, "
+                    f"OverTime: {data.over_threshold_time}s, Timestamp: {data.timestamp}"
+                )
+            else:
+                logger.info(
+                    f"Duplicate package data ignored - ID: {data.package_id}, "
+                    f"Timestamp: {data.timestamp}, RecordID: {record_id}"
+                )
             
             return {
                 "status": "success",
                 "message": f"Data for package {data.package_id} received",
-                "record_id": record.id
+                "record_id": record_id,
+                "duplicate": not created
             }
+        except DATABASE_UNAVAILABLE_ERRORS as e:
+            if self.spool is None:
+                logger.error(f"Failed to save package data: {str(e)}")
+                raise
+            return self._spool_readings([data], source_device_id, e)
         except Exception as e:
             logger.error(f"Failed to save package data: {str(e)}")
             raise
     
+    def save_package_batch(
+        self,
+        data: List[PackageUploadRequest],
+        source_device_id: int = 0
+    ) -> Dict[str, Any]:
+        """
+        批量保存包裹数据（单个事务，幂等）
+        
+        Args:
+            data: 包裹上传数据列表（PackageUploadRequest 或二进制帧读数）
+            source_device_id: 上传设备（devices.id，0 表示未知）
+            
+        Returns:
+            保存结果
+        """
+        for item in data:
+            self._check_temperature_alert(item.package_id, item.max_temperature)
+        
+        try:
+            record_ids, created = self.repository.create_many(data, source_device_id)
+            logger.info(
+                f"Package data batch saved - readings: {len(record_ids)}, new: {created}, "
+                f"packages: {sorted({item.package_id for item in data})}"
+            )
+            return {
+                "status": "success",
+                "message": f"{len(record_ids)} readings received",
+                "record_ids": record_ids,
+                "duplicates": len(record_ids) - created
+            }
+        except DATABASE_UNAVAILABLE_ERRORS as e:
+            if self.spool is None:
+                logger.error(f"Failed to save package data batch: {str(e)}")
+                raise
+            return self._spool_readings(data, source_device_id, e)
+        except Exception as e:
+            logger.error(f"Failed to save package data batch: {str(e)}")
+            raise
+    
+    def _spool_readings(
+        self,
+        data: List[PackageUploadRequest],
+        source_device_id: int,
+        error: Exception
+    ) -> Dict[str, Any]:
+        """
+        数据库不可用时将读数写入本地 spool（落盘后返回），由后台任务回放
+        
+        Args:
+            data: 读数列表
+            source_device_id: 上传设备（devices.id）
+            error: 数据库异常
+            
+        Returns:
+            保存结果（status 为 stored）
+        """
+        try:
+            self.repository.db.rollback()
+        except Exception:
+            pass
+        count = self.spool.append(data, source_device_id)
+        logger.warning(f"Database unavailable, {count} readings spooled locally: {str(error)}")
+        return {
+            "status": "stored",
+            "message": f"{count} readings stored, will be written when the database recovers",
+            "spooled": count
+        }
+    
     def get_package_history(
         self, 
         package_id: int, 
@@ -55,6 +161,9 @@ class PackageService:
         """
         获取包裹历史记录
         
+        按 热表 → 封存序列块 → 冷归档 的顺序拼接（均为时间倒序），
+        超出热表部分透明地从封存块或冷归档中读取
+        
         Args:
             package_id: 包裹ID
             limit: 返回记录数量限制
@@ -63,8 +172,23 @@ class PackageService:
         Returns:
             包裹历史记录
         """
-        records = self.repository.get_by_package_id(package_id, limit, offset)
-        total = self.repository.count_by_package_id(package_id)
+        sources = [(
+            self.repository.count_by_package_id(package_id),
+            lambda skip, size: self.repository.get_by_package_id(package_id, size, skip)
+        )]
+        if self.series.is_sealed(package_id):
+            sources.append((
+                self.series.count(package_id),
+                lambda skip, size: self.series.page(package_id, skip, size)
+            ))
+        if self.archive.has_archive(package_id):
+            sources.append((
+                self.archive.count(package_id),
+                lambda skip, size: self.archive.page(package_id, skip, size)
+            ))
+        
+        records = page_across_sources(sources, offset, limit)
+        total = sum(count for count, _ in sources)
         
         return PackageHistoryResponse(
             package_id=package_id,
@@ -72,6 +196,152 @@ class PackageService:
             records=[PackageRecordResponse.model_validate(r) for r in records]
         )
     
+    def get_downsampled_history(
+        self,
+        package_id: int,
+        points: int,
+        method: str = "lttb",
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> PackageHistoryResponse:
+        """
+        获取降采样后的包裹历史记录（用于图表）
+        
+        合并 热表 / 封存序列块 / 冷归档 中时间范围内的记录，按最高温度降采样到 points 个点，
+        超出温度阈值的峰值必定保留
+        
+        Args:
+            package_id: 包裹ID
+            points: 目标点数
+            method: 降采样算法（lttb / minmax）
+            start_timestamp: 开始时间戳（可选）
+            end_timestamp: 结束时间戳（可选）
+            
+        Returns:
+            包裹历史记录（total 为时间范围内的原始记录数，records 按时间倒序）
+        """
+        columns, selected = self._downsample(package_id, points, method, start_timestamp, end_timestamp)
+        records = columns_to_records(package_id, columns, selected[::-1])
+        
+        return PackageHistoryResponse(
+            package_id=package_id,
+            total=len(columns["timestamp"]),
+            records=[PackageRecordResponse.model_validate(r) for r in records],
+            downsample=method
+        )
+    
+    def get_package_history_columns(
+        self,
+        package_id: int,
+        limit: int = 100,
+        offset: int = 0
+    ) -> Tuple[int, Dict[str, np.ndarray]]:
+        """
+        获取包裹历史记录列数组（用于列式响应，不构建逐行对象）
+        
+        分页规则与 get_package_history 一致
+        
+        Args:
+            package_id: 包裹ID
+            limit: 返回记录数量限制
+            offset: 偏移量
+            
+        Returns:
+            (总记录数, 列数组（按时间倒序）)
+        """
+        sources = [(
+            self.repository.count_by_package_id(package_id),
+            lambda skip, size: self.repository.get_columns_by_package_id(package_id, size, skip)
+        )]
+        if self.series.is_sealed(package_id):
+            sources.append((
+                self.series.count(package_id),
+                lambda skip, size: self.series.page_columns(package_id, skip, size)
+            ))
+        if self.archive.has_archive(package_id):
+            sources.append((
+                self.archive.count(package_id),
+                lambda skip, size: columns_from_records(self.archive.page(package_id, skip, size))
+            ))
+        
+        total = sum(count for count, _ in sources)
+        return total, page_column_sources(sources, offset, limit)
+    
+    def get_downsampled_columns(
+        self,
+        package_id: int,
+        points: int,
+        method: str = "lttb",
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> Tuple[int, Dict[str, np.ndarray]]:
+        """
+        获取降采样后的历史记录列数组（用于列式响应）
+        
+        Args:
+            package_id: 包裹ID
+            points: 目标点数
+            method: 降采样算法（lttb / minmax）
+            start_timestamp: 开始时间戳（可选）
+            end_timestamp: 结束时间戳（可选）
+            
+        Returns:
+            (时间范围内的原始记录数, 列数组（按时间倒序）)
+        """
+        columns, selected = self._downsample(package_id, points, method, start_timestamp, end_timestamp)
+        return len(columns["timestamp"]), to_history_columns(columns, selected[::-1])
+    
+    def load_columns(
+        self,
+        package_id: int,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        读取时间范围内 热表 / 封存序列块 / 冷归档 的全部记录列
+        
+        Args:
+            package_id: 包裹ID
+            start_timestamp: 开始时间戳（可选）
+            end_timestamp: 结束时间戳（可选）
+            
+        Returns:
+            列名到数组的映射（按时间升序，温湿度为百分位定点数）
+        """
+        parts = [rows_to_columns(
+            self.repository.get_series_rows(package_id, start_timestamp, end_timestamp)
+        )]
+        sealed = self.series.range_columns(package_id, start_timestamp, end_timestamp)
+        if sealed is not None:
+            parts.append(sealed)
+        if self.archive.has_archive(package_id):
+            parts.append(rows_to_columns(
+                self.archive.read_range(package_id, start_timestamp, end_timestamp)
+            ))
+        
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        order = np.lexsort((columns["id"], columns["timestamp"]))
+        return {name: values[order] for name, values in columns.items()}
+    
+    def _downsample(
+        self,
+        package_id: int,
+        points: int,
+        method: str,
+        start_timestamp: Optional[int],
+        end_timestamp: Optional[int]
+    ) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """读取时间范围内的记录列并计算降采样保留的索引（升序）"""
+        columns = self.load_columns(package_id, start_timestamp, end_timestamp)
+        selected = downsample_indices(
+            columns["timestamp"],
+            columns["max_temperature"] / CENTI_SCALE,
+            points,
+            method,
+            high_threshold=settings.TEMP_HIGH_THRESHOLD,
+            low_threshold=settings.TEMP_LOW_THRESHOLD
+        )
+        return columns, selected
     
     def _check_temperature_alert(self, package_id: int, temperature: float) -> None:
         """
@@ -0,0 +1,112 @@
+"""
+数据保留与冷归档业务逻辑
+将超出热数据窗口的 package_records 分块迁移到归档文件，并小批量删除热表数据
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from app.core.config import settings
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+
+
+RETENTION_MODES = ("age", "closed")
+
+
+class RetentionService:
+    """数据保留与冷归档业务逻辑层"""
+
+    def __init__(self, repository: PackageRepository, archive: ArchiveRepository):
+        self.repository = repository
+        self.archive = archive
+
+    def run(
+        self,
+        mode: Optional[str] = None,
+        days: Optional[int] = None,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        执行一次归档任务
+
+        流程：按ID顺序分块读取候选记录 → 按包裹/月份写入归档文件 → 小批量删除热表记录。
+        先写归档再删除；中途失败后重复执行不会产生重复归档。
+
+        Args:
+            mode: 归档模式（age / closed，默认读取配置）
+            days: 天数阈值（默认读取对应模式的配置）
+            dry_run: 只统计候选记录，不写归档也不删除
+
+        Returns:
+            执行结果汇总
+        """
+        mode = mode or settings.RETENTION_MODE
+        if mode not in RETENTION_MODES:
+            raise ValueError(f"Unsupported retention mode: {mode}")
+
+        if days is None:
+            days = settings.RETENTION_DAYS if mode == "age" else settings.RETENTION_CLOSED_IDLE_DAYS
+        cutoff = int((datetime.now() - timedelta(days=days)).timestamp())
+
+        fetch = (
+            self.repository.get_records_before if mode == "age"
+            else self.repository.get_records_of_idle_packages
+        )
+
+        summary = {
+            "mode": mode,
+            "cutoff_timestamp": cutoff,
+            "dry_run": dry_run,
+            "scanned": 0,
+            "archived": 0,
+            "deleted": 0,
+            "packages": 0
+        }
+        packages = set()
+        last_id = 0
+
+        logger.info(f"🗄️ Retention started - mode: {mode}, cutoff: {cutoff}, dry_run: {dry_run}")
+
+        while True:
+            rows = fetch(cutoff, after_id=last_id, limit=settings.RETENTION_CHUNK_SIZE)
+            if not rows:
+                break
+            last_id = rows[-1].id
+            summary["scanned"] += len(rows)
+
+            by_package: Dict[int, List] = {}
+            for row in rows:
+                by_package.setdefault(row.package_id, []).append(row)
+            packages.update(by_package)
+
+            if dry_run:
+                continue
+
+            for package_id, package_rows in by_package.items():
+                summary["archived"] += self.archive.append(package_id, package_rows)
+
+            summary["deleted"] += self._delete_in_batches([row.id for row in rows])
+
+        summary["packages"] = len(packages)
+        logger.info(
+            f"✅ Retention finished - scanned: {summary['scanned']}, "
+            f"archived: {summary['archived']}, deleted: {summary['deleted']}, "
+            f"packages: {summary['packages']}"
+        )
+        return summary
+
+    def _delete_in_batches(self, record_ids: List[int]) -> int:
+        """
+        小批量删除热表记录，每批单独提交以缩短锁持有时间
+
+        Args:
+            record_ids: 已归档的记录ID
+
+        Returns:
+            删除的记录数量
+        """
+        deleted = 0
+        batch_size = settings.RETENTION_DELETE_BATCH_SIZE
+        for i in range(0, len(record_ids), batch_size):
+            deleted += self.repository.delete_by_ids(record_ids[i:i + batch_size])
+        return deleted
@@ -0,0 +1,171 @@
+"""
+时间序列预聚合业务逻辑
+按 1分钟/15分钟/1小时/1天 四个层级维护每个包裹的 最小/最大/平均/计数 金字塔，
+图表缩放时根据时间范围和点数预算选择层级，无需扫描原始记录
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException, status
+from loguru import logger
+
+from app.models.types import CENTI_SCALE
+from app.repositories.rollup_repository import ROLLUP_LEVELS, SeriesRollupRepository, bucket_start
+from app.schemas.package import PackageSeriesBucket, PackageSeriesResponse
+from app.services.package_service import PackageService
+
+
+def choose_level(start_timestamp: int, end_timestamp: int, points: int) -> int:
+    """
+    选择桶数不超过点数预算的最细层级（都超出时使用最粗层级）
+
+    Args:
+        start_timestamp: 开始时间戳
+        end_timestamp: 结束时间戳
+        points: 点数预算
+
+    Returns:
+        层级（桶时长，秒）
+    """
+    for level in ROLLUP_LEVELS:
+        buckets = end_timestamp // level - bucket_start(start_timestamp, level) // level + 1
+        if buckets <= points:
+            return level
+    return ROLLUP_LEVELS[-1]
+
+
+def aggregate_columns(columns: Dict[str, np.ndarray], level: int) -> List[Dict[str, Any]]:
+    """
+    将按时间升序的记录列聚合为某层级的桶
+
+    Args:
+        columns: 记录列（温湿度为百分位定点数）
+        level: 层级（桶时长，秒）
+
+    Returns:
+        聚合行列表
+    """
+    timestamps = columns["timestamp"]
+    if len(timestamps) == 0:
+        return []
+    buckets = timestamps - timestamps % level
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    temperatures = columns["max_temperature"] / CENTI_SCALE
+    humidities = columns["avg_humidity"] / CENTI_SCALE
+
+    bucket_starts = buckets[starts].tolist()
+    counts = np.diff(np.append(starts, len(timestamps))).tolist()
+    mins = np.minimum.reduceat(temperatures, starts).tolist()
+    maxs = np.maximum.reduceat(temperatures, starts).tolist()
+    temp_sums = np.add.reduceat(temperatures, starts).tolist()
+    humidity_sums = np.add.reduceat(humidities, starts).tolist()
+    return [
+        {
+            "level": level,
+            "bucket_start": bucket_starts[i],
+            "record_count": counts[i],
+            "min_temperature": mins[i],
+            "max_temperature": maxs[i],
+            "sum_temperature": temp_sums[i],
+            "sum_humidity": humidity_sums[i],
+        }
+        for i in range(len(bucket_starts))
+    ]
+
+
+class RollupService:
+    """时间序列预聚合业务逻辑层"""
+
+    def __init__(self, package_service: PackageService, rollups: SeriesRollupRepository):
+        self.package_service = package_service
+        self.rollups = rollups
+
+    def rebuild(self, package_id: int) -> Dict[str, Any]:
+        """
+        根据 热表 / 封存序列块 / 冷归档 的全部记录重建包裹预聚合
+
+        Args:
+            package_id: 包裹ID
+
+        Returns:
+            各层级桶数量
+        """
+        columns = self.package_service.load_columns(package_id)
+        rows = []
+        levels = {}
+        for level in ROLLUP_LEVELS:
+            level_rows = aggregate_columns(columns, level)
+            for row in level_rows:
+                row["package_id"] = package_id
+            rows.extend(level_rows)
+            levels[level] = len(level_rows)
+
+        self.rollups.replace(package_id, rows)
+        logger.info(
+            f"📈 Package {package_id} rollups rebuilt - records: {len(columns['timestamp'])}, "
+            f"buckets: {levels}"
+        )
+        return {"package_id": package_id, "records": len(columns["timestamp"]), "buckets": levels}
+
+    def get_series(
+        self,
+        package_id: int,
+        points: int,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None,
+        level: Optional[int] = None
+    ) -> PackageSeriesResponse:
+        """
+        获取预聚合时间序列
+
+        Args:
+            package_id: 包裹ID
+            points: 点数预算（未指定层级时用于自动选择层级）
+            start_timestamp: 开始时间戳（可选，默认为最早数据）
+            end_timestamp: 结束时间戳（可选，默认为最新数据）
+            level: 指定层级（可选）
+
+        Returns:
+            预聚合时间序列
+        """
+        if level is not None and level not in ROLLUP_LEVELS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported rollup level: {level}, expected one of {list(ROLLUP_LEVELS)}"
+            )
+
+        if start_timestamp is None or end_timestamp is None:
+            bounds = self.rollups.get_bounds(package_id)
+            if bounds is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"No rollups found for package {package_id}"
+                )
+            start_timestamp = bounds[0] if start_timestamp is None else start_timestamp
+            end_timestamp = bounds[1] if end_timestamp is None else end_timestamp
+
+        if end_timestamp < start_timestamp:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end_timestamp must not be earlier than start_timestamp"
+            )
+
+        level = level or choose_level(start_timestamp, end_timestamp, points)
+        rows = self.rollups.get_range(package_id, level, start_timestamp, end_timestamp)
+        return PackageSeriesResponse(
+            package_id=package_id,
+            level=level,
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp,
+            buckets=[
+                PackageSeriesBucket(
+                    bucket_start=row.bucket_start,
+                    count=row.record_count,
+                    min_temperature=row.min_temperature,
+                    max_temperature=row.max_temperature,
+                    avg_temperature=row.sum_temperature / row.record_count,
+                    avg_humidity=row.sum_humidity / row.record_count
+                )
+                for row in rows
+            ]
+        )
@@ -0,0 +1,361 @@
+"""
+封存序列业务逻辑
+已送达包裹的监测数据只读且通常整体读取（图表、导出），封存后以差分编码压缩块存储
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException, status
+from loguru import logger
+
+from app.core.config import settings
+from app.models.package import RecordSnapshot
+from app.models.types import CENTI_SCALE, to_centi
+from app.repositories.package_repository import PackageRepository
+from app.repositories.series_chunk_repository import SeriesChunkRepository
+from app.utils.columnar import empty_columns
+from app.utils.series_codec import COLUMNS, VERSION, decode_series, encode_series
+
+
+class SeriesService:
+    """封存序列业务逻辑层"""
+
+    def __init__(self, repository: PackageRepository, chunks: SeriesChunkRepository):
+        self.repository = repository
+        self.chunks = chunks
+
+    def seal(self, package_id: int) -> Dict[str, Any]:
+        """
+        封存包裹：将热表记录编码为序列块并删除热表记录
+
+        温湿度按百分位精度编码（与签名精度一致）
+
+        Args:
+            package_id: 包裹ID
+
+        Returns:
+            封存结果
+        """
+        if self.chunks.has_chunks(package_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Package {package_id} is already sealed"
+            )
+
+        rows = self.repository.get_series_rows(package_id)
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No records found for package {package_id}"
+            )
+
+        chunk_size = settings.SERIES_CHUNK_SIZE
+        chunks = []
+        record_ids = []
+        for seq, start in enumerate(range(0, len(rows), chunk_size)):
+            part = rows[start:start + chunk_size]
+            record_ids.append([row.id for row in part])
+            chunks.append({
+                "package_id": package_id,
+                "seq": seq,
+                "record_count": len(part),
+                "start_timestamp": part[0].timestamp,
+                "end_timestamp": part[-1].timestamp,
+                "encoding": VERSION,
+                "data": encode_series(rows_to_columns(part), settings.SERIES_COMPRESSION_LEVEL),
+            })
+
+        deleted = self.chunks.seal(package_id, chunks, record_ids)
+        encoded_bytes = sum(len(c["data"]) for c in chunks)
+        logger.info(
+            f"📦 Package {package_id} sealed - records: {len(rows)}, "
+            f"chunks: {len(chunks)}, bytes: {encoded_bytes}"
+        )
+        return {
+            "package_id": package_id,
+            "records": deleted,
+            "chunks": len(chunks),
+            "bytes": encoded_bytes
+        }
+
+    def unseal(self, package_id: int) -> Dict[str, Any]:
+        """
+        解封包裹：将序列块解码写回热表
+
+        Args:
+            package_id: 包裹ID
+
+        Returns:
+            解封结果
+        """
+        columns = self.load_columns(package_id)
+        if columns is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Package {package_id} is not sealed"
+            )
+
+        # 不写回原记录ID：封存期间新写入的记录可能已复用这些ID（SQLite 主键无 AUTOINCREMENT），
+        # 由幂等键 (package_id, timestamp, source_device_id) 去重
+        records = [
+            {
+                "package_id": package_id,
+                "max_temperature": record.max_temperature,
+                "avg_humidity": record.avg_humidity,
+                "over_threshold_time": record.over_threshold_time,
+                "timestamp": record.timestamp,
+                "created_at": record.created_at,
+                "source_device_id": record.source_device_id,
+            }
+            for record in columns_to_records(package_id, columns, np.arange(len(columns["id"])))
+        ]
+        restored = self.chunks.unseal(package_id, records)
+        logger.info(f"📦 Package {package_id} unsealed - records: {restored}")
+        return {"package_id": package_id, "records": restored}
+
+    def is_sealed(self, package_id: int) -> bool:
+        """检查包裹是否已封存"""
+        return self.chunks.has_chunks(package_id)
+
+    def count(self, package_id: int) -> int:
+        """统计封存记录数量"""
+        return self.chunks.count_records(package_id)
+
+    def load_columns(self, package_id: int) -> Optional[Dict[str, np.ndarray]]:
+        """
+        解码包裹的全部序列块
+
+        Args:
+            package_id: 包裹ID
+
+        Returns:
+            列名到数组的映射（按时间升序），未封存时返回 None
+        """
+        chunks = self.chunks.get_chunks(package_id)
+        if not chunks:
+            return None
+        decoded = [decode_series(chunk.data) for chunk in chunks]
+        return {name: np.concatenate([d[name] for d in decoded]) for name in COLUMNS}
+
+    def page(
+        self,
+        package_id: int,
+        skip: int,
+        limit: int,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> List[RecordSnapshot]:
+        """
+        分页读取封存记录（按时间倒序，只解码当前页所在的序列块）
+
+        Args:
+            package_id: 包裹ID
+            skip: 偏移量
+            limit: 返回数量限制
+            start_timestamp: 开始时间戳（可选）
+            end_timestamp: 结束时间戳（可选）
+
+        Returns:
+            记录列表
+        """
+        columns, indices = self._page_indices(package_id, skip, limit, start_timestamp, end_timestamp)
+        return columns_to_records(package_id, columns, indices)
+
+    def page_columns(self, package_id: int, skip: int, limit: int) -> Dict[str, np.ndarray]:
+        """
+        分页读取封存记录列数组（按时间倒序，温湿度转换为浮点数）
+
+        Args:
+            package_id: 包裹ID
+            skip: 偏移量
+            limit: 返回数量限制
+
+        Returns:
+            列数组
+        """
+        columns, indices = self._page_indices(package_id, skip, limit)
+        if not len(indices):
+            return empty_columns()
+        return to_history_columns(columns, indices)
+
+    def count_range(
+        self,
+        package_id: int,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> int:
+        """统计时间范围内的封存记录数量（只解码跨越范围边界的序列块）"""
+        if start_timestamp is None and end_timestamp is None:
+            return self.count(package_id)
+        spans, _ = self._chunk_spans(package_id, start_timestamp, end_timestamp)
+        return sum(count for _, count in spans)
+
+    def range_columns(
+        self,
+        package_id: int,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        读取时间范围内的封存记录列（按时间升序，只解码与范围重叠的序列块）
+
+        Args:
+            package_id: 包裹ID
+            start_timestamp: 开始时间戳（可选）
+            end_timestamp: 结束时间戳（可选）
+
+        Returns:
+            列名到数组的映射，未封存时返回 None
+        """
+        if not self.chunks.has_chunks(package_id):
+            return None
+        spans, decoded = self._chunk_spans(package_id, start_timestamp, end_timestamp)
+        columns = self._decode_chunks([chunk for chunk, _ in spans], decoded)
+        indices = self._range_indices(columns, start_timestamp, end_timestamp)
+        return {name: values[indices] for name, values in columns.items()}
+
+    def _chunk_spans(
+        self,
+        package_id: int,
+        start_timestamp: Optional[int],
+        end_timestamp: Optional[int]
+    ) -> Tuple[List[Tuple[Any, int]], Dict[int, Dict[str, np.ndarray]]]:
+        """
+        按块元数据筛选与时间范围重叠的序列块（按序号升序）
+
+        完全落在范围内的块直接使用 record_count，只有跨越范围边界的块需要解码
+
+        Returns:
+            ([(块元数据, 范围内记录数)], 已解码的块)
+        """
+        spans = []
+        partial = []
+        for chunk in self.chunks.get_chunk_index(package_id):
+            if start_timestamp is not None and chunk.end_timestamp < start_timestamp:
+                continue
+            if end_timestamp is not None and chunk.start_timestamp > end_timestamp:
+                continue
+            spans.append([chunk, chunk.record_count])
+            if (start_timestamp is not None and chunk.start_timestamp < start_timestamp) or \
+                    (end_timestamp is not None and chunk.end_timestamp > end_timestamp):
+                partial.append(len(spans) - 1)
+
+        decoded = {}
+        if partial:
+            data = self.chunks.get_chunk_data([spans[i][0].id for i in partial])
+            for i in partial:
+                columns = decode_series(data[spans[i][0].id])
+                decoded[spans[i][0].id] = columns
+                spans[i][1] = len(self._range_indices(columns, start_timestamp, end_timestamp))
+        return [(chunk, count) for chunk, count in spans if count], decoded
+
+    def _decode_chunks(self, chunks: List[Any], decoded: Dict[int, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        """解码指定的序列块并按时间升序拼接（复用已解码的块）"""
+        data = self.chunks.get_chunk_data([chunk.id for chunk in chunks if chunk.id not in decoded])
+        parts = [decoded[chunk.id] if chunk.id in decoded else decode_series(data[chunk.id]) for chunk in chunks]
+        if not parts:
+            return {name: np.empty(0, dtype=np.int64) for name in COLUMNS}
+        return {name: np.concatenate([part[name] for part in parts]) for name in COLUMNS}
+
+    def _page_indices(
+        self,
+        package_id: int,
+        skip: int,
+        limit: int,
+        start_timestamp: Optional[int] = None,
+        end_timestamp: Optional[int] = None
+    ) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """
+        定位倒序分页所需的序列块：从最新的块向前按记录数跳过 skip 条，只解码覆盖当前页的块
+
+        Returns:
+            (所需块拼接后的列, 当前页在列中的索引（倒序）)
+        """
+        needed = []
+        offset = skip
+        collected = 0
+        if limit > 0:
+            spans, decoded = self._chunk_spans(package_id, start_timestamp, end_timestamp)
+            for chunk, count in reversed(spans):
+                if not needed and offset >= count:
+                    offset -= count
+                    continue
+                needed.append(chunk)
+                collected += count
+                if collected - offset >= limit:
+                    break
+        if not needed:
+            return self._decode_chunks([], {}), np.arange(0)
+
+        columns = self._decode_chunks(needed[::-1], decoded)
+        indices = self._range_indices(columns, start_timestamp, end_timestamp)[::-1]
+        return columns, indices[offset:offset + limit]
+
+    @staticmethod
+    def _range_indices(
+        columns: Dict[str, np.ndarray],
+        start_timestamp: Optional[int],
+        end_timestamp: Optional[int]
+    ) -> np.ndarray:
+        """按时间范围筛选（列已按时间升序，使用二分查找）"""
+        timestamps = columns["timestamp"]
+        low = 0 if start_timestamp is None else np.searchsorted(timestamps, start_timestamp, side="left")
+        high = len(timestamps) if end_timestamp is None else np.searchsorted(timestamps, end_timestamp, side="right")
+        return np.arange(low, high)
+
+
+def rows_to_columns(rows) -> Dict[str, np.ndarray]:
+    """将记录行转换为整数列（温湿度为百分位定点数，created_at 为 Unix 秒）"""
+    return {
+        "id": np.fromiter((r.id for r in rows), dtype=np.int64, count=len(rows)),
+        "timestamp": np.fromiter((r.timestamp for r in rows), dtype=np.int64, count=len(rows)),
+        "max_temperature": np.fromiter((to_centi(r.max_temperature) for r in rows), dtype=np.int64, count=len(rows)),
+        "avg_humidity": np.fromiter((to_centi(r.avg_humidity) for r in rows), dtype=np.int64, count=len(rows)),
+        "over_threshold_time": np.fromiter((r.over_threshold_time for r in rows), dtype=np.int64, count=len(rows)),
+        "created_at": np.fromiter(
+            (int(r.created_at.timestamp()) if r.created_at else 0 for r in rows),
+            dtype=np.int64, count=len(rows)
+        ),
+        "source_device_id": np.fromiter((r.source_device_id for r in rows), dtype=np.int64, count=len(rows)),
+    }
+
+
+def columns_to_records(
+    package_id: int,
+    columns: Dict[str, np.ndarray],
+    indices: np.ndarray
+) -> List[RecordSnapshot]:
+    """将解码后的列按索引转换为记录对象（只转换需要返回的部分）"""
+    ids = columns["id"][indices].tolist()
+    timestamps = columns["timestamp"][indices].tolist()
+    temperatures = (columns["max_temperature"][indices] / CENTI_SCALE).tolist()
+    humidities = (columns["avg_humidity"][indices] / CENTI_SCALE).tolist()
+    over_times = columns["over_threshold_time"][indices].tolist()
+    created = columns["created_at"][indices].tolist()
+    devices = columns["source_device_id"][indices].tolist()
+    return [
+        RecordSnapshot(
+            id=ids[i],
+            package_id=package_id,
+            max_temperature=temperatures[i],
+            avg_humidity=humidities[i],
+            over_threshold_time=over_times[i],
+            timestamp=timestamps[i],
+            created_at=datetime.fromtimestamp(created[i]) if created[i] else None,
+            source_device_id=devices[i]
+        )
+        for i in range(len(ids))
+    ]
+
+
+def to_history_columns(columns: Dict[str, np.ndarray], indices: np.ndarray) -> Dict[str, np.ndarray]:
+    """将百分位定点数列按索引转换为历史记录列数组（温湿度为浮点数）"""
+    return {
+        "id": columns["id"][indices],
+        "timestamp": columns["timestamp"][indices],
+        "max_temperature": columns["max_temperature"][indices] / CENTI_SCALE,
+        "avg_humidity": columns["avg_humidity"][indices] / CENTI_SCALE,
+        "over_threshold_time": columns["over_threshold_time"][indices],
+        "created_at": columns["created_at"][indices],
+    }
@@ -0,0 +1,68 @@
+"""
+本地 spool 回放
+数据库恢复后由后台任务把 spool 中的读数按写入顺序批量写入（幂等，重复回放不产生重复记录）
+"""
+import asyncio
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import DATABASE_UNAVAILABLE_ERRORS, SessionLocal
+from app.core.spool import IngestSpool, ingest_spool
+from app.repositories.package_repository import PackageRepository
+
+
+def replay_once(spool: IngestSpool = ingest_spool, session_factory=SessionLocal) -> int:
+    """
+    回放一次 spool（数据库仍不可用时不做任何处理）
+    
+    Args:
+        spool: 待回放的 spool
+        session_factory: 数据库会话工厂
+        
+    Returns:
+        本次写入（含已存在而跳过）的读数数量
+    """
+    db = session_factory()
+    try:
+        try:
+            db.execute(text("SELECT 1"))
+        except DATABASE_UNAVAILABLE_ERRORS:
+            return 0
+        
+        repository = PackageRepository(db)
+        
+        def write(batch, source_device_id):
+            try:
+                repository.create_many(batch, source_device_id)
+            except Exception:
+                # 失败的批次回滚后再继续（逐条重试或下次回放）
+                db.rollback()
+                raise
+        
+        replayed = spool.replay(write, settings.SPOOL_REPLAY_BATCH_SIZE)
+        if replayed:
+            logger.info(f"Spool replayed - readings: {replayed}, remaining: {spool.depth()}")
+        return replayed
+    finally:
+        db.close()
+
+
+async def run_spool_replayer(interval: float, spool: IngestSpool = ingest_spool) -> None:
+    """
+    后台回放任务：spool 非空时定期尝试回放
+    
+    Args:
+        interval: 检查间隔（秒）
+        spool: 待回放的 spool
+    """
+    while True:
+        await asyncio.sleep(interval)
+        if spool.depth() == 0:
+            continue
+        try:
+            await run_in_threadpool(replay_once, spool)
+        except Exception as e:
+            logger.warning(f"Spool replay failed, will retry: {str(e)}")
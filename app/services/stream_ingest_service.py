@@ -0,0 +1,152 @@
+"""
+网关流式上传业务逻辑
+网关把多个 ESP32 采集器的积压读数以 NDJSON 逐行转发，每行携带采集设备ID和该设备的签名；
+逐行校验签名后按批写入（同一批内按采集设备分组，保持原有顺序）
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import ValidationError
+
+from app.core.database import DATABASE_UNAVAILABLE_ERRORS
+from app.core.device_cache import device_cache
+from app.models.device import DeviceSnapshot
+from app.repositories.device_repository import DeviceRepository
+from app.schemas.package import PackageStreamReading
+from app.services.package_service import PackageService
+from app.utils.security import SIGNATURE_V2, build_signature_data, verify_hmac_signature
+
+# 汇总中保留的错误样例数量
+MAX_ERROR_SAMPLES = 20
+
+
+class StreamIngestService:
+    """单次流式上传的处理状态（逐批调用 process，最后调用 summary）"""
+    
+    def __init__(self, package_service: PackageService, device_repo: DeviceRepository):
+        self.package_service = package_service
+        self.device_repo = device_repo
+        # 本次上传内已解析的设备（None 表示不存在或未激活），避免每行重复查找
+        self._devices: Dict[str, Optional[DeviceSnapshot]] = {}
+        self.lines = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.spooled = 0
+        self.rejected = 0
+        self.batches = 0
+        self.errors: List[Dict[str, Any]] = []
+    
+    def process(self, lines: List[Tuple[int, Optional[bytes]]]) -> None:
+        """
+        校验并写入一批行
+        
+        Args:
+            lines: (行号, 行内容) 列表，行内容为 None 表示超长
+        """
+        groups: List[Tuple[int, List[PackageStreamReading]]] = []
+        for line_number, line in lines:
+            self.lines += 1
+            reading, device = self._verify(line_number, line)
+            if reading is None:
+                continue
+            if groups and groups[-1][0] == device.id:
+                groups[-1][1].append(reading)
+            else:
+                groups.append((device.id, [reading]))
+        
+        for source_device_id, readings in groups:
+            result = self.package_service.save_package_batch(readings, source_device_id)
+            self.batches += 1
+            self.accepted += len(readings)
+            if result["status"] == "stored":
+                self.spooled += result["spooled"]
+            else:
+                self.duplicates += result["duplicates"]
+    
+    def summary(self) -> Dict[str, Any]:
+        """
+        上传汇总
+        
+        Returns:
+            行数、写入/重复/转存 spool/拒绝的读数数量及错误样例
+        """
+        return {
+            "status": "stored" if self.spooled else "success",
+            "lines": self.lines,
+            "accepted": self.accepted,
+            "created": self.accepted - self.duplicates - self.spooled,
+            "duplicates": self.duplicates,
+            "spooled": self.spooled,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+    
+    def _verify(
+        self,
+        line_number: int,
+        line: Optional[bytes]
+    ) -> Tuple[Optional[PackageStreamReading], Optional[DeviceSnapshot]]:
+        """解析一行并校验采集设备签名，失败时记录拒绝原因"""
+        if line is None:
+            return self._reject(line_number, "Line too long")
+        try:
+            reading = PackageStreamReading.model_validate_json(line)
+        except ValidationError as e:
+            error = e.errors(include_url=False)[0]
+            location = ".".join(str(part) for part in error["loc"])
+            return self._reject(line_number, f"{location}: {error['msg']}" if location else error["msg"])
+        
+        try:
+            device = self._resolve_device(reading.device_id)
+        except DATABASE_UNAVAILABLE_ERRORS as e:
+            # 不记住查找失败，后续行重试
+            logger.warning(f"Device lookup failed during stream upload: {str(e)}")
+            try:
+                self.device_repo.db.rollback()
+            except Exception:
+                pass
+            return self._reject(line_number, f"Device {reading.device_id} lookup unavailable")
+        if device is None:
+            return self._reject(line_number, f"Unknown or inactive device {reading.device_id}")
+        if device.signature_version == SIGNATURE_V2:
+            # 行内签名为 v1 格式，已升级到 v2 的设备不接受 v1 签名
+            return self._reject(line_number, f"Device {reading.device_id} requires v2 signatures")
+        
+        signature_data = build_signature_data(
+            reading.package_id, reading.max_temperature, reading.avg_humidity,
+            reading.over_threshold_time, reading.timestamp
+        )
+        if not verify_hmac_signature(signature_data, reading.signature, device.secret_key):
+            return self._reject(line_number, f"Invalid signature for device {reading.device_id}")
+        return reading, device
+    
+    def _resolve_device(self, device_id: str) -> Optional[DeviceSnapshot]:
+        """查找激活的设备：本次上传内每个设备只查询一次数据库，数据库不可用时回退到设备缓存"""
+        if device_id in self._devices:
+            return self._devices[device_id]
+        
+        try:
+            found = self.device_repo.get_by_device_id(device_id)
+            device = DeviceSnapshot.from_device(found) if found is not None else None
+        except DATABASE_UNAVAILABLE_ERRORS:
+            device = device_cache.get(device_id)
+            if device is None:
+                raise
+            try:
+                self.device_repo.db.rollback()
+            except Exception:
+                pass
+            device_cache.record_fallback()
+            logger.warning(f"Database unavailable, authenticating {device_id} from device cache")
+        
+        if device is not None and not device.is_active:
+            device = None
+        self._devices[device_id] = device
+        return device
+    
+    def _reject(self, line_number: int, reason: str) -> Tuple[None, None]:
+        self.rejected += 1
+        if len(self.errors) < MAX_ERROR_SAMPLES:
+            self.errors.append({"line": line_number, "error": reason})
+        return None, None
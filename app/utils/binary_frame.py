@@ -0,0 +1,117 @@
+"""
+ESP32 二进制上传帧
+面向蜂窝网络等受限链路，以定长结构体代替 JSON 上传一条或多条读数
+
+帧格式（小端序）：
+    头部      2s 魔数 b"RF" | B 版本 | B 保留 | H 读数条数
+    读数      每条 I package_id | h 最高温度×100 | H 平均湿度×100 | I 超阈值时间(秒) | I 时间戳
+
+签名为对完整帧原始字节计算的 HMAC-SHA256（见 app.utils.security.generate_body_signature）
+"""
+import struct
+import time
+from typing import Iterable, List, NamedTuple
+
+from app.models.types import CENTI_SCALE, to_centi
+
+
+FRAME_MEDIA_TYPE = "application/x-rfid-frame"
+
+MAGIC = b"RF"
+VERSION = 1
+
+_HEADER = struct.Struct("<2sBBH")
+_READING = struct.Struct("<IhHII")
+
+HEADER_SIZE = _HEADER.size
+READING_SIZE = _READING.size
+
+# 与 PackageUploadRequest 的字段约束一致（百分位定点数）
+_MIN_TEMPERATURE = -50 * CENTI_SCALE
+_MAX_TEMPERATURE = 100 * CENTI_SCALE
+_MAX_HUMIDITY = 100 * CENTI_SCALE
+_MAX_FUTURE_SECONDS = 3600
+
+
+class FrameDecodeError(ValueError):
+    """二进制帧格式或数据非法"""
+
+
+class FrameReading(NamedTuple):
+    """帧内读数（字段与 PackageUploadRequest 一致，可直接传给 PackageRepository）"""
+    package_id: int
+    max_temperature: float
+    avg_humidity: float
+    over_threshold_time: int
+    timestamp: int
+
+
+def encode_frame(readings: Iterable) -> bytes:
+    """
+    编码二进制帧（供设备端参考实现、测试和压测使用）
+
+    Args:
+        readings: 具有 PackageUploadRequest 字段属性的读数
+
+    Returns:
+        帧字节串
+    """
+    body = [
+        _READING.pack(
+            r.package_id,
+            to_centi(r.max_temperature),
+            to_centi(r.avg_humidity),
+            r.over_threshold_time,
+            r.timestamp
+        )
+        for r in readings
+    ]
+    return _HEADER.pack(MAGIC, VERSION, 0, len(body)) + b"".join(body)
+
+
+def decode_frame(data: bytes, max_readings: int = 500) -> List[FrameReading]:
+    """
+    解码并校验二进制帧
+
+    直接在 memoryview 上按结构体解包，不复制读数数据；
+    字段范围校验与 PackageUploadRequest 一致，不经过 Pydantic 构建模型
+
+    Args:
+        data: 帧字节串
+        max_readings: 单帧最大读数条数
+
+    Returns:
+        读数列表
+
+    Raises:
+        FrameDecodeError: 帧格式或字段非法
+    """
+    view = memoryview(data)
+    if len(view) < HEADER_SIZE:
+        raise FrameDecodeError("Frame too short")
+
+    magic, version, _, count = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION:
+        raise FrameDecodeError("Unsupported frame magic or version")
+    if count == 0 or count > max_readings:
+        raise FrameDecodeError(f"Reading count must be between 1 and {max_readings}")
+    if len(view) != HEADER_SIZE + count * READING_SIZE:
+        raise FrameDecodeError("Frame length does not match reading count")
+
+    latest_timestamp = int(time.time()) + _MAX_FUTURE_SECONDS
+    readings = []
+    for index, (package_id, temperature, humidity, over_time, timestamp) in enumerate(
+        _READING.iter_unpack(view[HEADER_SIZE:])
+    ):
+        if package_id == 0:
+            raise FrameDecodeError(f"Reading {index}: package_id must be positive")
+        if not _MIN_TEMPERATURE <= temperature <= _MAX_TEMPERATURE:
+            raise FrameDecodeError(f"Reading {index}: max_temperature out of range")
+        if humidity > _MAX_HUMIDITY:
+            raise FrameDecodeError(f"Reading {index}: avg_humidity out of range")
+        if timestamp == 0 or timestamp > latest_timestamp:
+            raise FrameDecodeError(f"Reading {index}: invalid timestamp")
+        readings.append(FrameReading(
+            package_id, temperature / CENTI_SCALE, humidity / CENTI_SCALE, over_time, timestamp
+        ))
+    return readings
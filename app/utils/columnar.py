@@ -0,0 +1,173 @@
+"""
+历史记录列式响应格式
+避免逐行构建 dict / Pydantic 对象，直接以列数组编码响应
+
+- columnar: JSON 平行数组 {"package_id", "total", "count", "columns": {"timestamp": [...], ...}}
+- packed:   小端序二进制，头部 + 各列连续数组
+
+packed 格式：
+    头部      4s 魔数 b"PHR1" | B 版本 | B 保留 | H 列数 | I 包裹ID | I 总记录数 | I 本页记录数
+    数据      按 HISTORY_COLUMNS 顺序依次存放各列数组（id u4 | timestamp i8 | max_temperature f4 |
+              avg_humidity f4 | over_threshold_time u4 | created_at i8，created_at 为 Unix 秒，0 表示空）
+"""
+import json
+import struct
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+PACKED_MEDIA_TYPE = "application/x-package-history"
+
+MAGIC = b"PHR1"
+VERSION = 1
+
+# 列名及 packed 格式中的数据类型（顺序即编码顺序）
+HISTORY_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("id", "<u4"),
+    ("timestamp", "<i8"),
+    ("max_temperature", "<f4"),
+    ("avg_humidity", "<f4"),
+    ("over_threshold_time", "<u4"),
+    ("created_at", "<i8"),
+)
+
+_HEADER = struct.Struct("<4sBBHIII")
+
+# (记录总数, 分页读取函数(skip, limit) -> 列数组)
+ColumnSource = Tuple[int, Callable[[int, int], Dict[str, np.ndarray]]]
+
+
+def empty_columns() -> Dict[str, np.ndarray]:
+    """创建空的列数组"""
+    return {name: np.empty(0, dtype=dtype) for name, dtype in HISTORY_COLUMNS}
+
+
+def columns_from_rows(rows: Sequence[tuple]) -> Dict[str, np.ndarray]:
+    """
+    将按 HISTORY_COLUMNS 顺序选取的查询结果行转换为列数组
+
+    Args:
+        rows: 查询结果行（id, timestamp, max_temperature, avg_humidity, over_threshold_time, created_at）
+
+    Returns:
+        列数组
+    """
+    if not rows:
+        return empty_columns()
+    ids, timestamps, temperatures, humidities, over_times, created = zip(*rows)
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        "timestamp": np.array(timestamps, dtype=np.int64),
+        "max_temperature": np.array(temperatures, dtype=np.float64),
+        "avg_humidity": np.array(humidities, dtype=np.float64),
+        "over_threshold_time": np.array(over_times, dtype=np.int64),
+        "created_at": np.array([int(c.timestamp()) if c else 0 for c in created], dtype=np.int64),
+    }
+
+
+def columns_from_records(records: Sequence) -> Dict[str, np.ndarray]:
+    """将记录对象（ORM 对象或 RecordSnapshot）转换为列数组"""
+    return columns_from_rows([
+        (r.id, r.timestamp, r.max_temperature, r.avg_humidity, r.over_threshold_time, r.created_at)
+        for r in records
+    ])
+
+
+def page_column_sources(sources: List[ColumnSource], offset: int, limit: int) -> Dict[str, np.ndarray]:
+    """
+    跨数据源分页（列数组版本，拼接规则与 page_across_sources 一致）
+
+    Args:
+        sources: 数据源列表
+        offset: 偏移量
+        limit: 返回数量限制
+
+    Returns:
+        拼接后的列数组
+    """
+    parts = []
+    fetched = 0
+    for total, fetch in sources:
+        if fetched >= limit:
+            break
+        if offset >= total:
+            offset -= total
+            continue
+        part = fetch(offset, limit - fetched)
+        parts.append(part)
+        fetched += len(part["id"])
+        offset = 0
+    if not parts:
+        return empty_columns()
+    return {name: np.concatenate([part[name] for part in parts]) for name, _ in HISTORY_COLUMNS}
+
+
+def encode_columnar_json(package_id: int, total: int, columns: Dict[str, np.ndarray]) -> bytes:
+    """
+    编码为 JSON 平行数组
+
+    Args:
+        package_id: 包裹ID
+        total: 总记录数
+        columns: 列数组
+
+    Returns:
+        JSON 字节串（created_at 为 Unix 秒，空值为 null）
+    """
+    created = columns["created_at"].tolist()
+    body = {
+        "package_id": package_id,
+        "total": total,
+        "count": len(columns["id"]),
+        "columns": {
+            "id": columns["id"].tolist(),
+            "timestamp": columns["timestamp"].tolist(),
+            "max_temperature": columns["max_temperature"].tolist(),
+            "avg_humidity": columns["avg_humidity"].tolist(),
+            "over_threshold_time": columns["over_threshold_time"].tolist(),
+            "created_at": [c or None for c in created],
+        }
+    }
+    return json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+def encode_packed(package_id: int, total: int, columns: Dict[str, np.ndarray]) -> bytes:
+    """
+    编码为 packed 二进制格式
+
+    Args:
+        package_id: 包裹ID
+        total: 总记录数
+        columns: 列数组
+
+    Returns:
+        二进制数据
+    """
+    count = len(columns["id"])
+    parts = [_HEADER.pack(MAGIC, VERSION, 0, len(HISTORY_COLUMNS), package_id, total, count)]
+    for name, dtype in HISTORY_COLUMNS:
+        parts.append(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+    return b"".join(parts)
+
+
+def decode_packed(data: bytes) -> Tuple[Dict[str, int], Dict[str, np.ndarray]]:
+    """
+    解码 packed 二进制格式（供客户端和测试使用，列数组为只读视图，不复制数据）
+
+    Args:
+        data: 二进制数据
+
+    Returns:
+        (头部信息, 列数组)
+    """
+    magic, version, _, column_count, package_id, total, count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or column_count != len(HISTORY_COLUMNS):
+        raise ValueError("Invalid packed history payload")
+
+    columns = {}
+    offset = _HEADER.size
+    for name, dtype in HISTORY_COLUMNS:
+        columns[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += np.dtype(dtype).itemsize * count
+    return {"package_id": package_id, "total": total, "count": count}, columns
@@ -0,0 +1,130 @@
+"""
+时间序列降采样
+图表只需要与像素宽度相当的点数，服务端按列数组降采样后再返回
+
+- lttb: Largest-Triangle-Three-Buckets，保留曲线形状
+- minmax: 每个桶保留最小值和最大值，保留包络
+
+两种算法都会保留超出温度阈值的峰值：桶内存在超阈值的点时，该桶选取最极端的点
+"""
+from typing import Optional
+
+import numpy as np
+
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def downsample_indices(
+    x: np.ndarray,
+    y: np.ndarray,
+    points: int,
+    method: str = "lttb",
+    high_threshold: Optional[float] = None,
+    low_threshold: Optional[float] = None
+) -> np.ndarray:
+    """
+    计算降采样后保留的点的索引
+
+    Args:
+        x: 横坐标（按升序排列，通常为时间戳）
+        y: 纵坐标（通常为温度）
+        points: 目标点数
+        method: 降采样算法（lttb / minmax）
+        high_threshold: 高温阈值，超出的峰值必定保留（可选）
+        low_threshold: 低温阈值，低于的谷值必定保留（可选）
+
+    Returns:
+        保留点的索引（升序，数量不超过 points）
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unsupported downsample method: {method}")
+    n = len(y)
+    if points >= n or n <= 2:
+        return np.arange(n)
+    if method == "minmax":
+        # 超阈值的峰值/谷值即为桶内最大值/最小值，minmax 天然保留
+        return _minmax(y, points)
+    return _lttb(x, y, points, high_threshold, low_threshold)
+
+
+def _bucket_edges(start: int, stop: int, buckets: int) -> np.ndarray:
+    """将 [start, stop) 均分为 buckets 个桶，返回 buckets+1 个边界"""
+    return np.linspace(start, stop, buckets + 1).astype(np.int64)
+
+
+def _excursion(
+    y: np.ndarray,
+    high_threshold: Optional[float],
+    low_threshold: Optional[float]
+) -> np.ndarray:
+    """每个点超出阈值的幅度（未超出为 0）"""
+    excursion = np.zeros(len(y), dtype=np.float64)
+    if high_threshold is not None:
+        excursion = np.maximum(excursion, y - high_threshold)
+    if low_threshold is not None:
+        excursion = np.maximum(excursion, low_threshold - y)
+    return excursion
+
+
+def _lttb(
+    x: np.ndarray,
+    y: np.ndarray,
+    points: int,
+    high_threshold: Optional[float],
+    low_threshold: Optional[float]
+) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets（首尾点固定，中间 points-2 个桶各选一个点）"""
+    n = len(y)
+    if points < 3:
+        return np.array([0, n - 1])[:points]
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    excursion = _excursion(y, high_threshold, low_threshold)
+    edges = _bucket_edges(1, n - 1, points - 2)
+
+    # 各桶的均值一次性向量化计算，作为下一个桶的第三个顶点
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    x_avg = np.add.reduceat(x, starts) / counts
+    y_avg = np.add.reduceat(y, starts) / counts
+    x_avg = np.append(x_avg, x[-1])
+    y_avg = np.append(y_avg, y[-1])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bucket_excursion = excursion[lo:hi]
+        if bucket_excursion.any():
+            # 桶内存在超阈值的点：保留最极端的峰值
+            chosen = lo + int(np.argmax(bucket_excursion))
+        else:
+            # 三角形面积（省略常数 1/2）
+            area = np.abs(
+                (x[prev] - x_avg[i + 1]) * (y[lo:hi] - y[prev])
+                - (x[prev] - x[lo:hi]) * (y_avg[i + 1] - y[prev])
+            )
+            chosen = lo + int(np.argmax(area))
+        selected[i + 1] = chosen
+        prev = chosen
+    return selected
+
+
+def _minmax(y: np.ndarray, points: int) -> np.ndarray:
+    """每个桶保留最小值和最大值（points 个点对应 points//2 个桶）"""
+    n = len(y)
+    buckets = max(points // 2, 1)
+    edges = _bucket_edges(0, n, buckets)
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    bucket_of = np.repeat(np.arange(buckets), counts)
+
+    # 对 (桶号, 值) 排序后，每个桶的第一个和最后一个即为最小值和最大值
+    order = np.lexsort((y, bucket_of))
+    min_idx = order[starts]
+    max_idx = order[edges[1:] - 1]
+    return np.unique(np.concatenate([min_idx, max_idx]))
@@ -0,0 +1,134 @@
+"""
+UDP/TCP 轻量上传报文
+供电池供电的采集器绕过 HTTP + JSON + TLS，直接发送签名的二进制帧（见 app.utils.binary_frame）
+
+报文格式（小端序）：
+    头部      2s 魔数 b"RP" | B 版本 | B 设备ID长度 N | I 请求时间戳
+    设备ID    N 字节 ASCII
+    帧        二进制帧（头部 + 读数）
+    签名      32 字节 HMAC-SHA256（原始摘要，覆盖签名之前的全部字节）
+
+TCP 连接上每个报文前加 2 字节（H，小端）报文长度；UDP 每个数据报一个报文
+
+确认（8 字节）：2s 魔数 b"RA" | B 状态 | B 建议重试秒数 | 4s 签名前 4 字节（用于匹配请求）
+"""
+import hashlib
+import hmac
+import struct
+from enum import IntEnum
+from typing import NamedTuple
+
+from app.utils.binary_frame import FrameDecodeError, HEADER_SIZE
+
+PACKET_MAGIC = b"RP"
+PACKET_VERSION = 1
+ACK_MAGIC = b"RA"
+
+_PREFIX = struct.Struct("<2sBBI")
+_ACK = struct.Struct("<2sBB4s")
+
+PREFIX_SIZE = _PREFIX.size
+SIGNATURE_SIZE = 32
+ACK_SIZE = _ACK.size
+MAX_DEVICE_ID_LENGTH = 50
+
+
+class AckStatus(IntEnum):
+    """确认状态"""
+    OK = 0            # 已写入
+    STORED = 1        # 数据库不可用，已写入本地 spool
+    BAD_PACKET = 2    # 报文或帧格式非法
+    UNAUTHORIZED = 3  # 设备不存在/未激活、签名错误或时间戳超出范围
+    REPLAYED = 4      # 重放报文
+    RATE_LIMITED = 5  # 超出设备限流
+    BUSY = 6          # 服务端繁忙（准入控制拒绝）
+    ERROR = 7         # 服务端内部错误
+
+
+class IngestPacket(NamedTuple):
+    """解析后的上传报文"""
+    device_id: str
+    timestamp: int
+    frame: bytes
+    signed: bytes
+    signature: bytes
+
+
+def encode_packet(device_id: str, timestamp: int, frame: bytes, secret_key: str) -> bytes:
+    """
+    编码并签名上传报文（供设备端参考实现、测试和压测使用）
+
+    Args:
+        device_id: 设备唯一标识
+        timestamp: 请求时间戳
+        frame: 二进制帧
+        secret_key: 设备密钥
+
+    Returns:
+        报文字节串
+    """
+    device = device_id.encode("ascii")
+    signed = _PREFIX.pack(PACKET_MAGIC, PACKET_VERSION, len(device), timestamp) + device + frame
+    return signed + hmac.new(secret_key.encode("utf-8"), signed, hashlib.sha256).digest()
+
+
+def decode_packet(data: bytes) -> IngestPacket:
+    """
+    解析上传报文（只检查结构，不验证签名和帧内容）
+
+    Args:
+        data: 报文字节串
+
+    Returns:
+        上传报文
+
+    Raises:
+        FrameDecodeError: 报文格式非法
+    """
+    if len(data) < _PREFIX.size + 1 + HEADER_SIZE + SIGNATURE_SIZE:
+        raise FrameDecodeError("Packet too short")
+    magic, version, device_length, timestamp = _PREFIX.unpack_from(data, 0)
+    if magic != PACKET_MAGIC or version != PACKET_VERSION:
+        raise FrameDecodeError("Unsupported packet magic or version")
+    if not 0 < device_length <= MAX_DEVICE_ID_LENGTH:
+        raise FrameDecodeError("Invalid device ID length")
+
+    frame_start = _PREFIX.size + device_length
+    signed_end = len(data) - SIGNATURE_SIZE
+    if signed_end - frame_start < HEADER_SIZE:
+        raise FrameDecodeError("Packet too short")
+    try:
+        device_id = data[_PREFIX.size:frame_start].decode("ascii")
+    except UnicodeDecodeError:
+        raise FrameDecodeError("Invalid device ID")
+    return IngestPacket(
+        device_id, timestamp, data[frame_start:signed_end], data[:signed_end], data[signed_end:]
+    )
+
+
+def encode_ack(status: AckStatus, signature: bytes, retry_after: int = 0) -> bytes:
+    """
+    编码确认
+
+    Args:
+        status: 确认状态
+        signature: 请求报文签名（取前 4 字节）
+        retry_after: 建议重试秒数（0 ~ 255）
+
+    Returns:
+        确认字节串
+    """
+    return _ACK.pack(ACK_MAGIC, status, min(max(retry_after, 0), 255), signature[:4].ljust(4, b"\0"))
+
+
+def decode_ack(data: bytes) -> tuple:
+    """
+    解析确认（供设备端参考实现、测试和压测使用）
+
+    Returns:
+        (状态, 建议重试秒数, 签名前 4 字节)
+    """
+    magic, status, retry_after, token = _ACK.unpack(data)
+    if magic != ACK_MAGIC:
+        raise FrameDecodeError("Invalid ack magic")
+    return AckStatus(status), retry_after, token
@@ -0,0 +1,105 @@
+"""
+NDJSON（换行分隔 JSON）流式拆行
+从请求体分块流中增量拆出行，可选 gzip 解压；内存占用只与块大小和单行长度上限有关，与请求体总大小无关
+
+- gzip 按块解压且每次输出不超过固定长度，压缩炸弹不会一次性展开；支持多成员 gzip 流
+- 超过长度上限的行被丢弃（跳过到下一个换行符），以 None 占位，由调用方计为拒绝
+- 空行忽略，行号从 1 开始（包含空行）
+"""
+import zlib
+from typing import AsyncIterator, Optional, Tuple
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# 每次解压输出的最大字节数
+_INFLATE_CHUNK = 64 * 1024
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class NDJSONDecodeError(ValueError):
+    """请求体无法解压"""
+
+
+async def inflate_gzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    增量解压 gzip 分块流
+
+    Args:
+        chunks: 压缩数据分块
+
+    Yields:
+        解压后的数据块（每块不超过 64KB）
+
+    Raises:
+        NDJSONDecodeError: 数据不是合法的 gzip 或被截断
+    """
+    decompressor = zlib.decompressobj(_GZIP_WBITS)
+    started = False
+    try:
+        async for chunk in chunks:
+            data = chunk
+            while data:
+                if decompressor.eof:
+                    # 多成员 gzip：后续字节属于下一个成员
+                    decompressor = zlib.decompressobj(_GZIP_WBITS)
+                started = True
+                output = decompressor.decompress(data, _INFLATE_CHUNK)
+                if output:
+                    yield output
+                data = decompressor.unused_data if decompressor.eof else decompressor.unconsumed_tail
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+    except zlib.error as e:
+        raise NDJSONDecodeError(f"Invalid gzip body: {str(e)}")
+    if started and not decompressor.eof:
+        raise NDJSONDecodeError("Truncated gzip body")
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    从分块流中增量拆出非空行
+
+    Args:
+        chunks: 数据分块
+        max_line_bytes: 单行最大字节数
+
+    Yields:
+        (行号, 行内容)，超长的行内容为 None
+    """
+    buffer = bytearray()
+    line_number = 0
+    overlong = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not overlong:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        overlong = True
+                        buffer.clear()
+                break
+
+            line_number += 1
+            if overlong:
+                overlong = False
+                yield line_number, None
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    yield line_number, None
+                elif buffer.strip():
+                    yield line_number, bytes(buffer)
+            buffer.clear()
+            start = end + 1
+
+    line_number += 1
+    if overlong:
+        yield line_number, None
+    elif buffer.strip():
+        yield line_number, bytes(buffer)
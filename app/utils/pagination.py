@@ -0,0 +1,35 @@
+"""
+多数据源分页工具
+用于将 热表 / 封存序列块 / 冷归档 等按时间倒序首尾相接的数据源拼接成统一的分页结果
+"""
+from typing import Callable, List, Sequence, Tuple
+
+# (记录总数, 分页读取函数(skip, limit) -> 记录列表)
+PageSource = Tuple[int, Callable[[int, int], Sequence]]
+
+
+def page_across_sources(sources: List[PageSource], offset: int, limit: int) -> list:
+    """
+    跨数据源分页
+
+    各数据源按顺序拼接（前一个数据源的记录整体排在后一个之前），
+    只会调用与请求页有交集的数据源
+
+    Args:
+        sources: 数据源列表
+        offset: 偏移量
+        limit: 返回数量限制
+
+    Returns:
+        记录列表
+    """
+    records: list = []
+    for total, fetch in sources:
+        if len(records) >= limit:
+            break
+        if offset >= total:
+            offset -= total
+            continue
+        records.extend(fetch(offset, limit - len(records)))
+        offset = 0
+    return records
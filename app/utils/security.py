@@ -8,6 +8,11 @@ import secrets
 from typing import Optional
 
 
+# 设备签名版本
+SIGNATURE_V1 = 1  # 对 build_signature_data 拼接的字段字符串签名
+SIGNATURE_V2 = 2  # 对请求体原始字节签名
+
+
 def generate_secret_key() -> str:
     """
     生成 32 字节的 Secret Key（64字符十六进制）
@@ -92,3 +97,32 @@ def verify_hmac_signature(
     # 使用安全的比较方法，防止时序攻击
     return hmac.compare_digest(expected_signature, signature)
 
+
+def generate_body_signature(body: bytes, secret_key: str) -> str:
+    """
+    对请求体原始字节生成 HMAC-SHA256 签名
+    
+    Args:
+        body: 请求体原始字节
+        secret_key: 密钥
+        
+    Returns:
+        HMAC-SHA256 签名的十六进制字符串（64字符）
+    """
+    return hmac.new(secret_key.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+
+def verify_body_signature(body: bytes, signature: str, secret_key: str) -> bool:
+    """
+    验证请求体原始字节的 HMAC-SHA256 签名
+    
+    Args:
+        body: 请求体原始字节
+        signature: 待验证的签名
+        secret_key: 密钥
+        
+    Returns:
+        验证是否通过
+    """
+    expected_signature = generate_body_signature(body, secret_key)
+    return hmac.compare_digest(expected_signature, signature)
@@ -0,0 +1,132 @@
+"""
+时间序列块编解码
+将一个包裹的监测序列按列做差分编码后用 zlib 压缩为二进制块
+
+块格式（小端序）：
+    头部      4s 魔数 b"PSC1" | B 版本 | B 标志位 | I 点数
+    列描述    每列 B 差分数据类型代码 | q 首个值
+    数据      zlib(各列差分数组依次拼接，每列 点数-1 个元素)
+
+温湿度以百分位定点整数编码（与签名的 .2f 精度一致），created_at 以 Unix 秒编码（0 表示空）
+
+版本 2 增加 source_device_id 列（解封写回时保留幂等键）；版本 1 的块没有该列，解码为 0
+"""
+import struct
+import zlib
+from typing import Dict
+
+import numpy as np
+
+
+MAGIC = b"PSC1"
+VERSION = 2
+FLAG_HAS_CREATED_AT = 0x01
+
+# 编码列顺序
+COLUMNS = (
+    "id", "timestamp", "max_temperature", "avg_humidity", "over_threshold_time", "created_at", "source_device_id"
+)
+
+# 各版本块中编码的列
+_VERSION_COLUMNS = {1: COLUMNS[:6], 2: COLUMNS}
+
+_HEADER = struct.Struct("<4sBBI")
+_COLUMN = struct.Struct("<Bq")
+
+# 差分数组可选的数据类型（按从小到大尝试）
+_DTYPES = (np.dtype("<i1"), np.dtype("<i2"), np.dtype("<i4"), np.dtype("<i8"))
+
+
+class SeriesCodecError(ValueError):
+    """序列块格式错误"""
+
+
+def _narrowest_dtype(deltas: np.ndarray) -> int:
+    """选择能容纳所有差分值的最小整数类型"""
+    if deltas.size == 0:
+        return 0
+    low, high = int(deltas.min()), int(deltas.max())
+    for code, dtype in enumerate(_DTYPES):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return code
+    return len(_DTYPES) - 1
+
+
+def encode_series(columns: Dict[str, np.ndarray], compression_level: int = 6) -> bytes:
+    """
+    编码一段时间序列
+
+    Args:
+        columns: 列名到 int64 数组的映射（温湿度为百分位整数，created_at 为 Unix 秒，0 表示空；
+            缺少 source_device_id 时按 0 编码）
+        compression_level: zlib 压缩级别
+
+    Returns:
+        二进制块
+    """
+    count = len(columns["id"])
+    flags = FLAG_HAS_CREATED_AT if np.any(columns["created_at"]) else 0
+
+    descriptors = []
+    payload = []
+    for name in COLUMNS:
+        values = np.asarray(columns[name], dtype=np.int64) if name in columns else np.zeros(count, dtype=np.int64)
+        if len(values) != count:
+            raise SeriesCodecError(f"Column {name} has {len(values)} values, expected {count}")
+        first = int(values[0]) if count else 0
+        deltas = np.diff(values)
+        code = _narrowest_dtype(deltas)
+        descriptors.append(_COLUMN.pack(code, first))
+        payload.append(deltas.astype(_DTYPES[code]).tobytes())
+
+    return b"".join([
+        _HEADER.pack(MAGIC, VERSION, flags, count),
+        *descriptors,
+        zlib.compress(b"".join(payload), compression_level),
+    ])
+
+
+def decode_series(blob: bytes) -> Dict[str, np.ndarray]:
+    """
+    解码二进制块
+
+    Args:
+        blob: encode_series 生成的二进制块
+
+    Returns:
+        列名到 int64 数组的映射
+    """
+    view = memoryview(blob)
+    magic, version, flags, count = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version not in _VERSION_COLUMNS:
+        raise SeriesCodecError(f"Unsupported series chunk (magic={magic!r}, version={version})")
+    encoded = _VERSION_COLUMNS[version]
+
+    offset = _HEADER.size
+    descriptors = []
+    for _ in encoded:
+        descriptors.append(_COLUMN.unpack_from(view, offset))
+        offset += _COLUMN.size
+
+    raw = zlib.decompress(view[offset:])
+    columns = {}
+    position = 0
+    for name, (code, first) in zip(encoded, descriptors):
+        dtype = _DTYPES[code]
+        length = max(count - 1, 0)
+        deltas = np.frombuffer(raw, dtype=dtype, count=length, offset=position)
+        position += length * dtype.itemsize
+
+        values = np.empty(count, dtype=np.int64)
+        if count:
+            values[0] = first
+            np.cumsum(deltas, dtype=np.int64, out=values[1:])
+            values[1:] += first
+        columns[name] = values
+
+    if not flags & FLAG_HAS_CREATED_AT:
+        columns["created_at"] = np.zeros(count, dtype=np.int64)
+    for name in COLUMNS[len(encoded):]:
+        columns[name] = np.zeros(count, dtype=np.int64)
+    return columns
@@ -0,0 +1,210 @@
+"""
+合成数据集生成（基准测试用，可复现）
+按包裹逐个生成读数，每个包裹使用由 (seed, package_id) 派生的独立随机数发生器，
+同一参数生成的数据与分块大小、输出方式（数据库/CSV）无关
+
+- 设备：device_id BENCH-{id:06d}，密钥由种子派生，签名版本 2
+- 用户：bench_user_{id}，共用同一个密码哈希
+- 包裹：生命周期起点在 stagger_seconds 内均匀错开，读数条数在 readings_per_package 上下浮动 length_spread，
+  由一个设备上传；读数间隔 interval_seconds（±10% 抖动，同一包裹时间戳严格递增）
+- 温度：包裹基线（base_temperature ±1.5°C）+ 日周期波动 + 噪声；
+  超温事件按 excursion_rate 的概率开始、平均持续 excursion_readings 条，期间温度越过高温（80%）或低温阈值，
+  over_threshold_time 为读数间隔的 30%~100%
+- 湿度：包裹基线 40%~70% + 噪声
+- 用户绑定：bound_ratio 比例的包裹绑定到随机用户，5% 的绑定为未激活
+"""
+from typing import Dict, Iterator, List, NamedTuple
+
+import numpy as np
+
+from app.models.types import CENTI_SCALE
+
+
+# 读数列（与 package_records 插入列一致，不含自增 id 和 created_at）
+RECORD_COLUMNS = ("package_id", "max_temperature", "avg_humidity", "over_threshold_time", "timestamp", "source_device_id")
+
+SECONDS_PER_DAY = 86400
+
+
+class FleetSpec(NamedTuple):
+    """合成数据集参数"""
+    packages: int = 1000
+    devices: int = 100
+    users: int = 50
+    readings_per_package: int = 288
+    interval_seconds: int = 300
+    length_spread: float = 0.25
+    start_timestamp: int = 1704067200  # 2024-01-01 00:00:00 UTC（固定起点，保证可复现）
+    stagger_seconds: int = 30 * SECONDS_PER_DAY
+    base_temperature: float = 5.0
+    high_threshold: float = 30.0
+    low_threshold: float = -10.0
+    excursion_rate: float = 0.002
+    excursion_readings: int = 6
+    bound_ratio: float = 0.9
+    first_package_id: int = 1
+    seed: int = 42
+
+    @property
+    def package_ids(self) -> range:
+        return range(self.first_package_id, self.first_package_id + self.packages)
+
+
+def _package_rng(spec: FleetSpec, package_id: int) -> np.random.Generator:
+    return np.random.default_rng([spec.seed, package_id])
+
+
+def package_device(spec: FleetSpec, package_id: int) -> int:
+    """包裹的上传设备（devices.id）"""
+    return int(_package_rng(spec, package_id).integers(1, spec.devices + 1))
+
+
+def package_readings(spec: FleetSpec, package_id: int) -> Dict[str, np.ndarray]:
+    """
+    生成单个包裹的全部读数
+
+    Args:
+        spec: 数据集参数
+        package_id: 包裹ID
+
+    Returns:
+        按 RECORD_COLUMNS 的列数组（时间升序）
+    """
+    rng = _package_rng(spec, package_id)
+    device = int(rng.integers(1, spec.devices + 1))
+
+    spread = int(spec.readings_per_package * spec.length_spread)
+    count = int(rng.integers(
+        max(spec.readings_per_package - spread, 1), spec.readings_per_package + spread + 1
+    ))
+    interval = spec.interval_seconds
+    jitter = interval // 10
+
+    start = spec.start_timestamp + int(rng.integers(0, max(spec.stagger_seconds, 1)))
+    timestamps = start + np.arange(count, dtype=np.int64) * interval
+    if jitter:
+        timestamps += rng.integers(-jitter, jitter + 1, size=count)
+
+    # 基线 + 日周期 + 噪声
+    base = spec.base_temperature + rng.uniform(-1.5, 1.5)
+    phase = rng.uniform(0, 2 * np.pi)
+    temperature = (
+        base
+        + 0.8 * np.sin(2 * np.pi * (timestamps % SECONDS_PER_DAY) / SECONDS_PER_DAY + phase)
+        + rng.normal(0, 0.2, size=count)
+    )
+    humidity = np.clip(rng.uniform(40, 70) + rng.normal(0, 2, size=count), 0, 100)
+    over_time = np.zeros(count, dtype=np.int64)
+
+    # 超温事件
+    for begin in np.flatnonzero(rng.random(count) < spec.excursion_rate):
+        end = min(begin + int(rng.geometric(1 / max(spec.excursion_readings, 1))), count)
+        length = end - begin
+        if rng.random() < 0.8:
+            temperature[begin:end] = spec.high_threshold + rng.uniform(0.5, 6.0, size=length)
+        else:
+            temperature[begin:end] = spec.low_threshold - rng.uniform(0.5, 4.0, size=length)
+        over_time[begin:end] = (rng.uniform(0.3, 1.0, size=length) * interval).astype(np.int64)
+
+    return {
+        "package_id": np.full(count, package_id, dtype=np.int64),
+        "max_temperature": np.round(temperature, 2),
+        "avg_humidity": np.round(humidity, 2),
+        "over_threshold_time": over_time,
+        "timestamp": timestamps,
+        "source_device_id": np.full(count, device, dtype=np.int64),
+    }
+
+
+def iter_reading_chunks(spec: FleetSpec, chunk_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    按包裹顺序生成读数，拼接为约 chunk_rows 行的列数组块
+
+    Args:
+        spec: 数据集参数
+        chunk_rows: 每块目标行数（块边界对齐包裹，实际行数可能略多）
+
+    Yields:
+        按 RECORD_COLUMNS 的列数组
+    """
+    pending: List[Dict[str, np.ndarray]] = []
+    rows = 0
+    for package_id in spec.package_ids:
+        columns = package_readings(spec, package_id)
+        pending.append(columns)
+        rows += len(columns["timestamp"])
+        if rows >= chunk_rows:
+            yield _concat(pending)
+            pending, rows = [], 0
+    if pending:
+        yield _concat(pending)
+
+
+def _concat(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return {name: np.concatenate([part[name] for part in parts]) for name in RECORD_COLUMNS}
+
+
+def to_storage_units(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    温湿度换算为紧凑存储的百分位定点整数（CSV 直接导入紧凑存储表时使用）
+
+    Args:
+        columns: 读数列数组
+
+    Returns:
+        新的列数组
+    """
+    converted = dict(columns)
+    for name in ("max_temperature", "avg_humidity"):
+        converted[name] = np.rint(columns[name] * CENTI_SCALE).astype(np.int64)
+    return converted
+
+
+def generate_devices(spec: FleetSpec) -> List[dict]:
+    """生成设备行（显式 id 1..devices）"""
+    rng = np.random.default_rng([spec.seed, 0, 1])
+    return [
+        {
+            "id": device_id,
+            "device_id": f"BENCH-{device_id:06d}",
+            "device_name": f"Bench reader {device_id}",
+            "secret_key": rng.bytes(32).hex(),
+            "is_active": True,
+            "signature_version": 2,
+        }
+        for device_id in range(1, spec.devices + 1)
+    ]
+
+
+def generate_users(spec: FleetSpec, password_hash: str) -> List[dict]:
+    """生成用户行（显式 id 1..users）"""
+    return [
+        {
+            "id": user_id,
+            "username": f"bench_user_{user_id}",
+            "email": f"bench_user_{user_id}@example.com",
+            "password_hash": password_hash,
+            "is_active": True,
+        }
+        for user_id in range(1, spec.users + 1)
+    ]
+
+
+def generate_bindings(spec: FleetSpec) -> List[dict]:
+    """生成用户包裹绑定行（每个包裹最多绑定一个用户）"""
+    if spec.users <= 0:
+        return []
+    rng = np.random.default_rng([spec.seed, 0, 2])
+    package_ids = np.arange(spec.first_package_id, spec.first_package_id + spec.packages)
+    bound = package_ids[rng.random(spec.packages) < spec.bound_ratio]
+    owners = rng.integers(1, spec.users + 1, size=len(bound))
+    active = rng.random(len(bound)) >= 0.05
+    return [
+        {
+            "user_id": int(user_id),
+            "package_id": int(package_id),
+            "package_name": f"Bench package {package_id}",
+            "is_active": bool(is_active),
+        }
+        for package_id, user_id, is_active in zip(bound, owners, active)
+    ]
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+历史记录响应格式基准测试
+对比 /packages/{id}/records 三种响应格式（查询 + 编码）的耗时与响应体大小：
+- json:     PackageHistoryResponse 逐条记录
+- columnar: JSON 平行数组
+- packed:   小端序二进制列数组
+
+用法：
+    python scripts/bench_history_formats.py
+    python scripts/bench_history_formats.py --rows 10000 --repeats 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.package import PackageRecord
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+from app.services.package_service import PackageService
+from app.utils.columnar import encode_columnar_json, encode_packed
+from loguru import logger
+
+
+PACKAGE_ID = 1001
+
+
+def seed(session, rows: int, seed_value: int) -> None:
+    """写入一条温度缓慢漂移的序列"""
+    rng = random.Random(seed_value)
+    temperature, humidity = 4.0, 60.0
+    now = datetime.now()
+    values = []
+    for i in range(rows):
+        temperature = min(max(temperature + rng.uniform(-0.2, 0.2), -20), 40)
+        humidity = min(max(humidity + rng.uniform(-0.5, 0.5), 0), 100)
+        values.append({
+            "package_id": PACKAGE_ID,
+            "max_temperature": round(temperature, 2),
+            "avg_humidity": round(humidity, 2),
+            "over_threshold_time": i,
+            "timestamp": 1700000000 + i * 60,
+            "created_at": now,
+        })
+    session.execute(insert(PackageRecord), values)
+    session.commit()
+
+
+def time_it(func, repeats: int):
+    """返回多次执行的最短耗时（秒）和最后一次的结果"""
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="历史记录响应格式基准测试")
+    parser.add_argument("--rows", type=int, default=10000, help="每次响应的记录数")
+    parser.add_argument("--repeats", type=int, default=5, help="重复次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        seed(session, args.rows, args.seed)
+        service = PackageService(
+            PackageRepository(session),
+            archive=ArchiveRepository(os.path.join(tmp_dir, "archive"))
+        )
+
+        def json_format():
+            return service.get_package_history(PACKAGE_ID, args.rows).model_dump_json().encode("utf-8")
+
+        def columnar_format():
+            return encode_columnar_json(PACKAGE_ID, *service.get_package_history_columns(PACKAGE_ID, args.rows))
+
+        def packed_format():
+            return encode_packed(PACKAGE_ID, *service.get_package_history_columns(PACKAGE_ID, args.rows))
+
+        results = [
+            (name, *time_it(func, args.repeats))
+            for name, func in (("json", json_format), ("columnar", columnar_format), ("packed", packed_format))
+        ]
+        session.close()
+        engine.dispose()
+
+    base_seconds, base_body = results[0][1], results[0][2]
+    logger.info(f"📊 {args.rows} rows per response")
+    for name, seconds, body in results:
+        logger.info(
+            f"{name:>8}: {len(body):>9} bytes (x{len(base_body) / len(body):.1f} smaller) | "
+            f"{seconds * 1000:8.1f} ms (x{base_seconds / seconds:.1f} faster)"
+        )
+
+
+if __name__ == "__main__":
+    main()
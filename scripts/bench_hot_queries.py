@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+热点查询基准测试
+对比每次调用的 Python 侧开销（内存 SQLite，数据量很小，耗时主要来自语句构建、缓存键计算和结果处理）：
+- 旧写法：每次通过 Query API 重新构建查询
+- 新写法：仓库中的模块级语句 + 绑定参数
+
+用法：
+    python scripts/bench_hot_queries.py
+    python scripts/bench_hot_queries.py --calls 20000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import and_, create_engine, desc
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.config import settings
+from app.core.database import Base
+from app.models.device import Device
+from app.models.package import PackageRecord
+from app.models.user import UserPackage
+from app.repositories.device_repository import DeviceRepository
+from app.repositories.package_repository import PackageRepository
+from app.repositories.user import UserPackageRepository
+from loguru import logger
+
+
+PACKAGE_ID = 1001
+
+
+def legacy_queries(db) -> dict:
+    """Query API 写法（每次调用重新构建查询）"""
+    return {
+        "get_by_device_id": lambda: db.query(Device).filter(Device.device_id == "ESP32-001").first(),
+        "check_package_ownership": lambda: db.query(UserPackage).filter(
+            and_(
+                UserPackage.user_id == 1,
+                UserPackage.package_id == PACKAGE_ID,
+                UserPackage.is_active == True
+            )
+        ).first() is not None,
+        "get_by_package_id": lambda: db.query(PackageRecord).filter(
+            PackageRecord.package_id == PACKAGE_ID
+        ).order_by(desc(PackageRecord.timestamp)).limit(20).offset(0).all(),
+        "count_by_package_id": lambda: db.query(PackageRecord).filter(
+            PackageRecord.package_id == PACKAGE_ID
+        ).count(),
+        "get_latest_by_package_id": lambda: db.query(PackageRecord).filter(
+            PackageRecord.package_id == PACKAGE_ID
+        ).order_by(desc(PackageRecord.timestamp)).first(),
+    }
+
+
+def cached_queries(db) -> dict:
+    """仓库当前写法（模块级语句）"""
+    devices = DeviceRepository(db)
+    owners = UserPackageRepository(db)
+    packages = PackageRepository(db)
+    return {
+        "get_by_device_id": lambda: devices.get_by_device_id("ESP32-001"),
+        "check_package_ownership": lambda: owners.check_package_ownership(1, PACKAGE_ID),
+        "get_by_package_id": lambda: packages.get_by_package_id(PACKAGE_ID, 20, 0),
+        "count_by_package_id": lambda: packages.count_by_package_id(PACKAGE_ID),
+        "get_latest_by_package_id": lambda: packages.get_latest_by_package_id(PACKAGE_ID),
+    }
+
+
+def per_call(func, calls: int) -> float:
+    """返回每次调用耗时（秒）"""
+    for _ in range(100):
+        func()
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="热点查询 Python 开销基准测试")
+    parser.add_argument("--calls", type=int, default=5000, help="每个查询的调用次数")
+    args = parser.parse_args()
+
+    # 关闭热数据窗口，使每次调用都访问数据库
+    settings.HOT_WINDOW_ENABLED = False
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Device(device_id="ESP32-001", secret_key="a" * 64))
+    db.add(UserPackage(user_id=1, package_id=PACKAGE_ID))
+    db.add_all(
+        PackageRecord(
+            package_id=PACKAGE_ID, max_temperature=4.5, avg_humidity=50.0,
+            over_threshold_time=0, timestamp=1700000000 + i
+        )
+        for i in range(50)
+    )
+    db.commit()
+
+    legacy = legacy_queries(db)
+    cached = cached_queries(db)
+    logger.info(f"📊 {args.calls} calls per query (in-memory SQLite)")
+    for name in legacy:
+        before = per_call(legacy[name], args.calls)
+        after = per_call(cached[name], args.calls)
+        logger.info(
+            f"{name:<26}: Query {before * 1e6:7.1f} µs → cached {after * 1e6:7.1f} µs "
+            f"(-{(1 - after / before) * 100:.0f}%)"
+        )
+
+
+if __name__ == "__main__":
+    main()
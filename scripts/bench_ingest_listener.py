@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+上传监听压测：HTTP /upload/frame 与 UDP/TCP 报文的每核吞吐对比
+在本进程内启动 HTTP 服务（uvicorn）和上传监听，写入临时 SQLite 数据库；
+压测客户端在独立进程中运行，服务端 CPU 时间按本进程 getrusage 统计
+
+两条路径写入路径相同（幂等批量写入），差异主要来自协议开销（HTTP 解析、请求头、中间件、依赖注入）
+
+用法：
+    python scripts/bench_ingest_listener.py
+    python scripts/bench_ingest_listener.py --packets 5000 --batch 1 --concurrency 8
+"""
+import argparse
+import asyncio
+import multiprocessing
+import resource
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from loguru import logger
+
+
+DEVICE_ID = "ESP32-BENCH"
+SECRET_KEY = "a" * 64
+
+
+def make_frames(worker: int, packets: int, batch: int) -> list:
+    """生成互不重复的二进制帧"""
+    from app.schemas.package import PackageUploadRequest
+    from app.utils.binary_frame import encode_frame
+
+    now = int(datetime.now().timestamp())
+    return [
+        encode_frame([
+            PackageUploadRequest(
+                package_id=worker * 1000 + i % 1000 + 1, max_temperature=4.5, avg_humidity=50.0,
+                over_threshold_time=0, timestamp=now - (i * batch + j) // 1000 - 1
+            )
+            for j in range(batch)
+        ])
+        for i in range(packets)
+    ]
+
+
+def drive_worker(mode: str, port: int, worker: int, packets: int, batch: int) -> int:
+    """单个压测线程：顺序发送并等待响应，返回成功的读数数量"""
+    from app.utils.binary_frame import FRAME_MEDIA_TYPE
+    from app.utils.ingest_packet import AckStatus, decode_ack, encode_packet
+    from app.utils.security import generate_body_signature
+
+    frames = make_frames(worker, packets, batch)
+    accepted = 0
+    if mode == "http":
+        import httpx
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            for frame in frames:
+                response = client.post("/api/v1/upload/frame", content=frame, headers={
+                    "Content-Type": FRAME_MEDIA_TYPE,
+                    "X-Device-ID": DEVICE_ID,
+                    "X-Signature": generate_body_signature(frame, SECRET_KEY),
+                    "X-Timestamp": str(int(time.time())),
+                })
+                accepted += batch if response.status_code == 200 else 0
+    else:
+        kind = socket.SOCK_DGRAM if mode == "udp" else socket.SOCK_STREAM
+        with socket.socket(socket.AF_INET, kind) as sock:
+            sock.settimeout(5)
+            sock.connect(("127.0.0.1", port))
+            for frame in frames:
+                packet = encode_packet(DEVICE_ID, int(time.time()), frame, SECRET_KEY)
+                if mode == "tcp":
+                    sock.sendall(struct.pack("<H", len(packet)) + packet)
+                    ack = b""
+                    while len(ack) < 8:
+                        ack += sock.recv(8 - len(ack))
+                else:
+                    sock.send(packet)
+                    ack = sock.recv(64)
+                accepted += batch if decode_ack(ack)[0] == AckStatus.OK else 0
+    return accepted
+
+
+def drive(mode: str, port: int, packets: int, batch: int, concurrency: int, offset: int) -> int:
+    """压测客户端进程入口"""
+    with ThreadPoolExecutor(concurrency) as pool:
+        futures = [
+            pool.submit(drive_worker, mode, port, offset + w, packets // concurrency, batch)
+            for w in range(concurrency)
+        ]
+        return sum(f.result() for f in futures)
+
+
+def start_servers(db_path: str):
+    """在后台线程的事件循环中启动 HTTP 服务和上传监听，返回 (HTTP 端口, 监听, 停止函数)"""
+    import uvicorn
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.config import settings
+    from app.core.database import Base, get_db
+    from app.main import app
+    from app.repositories.device_repository import DeviceRepository
+    from app.services.ingest_listener import IngestListener, PacketIngestHandler
+
+    # 压测单个设备，关闭限流
+    settings.DEVICE_RATE_LIMIT_ENABLED = False
+    engine = create_engine(
+        f"sqlite:///{db_path}", connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with session_factory() as db:
+        DeviceRepository(db).create(device_id=DEVICE_ID, secret_key=SECRET_KEY)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    listener = IngestListener(PacketIngestHandler(session_factory))
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        http_port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(
+        app, host="127.0.0.1", port=http_port, log_level="warning", lifespan="off"
+    ))
+    ready = threading.Event()
+
+    async def serve():
+        await listener.start("127.0.0.1", 0, 0)
+        ready.set()
+        await server.serve()
+        await listener.stop()
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+    thread.start()
+    ready.wait()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+
+    return http_port, listener, stop
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="HTTP 与 UDP/TCP 上传每核吞吐对比")
+    parser.add_argument("--packets", type=int, default=2000, help="每种协议发送的请求/报文数")
+    parser.add_argument("--batch", type=int, default=1, help="每帧读数条数")
+    parser.add_argument("--concurrency", type=int, default=4, help="客户端并发数")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    with tempfile.TemporaryDirectory() as directory:
+        http_port, listener, stop = start_servers(str(Path(directory) / "bench.db"))
+        ports = {"http": http_port, "udp": listener.udp_address[1], "tcp": listener.tcp_address[1]}
+        context = multiprocessing.get_context("spawn")
+
+        results = {}
+        with context.Pool(1) as pool:
+            for offset, mode in enumerate(("http", "udp", "tcp")):
+                cpu_started, started = cpu_seconds(), time.perf_counter()
+                accepted = pool.apply(drive, (
+                    mode, ports[mode], args.packets, args.batch, args.concurrency, offset * args.concurrency
+                ))
+                results[mode] = (accepted, time.perf_counter() - started, cpu_seconds() - cpu_started)
+        stop()
+
+    print(f"{args.packets} requests x {args.batch} readings, concurrency {args.concurrency}")
+    print(f"{'path':<6}{'accepted':>10}{'readings/s':>14}{'server cpu s':>14}{'readings/s/core':>18}")
+    for mode, (accepted, seconds, cpu) in results.items():
+        print(f"{mode:<6}{accepted:>10}{accepted / seconds:>14.0f}{cpu:>14.2f}{accepted / max(cpu, 1e-9):>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
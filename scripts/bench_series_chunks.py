@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+封存序列块基准测试
+对比 行存储（package_records）与 差分编码压缩块（package_series_chunks）：
+- 存储大小
+- 读取完整序列并构建响应的耗时
+
+用法：
+    python scripts/bench_series_chunks.py
+    python scripts/bench_series_chunks.py --points 100000 --repeats 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.package import PackageRecord
+from app.repositories.package_repository import PackageRepository
+from app.repositories.series_chunk_repository import SeriesChunkRepository
+from app.schemas.package import PackageRecordResponse
+from app.services.series_service import SeriesService
+from loguru import logger
+
+
+PACKAGE_ID = 1001
+
+
+def sqlite_size(engine) -> int:
+    """SQLite 数据库文件占用字节数"""
+    with engine.connect() as conn:
+        conn.execute(text("VACUUM"))
+        page_size = conn.execute(text("PRAGMA page_size")).scalar()
+        page_count = conn.execute(text("PRAGMA page_count")).scalar()
+    return page_size * page_count
+
+
+def seed(session, points: int, seed_value: int) -> None:
+    """写入一条温度缓慢漂移的序列"""
+    rng = random.Random(seed_value)
+    temperature, humidity, over_time = 4.0, 60.0, 0
+    timestamp = 1700000000
+    now = datetime.now()
+    rows = []
+    for _ in range(points):
+        temperature = min(max(temperature + rng.uniform(-0.2, 0.2), -20), 40)
+        humidity = min(max(humidity + rng.uniform(-0.5, 0.5), 0), 100)
+        over_time += 60 if temperature > 8 else 0
+        timestamp += 60 + rng.randint(-2, 2)
+        rows.append({
+            "package_id": PACKAGE_ID,
+            "max_temperature": round(temperature, 2),
+            "avg_humidity": round(humidity, 2),
+            "over_threshold_time": over_time,
+            "timestamp": timestamp,
+            "created_at": now,
+        })
+    for i in range(0, len(rows), 10000):
+        session.execute(insert(PackageRecord), rows[i:i + 10000])
+    session.commit()
+
+
+def time_it(func, repeats: int) -> float:
+    """返回多次执行的最短耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="封存序列块基准测试")
+    parser.add_argument("--points", type=int, default=50000, help="序列点数")
+    parser.add_argument("--repeats", type=int, default=3, help="读取重复次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+
+        seed(session, args.points, args.seed)
+        repository = PackageRepository(session)
+        series = SeriesService(repository, SeriesChunkRepository(session))
+
+        row_size = sqlite_size(engine)
+
+        def read_rows():
+            records = repository.get_by_package_id(PACKAGE_ID, limit=args.points)
+            return [PackageRecordResponse.model_validate(r) for r in records]
+
+        row_seconds = time_it(read_rows, args.repeats)
+
+        result = series.seal(PACKAGE_ID)
+        session.expire_all()
+
+        def read_chunks():
+            records = series.page(PACKAGE_ID, 0, args.points)
+            return [PackageRecordResponse.model_validate(r) for r in records]
+
+        def decode_only():
+            return series.load_columns(PACKAGE_ID)
+
+        chunk_seconds = time_it(read_chunks, args.repeats)
+        decode_seconds = time_it(decode_only, args.repeats)
+        session.close()
+        engine.dispose()
+
+    logger.info(f"📊 {args.points} points, {result['chunks']} chunks")
+    logger.info(f"row storage      : {row_size:>10} bytes (incl. indexes)")
+    logger.info(
+        f"chunk storage    : {result['bytes']:>10} bytes "
+        f"({result['bytes'] / args.points:.2f} bytes/point, x{row_size / result['bytes']:.1f} smaller)"
+    )
+    logger.info(f"read rows + build responses   : {row_seconds * 1000:8.1f} ms")
+    logger.info(f"decode chunks + build responses: {chunk_seconds * 1000:8.1f} ms (x{row_seconds / chunk_seconds:.1f})")
+    logger.info(f"decode chunks to NumPy only   : {decode_seconds * 1000:8.1f} ms (x{row_seconds / decode_seconds:.1f})")
+
+
+if __name__ == "__main__":
+    main()
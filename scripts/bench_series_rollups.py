@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+时间序列预聚合基准测试
+对比图表缩放（30天 → 1小时）时：
+- 直接对 package_records 原始记录按桶 GROUP BY 聚合
+- 读取 package_series_rollups 预聚合金字塔
+
+用法：
+    python scripts/bench_series_rollups.py
+    python scripts/bench_series_rollups.py --days 60 --points 1000 --repeats 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.package import PackageRecord
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+from app.repositories.rollup_repository import SeriesRollupRepository
+from app.services.package_service import PackageService
+from app.services.rollup_service import RollupService, choose_level
+from loguru import logger
+
+
+PACKAGE_ID = 1001
+START_TIMESTAMP = 1700000000
+
+# 缩放窗口（名称, 秒）
+WINDOWS = (("30d", 30 * 86400), ("7d", 7 * 86400), ("1d", 86400), ("1h", 3600))
+
+
+def seed(session, days: int, seed_value: int) -> int:
+    """按每分钟一条写入温度缓慢漂移的序列，返回记录数"""
+    rng = random.Random(seed_value)
+    temperature, humidity = 4.0, 60.0
+    now = datetime.now()
+    rows = []
+    for i in range(days * 1440):
+        temperature = min(max(temperature + rng.uniform(-0.2, 0.2), -20), 40)
+        humidity = min(max(humidity + rng.uniform(-0.5, 0.5), 0), 100)
+        rows.append({
+            "package_id": PACKAGE_ID,
+            "max_temperature": round(temperature, 2),
+            "avg_humidity": round(humidity, 2),
+            "over_threshold_time": 0,
+            "timestamp": START_TIMESTAMP + i * 60,
+            "created_at": now,
+        })
+    for i in range(0, len(rows), 10000):
+        session.execute(insert(PackageRecord), rows[i:i + 10000])
+    session.commit()
+    return len(rows)
+
+
+def raw_group_by(session, level: int, start: int, end: int) -> list:
+    """直接对原始记录按桶聚合"""
+    bucket = PackageRecord.timestamp - PackageRecord.timestamp % level
+    stmt = select(
+        bucket,
+        func.count(),
+        func.min(PackageRecord.max_temperature),
+        func.max(PackageRecord.max_temperature),
+        func.avg(PackageRecord.max_temperature),
+        func.avg(PackageRecord.avg_humidity)
+    ).where(
+        PackageRecord.package_id == PACKAGE_ID,
+        PackageRecord.timestamp >= start,
+        PackageRecord.timestamp <= end
+    ).group_by(bucket).order_by(bucket)
+    return session.execute(stmt).all()
+
+
+def time_it(func, repeats: int) -> float:
+    """返回多次执行的最短耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="时间序列预聚合基准测试")
+    parser.add_argument("--days", type=int, default=30, help="序列天数（每分钟一条）")
+    parser.add_argument("--points", type=int, default=600, help="图表点数预算")
+    parser.add_argument("--repeats", type=int, default=3, help="重复次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+
+        total = seed(session, args.days, args.seed)
+        repository = PackageRepository(session)
+        service = RollupService(
+            PackageService(repository, archive=ArchiveRepository(os.path.join(tmp_dir, "archive"))),
+            SeriesRollupRepository(session)
+        )
+        started = time.perf_counter()
+        service.rebuild(PACKAGE_ID)
+        rebuild_seconds = time.perf_counter() - started
+
+        logger.info(f"📊 {total} records over {args.days} days, rebuild: {rebuild_seconds * 1000:.1f} ms")
+        end = START_TIMESTAMP + args.days * 86400 - 1
+        for name, span in WINDOWS:
+            start = end - span + 1
+            level = choose_level(start, end, args.points)
+            raw_seconds = time_it(lambda: raw_group_by(session, level, start, end), args.repeats)
+            rollup_seconds = time_it(
+                lambda: service.get_series(PACKAGE_ID, args.points, start, end), args.repeats
+            )
+            logger.info(
+                f"{name:>4} window, level {level:>5}s: raw GROUP BY {raw_seconds * 1000:8.2f} ms | "
+                f"rollups {rollup_seconds * 1000:8.2f} ms (x{raw_seconds / rollup_seconds:.1f})"
+            )
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+SQLite 嵌入式模式上传写入基准测试
+多线程模拟并发设备上传（每次上传一个事务，PackageRepository.create_many），对比：
+- 默认：create_engine 默认配置（回滚日志、synchronous=FULL，写冲突靠 busy_timeout 轮询）
+- WAL：create_sqlite_engine（WAL + pragma），不启用写队列
+- WAL + 写队列：create_sqlite_engine，进程内写事务排队串行
+
+输出每秒写入读数、上传延迟 p50/p99 和失败次数（database is locked）
+
+预聚合和热数据窗口在基准中关闭，只比较写入本身
+
+用法：
+    python scripts/bench_sqlite_ingest.py
+    python scripts/bench_sqlite_ingest.py --workers 16 --uploads 200 --batch 10
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.database import Base
+from app.core.ingest_dedupe import recent_ingest_keys
+from app.core.sqlite import create_sqlite_engine, sqlite_write_queue
+from app.models.package import PackageRecord
+from app.repositories.package_repository import PackageRepository
+from loguru import logger
+
+
+def default_engine(url: str):
+    return create_engine(url, connect_args={
+        "check_same_thread": False,
+        "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+    })
+
+
+def wal_engine(url: str):
+    settings.SQLITE_WRITE_QUEUE_ENABLED = False
+    return create_sqlite_engine(url, pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW)
+
+
+def queued_engine(url: str):
+    settings.SQLITE_WRITE_QUEUE_ENABLED = True
+    sqlite_write_queue.reset_stats()
+    return create_sqlite_engine(url, pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW)
+
+
+def run(name: str, factory, directory: Path, workers: int, uploads: int, batch: int) -> None:
+    """运行一个场景"""
+    engine = factory(f"sqlite:///{directory / f'{name}.db'}")
+    Base.metadata.create_all(bind=engine, tables=[PackageRecord.__table__])
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    recent_ingest_keys.clear()
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def device(worker: int):
+        db = session_factory()
+        repository = PackageRepository(db)
+        samples = []
+        try:
+            for upload in range(uploads):
+                readings = [
+                    SimpleNamespace(
+                        package_id=worker + 1, max_temperature=4.5, avg_humidity=55.0,
+                        over_threshold_time=0, timestamp=1700000000 + upload * batch + i
+                    )
+                    for i in range(batch)
+                ]
+                started = time.perf_counter()
+                try:
+                    repository.create_many(readings, source_device_id=worker + 1)
+                    samples.append(time.perf_counter() - started)
+                except Exception as e:
+                    db.rollback()
+                    with lock:
+                        failures.append(str(e).splitlines()[0])
+        finally:
+            db.close()
+        with lock:
+            latencies.extend(samples)
+
+    threads = [threading.Thread(target=device, args=(worker,)) for worker in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    rows = len(latencies) * batch
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) >= 2 else [0.0] * 99
+    logger.info(
+        f"{name:<12}: {rows / elapsed:9.0f} readings/s, p50 {quantiles[49] * 1000:7.2f} ms, "
+        f"p99 {quantiles[98] * 1000:7.2f} ms, failed uploads {len(failures)}"
+    )
+    if failures:
+        logger.info(f"{'':<12}  first failure: {failures[0]}")
+    engine.dispose()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="SQLite 嵌入式模式上传写入基准测试")
+    parser.add_argument("--workers", type=int, default=8, help="并发上传线程数")
+    parser.add_argument("--uploads", type=int, default=100, help="每个线程上传次数")
+    parser.add_argument("--batch", type=int, default=10, help="每次上传读数条数")
+    args = parser.parse_args()
+
+    settings.SERIES_ROLLUP_ENABLED = False
+    settings.HOT_WINDOW_ENABLED = False
+
+    logger.info(
+        f"📊 {args.workers} workers x {args.uploads} uploads x {args.batch} readings, "
+        f"busy_timeout {settings.SQLITE_BUSY_TIMEOUT_MS} ms"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for name, factory in (("default", default_engine), ("wal", wal_engine), ("wal+queue", queued_engine)):
+            run(name, factory, Path(directory), args.workers, args.uploads, args.batch)
+    logger.info(f"write queue: {sqlite_write_queue.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+启动耗时基准测试
+每轮在新的子进程中测量（不受已导入模块影响）：
+- import：导入 app.main 的耗时
+- first_response：启动 uvicorn 到 GET / 首次返回 200 的耗时（包含导入、生命周期启动和结构版本检查）
+
+结果输出中位数/最小值/最大值，--output 写入 JSON，便于与仓库中记录的基线比较
+
+用法：
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 10 --top 15
+    python scripts/bench_startup.py --output startup.json
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from loguru import logger
+
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def _summary(samples: list) -> dict:
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(env: dict) -> float:
+    """子进程中导入 app.main 的耗时（秒）"""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=project_root, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_first_response(env: dict, timeout: float) -> float:
+    """启动 uvicorn 到首次成功响应的耗时（秒）"""
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=project_root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode} (schema check failed?)")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"no response within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def top_imports(env: dict, top: int) -> list:
+    """-X importtime 统计的累计耗时最高的顶层模块"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=project_root, env=env, capture_output=True, text=True, check=True
+    ).stderr
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        name = name.rstrip()
+        # 只统计顶层导入（缩进最少的两级），避免父子模块重复计数
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            modules[name.strip()] = max(modules.get(name.strip(), 0), int(cumulative))
+    ranked = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in ranked]
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="应用启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="测量轮数")
+    parser.add_argument("--top", type=int, default=10, help="输出导入耗时最高的模块数量（0 表示不统计）")
+    parser.add_argument("--timeout", type=float, default=30.0, help="等待首次响应的超时（秒）")
+    parser.add_argument("--output", help="结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # 避免启动时建立 UDP/TCP 监听占用固定端口
+    env.setdefault("INGEST_LISTENER_ENABLED", "false")
+
+    # 预热一次（编译 .pyc），不计入结果
+    measure_import(env)
+    imports = [measure_import(env) for _ in range(args.runs)]
+    first_responses = [measure_first_response(env, args.timeout) for _ in range(args.runs)]
+
+    result = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "import": _summary(imports),
+        "first_response": _summary(first_responses),
+    }
+    if args.top:
+        result["top_imports"] = top_imports(env, args.top)
+
+    logger.info(f"import app.main : {result['import']}")
+    logger.info(f"first response  : {result['first_response']}")
+    for item in result.get("top_imports", []):
+        logger.info(f"  {item['cumulative_ms']:>8.1f} ms  {item['module']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        logger.info(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+上传解码基准测试
+对比每条读数在服务端的 解码 + 校验 + 签名验证 耗时：
+- JSON: json.loads + PackageUploadRequest 校验 + build_signature_data + HMAC
+- 二进制帧: struct/memoryview 解包 + 范围校验 + 对原始字节 HMAC（单条帧 / 批量帧）
+
+用法：
+    python scripts/bench_upload_frame.py
+    python scripts/bench_upload_frame.py --readings 20000 --batch 100
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.schemas.package import PackageUploadRequest
+from app.utils.binary_frame import decode_frame, encode_frame
+from app.utils.security import (
+    build_signature_data,
+    generate_body_signature,
+    generate_hmac_signature,
+    verify_body_signature,
+    verify_hmac_signature
+)
+from loguru import logger
+
+
+SECRET_KEY = "a" * 64
+
+
+def make_readings(count: int, seed_value: int) -> list:
+    """生成随机读数"""
+    rng = random.Random(seed_value)
+    now = int(datetime.now().timestamp())
+    return [
+        PackageUploadRequest(
+            package_id=rng.randint(1, 100000),
+            max_temperature=round(rng.uniform(-20, 40), 2),
+            avg_humidity=round(rng.uniform(0, 100), 2),
+            over_threshold_time=rng.randint(0, 7200),
+            timestamp=now - rng.randint(0, 3600)
+        )
+        for _ in range(count)
+    ]
+
+
+def bench_json(readings: list) -> float:
+    """JSON 路径：返回每条读数耗时（秒）"""
+    bodies = []
+    for r in readings:
+        sign_data = build_signature_data(
+            r.package_id, r.max_temperature, r.avg_humidity, r.over_threshold_time, r.timestamp
+        )
+        bodies.append((r.model_dump_json().encode("utf-8"), generate_hmac_signature(sign_data, SECRET_KEY)))
+
+    started = time.perf_counter()
+    for body, signature in bodies:
+        payload = PackageUploadRequest(**json.loads(body))
+        sign_data = build_signature_data(
+            payload.package_id, payload.max_temperature, payload.avg_humidity,
+            payload.over_threshold_time, payload.timestamp
+        )
+        assert verify_hmac_signature(sign_data, signature, SECRET_KEY)
+    return (time.perf_counter() - started) / len(bodies)
+
+
+def bench_frame(readings: list, batch: int) -> float:
+    """二进制帧路径：返回每条读数耗时（秒）"""
+    frames = []
+    for i in range(0, len(readings), batch):
+        body = encode_frame(readings[i:i + batch])
+        frames.append((body, generate_body_signature(body, SECRET_KEY)))
+
+    started = time.perf_counter()
+    for body, signature in frames:
+        assert verify_body_signature(body, signature, SECRET_KEY)
+        decode_frame(body, max_readings=batch)
+    return (time.perf_counter() - started) / len(readings)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="上传解码基准测试")
+    parser.add_argument("--readings", type=int, default=20000, help="读数条数")
+    parser.add_argument("--batch", type=int, default=100, help="批量帧的读数条数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    readings = make_readings(args.readings, args.seed)
+    json_seconds = bench_json(readings)
+    single_seconds = bench_frame(readings, 1)
+    batch_seconds = bench_frame(readings, args.batch)
+
+    frame_bytes = len(encode_frame(readings[:1]))
+    json_bytes = len(readings[0].model_dump_json())
+    logger.info(f"📊 {args.readings} readings, single reading: JSON {json_bytes} bytes, frame {frame_bytes} bytes")
+    logger.info(f"JSON + Pydantic + v1 signature : {json_seconds * 1e6:7.2f} µs/reading")
+    logger.info(
+        f"frame (1 reading/frame)        : {single_seconds * 1e6:7.2f} µs/reading "
+        f"(x{json_seconds / single_seconds:.1f})"
+    )
+    logger.info(
+        f"frame ({args.batch} readings/frame)     : {batch_seconds * 1e6:7.2f} µs/reading "
+        f"(x{json_seconds / batch_seconds:.1f})"
+    )
+
+
+if __name__ == "__main__":
+    main()
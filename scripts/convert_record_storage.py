@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+package_records 存储编码转换脚本
+在 DOUBLE/BIGINT（wide）与 SMALLINT 百分位定点数/INT UNSIGNED（compact）之间转换已有数据，
+目标编码由 --to 指定，与 COMPACT_RECORD_STORAGE 配置无关
+
+转换后修改 COMPACT_RECORD_STORAGE 与目标编码一致再重启应用（启动时检查两者一致，不一致时拒绝启动）。
+转换会重写整张表，请在维护窗口执行并提前备份
+
+用法：
+    python scripts/convert_record_storage.py --status
+    python scripts/convert_record_storage.py --to compact
+    python scripts/convert_record_storage.py --to compact --nullable-created-at
+    python scripts/convert_record_storage.py --to wide
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.database import engine
+from app.core.record_storage import COMPACT, WIDE, convert_record_storage, get_record_storage
+from loguru import logger
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="转换 package_records 存储编码")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--to", choices=(COMPACT, WIDE), help="目标编码")
+    group.add_argument("--status", action="store_true", help="只显示当前编码")
+    parser.add_argument(
+        "--nullable-created-at", action="store_true",
+        help="转为 compact 时 created_at 改为可空且无默认值（配合 RECORD_CREATED_AT_ENABLED=false）"
+    )
+    args = parser.parse_args()
+
+    try:
+        with engine.connect() as conn:
+            storage = get_record_storage(conn)
+        if storage is None:
+            logger.error("❌ package_records table does not exist")
+            sys.exit(1)
+        logger.info(f"📦 Current record storage: {storage}")
+        if args.status:
+            return
+
+        with engine.begin() as conn:
+            converted = convert_record_storage(
+                conn, to_compact=args.to == COMPACT, nullable_created_at=args.nullable_created_at
+            )
+        if converted:
+            logger.info(f"✅ Converted package_records to {args.to} storage")
+        else:
+            logger.info(f"Already {args.to}, nothing to do")
+        logger.info(f"💡 Set COMPACT_RECORD_STORAGE={'true' if args.to == COMPACT else 'false'} and restart the application")
+    except Exception as e:
+        logger.error(f"❌ Conversion failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -38,7 +38,6 @@ def create_user_tables():
                     is_active BOOLEAN DEFAULT TRUE NOT NULL COMMENT '是否激活',
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL COMMENT '创建时间',
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP NOT NULL COMMENT '更新时间',
-                    INDEX idx_username (username),
                     INDEX idx_email (email)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='用户表';
             """))
@@ -57,9 +56,8 @@ def create_user_tables():
                     is_active BOOLEAN DEFAULT TRUE NOT NULL COMMENT '是否激活',
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL COMMENT '创建时间',
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP NOT NULL COMMENT '更新时间',
-                    INDEX idx_user_id (user_id),
-                    INDEX idx_package_id (package_id),
-                    UNIQUE KEY uk_user_package (user_id, package_id)
+                    UNIQUE KEY uk_user_package (user_id, package_id),
+                    INDEX idx_user_active_package (user_id, is_active, package_id)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='用户包裹关联表';
             """))
             conn.commit()
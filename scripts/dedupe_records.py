@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+重复读数清理脚本（一次性任务）
+删除 package_records 中幂等键 (package_id, timestamp, source_device_id) 相同的重复记录（保留ID最小的一条），
+并重建受影响包裹的时间序列预聚合
+
+在执行 alembic 迁移 007（唯一索引 uk_package_timestamp_device）之前运行
+
+用法：
+    python scripts/dedupe_records.py --dry-run
+    python scripts/dedupe_records.py
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+from app.repositories.rollup_repository import SeriesRollupRepository
+from app.services.package_service import PackageService
+from app.services.rollup_service import RollupService
+from loguru import logger
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="清理重复的包裹读数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不删除")
+    parser.add_argument("--archive-dir", default=settings.ARCHIVE_DIR, help="归档目录")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        repository = PackageRepository(db)
+        rollups = RollupService(
+            PackageService(repository, archive=ArchiveRepository(args.archive_dir)),
+            SeriesRollupRepository(db)
+        )
+
+        package_ids = repository.get_duplicate_package_ids()
+        logger.info(f"📊 {len(package_ids)} packages have duplicated readings")
+
+        total = 0
+        batch_size = settings.RETENTION_DELETE_BATCH_SIZE
+        for package_id in package_ids:
+            duplicate_ids = repository.get_duplicate_ids(package_id)
+            total += len(duplicate_ids)
+            if args.dry_run:
+                logger.info(f"Package {package_id}: {len(duplicate_ids)} duplicates")
+                continue
+            for i in range(0, len(duplicate_ids), batch_size):
+                repository.delete_by_ids(duplicate_ids[i:i + batch_size])
+            # 预聚合包含重复读数，删除后按剩余记录重建
+            if settings.SERIES_ROLLUP_ENABLED:
+                rollups.rebuild(package_id)
+            logger.info(f"Package {package_id}: removed {len(duplicate_ids)} duplicates")
+
+        action = "Found" if args.dry_run else "Removed"
+        logger.info(f"✅ {action} {total} duplicated records")
+    except Exception as e:
+        logger.error(f"❌ Dedupe failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
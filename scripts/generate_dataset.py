@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+基准测试数据集生成脚本
+按固定种子生成可复现的车队数据（设备、用户、包裹读数、超温事件、用户绑定），
+同一组参数在任何环境下生成完全相同的数据，性能基准统一在同一数据集上运行
+
+两种输出方式：
+- 数据库：分块 Core 批量插入（每块一个事务），默认写入应用配置的数据库，--url 指定其他库
+- CSV：--csv-dir 输出 CSV 和 load.sql（MySQL LOAD DATA LOCAL INFILE），适合千万级以上数据量
+
+写入读数后预聚合/序列块不会自动生成，需要时运行 scripts/rebuild_rollups.py --all
+
+用法：
+    python scripts/generate_dataset.py --packages 1000 --readings 288
+    python scripts/generate_dataset.py --url sqlite:///./data/bench.db --packages 20000 --readings 1000 --reset
+    python scripts/generate_dataset.py --csv-dir ./dataset --packages 100000 --readings 500
+"""
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+from app.core.database import Base
+from app.core.sqlite import create_sqlite_engine
+from app.models.device import Device
+from app.models.package import PackageRecord
+from app.models.user import User, UserPackage
+from app.utils.auth import get_password_hash
+from app.utils.synthetic import (
+    RECORD_COLUMNS, FleetSpec, generate_bindings, generate_devices, generate_users,
+    iter_reading_chunks, to_storage_units
+)
+from loguru import logger
+
+
+DEVICE_COLUMNS = ("id", "device_id", "device_name", "secret_key", "is_active", "signature_version")
+USER_COLUMNS = ("id", "username", "email", "password_hash", "is_active")
+BINDING_COLUMNS = ("user_id", "package_id", "package_name", "is_active")
+
+
+def _open_engine(url: str):
+    if url is None:
+        from app.core.database import engine
+        return engine
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_sqlite_engine(url)
+    return create_engine(url, pool_pre_ping=True)
+
+
+def _log_progress(rows: int, total_started: float) -> None:
+    elapsed = time.perf_counter() - total_started
+    logger.info(f"   {rows:>12,} readings  {rows / elapsed:>10,.0f} rows/s")
+
+
+def write_database(spec: FleetSpec, url: str, chunk_rows: int, password_hash: str, reset: bool) -> int:
+    """
+    分块批量插入数据库
+
+    Args:
+        spec: 数据集参数
+        url: 数据库 URL（None 使用应用数据库）
+        chunk_rows: 每个事务的读数行数
+        password_hash: 用户密码哈希
+        reset: 是否先删除并重建表
+
+    Returns:
+        写入的读数条数
+    """
+    engine = _open_engine(url)
+    if reset:
+        logger.warning(f"⚠️ Dropping and recreating tables on {engine.url.render_as_string(hide_password=True)}")
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine, checkfirst=True)
+
+    with engine.begin() as conn:
+        if spec.devices:
+            conn.execute(insert(Device.__table__), generate_devices(spec))
+        if spec.users:
+            conn.execute(insert(User.__table__), generate_users(spec, password_hash))
+        bindings = generate_bindings(spec)
+        if bindings:
+            conn.execute(insert(UserPackage.__table__), bindings)
+    logger.info(f"   {spec.devices} devices, {spec.users} users, {len(bindings)} bindings")
+
+    statement = insert(PackageRecord.__table__)
+    rows = 0
+    started = time.perf_counter()
+    for columns in iter_reading_chunks(spec, chunk_rows):
+        parameters = [
+            dict(zip(RECORD_COLUMNS, row)) for row in zip(*(columns[name].tolist() for name in RECORD_COLUMNS))
+        ]
+        with engine.begin() as conn:
+            conn.execute(statement, parameters)
+        rows += len(parameters)
+        _log_progress(rows, started)
+    return rows
+
+
+def _write_csv(path: Path, header: tuple, rows) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def _load_statement(table: str, filename: str, columns: tuple) -> str:
+    return (
+        f"LOAD DATA LOCAL INFILE '{filename}' INTO TABLE {table}\n"
+        f"  FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\n'\n"
+        f"  IGNORE 1 LINES ({', '.join(columns)})\n"
+        f"  SET created_at = NOW();\n"
+    )
+
+
+def write_csv(spec: FleetSpec, directory: Path, chunk_rows: int, password_hash: str) -> int:
+    """
+    输出 CSV 和 MySQL 导入脚本
+
+    Args:
+        spec: 数据集参数
+        directory: 输出目录
+        chunk_rows: 每次写出的读数行数
+        password_hash: 用户密码哈希
+
+    Returns:
+        写出的读数条数
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+
+    def as_rows(items, columns):
+        return ([int(item[name]) if isinstance(item[name], bool) else item[name] for name in columns] for item in items)
+
+    _write_csv(directory / "devices.csv", DEVICE_COLUMNS, as_rows(generate_devices(spec), DEVICE_COLUMNS))
+    _write_csv(directory / "users.csv", USER_COLUMNS, as_rows(generate_users(spec, password_hash), USER_COLUMNS))
+    _write_csv(directory / "user_packages.csv", BINDING_COLUMNS, as_rows(generate_bindings(spec), BINDING_COLUMNS))
+
+    rows = 0
+    started = time.perf_counter()
+    with open(directory / "package_records.csv", "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(RECORD_COLUMNS)
+        for columns in iter_reading_chunks(spec, chunk_rows):
+            # 紧凑存储的温湿度列为百分位定点整数，LOAD DATA 不经过 ORM 类型转换
+            if settings.COMPACT_RECORD_STORAGE:
+                columns = to_storage_units(columns)
+            writer.writerows(zip(*(columns[name].tolist() for name in RECORD_COLUMNS)))
+            rows += len(columns["timestamp"])
+            _log_progress(rows, started)
+
+    statements = [
+        "-- 生成参数: " + ", ".join(f"{name}={value}" for name, value in spec._asdict().items()) + "\n",
+        "-- mysql --local-infile=1 <database> < load.sql（在本目录下执行）\n",
+        "SET unique_checks = 0;\n",
+        _load_statement("devices", "devices.csv", DEVICE_COLUMNS),
+        _load_statement("users", "users.csv", USER_COLUMNS),
+        _load_statement("user_packages", "user_packages.csv", BINDING_COLUMNS),
+        _load_statement("package_records", "package_records.csv", RECORD_COLUMNS),
+        "SET unique_checks = 1;\n",
+    ]
+    (directory / "load.sql").write_text("".join(statements))
+    return rows
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="生成可复现的基准测试数据集")
+    parser.add_argument("--packages", type=int, default=1000, help="包裹数")
+    parser.add_argument("--devices", type=int, default=100, help="设备数")
+    parser.add_argument("--users", type=int, default=50, help="用户数")
+    parser.add_argument("--readings", type=int, default=288, help="每个包裹平均读数条数")
+    parser.add_argument("--interval", type=int, default=300, help="读数间隔（秒）")
+    parser.add_argument("--excursion-rate", type=float, default=0.002, help="每条读数开始超温事件的概率")
+    parser.add_argument("--excursion-readings", type=int, default=6, help="超温事件平均持续读数条数")
+    parser.add_argument("--bound-ratio", type=float, default=0.9, help="绑定到用户的包裹比例")
+    parser.add_argument("--first-package-id", type=int, default=1, help="起始包裹ID")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--chunk-rows", type=int, default=50000, help="每块（事务）读数行数")
+    parser.add_argument("--password", default="bench123", help="生成用户的密码")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="数据库 URL（默认使用应用配置的数据库）")
+    target.add_argument("--csv-dir", help="输出 CSV 和 load.sql 到目录（不写数据库）")
+    parser.add_argument("--reset", action="store_true", help="写入前删除并重建全部表（勿指向生产库）")
+    args = parser.parse_args()
+
+    spec = FleetSpec(
+        packages=args.packages,
+        devices=args.devices,
+        users=args.users,
+        readings_per_package=args.readings,
+        interval_seconds=args.interval,
+        high_threshold=settings.TEMP_HIGH_THRESHOLD,
+        low_threshold=settings.TEMP_LOW_THRESHOLD,
+        excursion_rate=args.excursion_rate,
+        excursion_readings=args.excursion_readings,
+        bound_ratio=args.bound_ratio,
+        first_package_id=args.first_package_id,
+        seed=args.seed,
+    )
+    logger.info(f"🌱 Generating dataset: {spec._asdict()}")
+
+    password_hash = get_password_hash(args.password) if spec.users else ""
+    started = time.perf_counter()
+    try:
+        if args.csv_dir:
+            rows = write_csv(spec, Path(args.csv_dir), args.chunk_rows, password_hash)
+            logger.info(f"📄 CSV files and load.sql written to {args.csv_dir}")
+        else:
+            rows = write_database(spec, args.url, args.chunk_rows, password_hash, args.reset)
+            logger.info("💡 Run scripts/rebuild_rollups.py --all to build rollups for the new readings")
+    except Exception as e:
+        logger.error(f"❌ Dataset generation failed: {str(e)}")
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"✅ {rows:,} readings in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
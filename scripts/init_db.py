@@ -1,8 +1,19 @@
 #!/usr/bin/env python3
 """
 数据库初始化脚本
-创建所有表结构
+创建所有表结构，并将新库标记为最新迁移版本（应用启动时只检查版本，不再建表）
+
+- 新库（没有任何表）：create_all 建表后写入 alembic_version（当前 head）
+- 已由 alembic 管理的库：不做修改，请执行 alembic upgrade head
+- 已有表但没有 alembic_version 的旧库：只补建缺失的表，确认表结构与某个迁移版本一致后
+  手动执行 alembic stamp <版本> 和 alembic upgrade head（--stamp 可强制标记为 head）
+
+用法：
+    python scripts/init_db.py
+    python scripts/init_db.py --check
+    python scripts/init_db.py --stamp
 """
+import argparse
 import sys
 from pathlib import Path
 
@@ -10,25 +21,67 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from app.core.database import engine, Base
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from app.core.database import Base, engine, init_db
+from app.core.record_storage import check_record_storage
+from app.core.schema_version import SchemaVersionError, check_schema_version, get_schema_revision
 from app.models import PackageRecord  # 导入所有模型
 from loguru import logger
 
 
-def init_database():
+def stamp_head() -> None:
+    """将数据库标记为最新迁移版本"""
+    script = ScriptDirectory(str(project_root / "alembic"))
+    with engine.begin() as conn:
+        MigrationContext.configure(conn).stamp(script, "head")
+    logger.info(f"🏷️  Stamped alembic_version: {get_schema_revision(engine)}")
+
+
+def init_database(force_stamp: bool = False) -> None:
     """初始化数据库"""
+    tables = set(inspect(engine).get_table_names())
+    if "alembic_version" in tables:
+        logger.info(
+            f"Database is managed by alembic (revision {get_schema_revision(engine)}), "
+            f"run 'alembic upgrade head' to upgrade"
+        )
+        return
+
+    logger.info("🔨 Creating database tables...")
+    init_db()
+    logger.info(f"✅ Database tables created: {list(Base.metadata.tables.keys())}")
+
+    if not tables or force_stamp:
+        stamp_head()
+    else:
+        logger.warning(
+            f"Existing tables without alembic_version: {sorted(tables)}, "
+            f"verify the schema and run 'alembic stamp <revision>' then 'alembic upgrade head'"
+        )
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="创建数据库表并标记迁移版本")
+    parser.add_argument("--check", action="store_true", help="只检查数据库版本和存储编码是否与代码一致")
+    parser.add_argument("--stamp", action="store_true", help="已有表但没有 alembic_version 时强制标记为最新版本")
+    args = parser.parse_args()
+
     try:
-        logger.info("🔨 Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        logger.info("✅ Database tables created successfully!")
-        
-        # 打印创建的表
-        logger.info(f"📋 Created tables: {list(Base.metadata.tables.keys())}")
-        
+        if args.check:
+            logger.info(f"✅ Database schema revision: {check_schema_version(engine)}")
+            logger.info(f"✅ Record storage: {check_record_storage(engine)}")
+        else:
+            init_database(force_stamp=args.stamp)
+    except SchemaVersionError as e:
+        logger.error(f"❌ {str(e)}")
+        sys.exit(1)
     except Exception as e:
-        logger.error(f"❌ Failed to create database tables: {str(e)}")
+        logger.error(f"❌ Failed to initialize database: {str(e)}")
         sys.exit(1)
 
 
 if __name__ == "__main__":
-    init_database()
+    main()
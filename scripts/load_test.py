@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+端到端上传与查询压测脚本（asyncio + httpx）
+模拟大量签名设备周期性上传读数，同时模拟看板用户轮询包裹历史和列表，按路由统计吞吐和延迟分位数
+
+- 设备：数据集中的设备（generate_dataset.py 生成，签名版本 2 对请求体签名，版本 1 用 generate_hmac_signature
+  对字段拼接字符串签名），上传自己负责的包裹，间隔 --device-interval 秒（±20% 抖动）
+- 看板用户：数据集中的用户，用 SECRET_KEY 直接签发令牌（登录的 bcrypt 开销不计入压测），
+  按 --mix 权重请求 history / chart / series / list / detail，间隔 --dashboard-interval 秒
+- 负载曲线：--stages "秒:设备数:看板数,..."，每个阶段内从上一阶段的并发数线性变化到目标并发数；
+  未指定时为 --ramp-up 秒爬升到 --devices/--dashboards，再保持 --duration 秒
+
+默认在进程内运行（httpx ASGITransport，不经过网络）：在临时目录创建 SQLite 数据库，
+用 init_db.py、generate_dataset.py 和 rebuild_rollups.py 生成数据集后执行应用生命周期（结构版本检查、连接池预热）。
+--database-url 指定已有数据库（--skip-seed 跳过生成数据），--base-url 压测已启动的服务
+（服务端数据库需用 generate_dataset.py 以相同的 --seed/--packages/--users、--devices 为峰值设备数生成）
+
+准入控制、设备限流等服务端配置照常生效，被拒绝的请求按状态码计入错误
+
+用法：
+    python scripts/load_test.py
+    python scripts/load_test.py --devices 2000 --dashboards 100 --duration 60 --output run.json
+    python scripts/load_test.py --stages "20:500:20,40:2000:100,20:2000:100" --mix history=4,chart=3,list=3
+    python scripts/load_test.py --base-url http://localhost:8000 --devices 1000 --dashboards 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+from loguru import logger
+
+# app 模块在 main() 中设置数据库环境变量后再导入（配置在导入时读取）
+
+
+API_PREFIX = "/api/v1"
+DASHBOARD_ROUTES = ("history", "chart", "series", "list", "detail")
+DEFAULT_MIX = "history=4,chart=2,series=1,list=2,detail=1"
+
+
+class LoadStats:
+    """按路由汇总请求结果"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.timeline = defaultdict(Counter)
+        self.started = time.perf_counter()
+
+    def record(self, route: str, latency: float, status) -> None:
+        """
+        记录一次请求
+
+        Args:
+            route: 路由名称
+            latency: 耗时（秒）
+            status: HTTP 状态码，或异常类型名称（连接失败/超时）
+        """
+        self.latencies[route].append(latency)
+        self.statuses[route][str(status)] += 1
+        second = int(time.perf_counter() - self.started)
+        self.timeline[second]["requests"] += 1
+        if not (isinstance(status, int) and status < 400):
+            self.timeline[second]["errors"] += 1
+
+    def summary(self) -> dict:
+        """各路由吞吐、延迟分位数和状态码分布"""
+        elapsed = time.perf_counter() - self.started
+        routes = {}
+        for route in sorted(self.latencies):
+            samples = self.latencies[route]
+            statuses = self.statuses[route]
+            ok = sum(count for status, count in statuses.items() if status.isdigit() and int(status) < 400)
+            quantiles = statistics.quantiles(samples, n=100) if len(samples) >= 2 else samples * 99
+            routes[route] = {
+                "requests": len(samples),
+                "ok": ok,
+                "errors": len(samples) - ok,
+                "throughput_rps": round(len(samples) / elapsed, 1),
+                "p50_ms": round(quantiles[49] * 1000, 2),
+                "p95_ms": round(quantiles[94] * 1000, 2),
+                "p99_ms": round(quantiles[98] * 1000, 2),
+                "max_ms": round(max(samples) * 1000, 2),
+                "statuses": dict(statuses),
+            }
+        total = sum(route["requests"] for route in routes.values())
+        return {
+            "elapsed_seconds": round(elapsed, 2),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+            "routes": routes,
+            "timeline": [
+                {"second": second, "requests": counts["requests"], "errors": counts["errors"]}
+                for second, counts in sorted(self.timeline.items())
+            ],
+        }
+
+
+class WorkerPool:
+    """可调整并发数的虚拟用户池"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.workers = []
+
+    def resize(self, target: int) -> None:
+        while len(self.workers) < target:
+            stop = asyncio.Event()
+            self.workers.append((asyncio.create_task(self.factory(len(self.workers), stop)), stop))
+        while len(self.workers) > target:
+            _, stop = self.workers.pop()
+            stop.set()
+
+    async def close(self) -> None:
+        tasks = [task for task, _ in self.workers]
+        self.resize(0)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def parse_mix(value: str) -> dict:
+    """解析 history=4,list=2 形式的请求权重"""
+    mix = {}
+    for item in value.split(","):
+        route, _, weight = item.partition("=")
+        route = route.strip()
+        if route not in DASHBOARD_ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown route '{route}', expected one of {DASHBOARD_ROUTES}")
+        mix[route] = float(weight or 1)
+    return mix
+
+
+def parse_stages(value: str) -> list:
+    """解析 秒:设备数:看板数 形式的负载阶段"""
+    stages = []
+    for item in value.split(","):
+        seconds, devices, dashboards = item.split(":")
+        stages.append((float(seconds), int(devices), int(dashboards)))
+    return stages
+
+
+async def _pause(stop: asyncio.Event, interval: float, rng: random.Random) -> None:
+    """等待一个带抖动的间隔（收到停止信号时提前返回）"""
+    try:
+        await asyncio.wait_for(stop.wait(), interval * rng.uniform(0.8, 1.2))
+    except asyncio.TimeoutError:
+        pass
+
+
+async def _timed(client: httpx.AsyncClient, stats: LoadStats, route: str, method: str, url: str, **kwargs) -> None:
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        stats.record(route, time.perf_counter() - started, response.status_code)
+    except httpx.HTTPError as e:
+        stats.record(route, time.perf_counter() - started, type(e).__name__)
+
+
+def build_workload(spec):
+    """
+    由数据集参数还原设备密钥、设备负责的包裹和用户绑定
+
+    Args:
+        spec: 数据集参数（FleetSpec）
+
+    Returns:
+        (设备列表, 设备ID -> 包裹列表, 用户ID -> 包裹列表)
+    """
+    from app.utils.synthetic import generate_bindings, generate_devices, package_device
+
+    devices = generate_devices(spec)
+    device_packages = defaultdict(list)
+    for package_id in spec.package_ids:
+        device_packages[package_device(spec, package_id)].append(package_id)
+    user_packages = defaultdict(list)
+    for binding in generate_bindings(spec):
+        if binding["is_active"]:
+            user_packages[binding["user_id"]].append(binding["package_id"])
+    return devices, device_packages, user_packages
+
+
+async def run_load(client: httpx.AsyncClient, args, spec, stages: list) -> dict:
+    """
+    按负载曲线运行设备和看板用户
+
+    Args:
+        client: httpx 客户端
+        args: 命令行参数
+        spec: 数据集参数
+        stages: 负载阶段 [(秒, 设备数, 看板数)]
+
+    Returns:
+        统计结果
+    """
+    from app.utils.auth import create_access_token
+    from app.utils.security import SIGNATURE_V2, build_signature_data, generate_body_signature, generate_hmac_signature
+
+    devices, device_packages, user_packages = build_workload(spec)
+    mix = args.mix
+    routes, weights = list(mix), list(mix.values())
+    stats = LoadStats()
+    # 读数时间戳从一天前开始逐条递增，避免与已有读数重复而被去重
+    reading_start = int(time.time()) - 86400
+
+    async def device_worker(index: int, stop: asyncio.Event) -> None:
+        rng = random.Random(f"{spec.seed}:device:{index}")
+        device = devices[index % len(devices)]
+        packages = device_packages.get(device["id"]) or [rng.choice(spec.package_ids)]
+        upload = 0
+        await _pause(stop, rng.uniform(0, args.device_interval), rng)
+        while not stop.is_set():
+            body = {
+                "package_id": rng.choice(packages),
+                "max_temperature": round(rng.gauss(spec.base_temperature, 1.0), 2),
+                "avg_humidity": round(rng.uniform(40, 70), 2),
+                "over_threshold_time": 0,
+                "timestamp": reading_start + upload,
+            }
+            content = json.dumps(body).encode()
+            if device["signature_version"] == SIGNATURE_V2:
+                signature = generate_body_signature(content, device["secret_key"])
+            else:
+                signature = generate_hmac_signature(
+                    build_signature_data(
+                        body["package_id"], body["max_temperature"], body["avg_humidity"],
+                        body["over_threshold_time"], body["timestamp"]
+                    ),
+                    device["secret_key"]
+                )
+            headers = {
+                "Content-Type": "application/json",
+                "X-Device-ID": device["device_id"],
+                "X-Signature": signature,
+                "X-Timestamp": str(int(time.time())),
+            }
+            await _timed(client, stats, "upload", "POST", f"{API_PREFIX}/upload", content=content, headers=headers)
+            upload += 1
+            await _pause(stop, args.device_interval, rng)
+
+    async def dashboard_worker(index: int, stop: asyncio.Event) -> None:
+        rng = random.Random(f"{spec.seed}:dashboard:{index}")
+        user_id = index % max(spec.users, 1) + 1
+        packages = user_packages.get(user_id, [])
+        token = create_access_token({"user_id": user_id, "username": f"bench_user_{user_id}"})
+        headers = {"Authorization": f"Bearer {token}"}
+        await _pause(stop, rng.uniform(0, args.dashboard_interval), rng)
+        while not stop.is_set():
+            route = rng.choices(routes, weights)[0]
+            if route != "list" and not packages:
+                route = "list"
+            package_id = rng.choice(packages) if packages else None
+            if route == "history":
+                url = f"{API_PREFIX}/packages/{package_id}/records?limit={args.history_limit}"
+            elif route == "chart":
+                url = f"{API_PREFIX}/packages/{package_id}/records?points={args.chart_points}"
+            elif route == "series":
+                url = f"{API_PREFIX}/packages/{package_id}/series?points={args.chart_points}"
+            elif route == "detail":
+                url = f"{API_PREFIX}/packages/{package_id}"
+            else:
+                url = f"{API_PREFIX}/packages?page=1&size=10"
+            await _timed(client, stats, route, "GET", url, headers=headers)
+            await _pause(stop, args.dashboard_interval, rng)
+
+    device_pool = WorkerPool(device_worker)
+    dashboard_pool = WorkerPool(dashboard_worker)
+    loop = asyncio.get_running_loop()
+    previous = (0, 0)
+    try:
+        for seconds, target_devices, target_dashboards in stages:
+            logger.info(f"▶️ Stage {seconds:g}s -> {target_devices} devices, {target_dashboards} dashboards")
+            started = loop.time()
+            while True:
+                progress = min((loop.time() - started) / seconds, 1.0) if seconds > 0 else 1.0
+                device_pool.resize(round(previous[0] + (target_devices - previous[0]) * progress))
+                dashboard_pool.resize(round(previous[1] + (target_dashboards - previous[1]) * progress))
+                if progress >= 1.0:
+                    break
+                await asyncio.sleep(0.1)
+            previous = (target_devices, target_dashboards)
+    finally:
+        await asyncio.gather(device_pool.close(), dashboard_pool.close())
+    return stats.summary()
+
+
+def dataset_spec(args, peak_devices: int):
+    """数据集参数（与 generate_dataset.py 的同名参数一致，设备数为峰值模拟设备数）"""
+    from app.utils.synthetic import FleetSpec
+    return FleetSpec(
+        packages=args.packages, devices=peak_devices, users=args.users,
+        readings_per_package=args.readings, seed=args.seed
+    )
+
+
+def seed_database(database_url: str, spec) -> None:
+    """用 init_db.py 和 generate_dataset.py 建表并生成数据集，再用 rebuild_rollups.py 生成预聚合（series 请求需要）"""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    subprocess.run([sys.executable, str(project_root / "scripts" / "init_db.py")], cwd=project_root, env=env, check=True)
+    subprocess.run(
+        [
+            sys.executable, str(project_root / "scripts" / "generate_dataset.py"),
+            "--url", database_url,
+            "--packages", str(spec.packages),
+            "--devices", str(spec.devices),
+            "--users", str(spec.users),
+            "--readings", str(spec.readings_per_package),
+            "--seed", str(spec.seed),
+        ],
+        cwd=project_root, env=env, check=True
+    )
+    subprocess.run(
+        [sys.executable, str(project_root / "scripts" / "rebuild_rollups.py"), "--all"],
+        cwd=project_root, env=env, check=True
+    )
+
+
+async def run_in_process(args, spec, stages: list) -> dict:
+    """进程内运行应用（ASGITransport，不经过网络）"""
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        # 应用启动时重新配置了日志，压测脚本自身的进度日志单独输出
+        logger.add(sys.stderr, level="INFO", filter=lambda record: record["name"] == __name__)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            return await run_load(client, args, spec, stages)
+
+
+async def run_remote(args, spec, stages: list) -> dict:
+    """压测已启动的服务"""
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        return await run_load(client, args, spec, stages)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="端到端上传与查询压测")
+    parser.add_argument("--devices", type=int, default=200, help="模拟设备数（未指定 --stages 时）")
+    parser.add_argument("--dashboards", type=int, default=20, help="模拟看板用户数（未指定 --stages 时）")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="爬升时间（秒，未指定 --stages 时）")
+    parser.add_argument("--duration", type=float, default=30.0, help="满负载持续时间（秒，未指定 --stages 时）")
+    parser.add_argument("--stages", type=parse_stages, help="负载阶段，格式 秒:设备数:看板数,...")
+    parser.add_argument("--device-interval", type=float, default=5.0, help="设备上传间隔（秒）")
+    parser.add_argument("--dashboard-interval", type=float, default=2.0, help="看板请求间隔（秒）")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"看板请求权重（默认 {DEFAULT_MIX}）")
+    parser.add_argument("--history-limit", type=int, default=100, help="history 请求的 limit")
+    parser.add_argument("--chart-points", type=int, default=600, help="chart/series 请求的点数")
+    parser.add_argument("--packages", type=int, default=1000, help="数据集包裹数")
+    parser.add_argument("--users", type=int, default=50, help="数据集用户数")
+    parser.add_argument("--readings", type=int, default=288, help="数据集每个包裹平均读数条数")
+    parser.add_argument("--seed", type=int, default=42, help="数据集随机种子")
+    parser.add_argument("--base-url", help="压测已启动的服务（如 http://localhost:8000），默认进程内运行")
+    parser.add_argument("--database-url", help="进程内运行时使用的数据库（默认临时 SQLite 文件）")
+    parser.add_argument("--skip-seed", action="store_true", help="不生成数据集（数据库已用相同参数生成）")
+    parser.add_argument("--connections", type=int, default=200, help="--base-url 时的最大连接数")
+    parser.add_argument("--timeout", type=float, default=30.0, help="请求超时（秒）")
+    parser.add_argument("--app-log-level", default="WARNING", help="进程内运行时应用日志级别")
+    parser.add_argument("--output", help="结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    stages = args.stages or [(args.ramp_up, args.devices, args.dashboards), (args.duration, args.devices, args.dashboards)]
+    peak_devices = max(stage[1] for stage in stages)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if not args.base_url:
+            database_url = args.database_url or f"sqlite:///{Path(directory) / 'loadtest.db'}"
+            os.environ["DATABASE_URL"] = database_url
+            os.environ["LOG_LEVEL"] = args.app_log_level
+            os.environ.setdefault("INGEST_LISTENER_ENABLED", "false")
+
+        spec = dataset_spec(args, peak_devices)
+        if not args.base_url and not args.skip_seed:
+            seed_database(os.environ["DATABASE_URL"], spec)
+
+        logger.info(
+            f"🚀 Load test against {args.base_url or 'in-process app'}: peak {peak_devices} devices, "
+            f"{max(stage[2] for stage in stages)} dashboards, {sum(stage[0] for stage in stages):g}s"
+        )
+        if args.base_url:
+            result = asyncio.run(run_remote(args, spec, stages))
+        else:
+            result = asyncio.run(run_in_process(args, spec, stages))
+
+    result["config"] = {
+        "target": args.base_url or "in-process",
+        "stages": stages,
+        "device_interval": args.device_interval,
+        "dashboard_interval": args.dashboard_interval,
+        "mix": args.mix,
+        "dataset": spec._asdict(),
+    }
+
+    logger.info(f"📊 {result['requests']} requests in {result['elapsed_seconds']}s ({result['throughput_rps']} req/s)")
+    for route, item in result["routes"].items():
+        logger.info(
+            f"  {route:<8} {item['requests']:>7} req {item['throughput_rps']:>8.1f} req/s  "
+            f"p50 {item['p50_ms']:>8.2f}  p95 {item['p95_ms']:>8.2f}  p99 {item['p99_ms']:>8.2f} ms  "
+            f"errors {item['errors']} {item['statuses']}"
+        )
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        logger.info(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+时间序列预聚合重建脚本
+根据 热表 / 封存序列块 / 冷归档 的全部记录重新生成 package_series_rollups
+
+用法：
+    python scripts/rebuild_rollups.py --package-id 1001 --package-id 1002
+    python scripts/rebuild_rollups.py --all
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+from app.repositories.rollup_repository import SeriesRollupRepository
+from app.repositories.series_chunk_repository import SeriesChunkRepository
+from app.services.package_service import PackageService
+from app.services.rollup_service import RollupService
+from loguru import logger
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="重建包裹时间序列预聚合")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--package-id", type=int, action="append", help="包裹ID（可重复指定）")
+    group.add_argument("--all", action="store_true", help="重建全部包裹")
+    parser.add_argument("--archive-dir", default=settings.ARCHIVE_DIR, help="归档目录")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        repository = PackageRepository(db)
+        archive = ArchiveRepository(args.archive_dir)
+        service = RollupService(
+            PackageService(repository, archive=archive),
+            SeriesRollupRepository(db)
+        )
+
+        if args.all:
+            package_ids = sorted(
+                set(repository.get_package_ids())
+                | set(SeriesChunkRepository(db).get_package_ids())
+                | set(archive.get_package_ids())
+            )
+        else:
+            package_ids = args.package_id
+
+        for package_id in package_ids:
+            service.rebuild(package_id)
+        logger.info(f"✅ Rebuilt rollups for {len(package_ids)} packages")
+    except Exception as e:
+        logger.error(f"❌ Rollup rebuild failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+数据保留与冷归档脚本
+将超出热数据窗口的 package_records 迁移到归档文件
+
+用法：
+    python scripts/run_retention.py                  # 使用配置中的模式和天数
+    python scripts/run_retention.py --mode closed --days 30
+    python scripts/run_retention.py --dry-run        # 只统计，不归档
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+from app.services.retention_service import RetentionService, RETENTION_MODES
+from loguru import logger
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="package_records 冷归档任务")
+    parser.add_argument("--mode", choices=RETENTION_MODES, default=None, help="归档模式（默认读取配置）")
+    parser.add_argument("--days", type=int, default=None, help="天数阈值（默认读取配置）")
+    parser.add_argument("--archive-dir", default=settings.ARCHIVE_DIR, help="归档目录")
+    parser.add_argument("--dry-run", action="store_true", help="只统计候选记录")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        service = RetentionService(
+            PackageRepository(db),
+            ArchiveRepository(args.archive_dir)
+        )
+        summary = service.run(mode=args.mode, days=args.days, dry_run=args.dry_run)
+        logger.info(f"📊 Summary: {summary}")
+    except Exception as e:
+        logger.error(f"❌ Retention failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -56,7 +56,9 @@ def run_database_migration():
     logger.info("运行数据库迁移...")
     
     try:
-        # 运行用户表创建脚本
+        # 建表并标记迁移版本（服务启动时只检查版本，不再建表）
+        subprocess.run([sys.executable, str(project_root / "scripts" / "init_db.py")], check=True)
+        # 运行用户表创建脚本（创建测试用户）
         script_path = project_root / "scripts" / "create_user_tables.py"
         subprocess.run([sys.executable, str(script_path)], check=True)
         logger.success("数据库迁移完成")
@@ -8,6 +8,11 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.core.database import Base, get_db
+from app.core.device_cache import device_cache
+from app.core.hot_window import hot_window
+from app.core.ingest_dedupe import recent_ingest_keys
+from app.core.rate_limit import device_rate_limiter
+from app.core.replay_cache import replay_cache
 
 # 使用内存数据库进行测试
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -18,10 +23,32 @@ engine = create_engine(
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """可手动推进的时钟（clock.now 为当前时间）"""
+    return FakeClock()
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """创建测试数据库会话"""
     Base.metadata.create_all(bind=engine)
+    # 每个用例重建数据表，包裹ID会被复用，需清空热数据窗口
+    hot_window.clear()
+    replay_cache.clear()
+    recent_ingest_keys.clear()
+    device_rate_limiter.clear()
+    device_cache.clear()
     db = TestingSessionLocal()
     try:
         yield db
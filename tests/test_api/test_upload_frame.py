@@ -0,0 +1,84 @@
+"""
+二进制帧上传 API 测试
+"""
+import pytest
+from datetime import datetime
+from app.repositories.device_repository import DeviceRepository
+from app.repositories.package_repository import PackageRepository
+from app.schemas.package import PackageUploadRequest
+from app.utils.binary_frame import FRAME_MEDIA_TYPE, FrameDecodeError, decode_frame, encode_frame
+from app.utils.security import generate_body_signature
+
+SECRET_KEY = "a" * 64
+
+
+class TestUploadFrameAPI:
+    """二进制帧上传测试类"""
+
+    @pytest.fixture
+    def device(self, db_session):
+        """创建测试设备"""
+        return DeviceRepository(db_session).create(device_id="ESP32-FRAME", secret_key=SECRET_KEY)
+
+    @staticmethod
+    def make_frame(count: int = 3) -> bytes:
+        now = int(datetime.now().timestamp())
+        return encode_frame(
+            PackageUploadRequest(
+                package_id=6001,
+                max_temperature=4.25 + i,
+                avg_humidity=61.5,
+                over_threshold_time=i * 30,
+                timestamp=now - 60 * (count - i)
+            )
+            for i in range(count)
+        )
+
+    @staticmethod
+    def headers(body: bytes, signature: str = None) -> dict:
+        return {
+            "Content-Type": FRAME_MEDIA_TYPE,
+            "X-Device-ID": "ESP32-FRAME",
+            "X-Signature": signature or generate_body_signature(body, SECRET_KEY),
+            "X-Timestamp": str(int(datetime.now().timestamp())),
+        }
+
+    def test_upload_frame_success(self, client, db_session, device):
+        """测试上传多条读数的帧"""
+        body = self.make_frame(3)
+        response = client.post("/api/v1/upload/frame", content=body, headers=self.headers(body))
+
+        assert response.status_code == 200
+        assert len(response.json()["record_ids"]) == 3
+        latest = PackageRepository(db_session).get_latest_by_package_id(6001)
+        assert latest.max_temperature == 6.25
+        assert latest.avg_humidity == 61.5
+
+    def test_upload_frame_invalid_signature(self, client, device):
+        """测试签名与原始字节不匹配时拒绝"""
+        body = self.make_frame(1)
+        response = client.post(
+            "/api/v1/upload/frame", content=body, headers=self.headers(body, "0" * 64)
+        )
+        assert response.status_code == 401
+
+    def test_upload_frame_wrong_content_type(self, client, device):
+        """测试非帧内容类型返回 415"""
+        body = self.make_frame(1)
+        headers = self.headers(body)
+        headers["Content-Type"] = "application/json"
+        response = client.post("/api/v1/upload/frame", content=body, headers=headers)
+        assert response.status_code == 415
+
+    def test_decode_rejects_malformed_frames(self):
+        """测试长度不符与字段越界的帧"""
+        body = self.make_frame(2)
+        with pytest.raises(FrameDecodeError):
+            decode_frame(body[:-1])
+        with pytest.raises(FrameDecodeError):
+            decode_frame(body, max_readings=1)
+
+        corrupted = bytearray(body)
+        corrupted[10:12] = (20000).to_bytes(2, "little")  # 第一条读数温度 200°C
+        with pytest.raises(FrameDecodeError):
+            decode_frame(bytes(corrupted))
@@ -0,0 +1,102 @@
+"""
+上传签名版本测试（v1 字段拼接 / v2 请求体原始字节）
+"""
+import json
+import pytest
+from datetime import datetime
+from app.repositories.device_repository import DeviceRepository
+from app.utils.security import (
+    SIGNATURE_V2,
+    build_signature_data,
+    generate_body_signature,
+    generate_hmac_signature
+)
+
+SECRET_KEY = "b" * 64
+
+
+class TestUploadSignatureVersion:
+    """上传签名版本测试类"""
+
+    @staticmethod
+    def make_body(package_id: int = 7001) -> dict:
+        return {
+            "package_id": package_id,
+            "max_temperature": 5.5,
+            "avg_humidity": 60.0,
+            "over_threshold_time": 0,
+            "timestamp": int(datetime.now().timestamp()) - 10,
+        }
+
+    @staticmethod
+    def headers(device_id: str, signature: str) -> dict:
+        return {
+            "Content-Type": "application/json",
+            "X-Device-ID": device_id,
+            "X-Signature": signature,
+            "X-Timestamp": str(int(datetime.now().timestamp())),
+        }
+
+    @staticmethod
+    def v1_signature(body: dict) -> str:
+        return generate_hmac_signature(
+            build_signature_data(
+                body["package_id"], body["max_temperature"], body["avg_humidity"],
+                body["over_threshold_time"], body["timestamp"]
+            ),
+            SECRET_KEY
+        )
+
+    @pytest.fixture
+    def v1_device(self, db_session):
+        return DeviceRepository(db_session).create(device_id="ESP32-V1", secret_key=SECRET_KEY)
+
+    @pytest.fixture
+    def v2_device(self, db_session):
+        return DeviceRepository(db_session).create(
+            device_id="ESP32-V2", secret_key=SECRET_KEY, signature_version=SIGNATURE_V2
+        )
+
+    def test_v2_raw_body_signature(self, client, v2_device):
+        """测试 v2 设备对原始字节签名上传成功"""
+        raw = json.dumps(self.make_body()).encode("utf-8")
+        response = client.post(
+            "/api/v1/upload", content=raw,
+            headers=self.headers("ESP32-V2", generate_body_signature(raw, SECRET_KEY))
+        )
+        assert response.status_code == 200
+        assert response.json()["record_id"] > 0
+
+    def test_v2_tampered_body_rejected_before_parsing(self, client, v2_device):
+        """测试 v2 请求体被篡改时返回 401（即使请求体本身不合法也不返回 422）"""
+        raw = json.dumps(self.make_body()).encode("utf-8")
+        signature = generate_body_signature(raw, SECRET_KEY)
+        response = client.post(
+            "/api/v1/upload", content=b'{"package_id": -1}', headers=self.headers("ESP32-V2", signature)
+        )
+        assert response.status_code == 401
+
+    def test_v2_device_rejects_v1_signature(self, client, v2_device):
+        """测试 v2 设备不再接受 v1 签名"""
+        body = self.make_body()
+        response = client.post(
+            "/api/v1/upload", json=body, headers=self.headers("ESP32-V2", self.v1_signature(body))
+        )
+        assert response.status_code == 401
+
+    def test_v1_device_unchanged(self, client, v1_device):
+        """测试 v1 设备沿用字段拼接签名"""
+        body = self.make_body(7002)
+        response = client.post(
+            "/api/v1/upload", json=body, headers=self.headers("ESP32-V1", self.v1_signature(body))
+        )
+        assert response.status_code == 200
+
+    def test_v2_invalid_body_with_valid_signature(self, client, v2_device):
+        """测试签名正确但数据非法时返回 422"""
+        raw = json.dumps({**self.make_body(), "package_id": 0}).encode("utf-8")
+        response = client.post(
+            "/api/v1/upload", content=raw,
+            headers=self.headers("ESP32-V2", generate_body_signature(raw, SECRET_KEY))
+        )
+        assert response.status_code == 422
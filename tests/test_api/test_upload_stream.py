@@ -0,0 +1,159 @@
+"""
+网关 NDJSON 流式上传测试
+"""
+import asyncio
+import gzip
+import json
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.device_cache import device_cache
+from app.models.device import DeviceSnapshot
+from app.repositories.device_repository import DeviceRepository
+from app.repositories.package_repository import PackageRepository
+from app.utils.ndjson import NDJSON_MEDIA_TYPE, inflate_gzip, iter_lines
+from app.utils.security import build_signature_data, generate_hmac_signature
+
+SECRET_KEYS = {"ESP32-A": "a" * 64, "ESP32-B": "b" * 64}
+
+
+def make_line(device_id: str, package_id: int, timestamp: int, secret_key: str = None) -> bytes:
+    reading = {
+        "package_id": package_id,
+        "max_temperature": 4.25,
+        "avg_humidity": 55.0,
+        "over_threshold_time": 0,
+        "timestamp": timestamp,
+    }
+    signature = generate_hmac_signature(
+        build_signature_data(**reading), secret_key or SECRET_KEYS[device_id]
+    )
+    return json.dumps({"device_id": device_id, "signature": signature, **reading}).encode() + b"\n"
+
+
+async def collect(chunks, max_line_bytes=64, compressed=False):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    stream = inflate_gzip(source()) if compressed else source()
+    return [item async for item in iter_lines(stream, max_line_bytes)]
+
+
+class TestIterLines:
+    """增量拆行测试类"""
+
+    def test_lines_split_across_chunks(self):
+        """测试跨块拆行、空行忽略、超长行以 None 占位"""
+        body = b'{"a": 1}\n\n' + b"x" * 100 + b'\n{"b": 2}'
+        chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+        assert asyncio.run(collect(chunks)) == [(1, b'{"a": 1}'), (3, None), (4, b'{"b": 2}')]
+
+    def test_multi_member_gzip(self):
+        """测试多成员 gzip 流按块解压"""
+        body = gzip.compress(b"one\ntw") + gzip.compress(b"o\nthree\n")
+        chunks = [body[i:i + 5] for i in range(0, len(body), 5)]
+        assert asyncio.run(collect(chunks, compressed=True)) == [(1, b"one"), (2, b"two"), (3, b"three")]
+
+
+class TestUploadStream:
+    """流式上传接口测试类"""
+
+    def test_stream_upload_summary(self, client, db_session, monkeypatch):
+        """测试逐行校验签名、按批写入、重复和拒绝计数"""
+        monkeypatch.setattr(settings, "UPLOAD_STREAM_BATCH_SIZE", 2)
+        repository = DeviceRepository(db_session)
+        for device_id, secret_key in SECRET_KEYS.items():
+            repository.create(device_id=device_id, secret_key=secret_key)
+        repository.create(device_id="ESP32-OFF", secret_key="c" * 64)
+        repository.deactivate("ESP32-OFF")
+
+        now = int(datetime.now().timestamp())
+        body = b"".join([
+            make_line("ESP32-A", 501, now - 30),
+            make_line("ESP32-A", 501, now - 20),
+            make_line("ESP32-B", 502, now - 20),
+            make_line("ESP32-A", 501, now - 30),                      # 重复
+            make_line("ESP32-B", 502, now - 10, secret_key="f" * 64),  # 签名错误
+            make_line("ESP32-OFF", 503, now - 10, secret_key="c" * 64),
+            b"not json\n",
+        ])
+        response = client.post(
+            "/api/v1/upload/stream",
+            content=gzip.compress(body),
+            headers={"Content-Type": NDJSON_MEDIA_TYPE, "Content-Encoding": "gzip"},
+        )
+
+        assert response.status_code == 200
+        summary = response.json()
+        assert summary["lines"] == 7
+        assert summary["accepted"] == 4
+        assert summary["created"] == 3
+        assert summary["duplicates"] == 1
+        assert summary["rejected"] == 3
+        assert [error["line"] for error in summary["errors"]] == [5, 6, 7]
+
+        records = PackageRepository(db_session).get_by_package_id(501)
+        assert sorted(r.timestamp for r in records) == [now - 30, now - 20]
+
+    def test_truncated_gzip_rejected(self, client, db_session):
+        """测试被截断的 gzip 请求体返回 400"""
+        body = gzip.compress(make_line("ESP32-A", 501, int(datetime.now().timestamp())))
+        response = client.post(
+            "/api/v1/upload/stream",
+            content=body[:-12],
+            headers={"Content-Type": NDJSON_MEDIA_TYPE, "Content-Encoding": "gzip"},
+        )
+        assert response.status_code == 400
+
+    def test_device_resolved_from_database_once_per_stream(self, client, db_session, monkeypatch):
+        """测试每个设备每次上传只查询一次数据库，且不使用缓存中的旧密钥；v2 设备的行被拒绝"""
+        repository = DeviceRepository(db_session)
+        repository.create(device_id="ESP32-A", secret_key=SECRET_KEYS["ESP32-A"])
+        repository.create(device_id="ESP32-V2", secret_key="d" * 64, signature_version=2)
+        # 缓存中是换钥前的旧密钥
+        stale = DeviceSnapshot.from_device(repository.get_by_device_id("ESP32-A"))
+        device_cache.put(stale._replace(secret_key="f" * 64))
+
+        lookups = []
+        get_by_device_id = DeviceRepository.get_by_device_id
+        monkeypatch.setattr(
+            DeviceRepository, "get_by_device_id",
+            lambda self, device_id: lookups.append(device_id) or get_by_device_id(self, device_id)
+        )
+
+        now = int(datetime.now().timestamp())
+        body = b"".join([
+            make_line("ESP32-A", 601, now - 20),
+            make_line("ESP32-A", 601, now - 10),
+            make_line("ESP32-A", 601, now - 5, secret_key="f" * 64),  # 旧密钥
+            make_line("ESP32-V2", 602, now - 10, secret_key="d" * 64),
+        ])
+        response = client.post("/api/v1/upload/stream", content=body, headers={"Content-Type": NDJSON_MEDIA_TYPE})
+
+        summary = response.json()
+        assert summary["created"] == 2
+        assert [error["line"] for error in summary["errors"]] == [3, 4]
+        assert "requires v2" in summary["errors"][1]["error"]
+        assert sorted(lookups) == ["ESP32-A", "ESP32-V2"]
+
+    def test_cache_fallback_when_database_unavailable(self, client, db_session, monkeypatch):
+        """测试设备查找遇到数据库不可用时回退到设备缓存"""
+        repository = DeviceRepository(db_session)
+        repository.create(device_id="ESP32-A", secret_key=SECRET_KEYS["ESP32-A"])
+        assert repository.get_by_device_id("ESP32-A") is not None
+
+        def database_down(*args, **kwargs):
+            raise OperationalError("SELECT", {}, Exception("Lost connection to MySQL server"))
+
+        monkeypatch.setattr(DeviceRepository, "get_by_device_id", database_down)
+        now = int(datetime.now().timestamp())
+        response = client.post(
+            "/api/v1/upload/stream",
+            content=make_line("ESP32-A", 603, now - 10),
+            headers={"Content-Type": NDJSON_MEDIA_TYPE},
+        )
+        assert response.json()["created"] == 1
+        assert device_cache.stats()["fallbacks"] == 1
@@ -0,0 +1,73 @@
+"""
+准入控制测试
+"""
+import asyncio
+import pytest
+from app.core.admission import AdmissionGate, AdmissionRejected, admission_gates
+
+
+class TestAdmissionGate:
+    """并发闸门测试类"""
+
+    def test_queue_full_and_timeout(self):
+        """测试并发已满时排队，队列满返回 429，排队超时返回 503"""
+        async def scenario():
+            gate = AdmissionGate("device", limit=1, queue_size=1, queue_timeout=0.05)
+            await gate.acquire()
+
+            waiter = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejected) as full:
+                await gate.acquire()
+            assert full.value.status_code == 429
+
+            with pytest.raises(AdmissionRejected) as timeout:
+                await waiter
+            assert timeout.value.status_code == 503
+            return gate.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["active"] == 1
+        assert stats["waiting"] == 0
+        assert stats["rejected_queue_full"] == 1
+        assert stats["rejected_timeout"] == 1
+
+    def test_release_hands_slot_to_waiter(self):
+        """测试归还额度时直接转交给排队的请求"""
+        async def scenario():
+            gate = AdmissionGate("user", limit=1, queue_size=4, queue_timeout=1)
+            await gate.acquire()
+            waiter = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            gate.release()
+            await waiter
+            assert gate.active == 1
+            gate.release()
+            return gate.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["active"] == 0
+        assert stats["admitted"] == 2
+        assert stats["queued"] == 1
+
+
+class TestAdmissionMiddleware:
+    """准入控制中间件测试类"""
+
+    def test_saturated_device_gate_does_not_block_users(self, client, monkeypatch):
+        """测试设备上传闸门饱和时返回 429 + Retry-After，用户接口和健康检查不受影响"""
+        device_gate = admission_gates["device"]
+        monkeypatch.setattr(device_gate, "limit", 0)
+        monkeypatch.setattr(device_gate, "queue_size", 0)
+        device_gate.reset_stats()
+
+        response = client.post("/api/v1/upload", json={})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+
+        # 用户接口进入路由（未登录返回 403 而不是 429）
+        assert client.get("/api/v1/packages/1/records").status_code != 429
+
+        metrics = client.get("/api/v1/health/admission").json()
+        assert metrics["device"]["rejected_queue_full"] == 1
+        assert metrics["user"]["active"] == 0
@@ -0,0 +1,144 @@
+"""
+热数据窗口测试
+"""
+import pytest
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.hot_window import HotWindow, hot_window
+from app.models.package import RecordSnapshot
+from app.repositories.package_repository import PackageRepository
+from app.schemas.package import PackageUploadRequest
+
+
+def make_record(record_id: int, package_id: int, timestamp: int) -> RecordSnapshot:
+    return RecordSnapshot(
+        id=record_id,
+        package_id=package_id,
+        max_temperature=20.0,
+        avg_humidity=50.0,
+        over_threshold_time=0,
+        timestamp=timestamp,
+        created_at=None
+    )
+
+
+class TestHotWindow:
+    """热数据窗口测试类"""
+
+    def test_append_keeps_latest_records_in_order(self):
+        """测试乱序追加后窗口保持时间倒序且只保留最近 K 条"""
+        window = HotWindow(window_size=3, max_packages=10)
+        window.get_or_load(1, lambda size: ([], 0))
+
+        for record_id, ts in enumerate([100, 300, 200, 400, 50], start=1):
+            window.append(make_record(record_id, 1, ts))
+
+        entry = window.get_or_load(1, lambda size: pytest.fail("should hit cache"))
+        assert [r.timestamp for r in entry.records] == [400, 300, 200]
+        assert entry.total == 5
+        assert not entry.complete
+
+    def test_lru_eviction(self):
+        """测试超过最大包裹数时淘汰最久未使用的包裹"""
+        window = HotWindow(window_size=3, max_packages=2)
+        window.get_or_load(1, lambda size: ([], 0))
+        window.get_or_load(2, lambda size: ([], 0))
+        window.get_or_load(1, lambda size: ([], 0))
+        window.get_or_load(3, lambda size: ([], 0))
+
+        assert window.stats()["evictions"] == 1
+        loads = []
+        window.get_or_load(2, lambda size: loads.append(size) or ([], 0))
+        assert loads == [3]
+
+    def test_write_during_load_is_not_cached(self):
+        """测试加载期间发生写入时不缓存加载结果"""
+        window = HotWindow(window_size=3, max_packages=10)
+
+        def loader(size):
+            window.append(make_record(2, 1, 200))
+            return [make_record(1, 1, 100)], 1
+
+        window.get_or_load(1, loader)
+        assert window.stats()["packages"] == 0
+
+    def test_load_skips_count_when_window_is_full(self, db_session, monkeypatch):
+        """测试加载窗口不执行 COUNT：记录不足窗口大小时窗口完整，否则总数未知"""
+        monkeypatch.setattr(hot_window, "window_size", 3)
+        repository = PackageRepository(db_session)
+        monkeypatch.setattr(repository, "_count_from_db", lambda package_id: pytest.fail("unexpected COUNT"))
+        for i in range(4):
+            repository.create(PackageUploadRequest(
+                package_id=2003 + i // 3,
+                max_temperature=20.0,
+                avg_humidity=50.0,
+                over_threshold_time=0,
+                timestamp=1700000000 + i
+            ))
+
+        full = repository._get_window(2003)
+        assert full.total is None and not full.complete
+        assert not full.covers(1, 3)
+        partial = repository._get_window(2004)
+        assert partial.total == 1 and partial.covers(5, 10)
+
+    def test_repository_serves_reads_from_window(self, db_session):
+        """测试仓库写入后最新记录和小页历史由窗口直接返回"""
+        repository = PackageRepository(db_session)
+        for i in range(5):
+            repository.create(PackageUploadRequest(
+                package_id=2001,
+                max_temperature=20.0 + i,
+                avg_humidity=50.0,
+                over_threshold_time=0,
+                timestamp=1700000000 + i
+            ))
+
+        assert repository.get_latest_by_package_id(2001).timestamp == 1700000004
+        hits_before = hot_window.stats()["hits"]
+        records = repository.get_by_package_id(2001, limit=3, offset=1)
+        assert [r.timestamp for r in records] == [1700000003, 1700000002, 1700000001]
+        assert hot_window.stats()["hits"] == hits_before + 1
+        # 分页总数始终由数据库统计，不读取窗口
+        assert repository.count_by_package_id(2001) == 5
+        assert hot_window.stats()["hits"] == hits_before + 1
+
+    def test_sql_pages_break_ties_like_window(self, db_session, monkeypatch):
+        """测试同一时间戳多台设备的读数：数据库分页与窗口分页按 (timestamp, id) 倒序一致"""
+        # 不让 idx_package_history 的扫描顺序掩盖问题：走唯一索引时同一时间戳按设备倒序返回
+        db_session.execute(text("DROP INDEX idx_package_history"))
+        repository = PackageRepository(db_session)
+        for timestamp, source_device_id in ((1700000000, 2), (1700000000, 1), (1700000001, 3), (1700000001, 1)):
+            repository.create(PackageUploadRequest(
+                package_id=2005,
+                max_temperature=20.0,
+                avg_humidity=50.0,
+                over_threshold_time=0,
+                timestamp=timestamp
+            ), source_device_id=source_device_id)
+
+        from_window = [r.id for r in repository.get_by_package_id(2005, limit=4)]
+        monkeypatch.setattr(settings, "HOT_WINDOW_ENABLED", False)
+        from_sql = [r.id for offset in (0, 2) for r in repository.get_by_package_id(2005, limit=2, offset=offset)]
+        assert from_sql == from_window
+        assert repository.get_latest_by_package_id(2005).id == from_window[0]
+
+    def test_failed_commit_invalidates_window(self, db_session, monkeypatch):
+        """测试写入失败时使包裹窗口失效"""
+        repository = PackageRepository(db_session)
+        repository.get_latest_by_package_id(2002)
+        assert hot_window.stats()["packages"] == 1
+
+        def fail_commit():
+            raise RuntimeError("commit failed")
+
+        monkeypatch.setattr(db_session, "commit", fail_commit)
+        with pytest.raises(RuntimeError):
+            repository.create(PackageUploadRequest(
+                package_id=2002,
+                max_temperature=20.0,
+                avg_humidity=50.0,
+                over_threshold_time=0,
+                timestamp=1700000000
+            ))
+        assert hot_window.stats()["packages"] == 0
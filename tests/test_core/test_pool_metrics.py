@@ -0,0 +1,44 @@
+"""
+数据库连接池监控测试
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core.pool_metrics import InstrumentedQueuePool, instrument_engine, warm_up_pool
+
+
+class TestPoolMetrics:
+    """连接池监控测试类"""
+
+    def test_warmup_wait_and_timeout(self, tmp_path):
+        """测试预热建连、等待时间直方图、使用中/空闲连接数和取连接超时"""
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool, pool_size=2, max_overflow=0, pool_timeout=0.05
+        )
+        metrics = instrument_engine(engine, "primary")
+
+        assert warm_up_pool(engine, 2) == 2
+        stats = metrics.stats(engine.pool)
+        assert stats["connects"] == 2
+        assert stats["idle"] == 2
+
+        held = [engine.connect(), engine.connect()]
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        stats = metrics.stats(engine.pool)
+        assert stats["active"] == 2
+        assert stats["timeouts"] == 1
+        assert stats["connects"] == 2
+        assert stats["checkouts"] == 4
+        assert sum(stats["wait_histogram"].values()) == 4
+        for connection in held:
+            connection.close()
+
+        # dispose 重建连接池后保留统计
+        engine.dispose()
+        with engine.connect():
+            pass
+        assert metrics.stats(engine.pool)["checkouts"] == 5
+        assert metrics.stats(engine.pool)["connects"] == 3
@@ -0,0 +1,95 @@
+"""
+设备上传限流测试
+"""
+from datetime import datetime
+from app.core.rate_limit import DeviceRateLimiter, device_rate_limiter
+from app.repositories.device_repository import DeviceRepository
+from app.utils.binary_frame import FRAME_MEDIA_TYPE, encode_frame
+from app.utils.security import generate_body_signature
+from app.schemas.package import PackageUploadRequest
+
+SECRET_KEY = "d" * 64
+
+
+class TestDeviceRateLimiter:
+    """令牌桶测试类"""
+
+    def test_burst_then_refill(self, clock):
+        """测试突发额度用尽后按速率惰性补充"""
+        limiter = DeviceRateLimiter(60, 3, max_devices=10, clock=clock)
+        assert [limiter.acquire(1, "ESP32-001") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.acquire(1, "ESP32-001") == 1.0
+        assert limiter.acquire(2, "ESP32-002") == 0.0
+
+        clock.now += 1
+        assert limiter.acquire(1, "ESP32-001") == 0.0
+        assert limiter.stats()["top_rejected"] == [{"device_id": "ESP32-001", "rejected": 1}]
+
+    def test_device_overrides(self, clock):
+        """测试设备覆盖配置（0 表示不限流）"""
+        limiter = DeviceRateLimiter(60, 1, max_devices=10, clock=clock)
+        assert all(limiter.acquire(1, "GW-1", rate_per_minute=0) == 0.0 for _ in range(100))
+        assert all(limiter.acquire(2, "GW-2", burst=5) == 0.0 for _ in range(5))
+        assert limiter.acquire(2, "GW-2", burst=5) > 0
+
+    def test_idle_buckets_are_recycled(self, clock):
+        """测试槽位用尽时回收已补满的桶，仍无空闲槽位时放行"""
+        limiter = DeviceRateLimiter(60, 2, max_devices=2, clock=clock)
+        limiter.acquire(1, "A")
+        limiter.acquire(2, "B")
+        assert limiter.acquire(3, "C") == 0.0
+        assert limiter.stats()["overflowed"] == 1
+
+        clock.now += 2
+        limiter.acquire(3, "C")
+        assert limiter.stats()["tracked_devices"] == 1
+
+
+class TestUploadRateLimit:
+    """上传接口限流测试类"""
+
+    def test_frame_upload_rate_limited(self, client, db_session):
+        """测试设备超出突发额度后返回 429 + Retry-After"""
+        repository = DeviceRepository(db_session)
+        repository.create(device_id="ESP32-LOOP", secret_key=SECRET_KEY)
+        repository.set_rate_limit("ESP32-LOOP", 60, 2)
+
+        now = int(datetime.now().timestamp())
+        statuses = []
+        for i in range(3):
+            body = encode_frame([PackageUploadRequest(
+                package_id=9100, max_temperature=4.0, avg_humidity=50.0,
+                over_threshold_time=0, timestamp=now - i
+            )])
+            response = client.post("/api/v1/upload/frame", content=body, headers={
+                "Content-Type": FRAME_MEDIA_TYPE,
+                "X-Device-ID": "ESP32-LOOP",
+                "X-Signature": generate_body_signature(body, SECRET_KEY),
+                "X-Timestamp": str(now),
+            })
+            statuses.append(response.status_code)
+
+        assert statuses == [200, 200, 429]
+        assert response.headers["Retry-After"] == "1"
+        assert device_rate_limiter.stats()["rejected_total"] == 1
+
+    def test_forged_requests_do_not_drain_bucket(self, client, db_session):
+        """测试签名错误的请求不消耗设备令牌"""
+        repository = DeviceRepository(db_session)
+        repository.create(device_id="ESP32-VICTIM", secret_key=SECRET_KEY)
+        repository.set_rate_limit("ESP32-VICTIM", 60, 1)
+
+        now = int(datetime.now().timestamp())
+        body = encode_frame([PackageUploadRequest(
+            package_id=9101, max_temperature=4.0, avg_humidity=50.0,
+            over_threshold_time=0, timestamp=now
+        )])
+        headers = {"Content-Type": FRAME_MEDIA_TYPE, "X-Device-ID": "ESP32-VICTIM", "X-Timestamp": str(now)}
+        for _ in range(3):
+            forged = client.post("/api/v1/upload/frame", content=body, headers={**headers, "X-Signature": "0" * 64})
+            assert forged.status_code == 401
+
+        signed = client.post("/api/v1/upload/frame", content=body, headers={
+            **headers, "X-Signature": generate_body_signature(body, SECRET_KEY)
+        })
+        assert signed.status_code == 200
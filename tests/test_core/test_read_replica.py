@@ -0,0 +1,133 @@
+"""
+读写分离路由测试（两个 SQLite 文件分别模拟主库和只读副本）
+"""
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.read_replica import ReplicaRouter, RoutingSession, track_writes_for
+from app.models.package import PackageRecord
+from app.repositories.monitor import MonitorRepository
+from app.repositories.package_repository import PackageRepository
+from app.repositories.user import UserPackageRepository
+from app.schemas.user import PackageBindRequest
+
+
+@pytest.fixture
+def routed(tmp_path, clock):
+    """主库/副本各写入一条可区分的记录，返回 (会话工厂, 路由器, 延迟, 时钟)"""
+    engines = {}
+    for name, temperature in (("primary", 1.0), ("replica", 2.0)):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            db.add(PackageRecord(
+                package_id=1, max_temperature=temperature, avg_humidity=50.0,
+                over_threshold_time=0, timestamp=1700000000
+            ))
+            db.commit()
+        engines[name] = engine
+
+    lag = {"seconds": 0.0}
+
+    def probe(engine):
+        if lag["seconds"] is Exception:
+            raise RuntimeError("replica down")
+        return lag["seconds"]
+
+    router = ReplicaRouter(
+        max_lag_seconds=5, check_interval=10, sticky_seconds=30, lag_probe=probe, clock=clock
+    )
+    factory = sessionmaker(
+        class_=RoutingSession, bind=engines["primary"], replica_bind=engines["replica"], router=router
+    )
+    yield factory, router, lag, clock
+    for engine in engines.values():
+        engine.dispose()
+
+
+def read_temperature(db) -> float:
+    return MonitorRepository(db).get_all_package_records(1)[0].max_temperature
+
+
+class TestReadReplicaRouting:
+    """副本路由测试类"""
+
+    def test_marked_reads_use_replica(self, routed):
+        """测试 @replica_read 方法走副本，其他查询走主库"""
+        factory, router, _, _ = routed
+        with factory() as db:
+            assert read_temperature(db) == 2.0
+            assert PackageRepository(db).get_by_id(1).max_temperature == 1.0
+        assert router.stats()["replica_reads"] == 1
+
+    def test_read_your_writes(self, routed):
+        """测试会话写入后走主库，同一用户后续请求在粘滞时间内也走主库"""
+        factory, router, _, clock = routed
+        with factory() as db:
+            track_writes_for(db, "user:7")
+            UserPackageRepository(db).bind_package(7, PackageBindRequest(package_id=1))
+            assert read_temperature(db) == 1.0
+
+        with factory() as db:
+            track_writes_for(db, "user:7")
+            assert read_temperature(db) == 1.0
+        with factory() as db:
+            track_writes_for(db, "user:8")
+            assert read_temperature(db) == 2.0
+
+        clock.now += 31
+        with factory() as db:
+            track_writes_for(db, "user:7")
+            assert read_temperature(db) == 2.0
+
+    def test_fallback_when_lagging_or_down(self, routed):
+        """测试副本延迟超限或不可用时回退主库，检查间隔后恢复"""
+        factory, router, lag, clock = routed
+        lag["seconds"] = 60.0
+        with factory() as db:
+            assert read_temperature(db) == 1.0
+
+        lag["seconds"] = Exception
+        clock.now += 10
+        with factory() as db:
+            assert read_temperature(db) == 1.0
+        assert router.stats()["last_error"] == "replica down"
+
+        lag["seconds"] = 0.0
+        clock.now += 10
+        with factory() as db:
+            assert read_temperature(db) == 2.0
+        assert router.stats()["primary_fallbacks"] == 2
+
+    def test_replica_query_error_retried_on_primary(self, routed):
+        """测试副本查询中途失败时在主库重试，本次会话后续查询走主库"""
+        factory, router, _, _ = routed
+        PackageRecord.__table__.drop(factory.kw["replica_bind"])
+        with factory() as db:
+            assert read_temperature(db) == 1.0
+            assert read_temperature(db) == 1.0
+        assert router.stats()["replica_reads"] == 1
+
+    def test_check_does_not_block_other_readers(self, routed):
+        """测试副本检查期间其他线程不等待，沿用上次结果"""
+        factory, router, lag, clock = routed
+        entered, release = threading.Event(), threading.Event()
+
+        def slow_probe(engine):
+            entered.set()
+            release.wait(5)
+            return 0.0
+
+        router.lag_probe = slow_probe
+        checker = threading.Thread(target=router.replica_available, args=(factory.kw["replica_bind"],))
+        checker.start()
+        assert entered.wait(5)
+        # 检查未完成：其他线程立即得到上次结果（初始为不可用）
+        assert router.replica_available(factory.kw["replica_bind"]) is False
+        release.set()
+        checker.join(5)
+        assert router.replica_available(factory.kw["replica_bind"]) is True
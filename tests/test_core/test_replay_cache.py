@@ -0,0 +1,91 @@
+"""
+防重放缓存测试
+"""
+import json
+from datetime import datetime
+
+import pytest
+from app.core.replay_cache import MemoryReplayCache
+from app.repositories.device_repository import DeviceRepository
+from app.repositories.package_repository import PackageRepository
+from app.services.package_service import PackageService
+from app.utils.security import SIGNATURE_V2, generate_body_signature
+
+SECRET_KEY = "c" * 64
+
+
+class TestMemoryReplayCache:
+    """内存防重放缓存测试类"""
+
+    def test_duplicate_rejected_within_window(self, clock):
+        """测试窗口内的重复签名被拒绝，不同设备互不影响"""
+        cache = MemoryReplayCache(600, 30, clock=clock)
+        assert cache.add("ESP32-001", "sig") is True
+        assert cache.seen("ESP32-001", "sig") is True
+        assert cache.add("ESP32-001", "sig") is False
+        assert cache.seen("ESP32-002", "sig") is False
+
+    def test_buckets_expire_as_a_whole(self, clock):
+        """测试超过窗口后整桶过期，桶数保持有界"""
+        cache = MemoryReplayCache(600, 30, clock=clock)
+        cache.add("ESP32-001", "old")
+
+        clock.now += 599
+        assert cache.seen("ESP32-001", "old") is True
+
+        for _ in range(100):
+            clock.now += 30
+            cache.add("ESP32-001", f"sig-{clock.now}")
+        assert cache.seen("ESP32-001", "old") is False
+        assert cache.stats()["buckets"] <= cache.bucket_count
+
+
+def signed_upload(package_id: int):
+    """构造 v2 设备的已签名上传请求"""
+    raw = json.dumps({
+        "package_id": package_id,
+        "max_temperature": 3.5,
+        "avg_humidity": 55.0,
+        "over_threshold_time": 0,
+        "timestamp": int(datetime.now().timestamp()) - 5,
+    }).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "X-Device-ID": "ESP32-REPLAY",
+        "X-Signature": generate_body_signature(raw, SECRET_KEY),
+        "X-Timestamp": str(int(datetime.now().timestamp())),
+    }
+    return raw, headers
+
+
+class TestUploadReplay:
+    """上传接口防重放测试类"""
+
+    @pytest.fixture(autouse=True)
+    def device(self, db_session):
+        DeviceRepository(db_session).create(
+            device_id="ESP32-REPLAY", secret_key=SECRET_KEY, signature_version=SIGNATURE_V2
+        )
+
+    def test_replayed_upload_rejected(self, client, db_session):
+        """测试相同的已签名请求第二次提交返回 409 且不写入数据"""
+        raw, headers = signed_upload(8001)
+
+        assert client.post("/api/v1/upload", content=raw, headers=headers).status_code == 200
+        replay = client.post("/api/v1/upload", content=raw, headers=headers)
+        assert replay.status_code == 409
+        assert PackageRepository(db_session).count_by_package_id(8001) == 1
+
+    def test_failed_write_can_be_retried(self, client, db_session, monkeypatch):
+        """测试写入失败时不记录签名，设备用同一签名重试可以写入"""
+        raw, headers = signed_upload(8002)
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("write failed")
+
+        monkeypatch.setattr(PackageService, "save_package_data", fail)
+        assert client.post("/api/v1/upload", content=raw, headers=headers).status_code == 500
+        monkeypatch.undo()
+
+        assert client.post("/api/v1/upload", content=raw, headers=headers).status_code == 200
+        assert PackageRepository(db_session).count_by_package_id(8002) == 1
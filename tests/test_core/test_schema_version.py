@@ -0,0 +1,100 @@
+"""
+数据库结构版本检查测试
+"""
+from pathlib import Path
+
+import pytest
+from alembic.script import ScriptDirectory
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+
+import app.main as main_module
+from app.core.database import Base
+from app.core.record_storage import COMPACT, WIDE, check_record_storage, convert_record_storage, get_record_storage
+from app.core.schema_version import SCHEMA_REVISION, SchemaVersionError, check_schema_version
+from app.models.package import PackageRecord
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+
+
+class TestSchemaVersion:
+    """结构版本检查测试类"""
+
+    def test_revision_matches_alembic_head(self):
+        """测试代码期望的版本与 alembic 最新迁移一致（新增迁移时需同步修改 SCHEMA_REVISION）"""
+        assert ScriptDirectory(str(ALEMBIC_DIR)).get_current_head() == SCHEMA_REVISION
+
+    def test_check_schema_version(self, tmp_path):
+        """测试未执行迁移、版本不一致时抛出异常，一致时返回版本号"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+        with pytest.raises(SchemaVersionError, match="no alembic_version"):
+            check_schema_version(engine)
+
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)"))
+            conn.execute(text("INSERT INTO alembic_version VALUES ('008')"))
+        with pytest.raises(SchemaVersionError, match="revision 008 does not match"):
+            check_schema_version(engine)
+
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE alembic_version SET version_num = :revision"), {"revision": SCHEMA_REVISION})
+        assert check_schema_version(engine) == SCHEMA_REVISION
+
+    def test_query_errors_are_not_missing_table(self, tmp_path):
+        """测试 alembic_version 存在但查询失败时抛出原始错误，而不是按"未执行迁移"处理"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE alembic_version (revision VARCHAR(32) NOT NULL PRIMARY KEY)"))
+        with pytest.raises(OperationalError, match="no such column"):
+            check_schema_version(engine)
+
+    def test_startup_fails_fast_on_mismatch(self, monkeypatch):
+        """测试版本不一致时应用拒绝启动"""
+        def mismatched(engine):
+            raise SchemaVersionError("database schema revision 008 does not match application revision 009")
+
+        monkeypatch.setattr(main_module, "check_schema_version", mismatched)
+        with pytest.raises(SchemaVersionError):
+            with TestClient(main_module.app):
+                pass
+
+
+class TestRecordStorage:
+    """存储编码检查与转换测试类"""
+
+    @pytest.fixture
+    def wide_engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'storage.db'}")
+        Base.metadata.create_all(engine, tables=[PackageRecord.__table__])
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO package_records (package_id, max_temperature, avg_humidity, over_threshold_time, "
+                "timestamp, source_device_id) VALUES (1, 25.5, 60.25, 3, 1700000000, 0)"
+            ))
+        yield engine
+        engine.dispose()
+
+    def test_mismatch_fails_fast(self, wide_engine):
+        """测试列类型与配置不一致时抛出异常"""
+        assert check_record_storage(wide_engine, compact=False) == WIDE
+        with pytest.raises(SchemaVersionError, match="--to compact"):
+            check_record_storage(wide_engine, compact=True)
+
+    def test_convert_round_trip(self, wide_engine):
+        """测试转换为紧凑编码并转回，数值不变"""
+        with wide_engine.begin() as conn:
+            assert convert_record_storage(conn, to_compact=True)
+            assert get_record_storage(conn) == COMPACT
+            # 覆盖索引按模型定义重建，仍包含温湿度列
+            history = next(i for i in inspect(conn).get_indexes("package_records") if i["name"] == "idx_package_history")
+            assert "max_temperature" in history["column_names"]
+            assert conn.execute(text("SELECT max_temperature, avg_humidity FROM package_records")).one() == (2550, 6025)
+            # 已是目标编码时不重复转换
+            assert not convert_record_storage(conn, to_compact=True)
+
+        check_record_storage(wide_engine, compact=True)
+        with wide_engine.begin() as conn:
+            assert convert_record_storage(conn, to_compact=False)
+            assert conn.execute(text("SELECT max_temperature, avg_humidity FROM package_records")).one() == (25.5, 60.25)
+        assert check_record_storage(wide_engine, compact=False) == WIDE
@@ -0,0 +1,156 @@
+"""
+本地 spool 测试
+"""
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+
+from app.core.device_cache import device_cache
+from app.core.spool import DEAD_LETTER_FILE, RECORD_SIZE, IngestSpool
+from app.repositories.device_repository import DeviceRepository
+from app.repositories.package_repository import PackageRepository
+from app.schemas.package import PackageUploadRequest
+from app.services.package_service import PackageService
+from app.utils.security import generate_body_signature
+
+SECRET_KEY = "e" * 64
+
+
+def make_readings(package_id: int, timestamps):
+    return [
+        PackageUploadRequest(
+            package_id=package_id, max_temperature=4.5, avg_humidity=60.0,
+            over_threshold_time=0, timestamp=ts
+        )
+        for ts in timestamps
+    ]
+
+
+def database_down(*args, **kwargs):
+    raise OperationalError("INSERT", {}, Exception("Lost connection to MySQL server"))
+
+
+class TestIngestSpool:
+    """spool 读写测试类"""
+
+    def test_replay_in_order_and_skip_corrupt(self, tmp_path):
+        """测试按写入顺序、按设备分批回放，损坏和不完整的记录被跳过并计数"""
+        spool = IngestSpool(str(tmp_path), segment_bytes=RECORD_SIZE * 2, fsync=False)
+        spool.append(make_readings(1, [100, 101]), 7)
+        spool.append(make_readings(2, [102]), 8)
+        spool.append(make_readings(3, [103]), 8)
+        assert spool.depth() == 4
+        assert spool.stats()["segments"] == 2
+
+        # 第二个分段：翻转一个字节并追加半条记录
+        spool.close()
+        last = sorted(tmp_path.glob("*.spool"))[-1]
+        data = bytearray(last.read_bytes())
+        data[RECORD_SIZE + 5] ^= 0xFF
+        last.write_bytes(bytes(data) + b"\x00" * 10)
+
+        batches = []
+        replayed = spool.replay(
+            lambda batch, device: batches.append((device, [(r.package_id, r.timestamp) for r in batch])),
+            batch_size=1
+        )
+        assert replayed == 3
+        assert batches == [(7, [(1, 100)]), (7, [(1, 101)]), (8, [(2, 102)])]
+        assert spool.stats()["corrupt"] == 2
+        assert spool.depth() == 0
+
+    def test_failed_replay_keeps_segment(self, tmp_path):
+        """测试回放失败时分段保留，下次从头回放"""
+        spool = IngestSpool(str(tmp_path), segment_bytes=1024, fsync=False)
+        spool.append(make_readings(1, [100]), 1)
+
+        try:
+            spool.replay(database_down)
+        except OperationalError:
+            pass
+        assert spool.depth() == 1
+        assert spool.stats()["replay_failures"] == 1
+
+    def test_poison_record_moves_to_dead_letter(self, tmp_path):
+        """测试非数据库不可用的写入失败：失败读数移入死信文件，其余读数写入，分段删除"""
+        spool = IngestSpool(str(tmp_path), segment_bytes=1024, fsync=False)
+        spool.append(make_readings(1, [100, 101, 102]), 1)
+
+        written = []
+
+        def writer(batch, device):
+            if any(r.timestamp == 101 for r in batch):
+                raise ValueError("out of range value for column 'timestamp'")
+            written.extend(r.timestamp for r in batch)
+
+        assert spool.replay(writer) == 3
+        assert written == [100, 102]
+        assert spool.depth() == 0
+        assert spool.stats()["dead_lettered"] == 1
+        assert (tmp_path / DEAD_LETTER_FILE).stat().st_size == RECORD_SIZE
+
+    def test_replay_skips_other_process_active_segment(self, tmp_path):
+        """测试共用目录时各写入方使用不同分段，回放不处理（也不删除）其他写入方正在写入的分段"""
+        worker_a = IngestSpool(str(tmp_path), segment_bytes=1024, fsync=False)
+        worker_b = IngestSpool(str(tmp_path), segment_bytes=1024, fsync=False)
+        worker_a.append(make_readings(1, [100]), 1)
+        worker_b.append(make_readings(2, [200]), 2)
+        assert len(list(tmp_path.glob("*.spool"))) == 2
+
+        batches = []
+        assert worker_b.replay(lambda batch, device: batches.append(device)) == 1
+        assert batches == [2]
+        assert worker_a.depth() == 1
+
+        # worker_a 继续写入同一分段，关闭后可被回放
+        worker_a.append(make_readings(1, [101]), 1)
+        worker_a.close()
+        assert worker_b.replay(lambda batch, device: batches.append(device)) == 2
+        assert batches == [2, 1]
+        assert worker_a.depth() == 0
+
+
+class TestSpoolFallback:
+    """数据库不可用时的 spool 回退测试类"""
+
+    def test_service_spools_and_replay_is_idempotent(self, db_session, tmp_path, monkeypatch):
+        """测试写入失败时返回 stored，回放写入数据库且重复回放不产生重复记录"""
+        spool = IngestSpool(str(tmp_path), segment_bytes=1024, fsync=False)
+        repository = PackageRepository(db_session)
+        service = PackageService(repository, spool=spool)
+
+        monkeypatch.setattr(repository, "create_many", database_down)
+        result = service.save_package_batch(make_readings(42, [100, 101]), 3)
+        assert result["status"] == "stored"
+        assert result["spooled"] == 2
+        monkeypatch.undo()
+
+        # 同一批读数在恢复前已部分写入（例如回放中途失败后重试）
+        repository.create_many(make_readings(42, [100]), 3)
+        assert spool.replay(lambda batch, device: repository.create_many(batch, device)) == 2
+        records = repository.get_by_package_id(42)
+        assert sorted(r.timestamp for r in records) == [100, 101]
+
+    def test_upload_acknowledged_with_202(self, client, db_session, tmp_path, monkeypatch):
+        """测试数据库不可用时设备通过缓存认证，上传返回 202 stored"""
+        spool = IngestSpool(str(tmp_path), segment_bytes=1024, fsync=False)
+        monkeypatch.setattr("app.services.package_service.ingest_spool", spool)
+        DeviceRepository(db_session).create(device_id="ESP32-SPOOL", secret_key=SECRET_KEY, signature_version=2)
+        assert DeviceRepository(db_session).get_by_device_id("ESP32-SPOOL") is not None
+
+        monkeypatch.setattr(DeviceRepository, "get_by_device_id", database_down)
+        monkeypatch.setattr(DeviceRepository, "update_last_seen", database_down)
+        monkeypatch.setattr(PackageRepository, "create", database_down)
+
+        now = int(datetime.now().timestamp())
+        body = make_readings(43, [now])[0].model_dump_json().encode()
+        response = client.post("/api/v1/upload", content=body, headers={
+            "Content-Type": "application/json",
+            "X-Device-ID": "ESP32-SPOOL",
+            "X-Signature": generate_body_signature(body, SECRET_KEY),
+            "X-Timestamp": str(now),
+        })
+        assert response.status_code == 202
+        assert response.json()["status"] == "stored"
+        assert spool.depth() == 1
+        assert device_cache.stats()["fallbacks"] == 1
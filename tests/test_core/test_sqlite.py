@@ -0,0 +1,124 @@
+"""
+SQLite 嵌入式模式测试
+"""
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.sqlite import SQLiteWriteQueue, create_sqlite_engine, sqlite_status, sqlite_write_queue
+from app.models.package import PackageRecord
+from app.repositories.monitor import MonitorRepository
+from app.repositories.package_repository import PackageRepository
+from app.schemas.package import PackageUploadRequest
+
+
+def reading(package_id: int, timestamp: int, temperature: float = 4.0) -> PackageUploadRequest:
+    return PackageUploadRequest(
+        package_id=package_id, max_temperature=temperature, avg_humidity=50.0,
+        over_threshold_time=0, timestamp=timestamp
+    )
+
+
+class TestSQLiteWriteQueue:
+    """单写者队列测试类"""
+
+    def test_timeout_and_abandoned_ticket(self):
+        """测试排队超时抛出 TimeoutError，放弃的号不阻塞后续排队者"""
+        queue = SQLiteWriteQueue(timeout=0.05)
+        queue.acquire()
+        errors = []
+        waiter = threading.Thread(target=lambda: errors.append(pytest.raises(PoolTimeoutError, queue.acquire)))
+        waiter.start()
+        waiter.join()
+        assert queue.stats()["timeouts"] == 1
+
+        queue.release()
+        queue.acquire()
+        queue.release()
+        assert queue.stats()["acquired"] == 2
+
+
+class TestSQLiteEngine:
+    """SQLite 引擎测试类"""
+
+    @pytest.fixture
+    def edge_engine(self, tmp_path, monkeypatch):
+        # 不等待其他写入方：没有写队列时并发写入会立即报 database is locked
+        monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 0)
+        monkeypatch.setattr(settings, "HOT_WINDOW_ENABLED", False)
+        engine = create_sqlite_engine(
+            f"sqlite:///{tmp_path / 'edge' / 'rfid.db'}", pool_size=8, max_overflow=0
+        )
+        Base.metadata.create_all(engine)
+        sqlite_write_queue.reset_stats()
+        yield engine
+        engine.dispose()
+
+    def test_pragmas(self, edge_engine):
+        """测试连接建立时设置 WAL 和 pragma"""
+        pragmas = sqlite_status(edge_engine)["pragmas"]
+        assert pragmas["journal_mode"] == "wal"
+        assert pragmas["synchronous"] == 1  # NORMAL
+        assert pragmas["mmap_size"] == settings.SQLITE_MMAP_SIZE
+        assert pragmas["cache_size"] == settings.SQLITE_CACHE_SIZE
+
+    def test_concurrent_uploads_are_serialized(self, edge_engine):
+        """测试多线程并发写入经写队列串行执行，不出现 database is locked"""
+        session_factory = sessionmaker(bind=edge_engine)
+        errors = []
+
+        def upload(worker: int):
+            db = session_factory()
+            try:
+                repository = PackageRepository(db)
+                for batch in range(20):
+                    base = 1700000000 + batch * 10
+                    repository.create_many([reading(worker + 1, base + i) for i in range(10)], source_device_id=1)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=upload, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        db = session_factory()
+        try:
+            assert db.query(PackageRecord).count() == 8 * 20 * 10
+        finally:
+            db.close()
+        stats = sqlite_write_queue.stats()
+        assert stats["acquired"] >= 8 * 20
+        assert stats["waiting"] == 0
+
+
+class TestDailyStatistics:
+    """每日统计（方言无关查询）测试类"""
+
+    def test_daily_statistics_on_sqlite(self, db_session):
+        """测试按本地自然日分组统计"""
+        repository = PackageRepository(db_session)
+        today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        if today > datetime.now():
+            today -= timedelta(days=1)
+        yesterday = today - timedelta(days=1)
+        repository.create_many([
+            reading(42, int(today.timestamp()), 4.0),
+            reading(42, int(today.timestamp()) - 60, 6.0),
+            reading(42, int(yesterday.timestamp()), 8.0),
+        ])
+
+        stats = MonitorRepository(db_session).get_daily_statistics(42, days=7)
+        assert stats == [
+            {'date': today.strftime('%Y-%m-%d'), 'avg_temp': 5.0, 'avg_humidity': 50.0, 'record_count': 2},
+            {'date': yesterday.strftime('%Y-%m-%d'), 'avg_temp': 8.0, 'avg_humidity': 50.0, 'record_count': 1},
+        ]
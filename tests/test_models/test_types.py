@@ -0,0 +1,38 @@
+"""
+紧凑存储列类型测试
+"""
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select, func
+from app.models.types import CentiUnits, to_centi, from_centi
+from app.utils.security import build_signature_data
+
+
+class TestCentiUnits:
+    """百分位定点数类型测试类"""
+
+    def test_matches_signature_rounding(self):
+        """测试取整结果与签名字符串的 .2f 格式一致"""
+        for value in (28.5, 65.2, -12.345, 0.005, 99.995, -50.0, 100.0):
+            signed = build_signature_data(1, value, 0.0, 0, 1)
+            formatted = signed.split("&")[1].split("=")[1]
+            assert from_centi(to_centi(value)) == float(formatted)
+
+    def test_round_trip_through_database(self):
+        """测试写入 SMALLINT 后透明读回 float，聚合结果同样换算"""
+        engine = create_engine("sqlite://")
+        metadata = MetaData()
+        table = Table(
+            "readings", metadata,
+            Column("id", Integer, primary_key=True),
+            Column("value", CentiUnits, nullable=False)
+        )
+        metadata.create_all(engine)
+
+        with engine.begin() as conn:
+            conn.execute(insert(table), [{"value": 28.5}, {"value": -3.25}])
+            raw = conn.exec_driver_sql("SELECT value FROM readings ORDER BY id").scalars().all()
+            values = conn.execute(select(table.c.value).order_by(table.c.id)).scalars().all()
+            avg = conn.execute(select(func.avg(table.c.value, type_=table.c.value.type))).scalar()
+
+        assert raw == [2850, -325]
+        assert values == [28.5, -3.25]
+        assert avg == 12.625
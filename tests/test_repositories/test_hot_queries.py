@@ -0,0 +1,46 @@
+"""
+热点查询模块级语句测试
+"""
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.repositories.device_repository import DeviceRepository
+from app.repositories.package_repository import PackageRepository
+from app.repositories.user import UserPackageRepository
+from app.schemas.package import PackageUploadRequest
+
+
+class TestHotQueryStatements:
+    """热点查询模块级语句测试类"""
+
+    def test_hot_queries_reuse_statement_objects(self, db_session, monkeypatch):
+        """测试重复调用热点查询时执行的是同一组语句对象，不再每次构建新语句"""
+        monkeypatch.setattr(settings, "HOT_WINDOW_ENABLED", False)
+        DeviceRepository(db_session).create(device_id="ESP32-HOT", secret_key="h" * 64)
+        packages = PackageRepository(db_session)
+        packages.create(PackageUploadRequest(
+            package_id=77, max_temperature=4.0, avg_humidity=50.0, over_threshold_time=0, timestamp=1700000000
+        ))
+        devices = DeviceRepository(db_session)
+        owners = UserPackageRepository(db_session)
+
+        def run_hot_queries(i: int):
+            devices.get_by_device_id("ESP32-HOT" if i % 2 else f"ESP32-{i}")
+            owners.check_package_ownership(i, 77)
+            packages.get_by_package_id(77, limit=10 + i, offset=i)
+            packages.count_by_package_id(77 + i)
+            packages.get_latest_by_package_id(77)
+
+        run_hot_queries(0)
+        statements = []
+        listener = lambda orm_execute_state: statements.append(orm_execute_state.statement)
+        event.listen(db_session, "do_orm_execute", listener)
+        try:
+            for i in range(1, 21):
+                run_hot_queries(i)
+        finally:
+            event.remove(db_session, "do_orm_execute", listener)
+
+        assert len(statements) == 100
+        # 每个热点查询只有一个语句对象（逐次构建的 Query 每次调用都会产生新的语句对象）
+        assert len({id(statement) for statement in statements}) == 5
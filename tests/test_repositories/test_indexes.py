@@ -0,0 +1,107 @@
+"""
+覆盖索引查询计划测试
+"""
+import importlib.util
+from contextlib import contextmanager
+from pathlib import Path
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, event, inspect
+
+from app.core.config import settings
+from app.core.database import Base
+from app.repositories.package_repository import PackageRepository
+from app.repositories.user import UserPackageRepository
+
+
+@contextmanager
+def captured_statements(db_session):
+    """记录会话执行的 (SQL, 参数)"""
+    statements = []
+    listener = lambda conn, cursor, statement, params, context, executemany: statements.append(
+        (statement, params)
+    )
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+
+MIGRATION_009 = Path(__file__).resolve().parents[2] / "alembic" / "versions" / "009_covering_indexes.py"
+
+
+def load_migration(path: Path):
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def index_names(engine) -> dict:
+    inspector = inspect(engine)
+    return {table: {index["name"] for index in inspector.get_indexes(table)} for table in inspector.get_table_names()}
+
+
+def query_plan(db_session, statement, params) -> str:
+    """SQLite EXPLAIN QUERY PLAN 结果（各步骤描述拼接）"""
+    rows = db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+class TestCoveringIndexes:
+    """覆盖索引测试类"""
+
+    def test_history_queries_use_covering_index(self, db_session, monkeypatch):
+        """测试历史分页、最新记录和热数据窗口加载只扫描 idx_package_history（不回表、不排序）"""
+        monkeypatch.setattr(settings, "HOT_WINDOW_ENABLED", False)
+        repository = PackageRepository(db_session)
+        with captured_statements(db_session) as statements:
+            repository.get_by_package_id(77, limit=10, offset=0)
+            repository.get_latest_by_package_id(77)
+            repository._load_window(77, 50)
+
+        history_plans = [
+            query_plan(db_session, sql, params) for sql, params in statements if "count(" not in sql
+        ]
+        assert len(history_plans) == 3
+        for plan in history_plans:
+            assert "USING COVERING INDEX idx_package_history (package_id=?)" in plan
+            assert "TEMP B-TREE" not in plan
+
+    def test_user_package_queries_use_ownership_index(self, db_session):
+        """测试用户包裹列表/计数走 idx_user_active_package，所有权校验按唯一键单行查找"""
+        repository = UserPackageRepository(db_session)
+        with captured_statements(db_session) as statements:
+            repository.get_user_packages(1)
+            repository.get_user_package_count(1)
+            repository.check_package_ownership(1, 77)
+
+        list_plan, count_plan, ownership_plan = [query_plan(db_session, sql, params) for sql, params in statements]
+        assert "USING INDEX idx_user_active_package (user_id=? AND is_active=?)" in list_plan
+        assert "USING COVERING INDEX idx_user_active_package (user_id=? AND is_active=?)" in count_plan
+        assert "(user_id=? AND package_id=?)" in ownership_plan
+        assert "SCAN" not in ownership_plan
+
+    def test_covering_index_migration_round_trips(self, tmp_path):
+        """测试 009 降级恢复升级时删除的全部索引（init_db 建表时 idx_* 与 ix_* 同时存在）"""
+        migration = load_migration(MIGRATION_009)
+        engine = create_engine(f"sqlite:///{tmp_path / 'indexes.db'}")
+        Base.metadata.create_all(bind=engine)
+        # 还原 009 之前的索引：删除新索引，补建冗余索引
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX idx_package_history")
+            conn.exec_driver_sql("DROP INDEX idx_user_active_package")
+            for table, indexes in migration.REDUNDANT_INDEXES.items():
+                for name, columns in indexes.items():
+                    conn.exec_driver_sql(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+        before = index_names(engine)
+
+        for step in (migration.upgrade, migration.downgrade):
+            with engine.begin() as conn, Operations.context(MigrationContext.configure(conn)):
+                step()
+            if step is migration.upgrade:
+                assert "ix_users_id" not in index_names(engine)["users"]
+        assert index_names(engine) == before
+        engine.dispose()
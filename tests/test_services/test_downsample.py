@@ -0,0 +1,76 @@
+"""
+降采样测试
+"""
+import numpy as np
+from app.models.package import PackageRecord
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+from app.services.package_service import PackageService
+from app.utils.downsample import downsample_indices
+
+
+class TestDownsample:
+    """降采样测试类"""
+
+    def test_lttb_keeps_endpoints_and_point_count(self):
+        """测试 LTTB 返回指定点数且保留首尾点"""
+        x = np.arange(10000)
+        y = np.sin(x / 200.0) * 5 + 10
+
+        indices = downsample_indices(x, y, 600, "lttb")
+
+        assert len(indices) == 600
+        assert indices[0] == 0 and indices[-1] == 9999
+        assert np.all(np.diff(indices) > 0)
+
+    def test_lttb_preserves_excursion_peak(self):
+        """测试超出阈值的单点峰值被保留"""
+        x = np.arange(10000)
+        y = np.full(10000, 5.0)
+        y[4321] = 35.0
+        y[8765] = -20.0
+
+        indices = downsample_indices(x, y, 50, "lttb", high_threshold=30.0, low_threshold=-10.0)
+
+        assert 4321 in indices
+        assert 8765 in indices
+
+    def test_minmax_keeps_bucket_extremes(self):
+        """测试 minmax 保留全局最大值与最小值且不超过目标点数"""
+        rng = np.random.default_rng(3)
+        y = rng.normal(10, 2, 5000)
+        indices = downsample_indices(np.arange(5000), y, 100, "minmax")
+
+        assert len(indices) <= 100
+        assert int(np.argmax(y)) in indices
+        assert int(np.argmin(y)) in indices
+
+    def test_small_series_returned_unchanged(self):
+        """测试记录数不超过目标点数时原样返回"""
+        indices = downsample_indices(np.arange(5), np.arange(5.0), 10)
+        assert indices.tolist() == [0, 1, 2, 3, 4]
+
+    def test_service_downsampled_history(self, db_session, tmp_path):
+        """测试服务层降采样结果按时间倒序并包含超阈值记录"""
+        for i in range(500):
+            db_session.add(PackageRecord(
+                package_id=3001,
+                max_temperature=45.0 if i == 250 else 5.0 + (i % 7) * 0.1,
+                avg_humidity=50.0,
+                over_threshold_time=0,
+                timestamp=1700000000 + i * 60
+            ))
+        db_session.commit()
+
+        repository = PackageRepository(db_session)
+        service = PackageService(repository, archive=ArchiveRepository(str(tmp_path)))
+        history = service.get_downsampled_history(
+            3001, 20, start_timestamp=1700000000 + 100 * 60
+        )
+
+        assert history.total == 400
+        assert len(history.records) == 20
+        assert history.downsample == "lttb"
+        timestamps = [r.timestamp for r in history.records]
+        assert timestamps == sorted(timestamps, reverse=True)
+        assert any(r.max_temperature == 45.0 for r in history.records)
@@ -0,0 +1,74 @@
+"""
+历史记录列式响应格式测试
+"""
+import json
+import numpy as np
+import pytest
+from app.models.package import PackageRecord
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+from app.services.package_service import PackageService
+from app.utils.columnar import decode_packed, encode_columnar_json, encode_packed
+
+
+class TestHistoryFormats:
+    """列式响应测试类"""
+
+    @pytest.fixture
+    def service(self, db_session, tmp_path):
+        """写入 60 条记录"""
+        for i in range(60):
+            db_session.add(PackageRecord(
+                package_id=5001,
+                max_temperature=round(3.0 + i * 0.25, 2),
+                avg_humidity=55.5,
+                over_threshold_time=i,
+                timestamp=1700000000 + i * 60
+            ))
+        db_session.commit()
+
+        return PackageService(PackageRepository(db_session), archive=ArchiveRepository(str(tmp_path)))
+
+    def test_columns_match_record_history(self, db_session, service):
+        """测试列数组与逐条记录的历史结果一致（封存后再写入，分页跨越热表与封存块）"""
+        service.series.seal(5001)
+        for i in range(5):
+            db_session.add(PackageRecord(
+                package_id=5001,
+                max_temperature=30.0,
+                avg_humidity=50.0,
+                over_threshold_time=0,
+                timestamp=1700010000 + i
+            ))
+        db_session.commit()
+
+        history = service.get_package_history(5001, limit=25, offset=10)
+        total, columns = service.get_package_history_columns(5001, limit=25, offset=10)
+
+        assert total == history.total == 65
+        assert columns["id"].tolist() == [r.id for r in history.records]
+        assert columns["timestamp"].tolist() == [r.timestamp for r in history.records]
+        assert np.allclose(columns["max_temperature"], [r.max_temperature for r in history.records])
+
+    def test_packed_round_trip(self, service):
+        """测试 packed 编码后解码一致且体积小于逐条 JSON"""
+        history = service.get_package_history(5001, limit=60)
+        total, columns = service.get_package_history_columns(5001, limit=60)
+
+        payload = encode_packed(5001, total, columns)
+        header, decoded = decode_packed(payload)
+
+        assert header == {"package_id": 5001, "total": 60, "count": 60}
+        assert decoded["id"].tolist() == columns["id"].tolist()
+        assert np.allclose(decoded["avg_humidity"], 55.5)
+        assert len(payload) * 4 < len(history.model_dump_json())
+
+    def test_columnar_json(self, service):
+        """测试 JSON 平行数组格式"""
+        total, columns = service.get_package_history_columns(5001, limit=5)
+        body = json.loads(encode_columnar_json(5001, total, columns))
+
+        assert body["count"] == 5
+        assert body["columns"]["timestamp"] == sorted(body["columns"]["timestamp"], reverse=True)
+        assert body["columns"]["max_temperature"][0] == 17.75
+        assert all(isinstance(c, int) for c in body["columns"]["created_at"])
@@ -0,0 +1,137 @@
+"""
+幂等写入测试
+"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.dialects import mysql
+from app.core.config import settings
+from app.core.ingest_dedupe import recent_ingest_keys
+from app.models.package import PackageSeriesRollup
+from app.repositories.package_repository import PackageRepository, record_insert_ignore
+from app.schemas.package import PackageUploadRequest
+from app.services.package_service import PackageService
+
+
+def reading(package_id: int = 9001, timestamp: int = 1700000000, temperature: float = 5.0):
+    return PackageUploadRequest(
+        package_id=package_id,
+        max_temperature=temperature,
+        avg_humidity=50.0,
+        over_threshold_time=0,
+        timestamp=timestamp
+    )
+
+
+class TestIdempotentIngest:
+    """幂等写入测试类"""
+
+    @pytest.fixture
+    def repository(self, db_session):
+        return PackageRepository(db_session)
+
+    def test_retry_returns_original_record(self, repository, db_session):
+        """测试同一设备重发读数（缓存命中和数据库唯一索引两条路径）不产生重复记录"""
+        record_id, created = repository.create(reading(), source_device_id=1)
+        assert created is True
+
+        assert repository.create(reading(), source_device_id=1) == (record_id, False)
+        recent_ingest_keys.clear()
+        assert repository.create(reading(temperature=9.0), source_device_id=1) == (record_id, False)
+        assert repository.count_by_package_id(9001) == 1
+
+        # 预聚合只累加一次
+        counts = db_session.execute(
+            select(PackageSeriesRollup.record_count).where(PackageSeriesRollup.level == 60)
+        ).scalars().all()
+        assert counts == [1]
+
+    def test_different_devices_are_not_duplicates(self, repository):
+        """测试不同设备对同一包裹同一时刻的读数分别保存"""
+        first, _ = repository.create(reading(), source_device_id=1)
+        second, created = repository.create(reading(), source_device_id=2)
+        assert created is True
+        assert first != second
+        assert repository.count_by_package_id(9001) == 2
+
+    def test_batch_skips_existing_and_repeated_readings(self, repository):
+        """测试批量写入跳过已存在和批内重复的读数，返回ID与输入顺序一致"""
+        existing_id, _ = repository.create(reading(timestamp=1700000000), source_device_id=1)
+        recent_ingest_keys.clear()
+
+        batch = [reading(timestamp=1700000000 + i) for i in (0, 1, 2, 1)]
+        record_ids, created = repository.create_many(batch, source_device_id=1)
+
+        assert created == 2
+        assert record_ids[0] == existing_id
+        assert record_ids[1] == record_ids[3]
+        assert len(set(record_ids)) == 3
+        assert repository.count_by_package_id(9001) == 3
+
+    def test_batch_falls_back_when_racing(self, repository, monkeypatch):
+        """测试查询后被并发写入相同读数时回退为逐条幂等写入"""
+        existing_id, _ = repository.create(reading(timestamp=1700000000), source_device_id=1)
+        recent_ingest_keys.clear()
+
+        original = repository._get_rows_by_keys
+        calls = []
+
+        def stale_lookup(source_device_id, keys):
+            calls.append(keys)
+            # 第一次查询模拟并发写入之前的结果
+            return {} if len(calls) == 1 else original(source_device_id, keys)
+
+        monkeypatch.setattr(repository, "_get_rows_by_keys", stale_lookup)
+        record_ids, created = repository.create_many(
+            [reading(timestamp=1700000000), reading(timestamp=1700000060)], source_device_id=1
+        )
+        assert created == 1
+        assert record_ids[0] == existing_id
+        assert repository.count_by_package_id(9001) == 2
+
+    def test_service_reports_duplicates(self, repository):
+        """测试服务层返回重复标记"""
+        service = PackageService(repository)
+        first = service.save_package_data(reading(), source_device_id=3)
+        retry = service.save_package_data(reading(), source_device_id=3)
+        assert first["duplicate"] is False
+        assert retry["duplicate"] is True
+        assert retry["record_id"] == first["record_id"]
+
+        batch = service.save_package_batch([reading(), reading(timestamp=1700000060)], source_device_id=3)
+        assert batch["duplicates"] == 1
+
+
+class TestInsertStatements:
+    """写入语句数量测试类"""
+
+    def test_insert_returning_skips_follow_up_select(self, db_session, monkeypatch):
+        """测试支持 RETURNING 时单条和批量写入都只执行一条 INSERT（不再查询新记录）"""
+        monkeypatch.setattr(settings, "SERIES_ROLLUP_ENABLED", False)
+        repository = PackageRepository(db_session)
+        repository.get_latest_by_package_id(9100)  # 预先加载热数据窗口
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement.split()[0])
+        event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+        try:
+            record_id, _ = repository.create(reading(package_id=9100))
+            record_ids, created = repository.create_many(
+                [reading(package_id=9100, timestamp=1700000000 + i) for i in range(1, 4)]
+            )
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+        assert created == 3
+        assert [s for s in statements if s != "SELECT"] == ["INSERT", "INSERT"]
+        # 批量写入前一次幂等键查询，写入后不再查询
+        assert statements.count("SELECT") == 1
+        assert repository.get_latest_by_package_id(9100).id == max(record_ids + [record_id])
+
+    def test_mysql_insert_keeps_strict_errors(self):
+        """测试 MySQL 幂等插入使用 ON DUPLICATE KEY UPDATE（INSERT IGNORE 会吞掉越界/截断错误）"""
+        db = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=mysql.dialect()))
+        sql = str(record_insert_ignore(db).compile(dialect=mysql.dialect()))
+        assert "IGNORE" not in sql
+        assert sql.endswith("ON DUPLICATE KEY UPDATE id = package_records.id")
@@ -0,0 +1,95 @@
+"""
+UDP/TCP 轻量上传监听测试
+"""
+import asyncio
+import struct
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.repositories.device_repository import DeviceRepository
+from app.repositories.package_repository import PackageRepository
+from app.schemas.package import PackageUploadRequest
+from app.services.ingest_listener import IngestListener, PacketIngestHandler
+from app.services.package_service import PackageService
+from app.utils.binary_frame import encode_frame
+from app.utils.ingest_packet import AckStatus, decode_ack, encode_packet
+
+SECRET_KEY = "9" * 64
+
+
+def make_packet(package_id: int, secret_key: str = SECRET_KEY) -> bytes:
+    now = int(datetime.now().timestamp())
+    frame = encode_frame([PackageUploadRequest(
+        package_id=package_id, max_temperature=3.5, avg_humidity=45.0,
+        over_threshold_time=0, timestamp=now - 5
+    )])
+    return encode_packet("ESP32-UDP", now, frame, secret_key)
+
+
+class _Client(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.acks = asyncio.Queue()
+
+    def datagram_received(self, data, address):
+        self.acks.put_nowait(data)
+
+
+class TestIngestListener:
+    """上传监听测试类"""
+
+    def test_udp_and_tcp_acks(self, db_session):
+        """测试 UDP/TCP 报文写入、重放和签名错误的确认状态"""
+        DeviceRepository(db_session).create(device_id="ESP32-UDP", secret_key=SECRET_KEY)
+        handler = PacketIngestHandler(sessionmaker(bind=db_session.get_bind()))
+
+        async def scenario():
+            listener = IngestListener(handler)
+            await listener.start("127.0.0.1", 0, 0)
+            loop = asyncio.get_running_loop()
+            transport, client = await loop.create_datagram_endpoint(
+                _Client, remote_addr=listener.udp_address
+            )
+
+            acks = []
+            packet = make_packet(8001)
+            for data in (packet, packet, make_packet(8002, secret_key="0" * 64)):
+                transport.sendto(data)
+                acks.append(decode_ack(await asyncio.wait_for(client.acks.get(), 5)))
+            transport.close()
+
+            reader, writer = await asyncio.open_connection(*listener.tcp_address)
+            for data in (make_packet(8003), b"junk" * 20):
+                writer.write(struct.pack("<H", len(data)) + data)
+                acks.append(decode_ack(await asyncio.wait_for(reader.readexactly(8), 5)))
+            writer.close()
+
+            await listener.stop()
+            return packet, acks
+
+        packet, acks = asyncio.run(scenario())
+        assert [ack[0] for ack in acks] == [
+            AckStatus.OK, AckStatus.REPLAYED, AckStatus.UNAUTHORIZED, AckStatus.OK, AckStatus.BAD_PACKET
+        ]
+        assert acks[0][2] == packet[-32:-28]
+
+        repository = PackageRepository(db_session)
+        assert len(repository.get_by_package_id(8001)) == 1
+        assert len(repository.get_by_package_id(8003)) == 1
+        assert handler.readings == 2
+
+    def test_failed_write_can_be_retried(self, db_session):
+        """测试写入失败时不记录签名，重发同一报文可以写入"""
+        DeviceRepository(db_session).create(device_id="ESP32-UDP", secret_key=SECRET_KEY)
+        handler = PacketIngestHandler(sessionmaker(bind=db_session.get_bind()))
+        packet = make_packet(8004)
+
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(PackageService, "save_package_batch", lambda *args: 1 / 0)
+            status, retry_after, _ = decode_ack(handler.handle(packet))
+        assert (status, retry_after) == (AckStatus.ERROR, 1)
+
+        assert decode_ack(handler.handle(packet))[0] == AckStatus.OK
+        assert decode_ack(handler.handle(packet))[0] == AckStatus.REPLAYED
+        assert len(PackageRepository(db_session).get_by_package_id(8004)) == 1
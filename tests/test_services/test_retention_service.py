@@ -0,0 +1,176 @@
+"""
+数据保留与冷归档测试
+"""
+import gzip
+import json
+import os
+import pytest
+from datetime import datetime, timedelta
+from app.models.package import PackageRecord, RecordSnapshot
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+from app.services.package_service import PackageService
+from app.services.retention_service import RetentionService
+
+
+class TestRetentionService:
+    """冷归档测试类"""
+
+    @pytest.fixture
+    def archive(self, tmp_path):
+        """创建临时归档目录"""
+        return ArchiveRepository(str(tmp_path / "archive"))
+
+    @pytest.fixture
+    def seeded(self, db_session):
+        """写入 3 条热数据和 4 条过期数据（跨两个月）"""
+        now = datetime.now()
+        timestamps = [int((now - timedelta(hours=i)).timestamp()) for i in range(3)]
+        timestamps += [int((now - timedelta(days=d)).timestamp()) for d in (100, 101, 140, 141)]
+        for i, ts in enumerate(timestamps):
+            db_session.add(PackageRecord(
+                package_id=1001,
+                max_temperature=20.0 + i,
+                avg_humidity=50.0 + i,
+                over_threshold_time=i,
+                timestamp=ts
+            ))
+        db_session.commit()
+        return timestamps
+
+    def test_archive_and_delete_old_records(self, db_session, archive, seeded):
+        """测试过期记录写入归档并从热表删除"""
+        service = RetentionService(PackageRepository(db_session), archive)
+
+        summary = service.run(mode="age", days=90)
+
+        assert summary["archived"] == 4
+        assert summary["deleted"] == 4
+        assert db_session.query(PackageRecord).count() == 3
+        assert archive.count(1001) == 4
+        assert [r.timestamp for r in archive.read_range(1001)] == sorted(seeded[3:], reverse=True)
+
+    def test_rerun_is_idempotent(self, db_session, archive, seeded):
+        """测试归档写入对重复记录幂等"""
+        rows = PackageRepository(db_session).get_records_before(seeded[3] + 1)
+
+        assert archive.append(1001, rows) == 4
+        assert archive.append(1001, rows) == 0
+        assert archive.count(1001) == 4
+
+    def test_dry_run_keeps_data(self, db_session, archive, seeded):
+        """测试 dry-run 不修改数据"""
+        service = RetentionService(PackageRepository(db_session), archive)
+
+        summary = service.run(mode="age", days=90, dry_run=True)
+
+        assert summary["scanned"] == 4
+        assert db_session.query(PackageRecord).count() == 7
+        assert not archive.has_archive(1001)
+
+    def test_closed_mode_archives_idle_packages(self, db_session, archive, seeded):
+        """测试 closed 模式只归档长期无新数据的包裹"""
+        old_ts = int((datetime.now() - timedelta(days=60)).timestamp())
+        db_session.add(PackageRecord(
+            package_id=2002, max_temperature=5.0, avg_humidity=40.0,
+            over_threshold_time=0, timestamp=old_ts
+        ))
+        db_session.commit()
+        service = RetentionService(PackageRepository(db_session), archive)
+
+        summary = service.run(mode="closed", days=30)
+
+        assert summary["archived"] == 1
+        assert archive.has_archive(2002)
+        assert not archive.has_archive(1001)
+
+    def test_history_reads_through_archive(self, db_session, archive, seeded):
+        """测试历史查询透明读取归档数据"""
+        repository = PackageRepository(db_session)
+        RetentionService(repository, archive).run(mode="age", days=90)
+        service = PackageService(repository, archive)
+
+        history = service.get_package_history(1001, limit=5, offset=0)
+        assert history.total == 7
+        assert [r.timestamp for r in history.records] == sorted(seeded, reverse=True)[:5]
+
+        history = service.get_package_history(1001, limit=5, offset=5)
+        assert [r.timestamp for r in history.records] == sorted(seeded, reverse=True)[5:]
+
+
+class TestArchiveSegments:
+    """归档段文件测试类"""
+
+    @staticmethod
+    def snapshots(ids, start=1700000000):
+        return [
+            RecordSnapshot(
+                id=i, package_id=1001, max_temperature=5.0, avg_humidity=50.0,
+                over_threshold_time=0, timestamp=start + i * 60, created_at=None
+            )
+            for i in ids
+        ]
+
+    def test_crash_before_manifest_does_not_duplicate(self, tmp_path, monkeypatch):
+        """测试段文件已写入但 manifest 未更新时中断，重新执行不会重复归档"""
+        archive = ArchiveRepository(str(tmp_path))
+        archive.append(1001, self.snapshots(range(1, 11)))
+
+        def crash(package_id, manifest):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(archive, "_save_manifest", crash)
+        with pytest.raises(OSError):
+            archive.append(1001, self.snapshots(range(11, 21)))
+        monkeypatch.undo()
+
+        assert archive.count(1001) == 10
+        assert archive.append(1001, self.snapshots(range(1, 21))) == 10
+        assert archive.count(1001) == 20
+        assert [r.id for r in archive.read_range(1001)] == list(range(20, 0, -1))
+
+    def test_page_skips_segments_by_count(self, tmp_path, monkeypatch):
+        """测试分页与整体排序结果一致，且只解压与当前页相交的段"""
+        archive = ArchiveRepository(str(tmp_path))
+        for first in range(1, 100, 10):
+            archive.append(1001, self.snapshots(range(first, first + 10)))
+        # 时间范围与已有段重叠的迟到记录
+        archive.append(1001, self.snapshots([1000, 1001], start=1700000000 - 1000 * 60 + 95 * 60))
+
+        expected = archive.read_range(1001)
+        for skip, limit in ((0, 5), (8, 15), (90, 50), (200, 5)):
+            assert archive.page(1001, skip, limit) == expected[skip:skip + limit]
+
+        reads = []
+        original = archive._read_segment
+        monkeypatch.setattr(archive, "_read_segment", lambda p, s: reads.append(s["file"]) or original(p, s))
+        archive.page(1001, 0, 5)
+        assert len(reads) == 2  # 最新段与迟到记录的段时间范围重叠，合并为一组
+        reads.clear()
+        archive.page(1001, 52, 5)
+        assert len(reads) == 1
+
+    def test_reads_legacy_month_file(self, tmp_path):
+        """测试读取旧版每月单文件归档，并可继续追加"""
+        package_dir = tmp_path / "1001"
+        package_dir.mkdir()
+        with gzip.open(package_dir / "2023-11.csv.gz", "wt", encoding="utf-8") as f:
+            f.write("1,1001,5.0,50.0,0,1700000060,\n2,1001,6.0,51.0,0,1700000120,\n")
+        (package_dir / "manifest.json").write_text(json.dumps(
+            {"2023-11": {"count": 2, "min_timestamp": 1700000060, "max_timestamp": 1700000120}}
+        ))
+        archive = ArchiveRepository(str(tmp_path))
+
+        assert archive.append(1001, self.snapshots(range(1, 4))) == 1
+        assert archive.count(1001) == 3
+        assert [r.id for r in archive.page(1001, 0, 10)] == [3, 2, 1]
+        # 旧版行没有 source_device_id 列，读取为 0
+        assert {r.source_device_id for r in archive.page(1001, 0, 10)} == {0}
+        assert sorted(os.listdir(package_dir)) == ["2023-11.0001.csv.gz", "2023-11.csv.gz", "manifest.json"]
+
+    def test_keeps_source_device(self, tmp_path):
+        """测试归档保留上传设备（不同设备相同时间戳的读数可区分）"""
+        archive = ArchiveRepository(str(tmp_path))
+        records = [r._replace(source_device_id=7) for r in self.snapshots(range(1, 4))]
+        archive.append(1001, records)
+        assert sorted(archive.read_range(1001, None, None)) == sorted(records)
@@ -0,0 +1,99 @@
+"""
+时间序列预聚合测试
+"""
+import pytest
+from sqlalchemy import select
+from app.models.package import PackageSeriesRollup
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+from app.repositories.rollup_repository import SeriesRollupRepository
+from app.schemas.package import PackageUploadRequest
+from app.services.package_service import PackageService
+from app.services.rollup_service import RollupService, choose_level
+
+START = 1700000000 - 1700000000 % 86400
+
+
+class TestRollupService:
+    """预聚合测试类"""
+
+    @pytest.fixture
+    def service(self, db_session, tmp_path):
+        """创建预聚合服务"""
+        repository = PackageRepository(db_session)
+        return RollupService(
+            PackageService(repository, archive=ArchiveRepository(str(tmp_path))),
+            SeriesRollupRepository(db_session)
+        )
+
+    @pytest.fixture
+    def uploaded(self, db_session):
+        """按每 10 分钟一条写入 2 天数据（写入时增量累加预聚合）"""
+        repository = PackageRepository(db_session)
+        for i in range(288):
+            repository.create(PackageUploadRequest(
+                package_id=4001,
+                max_temperature=4.0 + (i % 12) * 0.5,
+                avg_humidity=60.0,
+                over_threshold_time=0,
+                timestamp=START + i * 600
+            ))
+
+    @staticmethod
+    def snapshot(db_session):
+        rows = db_session.execute(
+            select(PackageSeriesRollup.__table__).order_by(
+                PackageSeriesRollup.level, PackageSeriesRollup.bucket_start
+            )
+        ).all()
+        return [
+            (r.level, r.bucket_start, r.record_count, r.min_temperature,
+             r.max_temperature, round(r.sum_temperature, 6), round(r.sum_humidity, 6))
+            for r in rows
+        ]
+
+    def test_incremental_matches_rebuild(self, db_session, service, uploaded):
+        """测试写入时增量累加的结果与全量重建一致"""
+        incremental = self.snapshot(db_session)
+        service.rebuild(4001)
+        assert self.snapshot(db_session) == incremental
+
+    def test_day_level_buckets(self, service, uploaded):
+        """测试按天层级的 最小/最大/平均/计数"""
+        series = service.get_series(4001, points=600, level=86400)
+
+        assert [b.bucket_start for b in series.buckets] == [START, START + 86400]
+        first = series.buckets[0]
+        assert first.count == 144
+        assert first.min_temperature == 4.0
+        assert first.max_temperature == 9.5
+        assert first.avg_temperature == pytest.approx(6.75)
+
+    def test_auto_level_selection(self, service, uploaded):
+        """测试根据时间范围与点数预算自动选择层级"""
+        assert choose_level(START, START + 3600 - 1, 600) == 60
+        assert choose_level(START, START + 30 * 86400 - 1, 1000) == 3600
+        assert choose_level(START, START + 30 * 86400 - 1, 100) == 86400
+
+        series = service.get_series(4001, points=100, start_timestamp=START, end_timestamp=START + 86400 - 1)
+        assert series.level == 900
+        assert len(series.buckets) == 96
+
+    def test_accumulate_upserts_in_key_order(self, db_session, monkeypatch):
+        """测试批量累加按桶键顺序写入（并发事务以相同顺序锁定桶行）"""
+        rollups = SeriesRollupRepository(db_session)
+        statements = []
+        upsert = rollups._upsert
+        monkeypatch.setattr(rollups, "_upsert", lambda rows: statements.append(rows) or upsert(rows))
+
+        rollups.accumulate([
+            PackageUploadRequest(
+                package_id=package_id, max_temperature=4.0, avg_humidity=50.0,
+                over_threshold_time=0, timestamp=START + offset
+            )
+            for package_id, offset in ((802, 7200), (801, 60), (802, 0))
+        ])
+
+        keys = [(row["package_id"], row["level"], row["bucket_start"]) for row in statements[0]]
+        assert keys == sorted(keys)
+        assert len(keys) == 11
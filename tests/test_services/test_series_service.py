@@ -0,0 +1,209 @@
+"""
+封存序列服务测试
+"""
+import zlib
+
+import numpy as np
+import pytest
+from datetime import datetime
+from app.models.package import PackageRecord, PackageSeriesChunk
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.package_repository import PackageRepository
+from app.repositories.series_chunk_repository import SeriesChunkRepository
+from app.services.package_service import PackageService
+import app.services.series_service as series_service_module
+from app.services.series_service import SeriesService
+from app.utils import series_codec
+from app.utils.series_codec import decode_series, encode_series
+
+
+class TestSeriesCodec:
+    """序列块编解码测试类"""
+
+    def test_round_trip(self):
+        """测试编码后解码结果一致（包含大跨度差分）"""
+        rng = np.random.default_rng(7)
+        count = 5000
+        columns = {
+            "id": np.arange(1, count + 1, dtype=np.int64) * 3,
+            "timestamp": 1700000000 + np.cumsum(rng.integers(1, 120, count)),
+            "max_temperature": rng.integers(-5000, 10000, count),
+            "avg_humidity": rng.integers(0, 10000, count),
+            "over_threshold_time": np.cumsum(rng.integers(0, 5, count)),
+            "created_at": np.full(count, 1700000000, dtype=np.int64),
+            "source_device_id": rng.integers(0, 5, count),
+        }
+        columns["id"][-1] = 2 ** 40
+
+        decoded = decode_series(encode_series(columns))
+
+        for name, values in columns.items():
+            assert np.array_equal(decoded[name], values)
+
+    def test_single_point(self):
+        """测试只有一个点的序列"""
+        columns = {name: np.array([5], dtype=np.int64) for name in (
+            "id", "timestamp", "max_temperature", "avg_humidity", "over_threshold_time", "created_at"
+        )}
+        decoded = decode_series(encode_series(columns))
+        assert decoded["timestamp"].tolist() == [5]
+        assert decoded["source_device_id"].tolist() == [0]
+
+    def test_decodes_version_1_chunks(self):
+        """测试解码没有 source_device_id 列的版本 1 块"""
+        values = np.array([1, 2, 3], dtype=np.int64)
+        blob = b"".join([
+            series_codec._HEADER.pack(series_codec.MAGIC, 1, 0, 3),
+            *(series_codec._COLUMN.pack(3, 1) for _ in range(6)),
+            zlib.compress(np.diff(values).astype("<i8").tobytes() * 6),
+        ])
+        decoded = decode_series(blob)
+        assert decoded["id"].tolist() == [1, 2, 3]
+        assert decoded["source_device_id"].tolist() == [0, 0, 0]
+
+
+class TestSeriesService:
+    """封存序列服务测试类"""
+
+    @pytest.fixture
+    def seeded(self, db_session):
+        """写入 25 条记录"""
+        base = int(datetime.now().timestamp()) - 100000
+        for i in range(25):
+            db_session.add(PackageRecord(
+                package_id=1001,
+                max_temperature=round(2.0 + i * 0.37, 2),
+                avg_humidity=round(60.0 - i * 0.5, 2),
+                over_threshold_time=i * 10,
+                timestamp=base + i * 60
+            ))
+        db_session.commit()
+
+    @pytest.fixture
+    def services(self, db_session, tmp_path, monkeypatch):
+        """创建服务实例（序列块大小设为 10 以覆盖多块）"""
+        monkeypatch.setattr("app.core.config.settings.SERIES_CHUNK_SIZE", 10)
+        repository = PackageRepository(db_session)
+        series = SeriesService(repository, SeriesChunkRepository(db_session))
+        package_service = PackageService(repository, ArchiveRepository(str(tmp_path)), series)
+        return series, package_service
+
+    def test_seal_preserves_history(self, db_session, seeded, services):
+        """测试封存后历史查询结果不变"""
+        series, package_service = services
+        before = package_service.get_package_history(1001, limit=100)
+
+        result = series.seal(1001)
+
+        assert result["records"] == 25
+        assert result["chunks"] == 3
+        assert db_session.query(PackageRecord).count() == 0
+        after = package_service.get_package_history(1001, limit=100)
+        assert after.total == 25
+        assert [r.model_dump() for r in after.records] == [r.model_dump() for r in before.records]
+
+        page = package_service.get_package_history(1001, limit=5, offset=20)
+        assert [r.id for r in page.records] == [r.id for r in before.records[20:]]
+
+    def test_unseal_restores_rows(self, db_session, seeded, services):
+        """测试解封后记录写回热表"""
+        series, _ = services
+        readings = lambda: sorted(
+            (r.timestamp, r.max_temperature, r.avg_humidity, r.over_threshold_time)
+            for r in db_session.query(PackageRecord).all()
+        )
+        before = readings()
+
+        series.seal(1001)
+        result = series.unseal(1001)
+
+        assert result["records"] == 25
+        assert db_session.query(PackageSeriesChunk).count() == 0
+        assert readings() == before
+
+    def test_unseal_after_ids_reused(self, db_session, seeded, services):
+        """测试封存后新写入的记录复用了原记录ID时，解封仍能写回（分配新ID）"""
+        series, _ = services
+        series.seal(1001)
+        # SQLite 主键无 AUTOINCREMENT：表为空时新记录从 1 开始，与封存记录的原ID冲突
+        db_session.add(PackageRecord(
+            package_id=1003, max_temperature=1.0, avg_humidity=50.0,
+            over_threshold_time=0, timestamp=1700000000
+        ))
+        db_session.commit()
+
+        assert series.unseal(1001)["records"] == 25
+        assert db_session.query(PackageRecord).filter(PackageRecord.package_id == 1001).count() == 25
+        assert db_session.query(PackageRecord).filter(PackageRecord.package_id == 1003).count() == 1
+
+    def test_page_decodes_only_needed_chunks(self, db_session, seeded, services, monkeypatch):
+        """测试分页和范围统计只解码需要的序列块"""
+        series, _ = services
+        rows = db_session.query(PackageRecord).order_by(PackageRecord.timestamp).all()
+        expected = [r.id for r in rows][::-1]
+        series.seal(1001)
+
+        decoded = []
+        original = series_service_module.decode_series
+        monkeypatch.setattr(
+            series_service_module, "decode_series",
+            lambda blob: decoded.append(blob) or original(blob)
+        )
+
+        assert [r.id for r in series.page(1001, 0, 5)] == expected[:5]
+        assert len(decoded) == 1
+        decoded.clear()
+        assert [r.id for r in series.page(1001, 8, 4)] == expected[8:12]
+        assert len(decoded) == 1
+        decoded.clear()
+        assert [r.id for r in series.page(1001, 3, 4)] == expected[3:7]
+        assert len(decoded) == 2
+        decoded.clear()
+        assert series.page(1001, 30, 5) == []
+        assert decoded == []
+
+        # 第 2 块（记录 10-19）完全落在范围内，只解码两端的块
+        start, end = rows[5].timestamp, rows[22].timestamp
+        assert series.count_range(1001, start, end) == 18
+        assert len(decoded) == 2
+        decoded.clear()
+        assert [r.id for r in series.page(1001, 3, 4, start, end)] == expected[5:9]
+
+    def test_seal_keeps_rows_not_encoded(self, db_session, seeded, services, monkeypatch):
+        """测试封存只删除已编码的记录（编码期间并发提交的记录保留在热表）"""
+        series, _ = services
+        repository = series.repository
+        original = repository.get_series_rows
+
+        def rows_then_concurrent_insert(package_id, *args, **kwargs):
+            rows = original(package_id, *args, **kwargs)
+            db_session.add(PackageRecord(
+                package_id=package_id, max_temperature=1.0, avg_humidity=50.0,
+                over_threshold_time=0, timestamp=rows[0].timestamp - 60
+            ))
+            db_session.flush()
+            return rows
+
+        monkeypatch.setattr(repository, "get_series_rows", rows_then_concurrent_insert)
+        result = series.seal(1001)
+
+        assert result["records"] == 25
+        assert db_session.query(PackageRecord).count() == 1
+
+    def test_unseal_keeps_source_device(self, db_session, services):
+        """测试解封写回上传设备：两台设备相同 package_id/时间戳 的读数不冲突"""
+        series, _ = services
+        for device_id in (1, 2):
+            db_session.add(PackageRecord(
+                package_id=1002, max_temperature=3.0 + device_id, avg_humidity=50.0,
+                over_threshold_time=0, timestamp=1700000000, source_device_id=device_id
+            ))
+        db_session.commit()
+
+        series.seal(1002)
+        assert {r.source_device_id for r in series.page(1002, 0, 10)} == {1, 2}
+        assert series.unseal(1002)["records"] == 2
+        assert sorted(
+            (r.source_device_id, r.max_temperature)
+            for r in db_session.query(PackageRecord).filter(PackageRecord.package_id == 1002)
+        ) == [(1, 4.0), (2, 5.0)]
@@ -0,0 +1,49 @@
+"""
+合成数据集生成测试
+"""
+import numpy as np
+from app.utils.synthetic import (
+    RECORD_COLUMNS, FleetSpec, generate_bindings, generate_devices, iter_reading_chunks, package_readings
+)
+
+
+class TestSyntheticFleet:
+    """合成数据集测试类"""
+
+    def test_same_seed_is_reproducible_across_chunk_sizes(self):
+        """测试相同种子生成相同数据，且与分块大小无关"""
+        spec = FleetSpec(packages=20, readings_per_package=100, seed=7)
+
+        small = list(iter_reading_chunks(spec, 150))
+        large = list(iter_reading_chunks(spec, 100000))
+
+        assert len(small) > 1 and len(large) == 1
+        for name in RECORD_COLUMNS:
+            assert np.array_equal(np.concatenate([chunk[name] for chunk in small]), large[0][name])
+        assert generate_devices(spec) == generate_devices(FleetSpec(packages=20, readings_per_package=100, seed=7))
+        assert not np.array_equal(
+            package_readings(spec, 1)["max_temperature"],
+            package_readings(spec._replace(seed=8), 1)["max_temperature"]
+        )
+
+    def test_readings_shape(self):
+        """测试时间戳递增、超温事件越过阈值并记录超阈值时间"""
+        spec = FleetSpec(packages=50, readings_per_package=500, excursion_rate=0.01, seed=1)
+        excursions = 0
+        for package_id in spec.package_ids:
+            columns = package_readings(spec, package_id)
+            assert np.all(np.diff(columns["timestamp"]) > 0)
+            assert len(set(columns["source_device_id"].tolist())) == 1
+            over = columns["over_threshold_time"] > 0
+            outside = (columns["max_temperature"] > spec.high_threshold) | (columns["max_temperature"] < spec.low_threshold)
+            assert np.array_equal(over, outside)
+            excursions += int(over.sum())
+        assert excursions > 0
+
+    def test_bindings_unique_per_package(self):
+        """测试每个包裹最多绑定一个用户"""
+        spec = FleetSpec(packages=1000, users=10, bound_ratio=0.5)
+        bindings = generate_bindings(spec)
+        package_ids = [binding["package_id"] for binding in bindings]
+        assert len(package_ids) == len(set(package_ids))
+        assert 400 < len(bindings) < 600